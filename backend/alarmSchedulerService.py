@@ -0,0 +1,251 @@
+# Rules applied
+import heapq
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from scheduleStoreService import ScheduleStoreService, next_fire_time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Longest sleep before the daemon re-reads the wall clock and checks the store for changes
+MAX_SLEEP = 1.0
+# An alarm found this many seconds late (server was down or suspended) still rings; older ones are skipped
+MISFIRE_GRACE = 60.0
+# Seconds between attempts of a standby process to become the one that fires alarms
+LEADER_RETRY = 5.0
+PLAYBACK_TIMEOUT = 300
+PLAY_RINGTONE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'play_ringtone.py')
+
+
+def play_with_script(ringtone_path: str) -> bool:
+    """Play a ringtone with play_ringtone.py in a child process (the same player as the scheduled tasks)."""
+    try:
+        result = subprocess.run([sys.executable, PLAY_RINGTONE_SCRIPT, ringtone_path],
+                                capture_output=True, text=True, timeout=PLAYBACK_TIMEOUT)
+        if result.returncode != 0:
+            logger.error(f"❌ play_ringtone.py failed for {ringtone_path}: {result.stderr.strip()[-500:]}")
+        return result.returncode == 0
+    except subprocess.TimeoutExpired:
+        logger.error(f"❌ Playback of {ringtone_path} timed out")
+        return False
+
+
+class ProcessLock:
+    """Exclusive, non-blocking lock on a file, held until release() or process exit."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Try to take the lock; returns False if another process holds it."""
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class AlarmSchedulerService:
+    """
+    In-process alarm daemon for the 'server' schedules of the schedule store.
+
+    The alarms are kept in a min-heap of their next fire times. One thread sleeps
+    on a condition variable until the earliest alarm is due, rings it, and pushes
+    that alarm's following occurrence, so the cost of waiting does not depend on the
+    number of alarms and nothing polls. Changes made in this process wake the thread
+    at once (notify()).
+
+    Drift correction: sleeps are measured against the wall clock and capped at
+    max_sleep, so the thread re-reads the clock at least once a second and follows
+    clock adjustments (NTP, daylight saving, resume from suspend) instead of waking
+    at a stale deadline. Fire times stay anchored to the schedule, never to the
+    moment the previous alarm rang, so lateness never accumulates.
+
+    The store keeps the time each alarm last rang, so a restart resumes them, and
+    an alarm that came due while the server was down rings late if it is within
+    misfire_grace. With several worker processes only the one holding the lock
+    file fires alarms; the others serve the API, and the firing process picks up
+    their changes through the store's schedule version.
+    """
+
+    def __init__(self, store: ScheduleStoreService, lock_path: str, player: Optional[Callable[[str], bool]] = None,
+                 misfire_grace: float = MISFIRE_GRACE, max_sleep: float = MAX_SLEEP):
+        """
+        Args:
+            store: Schedule store holding the alarms
+            lock_path: Lock file that elects the process firing the alarms
+            player: Plays a ringtone file and returns success (default: play_ringtone.py)
+            misfire_grace: Seconds an alarm may be overdue and still ring
+            max_sleep: Longest sleep before the wall clock is read again
+        """
+        self.store = store
+        self.player = player or play_with_script
+        self.misfire_grace = misfire_grace
+        self.max_sleep = max_sleep
+        self._lock = ProcessLock(lock_path)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._leader = False
+        # Heap of (fire_at, alarm id, version); entries of older versions are skipped when popped
+        self._heap: List[Tuple[float, str, int]] = []
+        self._alarms: Dict[str, Dict] = {}
+        self._versions: Dict[str, int] = {}
+        self._schedule_version = None
+        self._counters = {'fired': 0, 'missed': 0, 'failed': 0}
+        self._lateness_ms: List[float] = []
+
+    def notify(self) -> None:
+        """Wake the daemon after a change to the store, so it reloads at once."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def start(self) -> None:
+        """Start the daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='alarm-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the daemon thread and give up the lock so another process can take over."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self._lock.release()
+        self._leader = False
+        logger.info("⏰ Alarm scheduler stopped")
+
+    def _load(self) -> None:
+        """Rebuild the heap from the store (at start-up and after changes by any process)."""
+        now = time.time()
+        alarms, heap = {}, []
+        for alarm in self.store.active_alarms():
+            # Resume after the last ring (or the last edit), but only look back misfire_grace seconds
+            since = max(alarm['last_fired_at'] or alarm['updated'], alarm['updated'], now - self.misfire_grace)
+            version = self._versions.get(alarm['id'], 0) + 1
+            alarms[alarm['id']] = alarm
+            self._versions[alarm['id']] = version
+            heap.append((next_fire_time(alarm['time'], alarm['days'], since), alarm['id'], version))
+        heapq.heapify(heap)
+        self._alarms, self._heap = alarms, heap
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._stopping:
+                try:
+                    if not self._leader:
+                        self._leader = self._lock.acquire()
+                        if not self._leader:
+                            self._cond.wait(LEADER_RETRY)
+                            continue
+                        logger.info("⏰ Alarm scheduler started (this process fires the alarms)")
+
+                    # Reload when a schedule was edited, in any process; other writes to the database do not count
+                    schedule_version = self.store.schedule_version()
+                    if schedule_version != self._schedule_version:
+                        self._load()
+                        self._schedule_version = schedule_version
+
+                    # Drop entries of alarms changed or removed since they were pushed
+                    while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait(self.max_sleep)
+                        continue
+
+                    fire_at, alarm_id, version = self._heap[0]
+                    delay = fire_at - time.time()
+                    if delay > 0:
+                        self._cond.wait(min(delay, self.max_sleep))
+                        continue
+
+                    heapq.heappop(self._heap)
+                    self._fire(self._alarms[alarm_id], fire_at, version)
+                except Exception as e:
+                    logger.error(f"❌ Alarm scheduler error: {e}")
+                    self._cond.wait(self.max_sleep)
+
+    def _fire(self, alarm: Dict, fire_at: float, version: int) -> None:
+        now = time.time()
+        lateness = now - fire_at
+        if lateness > self.misfire_grace:
+            self._counters['missed'] += 1
+            logger.warning(f"⚠️ Alarm {alarm['id']} was due {lateness:.0f} s ago - skipped")
+        else:
+            self._counters['fired'] += 1
+            self._lateness_ms = (self._lateness_ms + [lateness * 1000])[-100:]
+            logger.info(f"🔔 Alarm {alarm['id']} ringing ({lateness * 1000:.1f} ms after its time)")
+            threading.Thread(target=self._play, args=(alarm,), name='alarm-playback', daemon=True).start()
+
+        # The next occurrence is computed from the scheduled time, so late wake-ups do not shift the alarm
+        next_fire_at = next_fire_time(alarm['time'], alarm['days'], max(now, fire_at))
+        heapq.heappush(self._heap, (next_fire_at, alarm['id'], version))
+        # Only the fire times change, which leaves the schedule version alone (no reload)
+        self.store.mark_fired(alarm['id'], fire_at, next_fire_at)
+
+    def _play(self, alarm: Dict) -> None:
+        try:
+            success = self.player(alarm['ringtone_path'])
+        except Exception as e:
+            logger.error(f"❌ Error playing alarm {alarm['id']}: {e}")
+            success = False
+        if not success:
+            with self._cond:
+                self._counters['failed'] += 1
+
+    def stats(self) -> Dict:
+        """Alarm counts, whether this process fires them, and how late recent alarms rang."""
+        counts = self.store.stats()['by_source'].get('server', {'schedules': 0, 'active': 0})
+        with self._cond:
+            lateness = list(self._lateness_ms)
+            stats = {
+                'alarms': counts['schedules'],
+                'active': counts['active'],
+                'leader': self._leader,
+                'next_fire_at': self._heap[0][0] if self._leader and self._heap else None,
+                **self._counters
+            }
+        stats['lateness_ms'] = {
+            'last': round(lateness[-1], 1) if lateness else None,
+            'max': round(max(lateness), 1) if lateness else None,
+            'mean': round(sum(lateness) / len(lateness), 1) if lateness else None
+        }
+        return stats
@@ -0,0 +1,210 @@
+# Rules applied
+import importlib.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+from streamingTranscoder import transcode, TranscodeError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ffmpeg encoders reported per output format
+PROBED_ENCODERS = {
+    'mp3': 'libmp3lame',
+    'aac': 'aac',
+    'opus': 'libopus',
+    'vorbis': 'libvorbis'
+}
+
+# How long a request waits for a probe that is still running before going without ffmpeg
+PROBE_WAIT_SECONDS = 15.0
+
+
+def find_ffmpeg_path() -> Optional[str]:
+    """Find FFmpeg installation path dynamically"""
+    # First, check if ffmpeg is already in PATH
+    ffmpeg_exe = shutil.which("ffmpeg")
+    if ffmpeg_exe:
+        ffmpeg_dir = os.path.dirname(ffmpeg_exe)
+        logger.info(f"FFmpeg found in PATH: {ffmpeg_dir}")
+        return ffmpeg_dir
+
+    # Common FFmpeg installation paths on Windows
+    possible_paths = [
+        # WinGet installation path (dynamic user)
+        os.path.expanduser(r"~\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0-full_build\bin"),
+        # Chocolatey installation
+        r"C:\ProgramData\chocolatey\bin",
+        # Manual installation in Program Files
+        r"C:\Program Files\ffmpeg\bin",
+        r"C:\Program Files (x86)\ffmpeg\bin",
+        # Manual installation in user directory
+        os.path.expanduser(r"~\ffmpeg\bin"),
+        # Working directory (for portable installation)
+        os.path.join(os.path.dirname(__file__), "ffmpeg", "bin"),
+        # Project root ffmpeg folder
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "ffmpeg", "bin")
+    ]
+
+    for path in possible_paths:
+        if os.path.exists(path):
+            ffmpeg_exe = os.path.join(path, "ffmpeg.exe")
+            if os.path.exists(ffmpeg_exe):
+                logger.info(f"FFmpeg found at: {path}")
+                return path
+
+    logger.warning("FFmpeg not found in any common installation paths")
+    return None
+
+
+def _binary_key(ffmpeg_binary: str) -> Dict:
+    """Identify an ffmpeg binary by path and modification time (an upgrade changes the key)."""
+    binary_stat = os.stat(ffmpeg_binary)
+    return {'ffmpeg_path': ffmpeg_binary, 'mtime_ns': binary_stat.st_mtime_ns, 'size': binary_stat.st_size}
+
+
+class AudioCapabilityService:
+    """
+    Lazy, cached detection of what the audio toolchain can do.
+
+    Locating ffmpeg and test-encoding with it costs hundreds of milliseconds, so it
+    runs on a background thread instead of at import time, and the results are
+    cached on disk keyed by the ffmpeg binary's path and mtime. Later starts with an
+    unchanged ffmpeg only stat the binary.
+    """
+
+    def __init__(self, cache_path: str):
+        """
+        Args:
+            cache_path: JSON file holding the cached probe results
+        """
+        self.cache_path = cache_path
+        self._results: Optional[Dict] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start probing on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audio-capability-probe', daemon=True)
+            self._thread.start()
+
+    def _load_cache(self) -> Optional[Dict]:
+        """Return the cached results if they were probed with the same ffmpeg binary."""
+        try:
+            with open(self.cache_path, 'r') as f:
+                cached = json.load(f)
+            if _binary_key(cached['key']['ffmpeg_path']) == cached['key']:
+                return cached['results']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _save_cache(self, results: Dict) -> None:
+        partial_path = self.cache_path + '.part'
+        with open(partial_path, 'w') as f:
+            json.dump({'key': _binary_key(results['ffmpeg_path']), 'results': results}, f, indent=2)
+        os.replace(partial_path, self.cache_path)
+
+    @staticmethod
+    def _add_to_path(ffmpeg_binary: str) -> None:
+        """Make ffmpeg reachable for tools that look it up on PATH (pydub, worker processes)."""
+        ffmpeg_dir = os.path.dirname(ffmpeg_binary)
+        if shutil.which('ffmpeg') != ffmpeg_binary:
+            os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ.get("PATH", "")
+            logger.info(f"Added ffmpeg to PATH: {ffmpeg_dir}")
+
+    @staticmethod
+    def _probe(ffmpeg_binary: str) -> Dict:
+        """Run the probes against an ffmpeg binary."""
+        results = {'ffmpeg_path': ffmpeg_binary, 'ffmpeg_version': None, 'encoders': {}, 'mp3_encode_working': False}
+
+        version = subprocess.run([ffmpeg_binary, '-hide_banner', '-version'], capture_output=True, text=True, timeout=30)
+        if version.stdout:
+            results['ffmpeg_version'] = version.stdout.splitlines()[0]
+
+        encoders = subprocess.run([ffmpeg_binary, '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=30)
+        encoder_names = {line.split()[1] for line in encoders.stdout.splitlines() if len(line.split()) > 1}
+        results['encoders'] = {name: encoder in encoder_names for name, encoder in PROBED_ENCODERS.items()}
+
+        # A real encode of 100 ms of silence, through the same pipes the server uses
+        silence = io.BytesIO()
+        with wave.open(silence, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            wav_file.writeframes(b'\0\0' * 4410)
+        silence.seek(0)
+        encoded = io.BytesIO()
+        try:
+            transcode(silence, encoded, 'mp3', ffmpeg_binary=ffmpeg_binary)
+            results['mp3_encode_working'] = encoded.tell() > 0
+        except TranscodeError as e:
+            logger.warning(f"⚠️ ffmpeg test encode failed: {e}")
+        return results
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        results = self._load_cache()
+        from_cache = results is not None
+        try:
+            if results is None:
+                ffmpeg_dir = find_ffmpeg_path()
+                ffmpeg_binary = shutil.which('ffmpeg', path=ffmpeg_dir) if ffmpeg_dir else None
+                if ffmpeg_binary:
+                    results = self._probe(os.path.abspath(ffmpeg_binary))
+                    self._save_cache(results)
+                else:
+                    results = {'ffmpeg_path': None, 'ffmpeg_version': None, 'encoders': {}, 'mp3_encode_working': False}
+            if results['ffmpeg_path']:
+                self._add_to_path(results['ffmpeg_path'])
+        except Exception as e:
+            logger.error(f"❌ Audio capability probe failed: {e}")
+            results = {'ffmpeg_path': None, 'ffmpeg_version': None, 'encoders': {}, 'mp3_encode_working': False,
+                       'error': str(e)}
+
+        results['pydub_available'] = importlib.util.find_spec('pydub') is not None
+        results['from_cache'] = from_cache
+        results['probe_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        results['probed_at'] = datetime.now().isoformat()
+        self._results = results
+        self._ready.set()
+
+        if results['mp3_encode_working']:
+            logger.info(f"✅ MP3 conversion enabled - ffmpeg is available and working ({results['probe_ms']} ms"
+                        f"{', cached' if from_cache else ''})")
+        elif results['ffmpeg_path']:
+            logger.warning("⚠️ MP3 conversion will be disabled - ffmpeg found but the MP3 test encode failed")
+            logger.warning("💡 To fix this, install an ffmpeg build with libmp3lame")
+        else:
+            logger.warning("⚠️ MP3 conversion will be disabled - ffmpeg not found")
+            logger.warning("💡 To fix this, install ffmpeg")
+
+    def wait(self, timeout: Optional[float] = PROBE_WAIT_SECONDS) -> Optional[Dict]:
+        """Return the probe results, waiting for a running probe; None if it did not finish in time."""
+        self.start()
+        self._ready.wait(timeout)
+        return self._results
+
+    def ffmpeg_binary(self) -> Optional[str]:
+        """Return the path of a working ffmpeg for MP3 encoding, or None."""
+        results = self.wait()
+        if results and results['mp3_encode_working']:
+            return results['ffmpeg_path']
+        return None
+
+    def status(self) -> Dict:
+        """Return the results for /health without waiting ({'state': 'probing'} while running)."""
+        if not self._ready.is_set():
+            return {'state': 'probing'}
+        return dict(self._results, state='ready')
@@ -0,0 +1,231 @@
+# Rules applied
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from streamingTranscoder import transcode, STREAM_CHUNK_SIZE
+from encoderProfileService import encode_profile, is_plain_wav
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _wav_data_chunk(path: str) -> Tuple[int, int]:
+    """Return (offset, size) of the sample data of a RIFF/WAVE file."""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"Not a WAV file: {path}")
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"WAV file has no data chunk: {path}")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'data':
+                return f.tell(), chunk_size
+            # Chunks are word aligned
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def is_pcm16_wav(path: str) -> bool:
+    """Return True if the file is a 16-bit PCM WAV that can be mapped without decoding."""
+    try:
+        with wave.open(path, 'rb') as wav_file:
+            return wav_file.getsampwidth() == 2
+    except (wave.Error, EOFError):
+        return False
+
+
+class SharedPcm:
+    """
+    16-bit PCM of a decoded source, memory-mapped once and sliced by every cut.
+
+    Slices are views into the mapping, so cutting N segments reads the decoded audio
+    from the page cache instead of holding N copies in Python memory.
+    """
+
+    def __init__(self, wav_path: str):
+        with wave.open(wav_path, 'rb') as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError("Shared PCM must be 16-bit")
+            self.sample_rate = wav_file.getframerate()
+            self.channels = wav_file.getnchannels()
+        self.frame_size = 2 * self.channels
+
+        offset, size = _wav_data_chunk(wav_path)
+        self._file = open(wav_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Streamed WAV headers may carry a placeholder size; trust the file length instead
+        size = min(size, len(self._map) - offset)
+        self._data = memoryview(self._map)[offset:offset + size - size % self.frame_size]
+        self.frames = len(self._data) // self.frame_size
+        self._slices: List[memoryview] = []
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def slice(self, start: float, end: float) -> memoryview:
+        """Return the PCM of [start, end) seconds, clamped to the length of the audio."""
+        first_frame = min(round(start * self.sample_rate), self.frames)
+        last_frame = min(round(end * self.sample_rate), self.frames)
+        view = self._data[first_frame * self.frame_size:last_frame * self.frame_size]
+        self._slices.append(view)
+        return view
+
+    def close(self) -> None:
+        """Unmap the PCM; slices handed out must no longer be in use."""
+        for view in self._slices:
+            view.release()
+        self._data.release()
+        self._map.close()
+        self._file.close()
+
+
+@contextmanager
+def decoded_pcm(source_path: str, ffmpeg_binary: Optional[str] = None, output_args: Optional[List[str]] = None):
+    """
+    Yield a source as SharedPcm, decoding it to a temporary 16-bit WAV unless it already is one.
+
+    output_args replaces ffmpeg's WAV output options for the decode (e.g. to downmix or
+    resample); it must still produce a 16-bit PCM WAV.
+    """
+    temp_dir = None
+    pcm = None
+    try:
+        pcm_path = source_path
+        if not is_pcm16_wav(source_path):
+            temp_dir = tempfile.mkdtemp(prefix='pcm-')
+            pcm_path = os.path.join(temp_dir, 'source.wav')
+            transcode(source_path, pcm_path, 'wav', ffmpeg_binary=ffmpeg_binary, output_args=output_args)
+        pcm = SharedPcm(pcm_path)
+        yield pcm
+    finally:
+        if pcm is not None:
+            pcm.close()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class _MemoryReader:
+    """File-like reader over a memoryview, handing out fixed-size chunks to a pipe."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size < 0 else min(self._position + size, len(self._view))
+        chunk = self._view[self._position:end].tobytes()
+        self._position = end
+        return chunk
+
+
+class BatchCutService:
+    """
+    Cut many ringtones out of one source with a single decode.
+
+    The source is decoded once to 16-bit PCM (a 16-bit PCM WAV is mapped as is), every
+    segment is sliced from the shared mapping, and the outputs are encoded concurrently.
+    Encoding happens in ffmpeg processes fed through pipes, so a thread pool is enough
+    to keep all cores busy.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: Number of concurrent encodes (defaults to the CPU count)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch-encode')
+
+    @staticmethod
+    def _write_wav(pcm: SharedPcm, view: memoryview, output_path: str) -> Dict:
+        """Write a PCM slice as a WAV file (no encoder involved)."""
+        started = time.perf_counter()
+        partial_path = output_path + '.part'
+        with wave.open(partial_path, 'wb') as wav_file:
+            wav_file.setnchannels(pcm.channels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(pcm.sample_rate)
+            for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+                wav_file.writeframesraw(view[offset:offset + STREAM_CHUNK_SIZE])
+        os.replace(partial_path, output_path)
+
+        encode_seconds = time.perf_counter() - started
+        duration_seconds = len(view) / pcm.frame_size / pcm.sample_rate
+        return {
+            'output_path': output_path,
+            'format': 'wav',
+            'size': os.path.getsize(output_path),
+            'duration_ms': round(duration_seconds * 1000),
+            'encode_ms': round(encode_seconds * 1000, 1),
+            'realtime_factor': round(encode_seconds / duration_seconds, 4) if duration_seconds else None
+        }
+
+    def _encode(self, pcm: SharedPcm, view: memoryview, profile: Dict, output_path: str,
+                ffmpeg_binary: Optional[str]) -> Dict:
+        if is_plain_wav(profile):
+            return self._write_wav(pcm, view, output_path)
+        input_args = ['-f', 's16le', '-ar', str(pcm.sample_rate), '-ac', str(pcm.channels)]
+        return encode_profile(_MemoryReader(view), output_path, profile, ffmpeg_binary=ffmpeg_binary,
+                              input_args=input_args)
+
+    def cut_many(self, source_path: str, segments: List[Dict], ffmpeg_binary: Optional[str] = None) -> Dict:
+        """
+        Cut and encode several segments of one source.
+
+        Args:
+            source_path: Path of the source audio file
+            segments: Dicts with 'start' and 'end' (seconds) and 'outputs', a list of
+                (name, output path, encoder profile) tuples to produce for that segment
+            ffmpeg_binary: Path of ffmpeg (looked up on PATH when omitted)
+
+        Returns:
+            dict: 'segments' (per segment: 'outputs' mapping name -> transcode result
+                or {'error': ...}), 'decode_ms', 'source_duration_ms' and 'wall_ms'
+        """
+        started = time.perf_counter()
+        # Decode once; a 16-bit PCM WAV source already is the shared buffer
+        with decoded_pcm(source_path, ffmpeg_binary) as pcm:
+            decode_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            futures = []
+            for index, segment in enumerate(segments):
+                if segment['start'] >= pcm.duration:
+                    continue
+                view = pcm.slice(segment['start'], segment['end'])
+                for name, output_path, profile in segment['outputs']:
+                    futures.append((index, name, self._executor.submit(
+                        self._encode, pcm, view, profile, output_path, ffmpeg_binary
+                    )))
+
+            results = [{'outputs': {}} for _ in segments]
+            for index, segment in enumerate(segments):
+                if segment['start'] >= pcm.duration:
+                    results[index]['error'] = f"start_time is past the end of the source ({pcm.duration:.3f}s)"
+            for index, name, future in futures:
+                try:
+                    results[index]['outputs'][name] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Batch encode of segment {index} to {name} failed: {e}")
+                    results[index]['outputs'][name] = {'error': str(e)}
+
+            wall_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"✂️ Batch cut {len(segments)} segments ({len(futures)} outputs) in {wall_ms} ms "
+                        f"(decode {decode_ms} ms)")
+            return {
+                'segments': results,
+                'decode_ms': decode_ms,
+                'source_duration_ms': round(pcm.duration * 1000),
+                'wall_ms': wall_ms
+            }
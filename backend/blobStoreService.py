@@ -0,0 +1,323 @@
+# Rules applied
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+import logging
+
+from renditionCacheService import link_or_copy
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (folder, name)
+);
+CREATE INDEX IF NOT EXISTS idx_blob_refs_sha256 ON blob_refs (sha256);
+"""
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+# Blob files the database does not know are only deleted once they are this old: another worker
+# process links a new blob before it commits the row
+ORPHAN_GRACE_SECONDS = 300
+
+
+class BlobStoreService:
+    """
+    Content-addressed storage of uploaded originals and ringtones.
+
+    Every distinct content is stored once as a blob named by its SHA-256. Named
+    files in the originals and ringtone folders are references to a blob: hardlinks
+    (or reflinks) of it, so a second upload or an identical cut takes no space, and
+    the folders still hold ordinary files for the catalog, the player and the Task
+    Scheduler. References are counted per blob; when the last one is released the
+    blob is deleted. As with the rendition cache, files are never modified in place
+    (writers use a temporary name and rename), which is what makes sharing safe.
+    """
+
+    def __init__(self, blob_dir: str, db_path: str, folders: Dict[str, str]):
+        """
+        Args:
+            blob_dir: Folder of the blobs; must be on the same file system as the
+                named folders for references to be hardlinks (otherwise they are copies)
+            db_path: Path of the SQLite database holding blobs and references
+            folders: Folder name -> path of the folders whose files may reference blobs
+        """
+        self.blob_dir = blob_dir
+        self.db_path = db_path
+        self.folders = dict(folders)
+        self._local = threading.local()
+        # Serializes every change of blobs and references, file links included
+        self._write_lock = threading.Lock()
+        self._counters = {'ingested': 0, 'dedup_hits': 0, 'bytes_saved': 0, 'collected': 0}
+
+        os.makedirs(blob_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(BLOB_STORE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def blob_path(self, sha256: str) -> str:
+        """Return the path of a blob (fanned out over 256 subfolders)."""
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def _named_path(self, folder: str, name: str) -> str:
+        return os.path.join(self.folders[folder], name)
+
+    def has(self, sha256: str) -> bool:
+        """Return whether a blob with this content is stored (an upload of it can be skipped)."""
+        if not SHA256_PATTERN.match(sha256 or ''):
+            return False
+        row = self._connect().execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return row is not None and os.path.exists(self.blob_path(sha256))
+
+    def reference(self, sha256: str) -> Optional[Tuple[str, str]]:
+        """Return one (folder, name) referencing a stored blob (its name tells the format), or None."""
+        if not SHA256_PATTERN.match(sha256 or ''):
+            return None
+        row = self._connect().execute("SELECT folder, name FROM blob_refs WHERE sha256 = ? LIMIT 1",
+                                      (sha256,)).fetchone()
+        if row is None or not os.path.exists(self.blob_path(sha256)):
+            return None
+        return row['folder'], row['name']
+
+    def lookup(self, folder: str, name: str) -> Optional[str]:
+        """Return the SHA-256 a named file references, or None if it is not managed."""
+        row = self._connect().execute("SELECT sha256 FROM blob_refs WHERE folder = ? AND name = ?",
+                                      (folder, name)).fetchone()
+        return row['sha256'] if row else None
+
+    def _set_ref(self, conn: sqlite3.Connection, folder: str, name: str, sha256: Optional[str]) -> Optional[str]:
+        """
+        Point (folder, name) at a blob (or drop it for None) and recount the blobs
+        involved; returns the blob whose last reference was dropped, if any.
+        """
+        previous = conn.execute("SELECT sha256 FROM blob_refs WHERE folder = ? AND name = ?",
+                                (folder, name)).fetchone()
+        previous = previous['sha256'] if previous else None
+        if previous == sha256:
+            return None
+        if sha256 is None:
+            conn.execute("DELETE FROM blob_refs WHERE folder = ? AND name = ?", (folder, name))
+        else:
+            conn.execute("INSERT OR REPLACE INTO blob_refs (folder, name, sha256, created) VALUES (?, ?, ?, ?)",
+                         (folder, name, sha256, time.time()))
+            conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+        if previous is not None:
+            conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", (previous,))
+            row = conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (previous,)).fetchone()
+            if row is not None and row['refcount'] <= 0:
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (previous,))
+                return previous
+        return None
+
+    def _collect(self, sha256: Optional[str]) -> None:
+        """Delete the file of a blob that has lost its last reference."""
+        if sha256 is None:
+            return
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+        self._counters['collected'] += 1
+        logger.info(f"🗑️ Blob {sha256[:12]} has no references left and was deleted")
+
+    def ingest(self, file_path: str, folder: str, name: str, sha256: str) -> Dict:
+        """
+        Make a freshly written named file a reference to the blob of its content.
+
+        If the content is already stored the file is replaced by a link of the blob
+        (a dedup hit); otherwise the file becomes the blob.
+
+        Args:
+            file_path: The named file (folder/name)
+            folder: Folder name of the reference
+            name: File name of the reference
+            sha256: SHA-256 of the file's content
+
+        Returns:
+            dict: 'sha256', 'dedup' (the content was already stored), 'method' of the
+                link and 'refcount' of the blob
+        """
+        blob_path = self.blob_path(sha256)
+        size = os.path.getsize(file_path)
+        conn = self._connect()
+        with self._write_lock:
+            stored = conn.execute("SELECT size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if stored is not None and os.path.exists(blob_path):
+                # Already a link of the blob (e.g. a rendition cache hit) or a copy to replace by one
+                method = 'existing' if os.path.samefile(blob_path, file_path) else link_or_copy(blob_path, file_path)
+                dedup = True
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                method = link_or_copy(file_path, blob_path)
+                dedup = False
+            with conn:
+                if stored is None:
+                    conn.execute("INSERT INTO blobs (sha256, size, refcount, created) VALUES (?, ?, 0, ?)",
+                                 (sha256, size, time.time()))
+                collected = self._set_ref(conn, folder, name, sha256)
+                refcount = conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()[0]
+            self._collect(collected)
+            self._counters['ingested'] += 1
+            if dedup:
+                self._counters['dedup_hits'] += 1
+                self._counters['bytes_saved'] += size
+
+        if dedup:
+            logger.info(f"♻️ {folder}/{name} is a duplicate of blob {sha256[:12]} ({method}, {refcount} references)")
+        return {'sha256': sha256, 'dedup': dedup, 'method': method, 'refcount': refcount}
+
+    def materialize(self, sha256: str, folder: str, name: str) -> Optional[Dict]:
+        """
+        Create a named file from a stored blob, e.g. for an upload the client did not
+        have to send.
+
+        Returns:
+            dict: As for ingest, or None if the blob is not stored
+        """
+        if not SHA256_PATTERN.match(sha256 or ''):
+            return None
+        blob_path = self.blob_path(sha256)
+        conn = self._connect()
+        with self._write_lock:
+            stored = conn.execute("SELECT size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if stored is None or not os.path.exists(blob_path):
+                return None
+            method = link_or_copy(blob_path, self._named_path(folder, name))
+            with conn:
+                collected = self._set_ref(conn, folder, name, sha256)
+                refcount = conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()[0]
+            self._collect(collected)
+            self._counters['dedup_hits'] += 1
+            self._counters['bytes_saved'] += stored['size']
+        logger.info(f"♻️ {folder}/{name} created from blob {sha256[:12]} without a transfer ({refcount} references)")
+        return {'sha256': sha256, 'dedup': True, 'method': method, 'refcount': refcount}
+
+    def release(self, folder: str, name: str) -> bool:
+        """
+        Drop the reference of a named file that was deleted; the blob is deleted with
+        its last reference. Returns False if the name was not managed.
+        """
+        conn = self._connect()
+        with self._write_lock:
+            if self.lookup(folder, name) is None:
+                return False
+            with conn:
+                collected = self._set_ref(conn, folder, name, None)
+            self._collect(collected)
+        return True
+
+    def adopt(self, folder: str, hash_file: Callable[[str], str], extensions=('.mp3', '.wav')) -> int:
+        """
+        Ingest the files of a folder that are not references yet (e.g. written before
+        the blob store existed). Returns how many files were adopted.
+        """
+        folder_path = self.folders[folder]
+        if not os.path.isdir(folder_path):
+            return 0
+        managed = {row['name'] for row in self._connect().execute(
+            "SELECT name FROM blob_refs WHERE folder = ?", (folder,))}
+        adopted = 0
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if (entry.name in managed or entry.name.startswith('.') or not entry.is_file()
+                        or not entry.name.lower().endswith(extensions)):
+                    continue
+                try:
+                    self.ingest(entry.path, folder, entry.name, hash_file(entry.path))
+                    adopted += 1
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not adopt {folder}/{entry.name}: {e}")
+        if adopted:
+            logger.info(f"📦 Adopted {adopted} files of {folder} into the blob store")
+        return adopted
+
+    def gc(self) -> Dict:
+        """
+        Drop references whose named file is gone, then delete blobs without
+        references and blob files the database does not know (once they are
+        older than ORPHAN_GRACE_SECONDS).
+
+        Returns:
+            dict: Counts of 'dropped_refs', 'collected_blobs' and 'orphan_files'
+        """
+        conn = self._connect()
+        result = {'dropped_refs': 0, 'collected_blobs': 0, 'orphan_files': 0}
+        with self._write_lock:
+            refs = conn.execute("SELECT folder, name FROM blob_refs").fetchall()
+            missing = [(row['folder'], row['name']) for row in refs
+                       if row['folder'] not in self.folders
+                       or not os.path.exists(os.path.join(self.folders[row['folder']], row['name']))]
+            collected = []
+            with conn:
+                for folder, name in missing:
+                    collected.append(self._set_ref(conn, folder, name, None))
+                # Recount from the references in case the counts drifted
+                conn.execute("UPDATE blobs SET refcount = (SELECT COUNT(*) FROM blob_refs "
+                             "WHERE blob_refs.sha256 = blobs.sha256)")
+                collected += [row['sha256'] for row in conn.execute("SELECT sha256 FROM blobs WHERE refcount = 0")]
+                conn.execute("DELETE FROM blobs WHERE refcount = 0")
+            for sha256 in collected:
+                if sha256 is not None:
+                    self._collect(sha256)
+                    result['collected_blobs'] += 1
+            result['dropped_refs'] = len(missing)
+
+            # The lock only covers this process; skip files young enough to be another worker's ingest
+            cutoff = time.time() - ORPHAN_GRACE_SECONDS
+            known = {row['sha256'] for row in conn.execute("SELECT sha256 FROM blobs")}
+            for fan_out in os.listdir(self.blob_dir):
+                fan_out_path = os.path.join(self.blob_dir, fan_out)
+                if not os.path.isdir(fan_out_path):
+                    continue
+                for file_name in os.listdir(fan_out_path):
+                    if file_name in known:
+                        continue
+                    orphan_path = os.path.join(fan_out_path, file_name)
+                    try:
+                        # A link keeps the mtime of the file it was made from, but updates the ctime
+                        stat = os.stat(orphan_path)
+                        if max(stat.st_mtime, stat.st_ctime) > cutoff:
+                            continue
+                        os.remove(orphan_path)
+                    except FileNotFoundError:
+                        continue
+                    result['orphan_files'] += 1
+        if any(result.values()):
+            logger.info(f"🧹 Blob store GC: {result}")
+        return result
+
+    def stats(self) -> Dict:
+        """Return blob and reference counts, stored and referenced bytes, and dedup counters since startup."""
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS blobs, COALESCE(SUM(size), 0) AS stored, "
+            "COALESCE(SUM(size * refcount), 0) AS referenced, COALESCE(SUM(refcount), 0) AS refs FROM blobs"
+        ).fetchone()
+        counters = dict(self._counters)
+        counters.update({'blobs': row['blobs'], 'references': row['refs'], 'stored_bytes': row['stored'],
+                         'referenced_bytes': row['referenced']})
+        return counters
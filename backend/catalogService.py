@@ -0,0 +1,658 @@
+# Rules applied
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from contentHashService import ContentHashService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when the schema changes; the catalog is derived data, so an outdated one is dropped and rebuilt
+CATALOG_SCHEMA_VERSION = 4
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_entries (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    ctime REAL NOT NULL,
+    mtime REAL NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    metadata_mtime_ns INTEGER,
+    file_path TEXT NOT NULL,
+    original_name TEXT,
+    start_time REAL,
+    end_time REAL,
+    duration REAL,
+    has_metadata INTEGER NOT NULL DEFAULT 0,
+    sort_duration REAL NOT NULL DEFAULT -1,
+    sort_name TEXT NOT NULL DEFAULT '',
+    generation INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (folder, name)
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_entries_generation ON catalog_entries (generation);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('generation', 0);
+INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('tombstones_pruned_before', 0);
+CREATE TABLE IF NOT EXISTS catalog_tombstones (
+    generation INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_entries_id ON catalog_entries (id);
+CREATE INDEX IF NOT EXISTS idx_catalog_sort_created ON catalog_entries (ctime, folder, name);
+CREATE INDEX IF NOT EXISTS idx_catalog_sort_size ON catalog_entries (size, folder, name);
+CREATE INDEX IF NOT EXISTS idx_catalog_sort_duration ON catalog_entries (sort_duration, folder, name);
+CREATE INDEX IF NOT EXISTS idx_catalog_sort_name ON catalog_entries (sort_name, folder, name);
+"""
+
+# Sort keys accepted by the listing API and the indexed column behind each
+SORT_EXPRESSIONS = {
+    'created': 'ctime',
+    'size': 'size',
+    'duration': 'sort_duration',
+    'original_name': 'sort_name'
+}
+
+# Number of generations of removals kept for the changes feed; older clients must resync
+TOMBSTONE_RETENTION = 50000
+
+# Fields that can be requested through the listing API's ``fields=`` projection
+LISTING_FIELDS = (
+    'id', 'name', 'size', 'created', 'modified', 'file_path', 'format', 'folder',
+    'original_name', 'start_time', 'end_time', 'duration', 'has_metadata'
+)
+
+
+class RingtoneCatalogService:
+    """
+    Persistent SQLite index of the audio files in the ringtone and upload folders.
+
+    The folders and their ``.json`` sidecars stay the source of truth; the catalog
+    mirrors them so listings are answered from one indexed query instead of a
+    directory walk plus a stat and sidecar parse per file.
+    """
+
+    def __init__(self, db_path: str, folders: Dict[str, Tuple[str, Tuple[str, ...]]],
+                 hash_service: ContentHashService, rendition_folders: Optional[List[str]] = None):
+        """
+        Args:
+            db_path: Path of the SQLite database file
+            folders: Folder name -> (absolute path, accepted audio extensions)
+            hash_service: Content hasher used to derive stable IDs
+            rendition_folders: Folders holding renditions of the same ringtone under the
+                same base name, in order of preference for the rendition the ID comes from
+        """
+        self.db_path = db_path
+        self.folders = folders
+        self.hash_service = hash_service
+        self.rendition_folders = rendition_folders or []
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != CATALOG_SCHEMA_VERSION:
+                logger.info("📇 Catalog schema changed, rebuilding the index")
+                conn.execute("DROP TABLE IF EXISTS catalog_entries")
+                conn.execute("DROP TABLE IF EXISTS catalog_tombstones")
+                conn.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+                conn.executescript(CATALOG_SCHEMA)
+                # Removals from before the rebuild are lost, so every client has to resync
+                conn.execute(
+                    "UPDATE catalog_meta SET value = (SELECT value FROM catalog_meta WHERE key = 'generation') "
+                    "WHERE key = 'tombstones_pruned_before'"
+                )
+            conn.executescript(CATALOG_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _folder_path(self, folder: str) -> str:
+        return self.folders[folder][0]
+
+    def _is_audio_file(self, folder: str, filename: str) -> bool:
+        return filename.lower().endswith(self.folders[folder][1])
+
+    @staticmethod
+    def _metadata_filename(filename: str) -> str:
+        return filename.rsplit('.', 1)[0] + '.json'
+
+    def _metadata_mtime_ns(self, folder: str, filename: str) -> Optional[int]:
+        """Return the mtime_ns of a file's JSON sidecar, or None if it has none."""
+        metadata_path = os.path.join(self._folder_path(folder), self._metadata_filename(filename))
+        try:
+            return os.stat(metadata_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _is_unchanged(existing: Optional[sqlite3.Row], file_stat: os.stat_result,
+                      metadata_mtime_ns: Optional[int]) -> bool:
+        """Return True if a catalog row still matches the file and sidecar on disk."""
+        return (existing is not None
+                and existing['size'] == file_stat.st_size
+                and existing['mtime_ns'] == file_stat.st_mtime_ns
+                and existing['metadata_mtime_ns'] == metadata_mtime_ns)
+
+    def _load_metadata(self, folder: str, filename: str) -> Tuple[Optional[Dict], Optional[int]]:
+        """Load the JSON sidecar of a file, returning (metadata, sidecar mtime_ns)."""
+        metadata_path = os.path.join(self._folder_path(folder), self._metadata_filename(filename))
+        try:
+            metadata_stat = os.stat(metadata_path)
+        except FileNotFoundError:
+            return None, None
+
+        try:
+            with open(metadata_path, 'r') as f:
+                return json.load(f), metadata_stat.st_mtime_ns
+        except Exception as e:
+            logger.warning(f"Failed to load metadata for {filename}: {e}")
+            return None, metadata_stat.st_mtime_ns
+
+    def _rendition_siblings(self, folder: str, filename: str) -> List[Tuple[str, str]]:
+        """Return the (folder, name) of every rendition slot of a file, in preference order."""
+        if folder not in self.rendition_folders:
+            return [(folder, filename)]
+        base_name = filename.rsplit('.', 1)[0]
+        siblings = []
+        for rendition_folder in self.rendition_folders:
+            for extension in self.folders[rendition_folder][1]:
+                siblings.append((rendition_folder, base_name + extension))
+        return siblings
+
+    def _resolve_id(self, folder: str, filename: str, metadata: Optional[Dict],
+                    file_stat: os.stat_result) -> str:
+        """
+        Resolve the stable ID of a file.
+
+        All renditions of a ringtone share the ID of their preferred existing rendition
+        (the WAV source when there is one): its sidecar ID if it has one, otherwise an
+        ID derived from its content hash.
+        """
+        for source_folder, source_name in self._rendition_siblings(folder, filename):
+            if (source_folder, source_name) == (folder, filename):
+                return (metadata or {}).get('id') or self.hash_service.file_content_id(
+                    os.path.join(self._folder_path(folder), filename), file_stat
+                )
+
+            source_path = os.path.join(self._folder_path(source_folder), source_name)
+            try:
+                source_stat = os.stat(source_path)
+            except FileNotFoundError:
+                continue
+            source_metadata, _ = self._load_metadata(source_folder, source_name)
+            return (source_metadata or {}).get('id') or self.hash_service.file_content_id(
+                source_path, source_stat
+            )
+
+        raise FileNotFoundError(os.path.join(self._folder_path(folder), filename))
+
+    def _build_row(self, folder: str, filename: str, file_stat: os.stat_result) -> Dict:
+        """Build a catalog row for a file from its stat result and sidecar."""
+        metadata, metadata_mtime_ns = self._load_metadata(folder, filename)
+        row = {
+            'folder': folder,
+            'name': filename,
+            'id': self._resolve_id(folder, filename, metadata, file_stat),
+            'format': filename.rsplit('.', 1)[-1].lower(),
+            'size': file_stat.st_size,
+            'ctime': file_stat.st_ctime,
+            'mtime': file_stat.st_mtime,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'metadata_mtime_ns': metadata_mtime_ns,
+            'file_path': os.path.join(self._folder_path(folder), filename),
+            'original_name': None,
+            'start_time': None,
+            'end_time': None,
+            'duration': None,
+            'has_metadata': 0
+        }
+        if metadata:
+            row.update({
+                'original_name': metadata.get('original_name'),
+                'start_time': metadata.get('start_time'),
+                'end_time': metadata.get('end_time'),
+                'duration': metadata.get('duration'),
+                'has_metadata': 1
+            })
+        # Denormalized sort keys so every sort order is a plain index range scan
+        row['sort_duration'] = row['duration'] if row['duration'] is not None else -1
+        row['sort_name'] = (row['original_name'] or filename).lower()
+        return row
+
+    @staticmethod
+    def _next_generation(conn: sqlite3.Connection) -> int:
+        """Bump and return the catalog generation (call inside a write transaction)."""
+        conn.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'generation'")
+        return conn.execute("SELECT value FROM catalog_meta WHERE key = 'generation'").fetchone()[0]
+
+    @classmethod
+    def _delete(cls, conn: sqlite3.Connection, folder: str, filename: str) -> bool:
+        """Delete an entry and leave a tombstone for the changes feed (call inside a write transaction)."""
+        existing = conn.execute(
+            "SELECT id FROM catalog_entries WHERE folder = ? AND name = ?", (folder, filename)
+        ).fetchone()
+        if existing is None:
+            return False
+
+        generation = cls._next_generation(conn)
+        conn.execute("DELETE FROM catalog_entries WHERE folder = ? AND name = ?", (folder, filename))
+        conn.execute(
+            "INSERT INTO catalog_tombstones (generation, folder, name, id) VALUES (?, ?, ?, ?)",
+            (generation, folder, filename, existing['id'])
+        )
+
+        pruned_before = generation - TOMBSTONE_RETENTION
+        if pruned_before > 0 and generation % 1000 == 0:
+            conn.execute("DELETE FROM catalog_tombstones WHERE generation < ?", (pruned_before,))
+            conn.execute(
+                "UPDATE catalog_meta SET value = ? WHERE key = 'tombstones_pruned_before'", (pruned_before,)
+            )
+        return True
+
+    @classmethod
+    def _upsert(cls, conn: sqlite3.Connection, row: Dict) -> None:
+        """Insert or replace an entry under a new generation (call inside a write transaction)."""
+        row['generation'] = cls._next_generation(conn)
+        columns = ', '.join(row.keys())
+        placeholders = ', '.join(f':{key}' for key in row.keys())
+        conn.execute(
+            f"INSERT OR REPLACE INTO catalog_entries ({columns}) VALUES ({placeholders})",
+            row
+        )
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict:
+        """Convert a catalog row to the JSON shape returned by the listing API."""
+        entry = {
+            'id': row['id'],
+            'name': row['name'],
+            'size': row['size'],
+            'created': datetime.fromtimestamp(row['ctime']).isoformat(),
+            'modified': datetime.fromtimestamp(row['mtime']).isoformat(),
+            'file_path': row['file_path'],
+            'format': row['format'],
+            'folder': row['folder']
+        }
+        if row['has_metadata']:
+            entry.update({
+                'original_name': row['original_name'],
+                'start_time': row['start_time'],
+                'end_time': row['end_time'],
+                'duration': row['duration'],
+                'has_metadata': True
+            })
+        else:
+            entry['has_metadata'] = False
+        return entry
+
+    def _refresh_siblings(self, conn: sqlite3.Connection, folder: str, filename: str) -> None:
+        """
+        Re-resolve the IDs of the other renditions of a file after it was added,
+        changed or removed, since their ID may come from it (call inside a write transaction).
+        """
+        for sibling_folder, sibling_name in self._rendition_siblings(folder, filename):
+            if (sibling_folder, sibling_name) == (folder, filename):
+                continue
+            current = conn.execute(
+                "SELECT id FROM catalog_entries WHERE folder = ? AND name = ?", (sibling_folder, sibling_name)
+            ).fetchone()
+            if current is None:
+                continue
+            try:
+                sibling_stat = os.stat(os.path.join(self._folder_path(sibling_folder), sibling_name))
+            except FileNotFoundError:
+                continue
+            row = self._build_row(sibling_folder, sibling_name, sibling_stat)
+            if row['id'] != current['id']:
+                self._upsert(conn, row)
+
+    def index_file(self, folder: str, filename: str) -> Optional[Dict]:
+        """
+        Add or refresh a single file in the catalog.
+
+        Args:
+            folder: Catalog folder name (e.g. 'wav_ringtones')
+            filename: Name of the audio file inside that folder
+
+        Returns:
+            dict: The catalog entry, or None if the file does not exist
+        """
+        if folder not in self.folders or not self._is_audio_file(folder, filename):
+            return None
+
+        file_path = os.path.join(self._folder_path(folder), filename)
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            self.remove_file(folder, filename)
+            return None
+
+        conn = self._connect()
+        existing = conn.execute(
+            "SELECT size, mtime_ns, metadata_mtime_ns FROM catalog_entries WHERE folder = ? AND name = ?",
+            (folder, filename)
+        ).fetchone()
+        if self._is_unchanged(existing, file_stat, self._metadata_mtime_ns(folder, filename)):
+            return self.get_entry(folder, filename)
+
+        row = self._build_row(folder, filename, file_stat)
+        with self._write_lock, conn:
+            self._upsert(conn, row)
+            self._refresh_siblings(conn, folder, filename)
+
+        logger.info(f"📇 Catalog indexed: {folder}/{filename}")
+        return self.get_entry(folder, filename)
+
+    def index_files(self, files: Iterable[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """
+        Add or refresh several files in one write transaction.
+
+        Args:
+            files: (folder, filename) pairs
+
+        Returns:
+            List of catalog entries (None for files that do not exist), in input order
+        """
+        files = list(files)
+        rows = []
+        for folder, filename in files:
+            if folder not in self.folders or not self._is_audio_file(folder, filename):
+                continue
+            try:
+                file_stat = os.stat(os.path.join(self._folder_path(folder), filename))
+            except FileNotFoundError:
+                continue
+            rows.append(self._build_row(folder, filename, file_stat))
+
+        conn = self._connect()
+        with self._write_lock, conn:
+            for row in rows:
+                self._upsert(conn, row)
+            for row in rows:
+                self._refresh_siblings(conn, row['folder'], row['name'])
+
+        logger.info(f"📇 Catalog indexed {len(rows)} files in one transaction")
+        return [self.get_entry(folder, filename) for folder, filename in files]
+
+    def remove_file(self, folder: str, filename: str) -> bool:
+        """
+        Remove a file from the catalog.
+
+        Returns:
+            bool: True if an entry was removed
+        """
+        conn = self._connect()
+        with self._write_lock, conn:
+            removed = self._delete(conn, folder, filename)
+            if removed:
+                self._refresh_siblings(conn, folder, filename)
+        if removed:
+            logger.info(f"📇 Catalog removed: {folder}/{filename}")
+        return removed
+
+    def get_entry(self, folder: str, filename: str) -> Optional[Dict]:
+        """Return the catalog entry of a single file, or None."""
+        row = self._connect().execute(
+            "SELECT * FROM catalog_entries WHERE folder = ? AND name = ?", (folder, filename)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def find_by_id(self, folder: str, entry_id: str) -> Optional[Dict]:
+        """Return the entry of a folder with the given ID (the first by name if several share it), or None."""
+        row = self._connect().execute(
+            "SELECT * FROM catalog_entries WHERE id = ? AND folder = ? ORDER BY name LIMIT 1", (entry_id, folder)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def list_entries(self, folders: Iterable[str]) -> List[Dict]:
+        """
+        List the catalog entries of the given folders.
+
+        Args:
+            folders: Catalog folder names to include
+
+        Returns:
+            List of entries in folder order, then by file name
+        """
+        folders = list(folders)
+        placeholders = ', '.join('?' for _ in folders)
+        order = ' '.join(f"WHEN ? THEN {index}" for index in range(len(folders)))
+        rows = self._connect().execute(
+            f"SELECT * FROM catalog_entries WHERE folder IN ({placeholders}) "
+            f"ORDER BY CASE folder {order} END, name",
+            folders + folders
+        ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    @staticmethod
+    def _encode_cursor(sort_value, folder: str, name: str) -> str:
+        raw = json.dumps([sort_value, folder, name]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if not isinstance(values, list) or len(values) != 3:
+            raise ValueError('Invalid cursor')
+        return values
+
+    def query_entries(self, folders: Iterable[str], sort: str = 'created', order: str = 'desc',
+                      limit: Optional[int] = None, cursor: Optional[str] = None,
+                      formats: Optional[List[str]] = None, min_duration: Optional[float] = None,
+                      max_duration: Optional[float] = None, has_metadata: Optional[bool] = None,
+                      name_prefix: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Query one page of catalog entries using keyset (cursor) pagination.
+
+        The cursor holds the sort value and (folder, name) of the last entry of the
+        previous page, so each page is an index range scan whose cost depends on the
+        page size rather than on the size of the library.
+
+        Args:
+            folders: Catalog folder names to include
+            sort: One of SORT_EXPRESSIONS
+            order: 'asc' or 'desc'
+            limit: Maximum number of entries to return (None for all)
+            cursor: ``next_cursor`` returned by the previous page
+            formats: Only include these file formats (e.g. ['mp3'])
+            min_duration: Minimum ringtone duration in seconds
+            max_duration: Maximum ringtone duration in seconds
+            has_metadata: Only include entries with (True) or without (False) a sidecar
+            name_prefix: Case-insensitive prefix of the file name or original name
+
+        Returns:
+            tuple: (entries, next_cursor) where next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the sort key, order or cursor is invalid
+        """
+        if sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Invalid sort key: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Invalid sort order: {order}")
+
+        sort_expression = SORT_EXPRESSIONS[sort]
+        folders = list(folders)
+        # The unary + keeps the planner on the sort index instead of the (folder, name) key
+        conditions = [f"+folder IN ({', '.join('?' for _ in folders)})"]
+        params: List = list(folders)
+
+        if formats:
+            conditions.append(f"format IN ({', '.join('?' for _ in formats)})")
+            params.extend(formats)
+        if min_duration is not None:
+            conditions.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            conditions.append("duration <= ?")
+            params.append(max_duration)
+        if has_metadata is not None:
+            conditions.append("has_metadata = ?")
+            params.append(1 if has_metadata else 0)
+        if name_prefix:
+            escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(name LIKE ? ESCAPE '\\' OR original_name LIKE ? ESCAPE '\\')")
+            params.extend([escaped, escaped])
+        if cursor:
+            comparison = '<' if order == 'desc' else '>'
+            conditions.append(f"({sort_expression}, folder, name) {comparison} (?, ?, ?)")
+            params.extend(self._decode_cursor(cursor))
+
+        direction = order.upper()
+        sql = (
+            f"SELECT *, {sort_expression} AS sort_value FROM catalog_entries "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {sort_expression} {direction}, folder {direction}, name {direction}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self._connect().execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self._encode_cursor(last['sort_value'], last['folder'], last['name'])
+
+        return [self._row_to_entry(row) for row in rows], next_cursor
+
+    def generation(self) -> int:
+        """Return the catalog generation, which increases with every change to the catalog."""
+        return self._connect().execute(
+            "SELECT value FROM catalog_meta WHERE key = 'generation'"
+        ).fetchone()[0]
+
+    def changes_since(self, folders: Iterable[str], since: int) -> Dict:
+        """
+        Return the entries added or replaced and the entries removed after a generation.
+
+        Args:
+            folders: Catalog folder names to include
+            since: Generation the client last synced at
+
+        Returns:
+            dict: ``generation`` (current), ``added`` entries, ``removed`` (folder, name, id)
+            records and ``reset`` -- True when removals that old are no longer retained
+            and the client has to reload the full listing instead
+        """
+        folders = list(folders)
+        placeholders = ', '.join('?' for _ in folders)
+        conn = self._connect()
+
+        # Read everything from one snapshot so the generation matches the changes
+        with conn:
+            conn.execute("BEGIN")
+            meta = dict(conn.execute("SELECT key, value FROM catalog_meta").fetchall())
+            if since < meta['tombstones_pruned_before']:
+                return {'generation': meta['generation'], 'added': [], 'removed': [], 'reset': True}
+
+            added_rows = conn.execute(
+                f"SELECT * FROM catalog_entries WHERE generation > ? AND folder IN ({placeholders}) "
+                f"ORDER BY generation",
+                [since] + folders
+            ).fetchall()
+            removed_rows = conn.execute(
+                f"SELECT t.folder, t.name, t.id FROM catalog_tombstones t "
+                f"WHERE t.generation > ? AND t.folder IN ({placeholders}) "
+                f"AND NOT EXISTS (SELECT 1 FROM catalog_entries e WHERE e.folder = t.folder AND e.name = t.name) "
+                f"ORDER BY t.generation",
+                [since] + folders
+            ).fetchall()
+
+        removed = {}
+        for row in removed_rows:
+            removed[(row['folder'], row['name'])] = {'folder': row['folder'], 'name': row['name'], 'id': row['id']}
+
+        return {
+            'generation': meta['generation'],
+            'added': [self._row_to_entry(row) for row in added_rows],
+            'removed': list(removed.values()),
+            'reset': False
+        }
+
+    def count(self) -> int:
+        """Return the total number of catalog entries."""
+        return self._connect().execute("SELECT COUNT(*) FROM catalog_entries").fetchone()[0]
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Rebuild the index from the folders and their ``.json`` sidecars.
+
+        Files whose size, mtime and sidecar mtime are unchanged are skipped without
+        reading the sidecar; new or changed files are re-indexed and entries for
+        files that no longer exist are removed.
+
+        Returns:
+            dict: Counts of added, updated, removed and unchanged entries
+        """
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        conn = self._connect()
+
+        for folder, (folder_path, _extensions) in self.folders.items():
+            known = {
+                row['name']: row for row in conn.execute(
+                    "SELECT name, size, mtime_ns, metadata_mtime_ns FROM catalog_entries WHERE folder = ?",
+                    (folder,)
+                )
+            }
+            rows = []
+            seen = set()
+
+            if os.path.isdir(folder_path):
+                with os.scandir(folder_path) as entries:
+                    for dir_entry in entries:
+                        if not dir_entry.is_file() or not self._is_audio_file(folder, dir_entry.name):
+                            continue
+                        seen.add(dir_entry.name)
+                        file_stat = dir_entry.stat()
+                        metadata_mtime_ns = self._metadata_mtime_ns(folder, dir_entry.name)
+
+                        existing = known.get(dir_entry.name)
+                        if self._is_unchanged(existing, file_stat, metadata_mtime_ns):
+                            stats['unchanged'] += 1
+                            continue
+
+                        rows.append(self._build_row(folder, dir_entry.name, file_stat))
+                        stats['updated' if existing is not None else 'added'] += 1
+
+            removed = [name for name in known if name not in seen]
+            stats['removed'] += len(removed)
+
+            with self._write_lock, conn:
+                for row in rows:
+                    self._upsert(conn, row)
+                for name in removed:
+                    self._delete(conn, folder, name)
+                for name in [row['name'] for row in rows] + removed:
+                    self._refresh_siblings(conn, folder, name)
+
+        logger.info(f"📇 Catalog reconciled: {stats}")
+        return stats
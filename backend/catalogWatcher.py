@@ -0,0 +1,313 @@
+# Rules applied
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# inotify event masks (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Quiet period before a burst of events is applied, and the longest an event may wait
+DEBOUNCE_SECONDS = 0.2
+MAX_LATENCY_SECONDS = 0.5
+POLL_INTERVAL_SECONDS = 0.5
+# Wait before retrying a catalog update that failed (e.g. database locked)
+RETRY_SECONDS = 1.0
+# Files created this recently are re-stat'ed by the poller to catch writes still in progress
+RECENT_FILE_SECONDS = 10.0
+
+
+class _Inotify:
+    """Minimal ctypes binding of the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        # Fails harmlessly when the kernel already dropped the watch
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Yield (wd, mask, name) for every pending event."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class CatalogWatcher:
+    """
+    Background thread that keeps the ringtone catalog in sync with its folders.
+
+    Uses inotify on Linux and falls back to polling elsewhere. Events are debounced
+    and applied incrementally, one file at a time, so files dropped in by other tools
+    show up in listings within a second without a full rescan.
+    """
+
+    def __init__(self, catalog_service, poll_interval: float = POLL_INTERVAL_SECONDS):
+        """
+        Args:
+            catalog_service: RingtoneCatalogService to keep up to date
+            poll_interval: Seconds between scans when inotify is not available
+        """
+        self.catalog_service = catalog_service
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Set[Tuple[str, str]] = set()
+        self._rescan_needed = False
+
+    def start(self) -> None:
+        """Start the watcher thread (inotify when available, polling otherwise)."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        target = self._run_polling
+        self.backend = 'polling'
+        if sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+                self._watches = {}
+                for folder, (folder_path, _extensions) in self.catalog_service.folders.items():
+                    self._watches[self._inotify.add_watch(folder_path, WATCH_MASK)] = folder
+                target = self._run_inotify
+                self.backend = 'inotify'
+            except (OSError, AttributeError) as e:
+                logger.warning(f"⚠️ inotify not available, falling back to polling: {e}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=target, name='catalog-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Catalog watcher started ({self.backend})")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the watcher thread and wait for it to exit."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("👀 Catalog watcher stopped")
+
+    def _queue(self, folder: str, name: str) -> None:
+        """Queue a changed file; sidecar changes re-index the audio files they describe."""
+        if name.lower().endswith('.json'):
+            base_name = name.rsplit('.', 1)[0]
+            for extension in self.catalog_service.folders[folder][1]:
+                self._pending.add((folder, base_name + extension))
+        else:
+            self._pending.add((folder, name))
+
+    def _flush(self) -> None:
+        """Apply every queued change to the catalog."""
+        if self._rescan_needed:
+            self._rescan_needed = False
+            self._pending.clear()
+            self.catalog_service.reconcile()
+            return
+
+        pending, self._pending = self._pending, set()
+        for folder, name in sorted(pending):
+            try:
+                self.catalog_service.index_file(folder, name)
+            except Exception as e:
+                logger.error(f"❌ Error updating catalog for {folder}/{name}: {e}")
+
+    def _add_missing_watches(self) -> bool:
+        """Watch folders that exist again after being deleted or moved away; True if any watch was added."""
+        added = False
+        watched = set(self._watches.values())
+        for folder, (folder_path, _extensions) in self.catalog_service.folders.items():
+            if folder in watched or not os.path.isdir(folder_path):
+                continue
+            try:
+                self._watches[self._inotify.add_watch(folder_path, WATCH_MASK)] = folder
+                logger.info(f"👀 Watching {folder} again")
+                added = True
+            except OSError as e:
+                logger.warning(f"⚠️ Could not watch {folder} again: {e}")
+        return added
+
+    def _run_inotify(self) -> None:
+        first_event_at = None
+        last_event_at = None
+        inotify_failed = False
+        try:
+            while not self._stop_event.is_set():
+                timeout = 1.0
+                if last_event_at is not None:
+                    now = time.monotonic()
+                    timeout = max(0.0, min(last_event_at + DEBOUNCE_SECONDS, first_event_at + MAX_LATENCY_SECONDS) - now)
+
+                try:
+                    readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+                    events = list(self._inotify.read_events()) if readable else []
+                except OSError as e:
+                    logger.error(f"❌ inotify failed, falling back to polling: {e}")
+                    inotify_failed = True
+                    break
+
+                # One failed iteration (e.g. the database is locked) must not end the watcher
+                try:
+                    for wd, mask, name in events:
+                        if mask & IN_Q_OVERFLOW:
+                            logger.warning("⚠️ inotify queue overflow, scheduling a full reconcile")
+                            self._rescan_needed = True
+                        elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                            folder = self._watches.pop(wd, None)
+                            if folder is None:
+                                continue
+                            if mask & IN_MOVE_SELF:
+                                # The watch would follow the folder to its new place
+                                self._inotify.rm_watch(wd)
+                            logger.warning(f"⚠️ Watched folder {folder} went away")
+                            self._rescan_needed = True
+                        elif name and not mask & IN_ISDIR and wd in self._watches:
+                            self._queue(self._watches[wd], name)
+                        else:
+                            continue
+                        now = time.monotonic()
+                        first_event_at = first_event_at or now
+                        last_event_at = now
+
+                    # A recreated folder gets no event of its own, so look for it on every wake-up
+                    if len(self._watches) < len(self.catalog_service.folders) and self._add_missing_watches():
+                        self._rescan_needed = True
+                        now = time.monotonic()
+                        first_event_at = first_event_at or now
+                        last_event_at = now
+
+                    if last_event_at is not None:
+                        now = time.monotonic()
+                        if now - last_event_at >= DEBOUNCE_SECONDS or now - first_event_at >= MAX_LATENCY_SECONDS:
+                            first_event_at = last_event_at = None
+                            self._flush()
+                except Exception as e:
+                    logger.error(f"❌ Error updating catalog, full reconcile in {RETRY_SECONDS:.0f} s: {e}")
+                    self._rescan_needed = True
+                    self._stop_event.wait(RETRY_SECONDS)
+                    first_event_at = last_event_at = time.monotonic()
+        finally:
+            self._inotify.close()
+
+        if inotify_failed and not self._stop_event.is_set():
+            self.backend = 'polling'
+            self._run_polling()
+
+    def _scan_folder(self, folder_path: str) -> Dict[str, Tuple[int, int]]:
+        """Return name -> (size, mtime_ns) for the files of a folder."""
+        snapshot = {}
+        if os.path.isdir(folder_path):
+            with os.scandir(folder_path) as entries:
+                for dir_entry in entries:
+                    if dir_entry.is_file():
+                        file_stat = dir_entry.stat()
+                        snapshot[dir_entry.name] = (file_stat.st_size, file_stat.st_mtime_ns)
+        return snapshot
+
+    def _run_polling(self) -> None:
+        """
+        Poll the folders: a folder is only re-listed when its own mtime changes
+        (files added, removed or renamed); recently created files are re-stat'ed
+        individually so writes that finish after creation are still picked up.
+        """
+        folder_mtimes: Dict[str, int] = {}
+        snapshots: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        recent: Dict[Tuple[str, str], float] = {}
+
+        for folder, (folder_path, _extensions) in self.catalog_service.folders.items():
+            try:
+                folder_mtimes[folder] = os.stat(folder_path).st_mtime_ns
+            except FileNotFoundError:
+                folder_mtimes[folder] = None
+            snapshots[folder] = self._scan_folder(folder_path)
+
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                now = time.monotonic()
+                for folder, (folder_path, _extensions) in self.catalog_service.folders.items():
+                    try:
+                        folder_mtime = os.stat(folder_path).st_mtime_ns
+                    except FileNotFoundError:
+                        folder_mtime = None
+
+                    if folder_mtime != folder_mtimes[folder]:
+                        folder_mtimes[folder] = folder_mtime
+                        snapshot = self._scan_folder(folder_path)
+                        previous = snapshots[folder]
+                        for name in set(snapshot) | set(previous):
+                            if snapshot.get(name) != previous.get(name):
+                                self._queue(folder, name)
+                                if name in snapshot:
+                                    recent[(folder, name)] = now
+                        snapshots[folder] = snapshot
+
+                for (folder, name), seen_at in list(recent.items()):
+                    if now - seen_at > RECENT_FILE_SECONDS:
+                        del recent[(folder, name)]
+                        continue
+                    try:
+                        file_stat = os.stat(os.path.join(self.catalog_service.folders[folder][0], name))
+                        signature = (file_stat.st_size, file_stat.st_mtime_ns)
+                    except FileNotFoundError:
+                        signature = None
+                    if signature != snapshots[folder].get(name):
+                        if signature is None:
+                            snapshots[folder].pop(name, None)
+                        else:
+                            snapshots[folder][name] = signature
+                        self._queue(folder, name)
+
+                if self._pending:
+                    self._flush()
+            except Exception as e:
+                logger.error(f"❌ Error polling catalog folders: {e}")
@@ -0,0 +1,286 @@
+# Rules applied
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from batchCutService import decoded_pcm
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Features are computed on mono audio at about this rate (chroma and timbre need no more than 5.5 kHz)
+ANALYSIS_SAMPLE_RATE = 11025
+FFT_SIZE = 2048
+HOP_SIZE = 1024
+# STFT frames averaged into one self-similarity segment (about 0.46 s)
+SEGMENT_FRAMES = 5
+MEL_BANDS = 24
+MFCC_COEFFICIENTS = 13
+# Weight of the chroma (harmony) features against the MFCC (timbre) features
+CHROMA_WEIGHT = 0.6
+# Weight of repetition against loudness in a window's score
+REPETITION_WEIGHT = 0.65
+# Candidates may overlap each other by at most this fraction of their length
+MAX_CANDIDATE_OVERLAP = 0.5
+MAX_CANDIDATES = 10
+CACHED_SOURCES = 32
+
+
+def _load_mono(source_path: str, ffmpeg_binary: Optional[str] = None) -> Tuple[np.ndarray, float]:
+    """
+    Return a source as mono float32 samples at about ANALYSIS_SAMPLE_RATE, and the actual rate.
+
+    A 16-bit PCM WAV is mapped and decimated in NumPy; anything else is decoded by
+    ffmpeg straight to mono at the analysis rate.
+    """
+    decode_args = ['-codec:a', 'pcm_s16le', '-ac', '1', '-ar', str(ANALYSIS_SAMPLE_RATE), '-f', 'wav']
+    with decoded_pcm(source_path, ffmpeg_binary, output_args=decode_args) as pcm:
+        view = pcm.slice(0, pcm.duration)
+        samples = np.frombuffer(view, dtype='<i2').reshape(-1, pcm.channels)
+
+        # Average the channels and blocks of `factor` frames (a crude low-pass before decimation)
+        factor = max(1, round(pcm.sample_rate / ANALYSIS_SAMPLE_RATE))
+        frames = len(samples) - len(samples) % factor
+        mono = samples[:frames].reshape(-1, factor * pcm.channels).mean(axis=1, dtype=np.float32) / 32768.0
+        del samples
+        return mono, pcm.sample_rate / factor
+
+
+def _filter_banks(sample_rate: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the chroma (bins x 12) and mel (bins x MEL_BANDS) matrices and the DCT matrix for MFCCs."""
+    frequencies = np.arange(FFT_SIZE // 2 + 1) * sample_rate / FFT_SIZE
+
+    # Chroma: every bin from C2 to about B7 adds to its pitch class
+    chroma = np.zeros((len(frequencies), 12), dtype=np.float32)
+    audible = (frequencies >= 65) & (frequencies <= 4000)
+    pitch_classes = np.round(12 * np.log2(frequencies[audible] / 440.0) + 69).astype(int) % 12
+    chroma[np.flatnonzero(audible), pitch_classes] = 1.0
+
+    # Triangular mel filters from 60 Hz to 5 kHz
+    def to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    edges = 700 * (10 ** (np.linspace(to_mel(60), to_mel(min(5000, sample_rate / 2)), MEL_BANDS + 2) / 2595) - 1)
+    mel = np.zeros((len(frequencies), MEL_BANDS), dtype=np.float32)
+    for band in range(MEL_BANDS):
+        low, center, high = edges[band:band + 3]
+        rising = (frequencies - low) / (center - low)
+        falling = (high - frequencies) / (high - center)
+        mel[:, band] = np.clip(np.minimum(rising, falling), 0, None)
+
+    # Orthonormal DCT-II, keeping MFCC_COEFFICIENTS coefficients
+    n = np.arange(MEL_BANDS)
+    dct = np.cos(np.pi / MEL_BANDS * (n[:, None] + 0.5) * np.arange(MFCC_COEFFICIENTS)[None, :]).astype(np.float32)
+    dct *= np.sqrt(2 / MEL_BANDS)
+    dct[:, 0] /= np.sqrt(2)
+    return chroma, mel, dct
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def compute_segment_features(mono: np.ndarray, sample_rate: float) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Compute unit-length chroma + MFCC features and the RMS energy of every segment.
+
+    Returns:
+        tuple: (features of shape (segments, 12 + MFCC_COEFFICIENTS - 1), energy per
+            segment, segment length in seconds)
+    """
+    if len(mono) < FFT_SIZE:
+        mono = np.pad(mono, (0, FFT_SIZE - len(mono)))
+    frames = np.lib.stride_tricks.sliding_window_view(mono, FFT_SIZE)[::HOP_SIZE]
+    segments = max(1, len(frames) // SEGMENT_FRAMES)
+    frames = frames[:segments * SEGMENT_FRAMES]
+
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+    energy = np.sqrt(np.mean(np.square(frames), axis=1))
+
+    chroma_bank, mel_bank, dct = _filter_banks(sample_rate)
+    chroma = _normalize_rows(power @ chroma_bank)
+    mfcc = np.log(power @ mel_bank + 1e-6) @ dct
+
+    # Average the frames of each segment; MFCCs without c0 (loudness), standardized per coefficient
+    chroma = _normalize_rows(chroma.reshape(segments, SEGMENT_FRAMES, 12).mean(axis=1))
+    mfcc = mfcc.reshape(segments, SEGMENT_FRAMES, MFCC_COEFFICIENTS).mean(axis=1)[:, 1:]
+    mfcc = _normalize_rows((mfcc - mfcc.mean(axis=0)) / np.maximum(mfcc.std(axis=0), 1e-9))
+    features = _normalize_rows(np.hstack([chroma * np.sqrt(CHROMA_WEIGHT), mfcc * np.sqrt(1 - CHROMA_WEIGHT)]))
+
+    energy = energy.reshape(segments, SEGMENT_FRAMES).mean(axis=1)
+    return features.astype(np.float32), energy.astype(np.float32), SEGMENT_FRAMES * HOP_SIZE / sample_rate
+
+
+def _window_means(values: np.ndarray, length: int) -> np.ndarray:
+    """Mean of every run of `length` consecutive values."""
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    return (sums[length:] - sums[:-length]) / length
+
+
+def repetition_scores(similarity: np.ndarray, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score every window of `length` segments by how well it repeats elsewhere.
+
+    A repeat of a window at lag k shows up in the self-similarity matrix as a run of
+    high values along the k-th diagonal, so every diagonal is averaged over runs of
+    `length` segments; a window keeps the best such run over all lags and the start
+    of the matching window.
+
+    Returns:
+        tuple: (score per window start, start segment of its best repeat or -1)
+    """
+    count = len(similarity) - length + 1
+    scores = np.zeros(count, dtype=np.float32)
+    partners = np.full(count, -1, dtype=np.int64)
+    # Repeats must not overlap the window itself
+    for lag in range(length, len(similarity) - length + 1):
+        means = _window_means(np.diagonal(similarity, lag), length)
+        starts = np.arange(len(means))
+        for first, second in ((starts, starts + lag), (starts + lag, starts)):
+            better = means > scores[first]
+            scores[first[better]] = means[better]
+            partners[first[better]] = second[better]
+    return scores, partners
+
+
+class ChorusLocatorService:
+    """
+    Find the catchy part of a song: its loudest, most repeated section.
+
+    Chroma (harmony) and MFCC-style (timbre) features are computed with NumPy on
+    a mono, downsampled copy of the source and averaged into ~0.5 s segments. The
+    segment self-similarity matrix reveals repeated sections as bright diagonals;
+    windows of the requested ringtone length are scored by repetition and loudness
+    and returned best first, without overlapping each other much. Features and
+    results are cached per source content.
+    """
+
+    def __init__(self, max_cached: int = CACHED_SOURCES):
+        """
+        Args:
+            max_cached: Number of sources whose features are kept in memory
+        """
+        self.max_cached = max_cached
+        self._features: "OrderedDict[str, Dict]" = OrderedDict()
+        self._results: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_put(self, cache: OrderedDict, key, value, limit: int) -> None:
+        with self._lock:
+            cache[key] = value
+            while len(cache) > limit:
+                cache.popitem(last=False)
+
+    def _source_features(self, source_path: str, source_sha256: str, ffmpeg_binary: Optional[str]) -> Dict:
+        with self._lock:
+            cached = self._features.get(source_sha256)
+            if cached is not None:
+                self._features.move_to_end(source_sha256)
+                return cached
+
+        started = time.perf_counter()
+        mono, sample_rate = _load_mono(source_path, ffmpeg_binary)
+        decode_ms = round((time.perf_counter() - started) * 1000, 1)
+        features, energy, segment_seconds = compute_segment_features(mono, sample_rate)
+        analysis = {
+            'features': features,
+            'energy': energy,
+            'segment_seconds': segment_seconds,
+            'duration': len(mono) / sample_rate,
+            'decode_ms': decode_ms,
+            'features_ms': round((time.perf_counter() - started) * 1000 - decode_ms, 1)
+        }
+        self._cache_put(self._features, source_sha256, analysis, self.max_cached)
+        return analysis
+
+    def locate(self, source_path: str, source_sha256: str, length: float = 30.0, count: int = 5,
+               ffmpeg_binary: Optional[str] = None) -> Dict:
+        """
+        Return ranked candidate windows of a ringtone length.
+
+        Args:
+            source_path: Path of the source audio file
+            source_sha256: Content hash of the source (the cache key)
+            length: Ringtone length in seconds
+            count: Maximum number of candidates
+            ffmpeg_binary: Path of ffmpeg for sources that are not 16-bit PCM WAV
+
+        Returns:
+            dict: 'candidates' (start, end, score, repetition, energy and the start of
+                the best repeat), the source duration and timings
+
+        Raises:
+            ValueError: For a length or count out of range
+        """
+        if not 1 <= length <= 600:
+            raise ValueError("length must be between 1 and 600 seconds")
+        if not 1 <= count <= MAX_CANDIDATES:
+            raise ValueError(f"count must be between 1 and {MAX_CANDIDATES}")
+
+        key = (source_sha256, round(float(length), 3), count)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return dict(cached, cached=True)
+
+        started = time.perf_counter()
+        analysis = self._source_features(source_path, source_sha256, ffmpeg_binary)
+        features, energy = analysis['features'], analysis['energy']
+        segment_seconds, duration = analysis['segment_seconds'], analysis['duration']
+
+        window = max(1, min(round(length / segment_seconds), len(features)))
+        similarity = np.clip(features @ features.T, 0, None)
+        repetition, partners = repetition_scores(similarity, window)
+        loudness = _window_means(energy, window)
+        if not len(repetition):
+            repetition = np.zeros(len(loudness), dtype=np.float32)
+            partners = np.full(len(loudness), -1, dtype=np.int64)
+
+        def scale(values):
+            spread = values.max() - values.min()
+            return (values - values.min()) / spread if spread > 0 else np.ones_like(values)
+
+        scores = REPETITION_WEIGHT * scale(repetition) + (1 - REPETITION_WEIGHT) * scale(loudness)
+
+        # Best windows first, skipping any that overlaps a better one too much
+        candidates = []
+        min_distance = max(1, round(window * (1 - MAX_CANDIDATE_OVERLAP)))
+        taken: List[int] = []
+        for start in np.argsort(-scores, kind='stable'):
+            if all(abs(int(start) - other) >= min_distance for other in taken):
+                taken.append(int(start))
+                start_seconds = round(float(start) * segment_seconds, 2)
+                candidates.append({
+                    'start': start_seconds,
+                    'end': round(min(start_seconds + length, duration), 2),
+                    'score': round(float(scores[start]), 4),
+                    'repetition': round(float(repetition[start]), 4),
+                    'energy': round(float(loudness[start]), 4),
+                    'repeats_at': round(int(partners[start]) * segment_seconds, 2) if partners[start] >= 0 else None
+                })
+                if len(candidates) == count:
+                    break
+
+        result = {
+            'length': length,
+            'duration': round(duration, 3),
+            'segment_seconds': round(segment_seconds, 4),
+            'segments': len(features),
+            'candidates': candidates,
+            'decode_ms': analysis['decode_ms'],
+            'features_ms': analysis['features_ms'],
+            'analysis_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        logger.info(f"🎯 Located {len(candidates)} hook candidates of {length:g}s in {duration:.0f}s of audio "
+                    f"({len(features)} segments) in {result['analysis_ms']} ms")
+        # Several lengths per source are typical, so keep more results than feature sets
+        self._cache_put(self._results, key, result, self.max_cached * 4)
+        return dict(result, cached=False)
@@ -0,0 +1,118 @@
+# Rules applied
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Optional
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASH_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hash_cache (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Length of the hex prefix of the SHA-256 digest used as a ringtone ID
+CONTENT_ID_LENGTH = 32
+
+
+def content_id(sha256: str) -> str:
+    """Derive the public ID of a file from its SHA-256 hex digest."""
+    return sha256[:CONTENT_ID_LENGTH]
+
+
+class ContentHashService:
+    """
+    SHA-256 hashing of audio files with a persistent cache.
+
+    Digests are cached per inode together with the file's size and mtime_ns, so a
+    file is only read again after it has actually been modified or replaced.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path of the SQLite database holding the hash cache
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(HASH_CACHE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def hash_stream(stream, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+        """Return the SHA-256 hex digest of a binary stream, read in fixed-size chunks."""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def hash_file(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> str:
+        """
+        Return the SHA-256 hex digest of a file, using the cache when the file is unchanged.
+
+        Args:
+            file_path: Path of the file to hash
+            file_stat: The file's stat result, if the caller already has it
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        if file_stat is None:
+            file_stat = os.stat(file_path)
+
+        conn = self._connect()
+        cached = conn.execute(
+            "SELECT sha256 FROM hash_cache WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+            (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        ).fetchone()
+        if cached:
+            return cached[0]
+
+        with open(file_path, 'rb') as f:
+            sha256 = self.hash_stream(f)
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hash_cache (dev, ino, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns, sha256)
+            )
+        logger.info(f"#️⃣ Hashed {os.path.basename(file_path)}: {sha256[:12]}")
+        return sha256
+
+    def remember(self, file_path: str, sha256: str, file_stat: Optional[os.stat_result] = None) -> None:
+        """Record the digest of a file the caller hashed while writing it, so it is not read again."""
+        if file_stat is None:
+            file_stat = os.stat(file_path)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hash_cache (dev, ino, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns, sha256)
+            )
+
+    def file_content_id(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> str:
+        """Return the content-derived ID of a file."""
+        return content_id(self.hash_file(file_path, file_stat))
@@ -0,0 +1,475 @@
+# Rules applied
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from encoderProfileService import encode_profile
+
+try:
+    import av  # PyAV: encodes in-process with libav instead of starting an ffmpeg process per conversion
+except ImportError:
+    av = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds an idle worker may go without a health check
+HEALTH_CHECK_INTERVAL = 30.0
+# Seconds a worker has to answer a health check
+HEALTH_CHECK_TIMEOUT = 5.0
+# Seconds a single task may run before its worker is considered hung and restarted
+TASK_TIMEOUT = 600.0
+# Attempts to start a worker process, and the first backoff between them (doubled each time)
+SPAWN_ATTEMPTS = 3
+SPAWN_BACKOFF_SECONDS = 0.5
+# 'auto' encodes with PyAV when it is installed; 'ffmpeg' always starts an ffmpeg process
+# (e.g. when the system ffmpeg's encoders are faster than the libav bundled with PyAV)
+ENCODER_ENGINE = os.environ.get('ENCODER_ENGINE', 'auto')
+
+
+def default_pool_size() -> int:
+    """ENCODER_WORKERS (set by wsgiServer for each server process) if positive, else the CPU count."""
+    value = os.environ.get('ENCODER_WORKERS', '')
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return os.cpu_count() or 1
+
+
+class WorkerCrashedError(Exception):
+    """Raised for a task whose worker process died or hung while running it."""
+
+
+def _av_can_encode(profile: Dict) -> bool:
+    """Return True if PyAV's libav build has the profile's encoder and muxer (VBR profiles go to ffmpeg)."""
+    if av is None or ENCODER_ENGINE == 'ffmpeg' or profile['quality'] is not None:
+        return False
+    try:
+        av.codec.Codec(profile['codec'], 'w')
+    except Exception:
+        return False
+    return profile['container'] in av.formats_available
+
+
+def _encode_with_av(source_path: str, output_path: str, profile: Dict) -> Dict:
+    """Decode and encode inside this process with PyAV, writing to a temporary name first."""
+    started = time.perf_counter()
+    partial_path = output_path + '.part'
+    duration_seconds = 0.0
+    try:
+        with av.open(source_path) as source, av.open(partial_path, 'w', format=profile['container']) as output:
+            source_stream = source.streams.audio[0]
+            # WAV sources often carry an unordered layout ("2 channels") that encoders reject
+            channels = profile['channels'] or source_stream.channels
+            layout = {1: 'mono', 2: 'stereo'}.get(channels, source_stream.layout.name)
+            output_stream = output.add_stream(profile['codec'], rate=profile['sample_rate'] or source_stream.rate,
+                                              layout=layout)
+            # Prefer the source's sample format (packed or planar) to save a conversion; PyAV resamples frames to it
+            sample_formats = [sample_format.name for sample_format in output_stream.codec_context.codec.audio_formats or []]
+            for sample_format in (source_stream.format.name, source_stream.format.planar.name):
+                if sample_format in sample_formats:
+                    output_stream.format = sample_format
+                    break
+            if profile['bitrate']:
+                output_stream.bit_rate = int(profile['bitrate'][:-1]) * 1000
+            for frame in source.decode(source_stream):
+                duration_seconds += frame.samples / frame.sample_rate
+                frame.pts = None
+                output.mux(output_stream.encode(frame))
+            output.mux(output_stream.encode(None))
+        os.replace(partial_path, output_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    encode_seconds = time.perf_counter() - started
+    return {
+        'output_path': output_path,
+        'format': profile['extension'],
+        'size': os.path.getsize(output_path),
+        'duration_ms': round(duration_seconds * 1000),
+        'encode_ms': round(encode_seconds * 1000, 1),
+        'realtime_factor': round(encode_seconds / duration_seconds, 4) if duration_seconds else None,
+        'engine': 'pyav'
+    }
+
+
+def encode_file(source_path: str, output_path: str, profile: Dict, ffmpeg_binary: Optional[str] = None) -> Dict:
+    """
+    Worker: encode a file with an encoder profile.
+
+    Uses PyAV inside the worker when it supports the profile, so a conversion costs
+    no process start; otherwise, or if PyAV fails, streams through an ffmpeg process.
+
+    Returns:
+        dict: The transcode result plus 'engine' ('pyav' or 'ffmpeg')
+    """
+    if _av_can_encode(profile):
+        try:
+            return _encode_with_av(source_path, output_path, profile)
+        except av.FFmpegError as e:
+            logger.warning(f"⚠️ PyAV could not encode {profile['name']}, falling back to ffmpeg: {e}")
+    return dict(encode_profile(source_path, output_path, profile, ffmpeg_binary=ffmpeg_binary), engine='ffmpeg')
+
+
+def export_renditions(source_path: str, targets: List[Tuple[Dict, str]],
+                      ffmpeg_binary: Optional[str] = None) -> Dict:
+    """
+    Worker: encode a source with several profiles at once.
+
+    The encodes run concurrently on threads of the worker. A failing profile is
+    reported in its result instead of failing the others.
+
+    Args:
+        source_path: Path of the source audio file
+        targets: (profile, output path) pairs
+        ffmpeg_binary: Path of ffmpeg (looked up on PATH when omitted)
+
+    Returns:
+        dict: Profile name -> encode result, or {'error': ...}
+
+    Raises:
+        RuntimeError: If every encode failed
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(targets) or 1) as executor:
+        futures = {
+            profile['name']: executor.submit(encode_file, source_path, output_path, profile, ffmpeg_binary)
+            for profile, output_path in targets
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {'error': str(e)}
+
+    if targets and all('error' in result for result in results.values()):
+        raise RuntimeError('; '.join(f"{name}: {result['error']}" for name, result in results.items()))
+    return results
+
+
+def _worker_main(conn) -> None:
+    """Worker process loop: run the tasks sent over the pipe until told to stop."""
+    if av is not None:
+        # Load libav's codec tables once per worker instead of on the first conversion
+        _ = av.codecs_available
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message[0] == 'stop':
+            return
+        if message[0] == 'ping':
+            conn.send(('pong', os.getpid()))
+            continue
+
+        _, fn, args, kwargs = message
+        try:
+            reply = ('ok', fn(*args, **kwargs))
+        except Exception as e:
+            reply = ('error', e)
+        try:
+            conn.send(reply)
+        except Exception:
+            # The exception could not be pickled; send its text instead
+            conn.send(('error', RuntimeError(repr(reply[1]))))
+
+
+class EncoderPoolService:
+    """
+    Pool of long-lived encoder worker processes.
+
+    Each worker is a Python process that stays up between conversions, so codecs
+    are loaded once and, with PyAV installed, a conversion starts no process at all.
+    Every worker is driven by a thread in the server process that hands it one task
+    at a time, health-checks it while idle and restarts it if it crashes or hangs;
+    only the task it was running fails. ``submit`` returns a concurrent.futures
+    Future, so the pool can stand in for an executor.
+    """
+
+    def __init__(self, size: Optional[int] = None, health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 task_timeout: float = TASK_TIMEOUT):
+        """
+        Args:
+            size: Number of worker processes (defaults to default_pool_size())
+            health_check_interval: Seconds between health checks of an idle worker
+            task_timeout: Seconds a task may run before its worker is restarted
+        """
+        self.size = size or default_pool_size()
+        self.health_check_interval = health_check_interval
+        self.task_timeout = task_timeout
+        self.engine = 'pyav' if av is not None and ENCODER_ENGINE != 'ffmpeg' else 'ffmpeg'
+        # Spawned, not forked: workers must not inherit the server's threads and locks
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks: "queue.Queue" = queue.Queue()
+        self._workers: List[Dict] = []
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the workers in the background (idempotent)."""
+        with self._lock:
+            if self._workers or self._stopping:
+                return
+            for worker_id in range(self.size):
+                worker = {
+                    'id': worker_id,
+                    'process': None,
+                    'conn': None,
+                    'state': 'starting',
+                    'started': None,
+                    'tasks_completed': 0,
+                    'tasks_failed': 0,
+                    'restarts': 0,
+                    'busy_seconds': 0.0,
+                    'last_task_ms': None,
+                    'last_health_check': None
+                }
+                self._workers.append(worker)
+                thread = threading.Thread(target=self._drive, args=(worker,), name=f"encoder-worker-{worker_id}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            # multiprocessing kills the workers at interpreter exit; they must not be restarted then
+            atexit.register(self._on_exit)
+        logger.info(f"🏭 Encoder pool starting {self.size} workers (engine: {self.engine})")
+
+    def _on_exit(self) -> None:
+        self._stopping = True
+
+    def _spawn(self, worker: Dict) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,),
+                                        name=f"encoder-worker-{worker['id']}", daemon=True)
+        process.start()
+        child_conn.close()
+        worker.update(process=process, conn=parent_conn, started=time.time(), state='idle')
+
+    def _has_live_workers(self) -> bool:
+        """Return True while any worker is running or may still come up (call with the lock held)."""
+        return any(worker['state'] not in ('failed', 'stopped') for worker in self._workers)
+
+    def _fail_queued(self, reason: str) -> None:
+        """Fail every queued task (call with the lock held, once no worker is left to run them)."""
+        sentinels = 0
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                sentinels += 1
+                continue
+            future = task[0]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(WorkerCrashedError(reason))
+        # Keep shutdown's stop markers for workers that recover later
+        for _ in range(sentinels):
+            self._tasks.put(None)
+
+    def _spawn_with_retry(self, worker: Dict) -> bool:
+        """
+        Start a worker process, retrying with exponential backoff.
+
+        Returns:
+            bool: False if every attempt failed; the worker is then marked 'failed'
+                and, if it was the last one left, the queued tasks are failed
+        """
+        error = None
+        for attempt in range(SPAWN_ATTEMPTS):
+            try:
+                self._spawn(worker)
+                return True
+            except Exception as e:
+                error = e
+                logger.warning(f"⚠️ Encoder worker {worker['id']} failed to start "
+                               f"(attempt {attempt + 1}/{SPAWN_ATTEMPTS}): {e}")
+            if attempt + 1 < SPAWN_ATTEMPTS and self._stop_event.wait(SPAWN_BACKOFF_SECONDS * 2 ** attempt):
+                break
+
+        logger.error(f"❌ Encoder worker {worker['id']} could not be started: {error}")
+        with self._lock:
+            worker['state'] = 'failed'
+            if not self._has_live_workers():
+                self._fail_queued(f"No encoder worker could be started: {error}")
+        return False
+
+    def _restart(self, worker: Dict, reason: str) -> bool:
+        """
+        Replace a crashed or hung worker process.
+
+        Returns:
+            bool: False if the worker could not be started again
+        """
+        if self._stopping:
+            worker['state'] = 'stopped'
+            return True
+        logger.warning(f"♻️ Restarting encoder worker {worker['id']} (pid {worker['process'].pid}): {reason}")
+        worker['state'] = 'restarting'
+        try:
+            if worker['process'].is_alive():
+                worker['process'].kill()
+            worker['process'].join(5)
+            worker['conn'].close()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not clean up encoder worker {worker['id']}: {e}")
+        worker['restarts'] += 1
+        return self._spawn_with_retry(worker)
+
+    @staticmethod
+    def _call(worker: Dict, message: tuple, timeout: float):
+        """
+        Send a message to a worker and wait for its reply.
+
+        Raises:
+            WorkerCrashedError: If the worker dies or does not answer within timeout
+        """
+        conn = worker['conn']
+        try:
+            conn.send(message)
+            deadline = time.monotonic() + timeout
+            while not conn.poll(0.5):
+                if not worker['process'].is_alive():
+                    raise WorkerCrashedError(f"exited with code {worker['process'].exitcode}")
+                if time.monotonic() > deadline:
+                    raise WorkerCrashedError(f"no answer within {timeout:g}s")
+            return conn.recv()
+        except (EOFError, OSError) as e:
+            worker['process'].join(1)
+            raise WorkerCrashedError(f"exited with code {worker['process'].exitcode} ({str(e) or type(e).__name__})")
+
+    def _health_check(self, worker: Dict) -> bool:
+        try:
+            self._call(worker, ('ping',), HEALTH_CHECK_TIMEOUT)
+            worker['last_health_check'] = time.time()
+            return True
+        except WorkerCrashedError as e:
+            return self._restart(worker, f"health check failed: {e}")
+
+    def _drive(self, worker: Dict) -> None:
+        """Feed tasks to one worker process, keeping it alive (runs on its own thread)."""
+        ready = self._spawn_with_retry(worker)
+        while True:
+            if not ready:
+                # Keep trying at the health check pace, leaving the queue to the other workers
+                if self._stop_event.wait(self.health_check_interval):
+                    break
+                ready = self._spawn_with_retry(worker)
+                continue
+            try:
+                task = self._tasks.get(timeout=self.health_check_interval)
+            except queue.Empty:
+                ready = self._health_check(worker)
+                continue
+            if task is None:
+                break
+
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            worker['state'] = 'busy'
+            started = time.perf_counter()
+            try:
+                status, payload = self._call(worker, ('task', fn, args, kwargs), self.task_timeout)
+            except WorkerCrashedError as e:
+                worker['tasks_failed'] += 1
+                future.set_exception(WorkerCrashedError(f"Encoder worker {worker['id']} crashed: {e}"))
+                ready = self._restart(worker, str(e))
+                continue
+            except Exception as e:
+                # The task itself could not be sent (e.g. unpicklable arguments)
+                status, payload = 'error', e
+            finally:
+                elapsed = time.perf_counter() - started
+                worker['busy_seconds'] += elapsed
+                worker['last_task_ms'] = round(elapsed * 1000, 1)
+                worker['state'] = 'idle'
+
+            if status == 'ok':
+                worker['tasks_completed'] += 1
+                future.set_result(payload)
+            else:
+                worker['tasks_failed'] += 1
+                future.set_exception(payload)
+
+        worker['state'] = 'stopped'
+        if not ready:
+            return
+        try:
+            worker['conn'].send(('stop',))
+        except OSError:
+            pass
+        worker['process'].join(5)
+        if worker['process'].is_alive():
+            worker['process'].kill()
+        worker['conn'].close()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Run a picklable top-level function on the next free worker.
+
+        Returns:
+            Future: Resolves to the function's return value, or its exception
+                (WorkerCrashedError if the worker died while running it, or if
+                no worker process can be started)
+        """
+        if self._stopping:
+            raise RuntimeError("Encoder pool is shut down")
+        self.start()
+        future = Future()
+        with self._lock:
+            if not self._has_live_workers():
+                future.set_exception(WorkerCrashedError("No encoder worker could be started"))
+                return future
+            self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def stats(self) -> Dict:
+        """Return pool and per-worker metrics."""
+        now = time.time()
+        workers = []
+        for worker in list(self._workers):
+            process = worker['process']
+            uptime = now - worker['started'] if worker['started'] else 0
+            workers.append({
+                'id': worker['id'],
+                'pid': process.pid if process else None,
+                'state': worker['state'],
+                'alive': bool(process and process.is_alive()),
+                'tasks_completed': worker['tasks_completed'],
+                'tasks_failed': worker['tasks_failed'],
+                'restarts': worker['restarts'],
+                'busy_ms': round(worker['busy_seconds'] * 1000, 1),
+                'last_task_ms': worker['last_task_ms'],
+                'uptime_s': round(uptime, 1),
+                'last_health_check': (datetime.fromtimestamp(worker['last_health_check']).isoformat()
+                                      if worker['last_health_check'] else None)
+            })
+        return {
+            'size': self.size,
+            'engine': self.engine,
+            'queued': self._tasks.qsize(),
+            'busy': sum(1 for worker in workers if worker['state'] == 'busy'),
+            'workers': workers
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers once the queued tasks have been handed out."""
+        self._stopping = True
+        self._stop_event.set()
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,192 @@
+# Rules applied
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from streamingTranscoder import transcode
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Built-in encoder profiles; a deployment adds or overrides profiles in its encoder_profiles.json.
+# A profile sets either a constant bitrate or a VBR quality, and optionally resamples or downmixes.
+DEFAULT_ENCODER_PROFILES = {
+    'wav': {'codec': 'pcm_s16le', 'container': 'wav', 'extension': 'wav'},
+    'mp3_128': {'codec': 'libmp3lame', 'container': 'mp3', 'extension': 'mp3', 'bitrate': '128k'},
+    'mp3_vbr': {'codec': 'libmp3lame', 'container': 'mp3', 'extension': 'mp3', 'quality': 4},
+    'aac_64': {'codec': 'aac', 'container': 'ipod', 'extension': 'm4a', 'bitrate': '64k'},
+    'm4r_128': {'codec': 'aac', 'container': 'ipod', 'extension': 'm4r', 'bitrate': '128k'},
+    'opus_96': {'codec': 'libopus', 'container': 'ogg', 'extension': 'opus', 'bitrate': '96k', 'sample_rate': 48000},
+    'ogg_q4': {'codec': 'libvorbis', 'container': 'ogg', 'extension': 'ogg', 'quality': 4}
+}
+
+# Profiles encoded for a new ringtone when neither the deployment nor the request picks any
+DEFAULT_PROFILE_NAMES = ['mp3_128']
+
+PROFILE_NAME_PATTERN = re.compile(r'^[a-z0-9_]{1,32}$')
+TOKEN_PATTERN = re.compile(r'^[a-z0-9_]{1,32}$')
+BITRATE_PATTERN = re.compile(r'^\d{1,4}k$')
+FOLDER_PATTERN = re.compile(r'^[a-z0-9]{1,16}_ringtones$')
+SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+
+def validate_profile(name: str, profile: Dict) -> Dict:
+    """
+    Validate an encoder profile and fill in its defaults.
+
+    Every value ends up on an ffmpeg command line or in a folder name, so only known
+    shapes are accepted.
+
+    Returns:
+        dict: The normalized profile, including 'name' and 'folder'
+
+    Raises:
+        ValueError: If the profile is malformed
+    """
+    if not PROFILE_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid encoder profile name: {name!r}")
+    if not isinstance(profile, dict):
+        raise ValueError(f"Encoder profile {name} must be an object")
+    for field in ('codec', 'container', 'extension'):
+        if not isinstance(profile.get(field), str) or not TOKEN_PATTERN.match(profile[field]):
+            raise ValueError(f"Encoder profile {name}: invalid {field}")
+
+    bitrate = profile.get('bitrate')
+    quality = profile.get('quality')
+    if bitrate is not None and (not isinstance(bitrate, str) or not BITRATE_PATTERN.match(bitrate)):
+        raise ValueError(f"Encoder profile {name}: bitrate must look like '128k'")
+    if quality is not None and (isinstance(quality, bool) or not isinstance(quality, (int, float))
+                                or not 0 <= quality <= 10):
+        raise ValueError(f"Encoder profile {name}: quality must be a number from 0 to 10")
+    if bitrate is not None and quality is not None:
+        raise ValueError(f"Encoder profile {name}: set either bitrate or quality, not both")
+
+    sample_rate = profile.get('sample_rate')
+    if sample_rate is not None and sample_rate not in SAMPLE_RATES:
+        raise ValueError(f"Encoder profile {name}: unsupported sample_rate {sample_rate}")
+    channels = profile.get('channels')
+    if channels is not None and channels not in (1, 2):
+        raise ValueError(f"Encoder profile {name}: channels must be 1 or 2")
+
+    folder = profile.get('folder') or f"{profile['extension']}_ringtones"
+    if not FOLDER_PATTERN.match(folder):
+        raise ValueError(f"Encoder profile {name}: invalid folder {folder!r}")
+
+    return {
+        'name': name,
+        'codec': profile['codec'],
+        'container': profile['container'],
+        'extension': profile['extension'],
+        'bitrate': bitrate,
+        'quality': quality,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'folder': folder
+    }
+
+
+def encoder_args(profile: Dict) -> List[str]:
+    """Return the ffmpeg output options of a profile."""
+    args = ['-codec:a', profile['codec']]
+    if profile['bitrate']:
+        args += ['-b:a', profile['bitrate']]
+    elif profile['quality'] is not None:
+        args += ['-q:a', str(profile['quality'])]
+    if profile['sample_rate']:
+        args += ['-ar', str(profile['sample_rate'])]
+    if profile['channels']:
+        args += ['-ac', str(profile['channels'])]
+    return args + ['-f', profile['container']]
+
+
+def is_plain_wav(profile: Dict) -> bool:
+    """Return True for 16-bit PCM WAV that keeps the source's rate and channels (no encoder needed)."""
+    return (profile['codec'] == 'pcm_s16le' and profile['container'] == 'wav'
+            and not profile['sample_rate'] and not profile['channels'])
+
+
+def encode_profile(source, output, profile: Dict, ffmpeg_binary: Optional[str] = None,
+                   input_args: Optional[List[str]] = None) -> Dict:
+    """Encode a source (path or file object) with an encoder profile; see streamingTranscoder.transcode."""
+    return transcode(source, output, profile['extension'], bitrate=None, ffmpeg_binary=ffmpeg_binary,
+                     input_args=input_args, output_args=encoder_args(profile))
+
+
+class EncoderProfileService:
+    """
+    Named encoder profiles for ringtone renditions.
+
+    The built-in profiles can be extended or overridden per deployment with a JSON
+    file ({"profiles": {name: profile}, "default_profiles": [names]}), and a request
+    can pick any of them by name. Each profile writes to its own rendition folder
+    (e.g. ``opus_ringtones``) next to the WAV and MP3 folders.
+    """
+
+    def __init__(self, config_path: Optional[str] = None):
+        """
+        Args:
+            config_path: Optional JSON file with deployment profiles and defaults
+        """
+        self.config_path = config_path
+        self.profiles = {name: validate_profile(name, profile) for name, profile in DEFAULT_ENCODER_PROFILES.items()}
+        self.default_profiles = list(DEFAULT_PROFILE_NAMES)
+
+        if config_path and os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            for name, profile in (config.get('profiles') or {}).items():
+                self.profiles[name] = validate_profile(name, profile)
+            if config.get('default_profiles') is not None:
+                self.default_profiles = self._check_names(config['default_profiles'])
+            logger.info(f"🎚️ Loaded encoder profiles from {config_path}")
+
+        folder_extensions = {}
+        for profile in self.profiles.values():
+            folder_extensions.setdefault(profile['folder'], set()).add(profile['extension'])
+        logger.info(f"🎚️ Encoder profiles: {', '.join(sorted(self.profiles))} (default: {', '.join(self.default_profiles)})")
+        self._folder_extensions = folder_extensions
+
+    def _check_names(self, names: Iterable[str]) -> List[str]:
+        names = list(names)
+        unknown = [name for name in names if name not in self.profiles]
+        if unknown:
+            raise ValueError(f"Unknown encoder profile: {', '.join(map(str, unknown))}")
+        return names
+
+    def folders(self) -> Dict[str, Tuple[str, ...]]:
+        """Return every rendition folder used by a profile with the file extensions it holds."""
+        return {folder: tuple(f".{extension}" for extension in sorted(extensions))
+                for folder, extensions in self._folder_extensions.items()}
+
+    def resolve(self, names: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Return the profiles selected by name (the deployment defaults when none are given).
+
+        Raises:
+            ValueError: For unknown names, or two profiles writing to the same folder
+        """
+        names = list(dict.fromkeys(names)) if names else self.default_profiles
+        profiles = [self.profiles[name] for name in self._check_names(names)]
+        folders = {}
+        for profile in profiles:
+            if profile['folder'] in folders:
+                raise ValueError(f"Encoder profiles {folders[profile['folder']]} and {profile['name']} "
+                                 f"both write to {profile['folder']}")
+            folders[profile['folder']] = profile['name']
+        return profiles
+
+    def list_profiles(self) -> Dict:
+        """Return the profiles and defaults for the API."""
+        return {'profiles': self.profiles, 'default_profiles': self.default_profiles}
+
+    @staticmethod
+    def cache_key_fields(profile: Dict) -> Dict:
+        """Return the rendition cache key fields that identify a profile's output."""
+        bitrate = profile['bitrate']
+        if bitrate is None and profile['quality'] is not None:
+            bitrate = f"q{profile['quality']}"
+        return {'codec': profile['extension'], 'bitrate': bitrate,
+                'sample_rate': profile['sample_rate'], 'channels': profile['channels']}
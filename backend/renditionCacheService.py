@@ -0,0 +1,263 @@
+# Rules applied
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RENDITION_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rendition_cache (
+    key TEXT PRIMARY KEY,
+    source_sha256 TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER,
+    codec TEXT NOT NULL,
+    bitrate TEXT,
+    sample_rate INTEGER,
+    channels INTEGER,
+    file_name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_rendition_cache_last_used ON rendition_cache (last_used);
+"""
+
+# ioctl request number of FICLONE (<linux/fs.h>): share the extents of another file, copy-on-write
+FICLONE = 0x40049409
+
+
+def _reflink(source_path: str, target_path: str) -> None:
+    """Clone a file with FICLONE; raises OSError where reflinks are not supported."""
+    import fcntl  # Not available on Windows; the ImportError is handled by the caller
+
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+def link_or_copy(source_path: str, target_path: str) -> str:
+    """
+    Make target_path a copy of source_path without copying data where possible.
+
+    Tries a reflink (copy-on-write clone), then a hardlink, then falls back to a
+    plain copy. The target appears atomically under its final name.
+
+    Returns:
+        str: 'reflink', 'hardlink' or 'copy'
+    """
+    partial_path = target_path + '.part'
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    try:
+        try:
+            _reflink(source_path, partial_path)
+            method = 'reflink'
+        except (ImportError, OSError):
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            try:
+                os.link(source_path, partial_path)
+                method = 'hardlink'
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    raise
+                shutil.copyfile(source_path, partial_path)
+                method = 'copy'
+        os.replace(partial_path, target_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return method
+
+
+class RenditionCacheService:
+    """
+    Content-addressed cache of encoded renditions.
+
+    An entry is keyed by the SHA-256 of the source audio, the cut range and the
+    encoder settings, so the same ringtone requested again is served by linking the
+    cached file instead of encoding it again. Cached files are never modified in
+    place (encoders write to a temporary name and rename), which is what makes
+    sharing them through hardlinks safe. The cache is bounded by a byte budget and
+    evicts the least recently used entries.
+    """
+
+    def __init__(self, cache_dir: str, db_path: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: Folder holding the cached files; should be on the same file
+                system as the ringtone folders so hits can be hardlinked
+            db_path: Path of the SQLite database holding the cache index
+            max_bytes: Byte budget of the cache
+        """
+        self.cache_dir = cache_dir
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bytes_saved': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(RENDITION_CACHE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[counter] += amount
+
+    @staticmethod
+    def make_key(source_sha256: str, start: float, end: Optional[float], codec: str, bitrate: Optional[str],
+                 sample_rate: Optional[int] = None, channels: Optional[int] = None) -> Dict:
+        """
+        Build the cache key of a rendition.
+
+        Args:
+            source_sha256: SHA-256 hex digest of the source audio
+            start: Start of the cut in seconds (0 for the whole file)
+            end: End of the cut in seconds (None for the whole file)
+            codec: Output format, e.g. 'mp3'
+            bitrate: Output bitrate, e.g. '128k' (None for lossless)
+            sample_rate: Output sample rate (None to keep the source's)
+            channels: Output channel count (None to keep the source's)
+
+        Returns:
+            dict: The key fields plus 'key', their digest
+        """
+        fields = {
+            'source_sha256': source_sha256,
+            'start_ms': round(start * 1000),
+            'end_ms': round(end * 1000) if end is not None else None,
+            'codec': codec,
+            'bitrate': bitrate,
+            'sample_rate': sample_rate,
+            'channels': channels
+        }
+        canonical = '|'.join('' if fields[name] is None else str(fields[name]) for name in sorted(fields))
+        fields['key'] = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        return fields
+
+    def _cache_path(self, file_name: str) -> str:
+        return os.path.join(self.cache_dir, file_name)
+
+    def fetch(self, key: Dict, target_path: str) -> Optional[str]:
+        """
+        Materialize a cached rendition at target_path.
+
+        Args:
+            key: Key built by make_key
+            target_path: Where the rendition should appear
+
+        Returns:
+            str: How it was materialized ('reflink', 'hardlink' or 'copy'), or None on a miss
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT file_name, size FROM rendition_cache WHERE key = ?", (key['key'],)).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+
+        try:
+            method = link_or_copy(self._cache_path(row['file_name']), target_path)
+        except FileNotFoundError:
+            # The cached file vanished behind our back; forget it
+            with self._write_lock, conn:
+                conn.execute("DELETE FROM rendition_cache WHERE key = ?", (key['key'],))
+            self._count('misses')
+            return None
+
+        with self._write_lock, conn:
+            conn.execute("UPDATE rendition_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                         (time.time(), key['key']))
+        self._count('hits')
+        self._count('bytes_saved', row['size'])
+        logger.info(f"♻️ Rendition cache hit ({method}): {os.path.basename(target_path)}")
+        return method
+
+    def store(self, key: Dict, rendition_path: str) -> None:
+        """
+        Add a freshly encoded rendition to the cache and evict down to the byte budget.
+
+        The file is linked into the cache rather than copied where the file system allows.
+        """
+        file_name = f"{key['key']}.{key['codec']}"
+        size = os.path.getsize(rendition_path)
+        if size > self.max_bytes:
+            return
+
+        link_or_copy(rendition_path, self._cache_path(file_name))
+        now = time.time()
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO rendition_cache (key, source_sha256, start_ms, end_ms, codec, bitrate, "
+                "sample_rate, channels, file_name, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key['key'], key['source_sha256'], key['start_ms'], key['end_ms'], key['codec'], key['bitrate'],
+                 key['sample_rate'], key['channels'], file_name, size, now, now)
+            )
+        self._count('stores')
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits its byte budget."""
+        conn = self._connect()
+        with self._write_lock:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM rendition_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            evicted = []
+            for row in conn.execute("SELECT key, file_name, size FROM rendition_cache ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(row)
+                total -= row['size']
+
+            with conn:
+                conn.executemany("DELETE FROM rendition_cache WHERE key = ?", [(row['key'],) for row in evicted])
+
+        for row in evicted:
+            try:
+                os.remove(self._cache_path(row['file_name']))
+            except FileNotFoundError:
+                pass
+        self._count('evictions', len(evicted))
+        logger.info(f"🧹 Rendition cache evicted {len(evicted)} entries")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters since startup plus the current size of the cache."""
+        entries, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM rendition_cache"
+        ).fetchone()
+        with self._stats_lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters.update({
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else None,
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes
+        })
+        return counters
@@ -0,0 +1,442 @@
+# Rules applied
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, time as dtime, timedelta
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEDULE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    id TEXT PRIMARY KEY,
+    ringtone_id TEXT NOT NULL,
+    ringtone_name TEXT NOT NULL,
+    ringtone_url TEXT,
+    ringtone_path TEXT,
+    ringtone_folder TEXT,
+    ringtone_filename TEXT,
+    time_of_day TEXT NOT NULL,
+    days TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    source TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_played TEXT,
+    last_fired_at REAL,
+    next_fire_at REAL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_next_fire ON schedules (next_fire_at) WHERE active = 1;
+CREATE INDEX IF NOT EXISTS idx_schedules_ringtone_id ON schedules (ringtone_id);
+CREATE INDEX IF NOT EXISTS idx_schedules_ringtone_file ON schedules (ringtone_folder, ringtone_filename);
+-- Bumped by every schedule edit, so readers can tell schedule changes from other writes to the shared database
+CREATE TABLE IF NOT EXISTS schedule_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO schedule_version (id, version) VALUES (1, 0);
+"""
+
+SCHEDULE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,100}$')
+# HH:MM (what the schedule form sends) or HH:MM:SS
+TIME_PATTERN = re.compile(r'^([01]\d|2[0-3]):([0-5]\d)(?::([0-5]\d))?$')
+# 'web': the browser plays it, 'device': a Windows scheduled task, 'server': the backend alarm daemon
+SCHEDULE_SOURCES = ('web', 'device', 'server')
+MAX_TEXT_LENGTH = 2000
+MAX_PAGE_SIZE = 1000
+
+# Client field -> column, for the fields a client may set
+SCHEDULE_FIELDS = {
+    'ringtone_id': 'ringtone_id',
+    'ringtone_name': 'ringtone_name',
+    'ringtone_url': 'ringtone_url',
+    'ringtone_path': 'ringtone_path',
+    'ringtone_folder': 'ringtone_folder',
+    'ringtone_filename': 'ringtone_filename',
+    'time': 'time_of_day',
+    'days': 'days',
+    'active': 'active',
+    'source': 'source',
+    'created_at': 'created_at',
+    'last_played': 'last_played'
+}
+
+
+class ScheduleExistsError(Exception):
+    """Raised when a schedule is created with the id of an existing one."""
+
+
+def parse_time_of_day(time_of_day: str) -> dtime:
+    """
+    Parse 'HH:MM' or 'HH:MM:SS' (24-hour).
+
+    Raises:
+        ValueError: For any other format
+    """
+    match = TIME_PATTERN.match(time_of_day) if isinstance(time_of_day, str) else None
+    if not match:
+        raise ValueError("time must be HH:MM (24-hour)")
+    return dtime(int(match.group(1)), int(match.group(2)), int(match.group(3) or 0))
+
+
+def parse_days(days) -> List[int]:
+    """
+    Validate a list of weekdays (0 = Sunday ... 6 = Saturday) and return it sorted without duplicates.
+
+    Raises:
+        ValueError: For an empty list or a value outside 0-6
+    """
+    if not isinstance(days, list) or not days:
+        raise ValueError("days must be a non-empty list of weekdays (0 = Sunday ... 6 = Saturday)")
+    if any(isinstance(day, bool) or not isinstance(day, int) or not 0 <= day <= 6 for day in days):
+        raise ValueError("days must only contain weekdays 0 (Sunday) to 6 (Saturday)")
+    return sorted(set(days))
+
+
+def next_fire_time(time_of_day: str, days: List[int], after: float) -> float:
+    """
+    Return the first occurrence of a weekly schedule strictly after a point in time.
+
+    Works in local time, so an alarm set for 07:00 stays at 07:00 across daylight
+    saving changes.
+
+    Args:
+        time_of_day: 'HH:MM' or 'HH:MM:SS'
+        days: Weekdays of the schedule (0 = Sunday ... 6 = Saturday)
+        after: Epoch seconds
+
+    Returns:
+        float: Epoch seconds of the next occurrence
+    """
+    clock = parse_time_of_day(time_of_day)
+    weekdays = set(parse_days(days))
+    start = datetime.fromtimestamp(after).date()
+    # Eight days: today's occurrence may already be past, the same weekday next week is not
+    for offset in range(8):
+        day = start + timedelta(days=offset)
+        # date.weekday() counts from Monday; the schedules count from Sunday like JavaScript
+        if (day.weekday() + 1) % 7 not in weekdays:
+            continue
+        fire_at = datetime.combine(day, clock).timestamp()
+        if fire_at > after:
+            return fire_at
+    raise ValueError("no occurrence found")
+
+
+class ScheduleStoreService:
+    """
+    Server-side store of the ringtone schedules, shared by every browser and device.
+
+    Each schedule keeps its next fire time precomputed in an indexed column, so
+    "what rings in the next N hours" is an index range scan and "which schedules
+    use this ringtone" an index lookup, however many schedules exist. Fire times
+    that have passed are rolled forward lazily: a window query first advances
+    only the rows that are due (again an index range), so nothing rescans the
+    table on a timer.
+
+    The alarm daemon reads the active 'server' schedules from here and records
+    when it rang them (mark_fired).
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path of the SQLite database holding the schedules
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEDULE_SCHEMA)
+            self._migrate_alarms(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        """Record a schedule edit, inside the transaction that makes it."""
+        conn.execute("UPDATE schedule_version SET version = version + 1 WHERE id = 1")
+
+    @staticmethod
+    def _migrate_alarms(conn: sqlite3.Connection) -> None:
+        """Move alarms of the former alarm_schedules table into the store as 'server' schedules."""
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alarm_schedules'").fetchone():
+            return
+        rows = conn.execute("SELECT * FROM alarm_schedules").fetchall()
+        for row in rows:
+            folder = os.path.basename(os.path.dirname(row['ringtone_path']))
+            filename = os.path.basename(row['ringtone_path'])
+            days = json.loads(row['days'])
+            next_fire_at = next_fire_time(row['time_of_day'], days, time.time()) if row['active'] else None
+            conn.execute(
+                "INSERT OR IGNORE INTO schedules (id, ringtone_id, ringtone_name, ringtone_path, ringtone_folder, "
+                "ringtone_filename, time_of_day, days, active, source, created_at, last_fired_at, next_fire_at, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'server', ?, ?, ?, ?)",
+                (row['id'], filename, filename, row['ringtone_path'], folder, filename, row['time_of_day'], row['days'],
+                 row['active'], datetime.fromtimestamp(row['created']).isoformat(), row['last_fired_at'],
+                 next_fire_at, row['updated']))
+        conn.execute("DROP TABLE alarm_schedules")
+        ScheduleStoreService._bump_version(conn)
+        logger.info(f"📅 Moved {len(rows)} alarms into the schedule store")
+
+    @staticmethod
+    def _describe(row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['id'],
+            'ringtone_id': row['ringtone_id'],
+            'ringtone_name': row['ringtone_name'],
+            'ringtone_url': row['ringtone_url'],
+            'ringtone_path': row['ringtone_path'],
+            'ringtone_folder': row['ringtone_folder'],
+            'ringtone_filename': row['ringtone_filename'],
+            'time': row['time_of_day'],
+            'days': json.loads(row['days']),
+            'active': bool(row['active']),
+            'source': row['source'],
+            'created_at': row['created_at'],
+            'last_played': row['last_played'],
+            'last_fired_at': row['last_fired_at'],
+            'next_fire_at': row['next_fire_at'],
+            'updated': row['updated']
+        }
+
+    @staticmethod
+    def _validate(fields: Dict) -> Dict:
+        """
+        Check client-supplied fields and convert them to column values.
+
+        Raises:
+            ValueError: For an unknown field or an invalid value
+        """
+        unknown = set(fields) - set(SCHEDULE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        columns = {}
+        for name, value in fields.items():
+            if name == 'time':
+                parse_time_of_day(value)
+            elif name == 'days':
+                value = json.dumps(parse_days(value))
+            elif name == 'active':
+                if not isinstance(value, bool):
+                    raise ValueError("active must be true or false")
+                value = int(value)
+            elif name == 'source':
+                if value not in SCHEDULE_SOURCES:
+                    raise ValueError(f"source must be one of: {', '.join(SCHEDULE_SOURCES)}")
+            elif value is not None and (not isinstance(value, str) or len(value) > MAX_TEXT_LENGTH):
+                raise ValueError(f"{name} must be a string of at most {MAX_TEXT_LENGTH} characters")
+            columns[SCHEDULE_FIELDS[name]] = value
+        return columns
+
+    @staticmethod
+    def _next_fire_at(columns: Dict, now: float) -> Optional[float]:
+        if not columns['active']:
+            return None
+        return next_fire_time(columns['time_of_day'], json.loads(columns['days']), now)
+
+    # CRUD
+
+    def _prepare(self, schedule: Dict, now: float) -> Dict:
+        """Validate a new schedule and return its column values, generating the id unless one is given."""
+        schedule = dict(schedule)
+        schedule_id = schedule.pop('id', None) or f"schedule_{int(now * 1000)}_{uuid.uuid4().hex[:9]}"
+        if not isinstance(schedule_id, str) or not SCHEDULE_ID_PATTERN.match(schedule_id):
+            raise ValueError("Invalid schedule id")
+        schedule.setdefault('active', True)
+        schedule.setdefault('created_at', datetime.now().isoformat())
+        columns = self._validate(schedule)
+        for required in ('ringtone_id', 'ringtone_name', 'time_of_day', 'days', 'source'):
+            if not columns.get(required):
+                raise ValueError(f"Missing required field: {required}")
+        columns.update(id=schedule_id, next_fire_at=self._next_fire_at(columns, now), updated=now)
+        return columns
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, columns: Dict) -> bool:
+        """Insert a prepared schedule; returns False if its id exists."""
+        return conn.execute(
+            f"INSERT OR IGNORE INTO schedules ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            list(columns.values())).rowcount > 0
+
+    def create(self, schedule: Dict) -> Dict:
+        """
+        Add a schedule; its id is generated unless the client supplies one.
+
+        Raises:
+            ValueError: For missing or invalid fields
+            ScheduleExistsError: If a schedule with that id exists
+        """
+        columns = self._prepare(schedule, time.time())
+        conn = self._connect()
+        with self._write_lock, conn:
+            if not self._insert(conn, columns):
+                raise ScheduleExistsError(f"Schedule {columns['id']} already exists")
+            self._bump_version(conn)
+        return self.get(columns['id'])
+
+    def update(self, schedule_id: str, changes: Dict) -> Optional[Dict]:
+        """
+        Change some fields of a schedule; the next fire time follows time, days and active.
+
+        Returns:
+            Dict: The updated schedule, or None if it does not exist
+
+        Raises:
+            ValueError: For invalid fields
+        """
+        columns = self._validate(changes)
+        conn = self._connect()
+        with self._write_lock, conn:
+            row = conn.execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+            if row is None:
+                return None
+            merged = {**dict(row), **columns}
+            now = time.time()
+            columns['updated'] = now
+            if {'time_of_day', 'days', 'active'} & set(columns):
+                columns['next_fire_at'] = self._next_fire_at(merged, now)
+            conn.execute(f"UPDATE schedules SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                         list(columns.values()) + [schedule_id])
+            self._bump_version(conn)
+        return self.get(schedule_id)
+
+    def delete(self, schedule_id: str) -> bool:
+        """Delete a schedule; returns False if it does not exist."""
+        conn = self._connect()
+        with self._write_lock, conn:
+            deleted = conn.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,)).rowcount > 0
+            if deleted:
+                self._bump_version(conn)
+            return deleted
+
+    def get(self, schedule_id: str) -> Optional[Dict]:
+        row = self._connect().execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+        return self._describe(row) if row else None
+
+    def list(self, limit: int = MAX_PAGE_SIZE, cursor: Optional[int] = None,
+             source: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of schedules in creation order (keyset pagination on the rowid).
+
+        Returns:
+            tuple: (schedules, next_cursor) where next_cursor is None on the last page
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql = "SELECT rowid, * FROM schedules WHERE rowid > ?"
+        params: List = [cursor or 0]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        rows = self._connect().execute(sql + " ORDER BY rowid LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = rows[limit - 1]['rowid'] if len(rows) > limit else None
+        return [self._describe(row) for row in rows[:limit]], next_cursor
+
+    def import_many(self, schedules: List[Dict]) -> Dict:
+        """
+        Add schedules kept elsewhere until now (a browser's local copy) in one transaction; ids that already
+        exist are skipped.
+
+        Returns:
+            Dict: imported and skipped counts and the errors of invalid schedules by id
+        """
+        result = {'imported': 0, 'skipped': 0, 'errors': {}}
+        now = time.time()
+        prepared = []
+        for schedule in schedules:
+            try:
+                prepared.append(self._prepare(schedule, now))
+            except (ValueError, TypeError, AttributeError) as e:
+                result['errors'][str(schedule.get('id') if isinstance(schedule, dict) else None)] = str(e)
+        conn = self._connect()
+        with self._write_lock, conn:
+            for columns in prepared:
+                result['imported' if self._insert(conn, columns) else 'skipped'] += 1
+            if result['imported']:
+                self._bump_version(conn)
+        return result
+
+    # Queries
+
+    def advance_due(self, now: Optional[float] = None) -> int:
+        """Roll next fire times that have passed forward to the next occurrence; returns how many moved."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        with self._write_lock, conn:
+            due = conn.execute("SELECT id, time_of_day, days FROM schedules WHERE active = 1 AND next_fire_at <= ?",
+                               (now,)).fetchall()
+            conn.executemany("UPDATE schedules SET next_fire_at = ? WHERE id = ?",
+                             [(next_fire_time(row['time_of_day'], json.loads(row['days']), now), row['id'])
+                              for row in due])
+        return len(due)
+
+    def due_within(self, seconds: float, limit: int = MAX_PAGE_SIZE, source: Optional[str] = None) -> List[Dict]:
+        """Active schedules that fire in the next ``seconds``, soonest first."""
+        now = time.time()
+        self.advance_due(now)
+        sql = "SELECT * FROM schedules WHERE active = 1 AND next_fire_at > ? AND next_fire_at <= ?"
+        params: List = [now, now + seconds]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY next_fire_at LIMIT ?"
+        rows = self._connect().execute(sql, params + [max(1, min(limit, MAX_PAGE_SIZE))]).fetchall()
+        return [self._describe(row) for row in rows]
+
+    def by_ringtone(self, ringtone_id: Optional[str] = None, folder: Optional[str] = None,
+                    filename: Optional[str] = None) -> List[Dict]:
+        """Schedules that play a ringtone, by its id or by its backend folder and file name."""
+        if ringtone_id is not None:
+            rows = self._connect().execute("SELECT * FROM schedules WHERE ringtone_id = ?", (ringtone_id,))
+        else:
+            rows = self._connect().execute(
+                "SELECT * FROM schedules WHERE ringtone_folder = ? AND ringtone_filename = ?", (folder, filename))
+        return [self._describe(row) for row in rows]
+
+    # Alarm daemon
+
+    def schedule_version(self) -> int:
+        """Changes whenever a schedule is created, edited, imported or deleted, by any process.
+
+        Fire times moved by advance_due or mark_fired do not count: the daemon computes its own.
+        """
+        return self._connect().execute("SELECT version FROM schedule_version WHERE id = 1").fetchone()[0]
+
+    def active_alarms(self) -> List[Dict]:
+        """The active schedules the backend alarm daemon rings."""
+        rows = self._connect().execute("SELECT * FROM schedules WHERE active = 1 AND source = 'server'")
+        return [self._describe(row) for row in rows]
+
+    def mark_fired(self, schedule_id: str, fired_at: float, next_fire_at: float) -> None:
+        """Record that the daemon rang a schedule (kept apart from 'updated', which marks edits)."""
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute("UPDATE schedules SET last_fired_at = ?, last_played = ?, next_fire_at = ? WHERE id = ?",
+                         (fired_at, datetime.fromtimestamp(fired_at).isoformat(), next_fire_at, schedule_id))
+
+    def stats(self) -> Dict:
+        rows = self._connect().execute(
+            "SELECT source, COUNT(*) AS schedules, COALESCE(SUM(active), 0) AS active FROM schedules GROUP BY source")
+        by_source = {row['source']: {'schedules': row['schedules'], 'active': row['active']} for row in rows}
+        return {
+            'schedules': sum(counts['schedules'] for counts in by_source.values()),
+            'active': sum(counts['active'] for counts in by_source.values()),
+            'by_source': by_source
+        }
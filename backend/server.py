@@ -1,96 +1,44 @@
 # Rules applied
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, make_response
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 import os
-import uuid
+import hashlib
+import math
+import tempfile
 from datetime import datetime
 import logging
 import json
+import threading
+import time
 
-# Configure ffmpeg path for pydub
-def find_ffmpeg_path():
-    """Find FFmpeg installation path dynamically"""
-    import shutil
-    
-    # First, check if ffmpeg is already in PATH
-    ffmpeg_exe = shutil.which("ffmpeg")
-    if ffmpeg_exe:
-        ffmpeg_dir = os.path.dirname(ffmpeg_exe)
-        logging.info(f"FFmpeg found in PATH: {ffmpeg_dir}")
-        return ffmpeg_dir
-    
-    # Common FFmpeg installation paths on Windows
-    possible_paths = [
-        # WinGet installation path (dynamic user)
-        os.path.expanduser(r"~\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0-full_build\bin"),
-        # Chocolatey installation
-        r"C:\ProgramData\chocolatey\bin",
-        # Manual installation in Program Files
-        r"C:\Program Files\ffmpeg\bin",
-        r"C:\Program Files (x86)\ffmpeg\bin",
-        # Manual installation in user directory
-        os.path.expanduser(r"~\ffmpeg\bin"),
-        # Working directory (for portable installation)
-        os.path.join(os.path.dirname(__file__), "ffmpeg", "bin"),
-        # Project root ffmpeg folder
-        os.path.join(os.path.dirname(os.path.dirname(__file__)), "ffmpeg", "bin")
-    ]
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            ffmpeg_exe = os.path.join(path, "ffmpeg.exe")
-            if os.path.exists(ffmpeg_exe):
-                logging.info(f"FFmpeg found at: {path}")
-                return path
-    
-    logging.warning("FFmpeg not found in any common installation paths")
-    return None
-
-# Find and configure FFmpeg path
-ffmpeg_path = find_ffmpeg_path()
-if ffmpeg_path:
-    os.environ["PATH"] = ffmpeg_path + os.pathsep + os.environ.get("PATH", "")
-    logging.info(f"Added ffmpeg to PATH: {ffmpeg_path}")
-else:
-    logging.warning("FFmpeg not found - MP3 conversion may not work")
+from catalogService import RingtoneCatalogService, LISTING_FIELDS
+from contentHashService import ContentHashService
+from catalogWatcher import CatalogWatcher
+from transcodeJobService import TranscodeJobService, JobQueueFullError
+from streamingTranscoder import cut_audio, TranscodeError
+from renditionCacheService import RenditionCacheService
+from batchCutService import BatchCutService
+from encoderProfileService import EncoderProfileService, DEFAULT_ENCODER_PROFILES, is_plain_wav, validate_profile
+from encoderPoolService import EncoderPoolService, WorkerCrashedError, encode_file, export_renditions, _av_can_encode
+from audioCapabilityService import AudioCapabilityService
+from waveformPeakService import WaveformPeakService, build_peak_file
+from silenceDetectionService import (SilenceDetectionService, DEFAULT_THRESHOLD_DB, DEFAULT_MIN_SILENCE,
+                                     DEFAULT_PADDING)
+from chorusLocatorService import ChorusLocatorService
+from uploadSessionService import UploadSessionService, UploadLimitError, UploadConflictError
+from blobStoreService import BlobStoreService
+from scheduleStoreService import ScheduleStoreService, ScheduleExistsError, MAX_PAGE_SIZE as MAX_SCHEDULE_PAGE_SIZE
+from alarmSchedulerService import AlarmSchedulerService
 
 # Import the Windows Task Scheduler service
 try:
-    from taskSchedulerService import task_scheduler_service
+    from taskSchedulerService import task_scheduler_service, ringtone_task_name
     TASK_SCHEDULER_AVAILABLE = True
 except ImportError as e:
     TASK_SCHEDULER_AVAILABLE = False
     print(f"⚠️ Windows Task Scheduler service not available: {e}")
 
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-    
-    # Test if pydub can actually convert audio (not just import)
-    try:
-        # Create a simple test audio and try to export it
-        test_audio = AudioSegment.silent(duration=100)
-        test_path = os.path.join(os.path.dirname(__file__), 'test_mp3_conversion.mp3')
-        test_audio.export(test_path, format="mp3")
-        
-        # Check if file was created and has content
-        if os.path.exists(test_path) and os.path.getsize(test_path) > 0:
-            os.remove(test_path)  # Clean up test file
-            PYDUB_FULLY_WORKING = True
-            logging.info("pydub is available and audio conversion is working with ffmpeg")
-        else:
-            PYDUB_FULLY_WORKING = False
-            logging.warning("pydub is available but audio conversion is not working (missing codecs)")
-            
-    except Exception as e:
-        PYDUB_FULLY_WORKING = False
-        logging.warning(f"pydub is available but audio conversion test failed: {e}")
-        
-except ImportError:
-    PYDUB_AVAILABLE = False
-    PYDUB_FULLY_WORKING = False
-    logging.warning("pydub not available - MP3 conversion disabled")
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -105,8 +53,12 @@ CORS(
         'http://localhost:3001', 'http://127.0.0.1:3001',
         'http://localhost:3002', 'http://127.0.0.1:3002'
     ],
-    methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-    allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
+    methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+    allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'If-None-Match', 'If-Modified-Since',
+                   'If-Range', 'Range', 'Upload-Offset'],
+    expose_headers=['ETag', 'X-Peaks-Zoom', 'X-Peaks-Zoom-Levels', 'X-Peaks-Samples-Per-Peak',
+                    'X-Peaks-Sample-Rate', 'X-Peaks-Start-Index', 'Upload-Offset', 'Accept-Ranges', 'Content-Range',
+                    'Content-Length', 'Last-Modified'],
     supports_credentials=True
 )
 
@@ -116,29 +68,211 @@ WAV_RINGTONES_FOLDER = os.path.join(RINGTONES_FOLDER, 'wav_ringtones')
 MP3_RINGTONES_FOLDER = os.path.join(RINGTONES_FOLDER, 'mp3_ringtones')
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'original_sound')
 
-# Ensure directories exist
-os.makedirs(RINGTONES_FOLDER, exist_ok=True)
-os.makedirs(WAV_RINGTONES_FOLDER, exist_ok=True)
-os.makedirs(MP3_RINGTONES_FOLDER, exist_ok=True)
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Persistent catalog of the ringtone and upload folders (answers listings without a directory walk)
+CATALOG_DB_PATH = os.path.join(RINGTONES_FOLDER, 'catalog.db')
+# Rendition folders in preference order; create_app() appends the folders of the encoder profiles
+RINGTONE_FOLDERS = ['wav_ringtones', 'mp3_ringtones']
+MAX_PAGE_SIZE = 500
+RENDITION_CACHE_FOLDER = os.path.join(RINGTONES_FOLDER, 'rendition_cache')
+RENDITION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+CAPABILITIES_CACHE_PATH = os.path.join(RINGTONES_FOLDER, 'audio_capabilities.json')
+MAX_BATCH_CUTS = 50
+# Deployment encoder profiles and default renditions (optional, see encoderProfileService)
+ENCODER_PROFILES_PATH = os.path.join(RINGTONES_FOLDER, 'encoder_profiles.json')
+# Every batch cut keeps a 16-bit WAV of the cut as its source rendition
+SOURCE_WAV_PROFILE = validate_profile('wav', DEFAULT_ENCODER_PROFILES['wav'])
+# Waveform peak pyramids of the originals, named by content hash
+PEAKS_FOLDER = os.path.join(RINGTONES_FOLDER, 'peaks')
+MAX_PEAKS_PER_REQUEST = 20000
+MAX_TRIM_PADDING = 5.0
+# Resumable uploads: partial files are staged next to the originals (same file system, so finalizing is a rename)
+UPLOAD_STAGING_FOLDER = os.path.join(UPLOAD_FOLDER, '.uploads')
+MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_OPEN_UPLOADS = 20
+# Content-addressed blobs: originals and ringtones are hardlinks of one blob per distinct content
+BLOBS_FOLDER = os.path.join(RINGTONES_FOLDER, 'blobs')
+# Audio MIME types by extension, for inline playback (mimetypes does not know all of them)
+AUDIO_MIMETYPES = {
+    '.mp3': 'audio/mpeg', '.wav': 'audio/wav', '.m4a': 'audio/mp4', '.m4r': 'audio/mp4',
+    '.aac': 'audio/aac', '.opus': 'audio/ogg', '.ogg': 'audio/ogg'
+}
+# Behind a front server that serves files itself (Apache mod_xsendfile, lighttpd), hand it the path
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+# Largest request body of any endpoint (a whole file in one multipart POST, plus form overhead)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE + 1024 * 1024
+# Only the process holding this lock fires the server-side alarms (one per machine, whatever the worker count)
+ALARM_LOCK_PATH = os.path.join(RINGTONES_FOLDER, 'alarm_scheduler.lock')
+
+# Services are created by create_app(), not at import time
+audio_capabilities = None
+content_hash_service = None
+catalog_service = None
+catalog_watcher = None
+transcode_job_service = None
+rendition_cache_service = None
+batch_cut_service = None
+encoder_profile_service = None
+encoder_pool_service = None
+waveform_peak_service = None
+silence_detection_service = None
+chorus_locator_service = None
+upload_session_service = None
+blob_store_service = None
+schedule_store_service = None
+alarm_scheduler_service = None
+_init_lock = threading.Lock()
 
-# Log the actual paths being used
-logger.info(f"RINGTONES_FOLDER: {os.path.abspath(RINGTONES_FOLDER)}")
-logger.info(f"WAV_RINGTONES_FOLDER: {os.path.abspath(WAV_RINGTONES_FOLDER)}")
-logger.info(f"MP3_RINGTONES_FOLDER: {os.path.abspath(MP3_RINGTONES_FOLDER)}")
-logger.info(f"UPLOAD_FOLDER: {os.path.abspath(UPLOAD_FOLDER)}")
+def _reconcile_catalog():
+    """Bring the catalog back in line with the folders in case they changed while the server was down"""
+    try:
+        catalog_service.reconcile()
+    except Exception as e:
+        logger.error(f"Catalog reconcile failed: {e}")
+
+def _maintain_blob_store():
+    """Adopt originals written before the blob store existed and collect unreferenced blobs"""
+    try:
+        blob_store_service.adopt('original_sound', content_hash_service.hash_file)
+        blob_store_service.gc()
+    except Exception as e:
+        logger.error(f"Blob store maintenance failed: {e}")
+
+def create_app():
+    """
+    Create the backend services and start their background work, then return the app.
+    
+    Nothing slow runs here: capability probes and the catalog reconcile run on
+    background threads, so the first request is served right after import. Safe to
+    call more than once (e.g. once per WSGI worker); later calls return the same app.
+    """
+    global audio_capabilities, content_hash_service, catalog_service, catalog_watcher
+    global transcode_job_service, rendition_cache_service, batch_cut_service, encoder_profile_service
+    global encoder_pool_service, waveform_peak_service, silence_detection_service, chorus_locator_service
+    global upload_session_service, blob_store_service, schedule_store_service, alarm_scheduler_service
+    
+    with _init_lock:
+        if catalog_service is not None:
+            return app
+        
+        # Ensure directories exist
+        os.makedirs(RINGTONES_FOLDER, exist_ok=True)
+        os.makedirs(WAV_RINGTONES_FOLDER, exist_ok=True)
+        os.makedirs(MP3_RINGTONES_FOLDER, exist_ok=True)
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        
+        # Named encoder profiles; each writes its renditions to its own folder
+        encoder_profile_service = EncoderProfileService(ENCODER_PROFILES_PATH)
+        profile_folders = encoder_profile_service.folders()
+        for folder in profile_folders:
+            if folder not in RINGTONE_FOLDERS:
+                RINGTONE_FOLDERS.append(folder)
+            os.makedirs(os.path.join(RINGTONES_FOLDER, folder), exist_ok=True)
+        
+        # Log the actual paths being used
+        logger.info(f"RINGTONES_FOLDER: {os.path.abspath(RINGTONES_FOLDER)}")
+        logger.info(f"WAV_RINGTONES_FOLDER: {os.path.abspath(WAV_RINGTONES_FOLDER)}")
+        logger.info(f"MP3_RINGTONES_FOLDER: {os.path.abspath(MP3_RINGTONES_FOLDER)}")
+        logger.info(f"UPLOAD_FOLDER: {os.path.abspath(UPLOAD_FOLDER)}")
+        
+        # Locate ffmpeg and check what it can encode in the background (cached on disk per binary)
+        audio_capabilities = AudioCapabilityService(CAPABILITIES_CACHE_PATH)
+        audio_capabilities.start()
+        
+        content_hash_service = ContentHashService(CATALOG_DB_PATH)
+        catalog_folders = {
+            'wav_ringtones': (WAV_RINGTONES_FOLDER, ('.wav',)),
+            'mp3_ringtones': (MP3_RINGTONES_FOLDER, ('.mp3',))
+        }
+        for folder, extensions in profile_folders.items():
+            folder_path, known_extensions = catalog_folders.get(folder, (os.path.join(RINGTONES_FOLDER, folder), ()))
+            catalog_folders[folder] = (folder_path, tuple(sorted(set(known_extensions) | set(extensions))))
+        catalog_folders['original_sound'] = (UPLOAD_FOLDER, ('.mp3', '.wav'))
+        catalog = RingtoneCatalogService(CATALOG_DB_PATH, catalog_folders, content_hash_service,
+                                         rendition_folders=RINGTONE_FOLDERS)
+        
+        # Each distinct content is stored once; named files in the catalog folders reference it
+        blob_store_service = BlobStoreService(BLOBS_FOLDER, CATALOG_DB_PATH,
+                                              {folder: folder_path for folder, (folder_path, _) in catalog_folders.items()})
+        
+        # Long-lived encoder worker processes (one per core), warmed up now so conversions start no process
+        encoder_pool_service = EncoderPoolService()
+        encoder_pool_service.start()
+        
+        # Bounded job queue on that pool, so ringtone creation returns before the encode finishes
+        transcode_job_service = TranscodeJobService(pool=encoder_pool_service, db_path=CATALOG_DB_PATH)
+        
+        # Encoded renditions keyed by source content, cut range and encoder settings, so repeats are linked, not re-encoded
+        rendition_cache_service = RenditionCacheService(RENDITION_CACHE_FOLDER, CATALOG_DB_PATH, RENDITION_CACHE_MAX_BYTES)
+        
+        # Several cuts of one source share a single decode and encode in parallel
+        batch_cut_service = BatchCutService()
+        
+        # Min/max peak pyramids of the originals, memory-mapped to serve waveform windows
+        waveform_peak_service = WaveformPeakService(PEAKS_FOLDER)
+        
+        # Silence envelopes of the originals, for cut suggestions and auto-trim
+        silence_detection_service = SilenceDetectionService()
+        
+        # Repeated, loud sections of the originals (ringtone suggestions)
+        chorus_locator_service = ChorusLocatorService()
+        
+        # Chunked uploads that survive dropped connections and restarts
+        upload_session_service = UploadSessionService(UPLOAD_STAGING_FOLDER, CATALOG_DB_PATH, MAX_UPLOAD_SIZE,
+                                                      MAX_UPLOAD_CHUNK_SIZE, max_sessions=MAX_OPEN_UPLOADS)
+        
+        # Schedules of every browser and device, indexed by their next fire time
+        schedule_store_service = ScheduleStoreService(CATALOG_DB_PATH)
+        
+        # Server alarms: a timer heap that rings ringtones at their scheduled times, browser open or not
+        alarm_scheduler_service = AlarmSchedulerService(schedule_store_service, ALARM_LOCK_PATH)
+        alarm_scheduler_service.start()
+        
+        # Keep the catalog in sync with files added or removed by other tools
+        catalog_watcher = CatalogWatcher(catalog)
+        catalog_watcher.start()
+        
+        # Published last: request handlers check it to see whether initialization is complete
+        catalog_service = catalog
+        threading.Thread(target=_reconcile_catalog, name='catalog-reconcile', daemon=True).start()
+        threading.Thread(target=_maintain_blob_store, name='blob-store-gc', daemon=True).start()
+    
+    return app
+
+def shutdown_app():
+    """Stop this process's background services; called by the WSGI server when a worker exits"""
+    global catalog_service
+    with _init_lock:
+        if catalog_service is None:
+            return
+        catalog_watcher.stop()
+        alarm_scheduler_service.stop()
+        # Lets queued encodes finish, then stops the encoder pool workers
+        transcode_job_service.shutdown(wait=True)
+        catalog_service = None
+    logger.info("Backend services stopped")
+
+@app.before_request
+def _ensure_services():
+    """Initialize lazily when the app is used without create_app() (e.g. ``from server import app``)"""
+    if catalog_service is None:
+        create_app()
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Answer bodies over MAX_CONTENT_LENGTH in the API's JSON error format"""
+    return jsonify({'success': False, 'error': f'Request is too large (max {app.config["MAX_CONTENT_LENGTH"]} bytes); '
+                                               'use /api/uploads for large files'}), 413
 
 def convert_wav_to_mp3(wav_path, mp3_path):
     """Convert WAV file to MP3 format"""
     try:
-        if PYDUB_AVAILABLE:
-            audio = AudioSegment.from_wav(wav_path)
-            audio.export(mp3_path, format="mp3", bitrate="128k")
-            return True
-        else:
-            logger.warning("pydub not available - cannot convert WAV to MP3")
-            return False
-    except Exception as e:
+        result = encoder_pool_service.submit(encode_file, wav_path, mp3_path, encoder_profile_service.profiles['mp3_128'],
+                                             audio_capabilities.ffmpeg_binary()).result()
+        logger.info(f"✅ Converted {os.path.basename(wav_path)} to MP3 in {result['encode_ms']} ms "
+                    f"(RTF {result['realtime_factor']}, {result['engine']})")
+        return True
+    except (TranscodeError, WorkerCrashedError) as e:
         logger.error(f"Error converting WAV to MP3: {e}")
         return False
 
@@ -152,115 +286,566 @@ def health_check():
             'wav_ringtones_folder': WAV_RINGTONES_FOLDER,
             'mp3_ringtones_folder': MP3_RINGTONES_FOLDER,
             'upload_folder': UPLOAD_FOLDER,
+            'catalog_entries': catalog_service.count(),
+            'catalog_generation': catalog_service.generation(),
+            'catalog_watcher': catalog_watcher.backend,
+            'audio_capabilities': audio_capabilities.status(),
+            'transcode_jobs': transcode_job_service.stats(),
+            'encoder_pool': encoder_pool_service.stats(),
+            'uploads': upload_session_service.stats(),
+            'blob_store': blob_store_service.stats(),
+            'schedules': schedule_store_service.stats(),
+            'alarm_scheduler': alarm_scheduler_service.stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
+def _parse_csv_arg(name):
+    """Split a comma-separated query argument into a list (None if absent)"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def _parse_number_arg(name, cast=float):
+    """Parse an optional finite numeric query argument (None if absent)"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be {'an integer' if cast is int else 'a number'}")
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be a finite number')
+    return number
+
+def _parse_listing_args():
+    """Parse and validate the pagination, sorting, filter and projection arguments of a listing"""
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        limit = min(limit, MAX_PAGE_SIZE)
+    elif cursor:
+        limit = MAX_PAGE_SIZE
+    
+    folders = _parse_csv_arg('folder') or RINGTONE_FOLDERS
+    invalid_folders = [folder for folder in folders if folder not in RINGTONE_FOLDERS]
+    if invalid_folders:
+        raise ValueError(f"Invalid folder: {', '.join(invalid_folders)}")
+    
+    fields = _parse_csv_arg('fields')
+    if fields:
+        invalid_fields = [field for field in fields if field not in LISTING_FIELDS]
+        if invalid_fields:
+            raise ValueError(f"Invalid field: {', '.join(invalid_fields)}")
+    
+    has_metadata = request.args.get('has_metadata')
+    if has_metadata is not None:
+        if has_metadata.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError('has_metadata must be true or false')
+        has_metadata = has_metadata.lower() in ('true', '1')
+    
+    query = {
+        'folders': folders,
+        'sort': request.args.get('sort', 'created'),
+        'order': request.args.get('order', 'desc'),
+        'limit': limit,
+        'cursor': cursor,
+        'formats': [fmt.lower() for fmt in _parse_csv_arg('format') or []] or None,
+        'min_duration': _parse_number_arg('min_duration'),
+        'max_duration': _parse_number_arg('max_duration'),
+        'has_metadata': has_metadata,
+        'name_prefix': request.args.get('name_prefix')
+    }
+    return query, fields
+
+def _project_fields(entries, fields):
+    """Keep only the requested fields of each listing entry"""
+    if not fields:
+        return entries
+    return [{field: entry[field] for field in fields if field in entry} for entry in entries]
+
+def _listing_etag(generation):
+    """Build the ETag of a listing from the catalog generation and the normalized query string"""
+    query_string = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    query_hash = hashlib.sha1(query_string.encode('utf-8')).hexdigest()[:12]
+    return f'g{generation}-{query_hash}'
+
 @app.route('/api/ringtones', methods=['GET'])
 def list_ringtones():
-    """List all ringtones in the ringtones folders"""
-    try:
-        ringtones = []
-        
-        # Scan WAV ringtones folder
-        if os.path.exists(WAV_RINGTONES_FOLDER):
-            for filename in os.listdir(WAV_RINGTONES_FOLDER):
-                if filename.lower().endswith('.wav'):
-                    file_path = os.path.join(WAV_RINGTONES_FOLDER, filename)
-                    file_stat = os.stat(file_path)
-                    
-                    # Try to load metadata
-                    metadata = None
-                    metadata_filename = filename.rsplit('.', 1)[0] + '.json'
-                    metadata_path = os.path.join(WAV_RINGTONES_FOLDER, metadata_filename)
-                    
-                    if os.path.exists(metadata_path):
-                        try:
-                            with open(metadata_path, 'r') as f:
-                                metadata = json.load(f)
-                        except Exception as e:
-                            logger.warning(f"Failed to load metadata for {filename}: {e}")
-                    
-                    ringtone_info = {
-                        'id': metadata.get('id') if metadata else str(uuid.uuid4()),
-                        'name': filename,
-                        'size': file_stat.st_size,
-                        'created': datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
-                        'modified': datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
-                        'file_path': file_path,
-                        'format': 'wav',
-                        'folder': 'wav_ringtones'
-                    }
-                    
-                    # Add metadata if available
-                    if metadata:
-                        ringtone_info.update({
-                            'original_name': metadata.get('original_name'),
-                            'start_time': metadata.get('start_time'),
-                            'end_time': metadata.get('end_time'),
-                            'duration': metadata.get('duration'),
-                            'has_metadata': True
-                        })
-                    else:
-                        ringtone_info['has_metadata'] = False
-                    
-                    ringtones.append(ringtone_info)
-        
-        # Scan MP3 ringtones folder
-        if os.path.exists(MP3_RINGTONES_FOLDER):
-            for filename in os.listdir(MP3_RINGTONES_FOLDER):
-                if filename.lower().endswith('.mp3'):
-                    file_path = os.path.join(MP3_RINGTONES_FOLDER, filename)
-                    file_stat = os.stat(file_path)
-                    
-                    # Try to load metadata
-                    metadata = None
-                    metadata_filename = filename.rsplit('.', 1)[0] + '.json'
-                    metadata_path = os.path.join(MP3_RINGTONES_FOLDER, metadata_filename)
-                    
-                    if os.path.exists(metadata_path):
-                        try:
-                            with open(metadata_path, 'r') as f:
-                                metadata = json.load(f)
-                        except Exception as e:
-                            logger.warning(f"Failed to load metadata for {filename}: {e}")
-                    
-                    ringtone_info = {
-                        'id': metadata.get('id') if metadata else str(uuid.uuid4()),
-                        'name': filename,
-                        'size': file_stat.st_size,
-                        'created': datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
-                        'modified': datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
-                        'file_path': file_path,
-                        'format': 'mp3',
-                        'folder': 'mp3_ringtones'
-                    }
-                    
-                    # Add metadata if available
-                    if metadata:
-                        ringtone_info.update({
-                            'original_name': metadata.get('original_name'),
-                            'start_time': metadata.get('start_time'),
-                            'end_time': metadata.get('end_time'),
-                            'duration': metadata.get('duration'),
-                            'has_metadata': True
-                        })
-                    else:
-                        ringtone_info['has_metadata'] = False
-                    
-                    ringtones.append(ringtone_info)
+    """List ringtones, optionally one page at a time with sorting, filters and a field projection"""
+    try:
+        query, fields = _parse_listing_args()
         
-        return jsonify({
+        # Read the generation before querying: a change in between only makes the ETag stale, never wrong
+        generation = catalog_service.generation()
+        etag = _listing_etag(generation)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        ringtones, next_cursor = catalog_service.query_entries(**query)
+        ringtones = _project_fields(ringtones, fields)
+        
+        response = jsonify({
             'success': True,
             'ringtones': ringtones,
-            'count': len(ringtones)
+            'count': len(ringtones),
+            'next_cursor': next_cursor,
+            'generation': generation,
+            'sort': query['sort'],
+            'order': query['order'],
+            'limit': query['limit']
         })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error listing ringtones: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/ringtones/changes', methods=['GET'])
+def list_ringtone_changes():
+    """Return the ringtones added or removed since a catalog generation"""
+    try:
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({'success': False, 'error': 'since must be a non-negative generation number'}), 400
+        
+        fields = _parse_csv_arg('fields')
+        if fields:
+            invalid_fields = [field for field in fields if field not in LISTING_FIELDS]
+            if invalid_fields:
+                return jsonify({'success': False, 'error': f"Invalid field: {', '.join(invalid_fields)}"}), 400
+        
+        changes = catalog_service.changes_since(RINGTONE_FOLDERS, since)
+        
+        return jsonify({
+            'success': True,
+            'since': since,
+            'generation': changes['generation'],
+            'reset': changes['reset'],
+            'added': _project_fields(changes['added'], fields),
+            'removed': changes['removed']
+        })
+    except Exception as e:
+        logger.error(f"Error listing ringtone changes: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/ringtones/reconcile', methods=['POST'])
+def reconcile_catalog():
+    """Rebuild the catalog index from the folders and their .json sidecars"""
+    try:
+        stats = catalog_service.reconcile()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Catalog reconciled successfully',
+            'stats': stats,
+            'count': catalog_service.count()
+        })
+    except Exception as e:
+        logger.error(f"Error reconciling catalog: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _write_sidecar(metadata_path, metadata):
+    """Write a sidecar under a temporary name and rename it into place"""
+    partial_path = metadata_path + '.part'
+    with open(partial_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(partial_path, metadata_path)
+
+def _record_renditions(results, profiles, metadata, metadata_path, cache_keys=None):
+    """
+    Write the sidecars of finished renditions and list them in the source's sidecar.
+    
+    Args:
+        results: Profile name -> transcode result (or {'error': ...})
+        profiles: Profile name -> encoder profile
+        metadata: The source's sidecar contents; updated in place
+        metadata_path: Path of the source's sidecar
+        cache_keys: Profile name -> rendition cache key, for freshly encoded renditions
+    
+    Returns:
+        tuple: (summary for the API, (folder, filename) pairs to index)
+    """
+    cache_keys = cache_keys or {}
+    indexed_files = []
+    renditions = {}
+    errors = {}
+    for name, result in results.items():
+        if 'error' in result:
+            errors[name] = result['error']
+            logger.warning(f"⚠️ {name} rendition of {metadata['filename']} failed: {result['error']}")
+            continue
+        
+        profile = profiles[name]
+        rendition_path = result['output_path']
+        if name in cache_keys:
+            try:
+                rendition_cache_service.store(cache_keys[name], rendition_path)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not cache {name} rendition: {e}")
+        
+        rendition_filename = os.path.basename(rendition_path)
+        renditions[name] = {
+            'profile': name,
+            'filename': rendition_filename,
+            'folder': profile['folder'],
+            'file_path': rendition_path,
+            'format': profile['extension'],
+            'size': result['size']
+        }
+        
+        # The saved file can be its own rendition and then shares its sidecar with it
+        rendition_metadata_path = os.path.join(RINGTONES_FOLDER, profile['folder'],
+                                               rendition_filename.rsplit('.', 1)[0] + '.json')
+        if rendition_metadata_path != metadata_path:
+            rendition_metadata = dict(metadata, filename=rendition_filename, file_path=rendition_path,
+                                      format=profile['extension'], folder=profile['folder'],
+                                      file_size=result['size'], profile=name)
+            for key in ('mp3_available', 'mp3_filename', 'mp3_path', 'renditions'):
+                rendition_metadata.pop(key, None)
+            _write_sidecar(rendition_metadata_path, rendition_metadata)
+            indexed_files.append((profile['folder'], rendition_filename))
+        
+        if profile['extension'] == 'mp3':
+            metadata.update(mp3_available=True, mp3_filename=rendition_filename, mp3_path=rendition_path)
+        logger.info(f"✅ {name} rendition created: {rendition_filename} (Size: {result['size']} bytes)")
+    
+    metadata.setdefault('renditions', {}).update(renditions)
+    _write_sidecar(metadata_path, metadata)
+    indexed_files.append((metadata['folder'], metadata['filename']))
+    
+    summary = {
+        'renditions': {
+            name: dict(rendition, duration_ms=results[name].get('duration_ms'),
+                       encode_ms=results[name].get('encode_ms', 0),
+                       realtime_factor=results[name].get('realtime_factor', 0))
+            for name, rendition in renditions.items()
+        },
+        'errors': errors,
+        'mp3_filename': metadata.get('mp3_filename'),
+        'mp3_path': metadata.get('mp3_path')
+    }
+    return summary, indexed_files
+
+def _complete_renditions(results, profiles, metadata, metadata_path, cache_keys=None):
+    """
+    Record finished renditions and index them with their source in one catalog
+    transaction. Runs in the server process when the job completes, or right away
+    for renditions linked from the rendition cache.
+    """
+    summary, indexed_files = _record_renditions(results, profiles, metadata, metadata_path, cache_keys)
+    catalog_service.index_files(indexed_files)
+    return summary
+
+def _ringtone_filename(original_name, start_time, end_time, file_ext):
+    """
+    Build the target folder and a unique, Task Scheduler safe filename for a new ringtone.
+    
+    Returns:
+        tuple: (clean original name, target folder path, target filename)
+    """
+    # Clean the original name to remove file extensions
+    clean_original_name = original_name
+    for ext in ['.mp3', '.wav', '.m4a', '.ogg']:
+        clean_original_name = clean_original_name.replace(ext, '')
+    
+    # Determine which folder to save to based on file type FIRST
+    if file_ext.lower() == '.wav':
+        target_folder = WAV_RINGTONES_FOLDER
+    else:
+        target_folder = MP3_RINGTONES_FOLDER
+    
+    # Generate unique filename with clean original name info
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    safe_filename = f"ringtone_{timestamp}_{clean_original_name}_{start_time}s_to_{end_time}s{file_ext}"
+    safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
+    
+    # Check if filename would exceed Windows Task Scheduler 261 character limit
+    # We need to account for the full command: python.exe + script_path + ringtone_path
+    python_exe_path = r"C:\Program Files\Python313\pythonw.exe"
+    script_path = os.path.join(os.path.dirname(__file__), "play_ringtone.py")
+    max_command_length = 261
+    
+    # Calculate the command length with current filename
+    test_command = f'"{python_exe_path}" "{script_path}" "{os.path.join(target_folder, safe_filename)}"'
+    
+    if len(test_command) > max_command_length:
+        # Shorten the filename to fit within the limit
+        logger.info(f"⚠️ Filename too long for Windows Task Scheduler ({len(test_command)} chars), shortening...")
+    
+        # Calculate how much we need to shorten
+        excess_length = len(test_command) - max_command_length + 20  # Add some buffer
+    
+        # Shorten the original name part
+        original_name_part = clean_original_name
+        if len(original_name_part) > excess_length:
+            # Truncate the original name and add hash for uniqueness
+            name_hash = hashlib.md5(original_name_part.encode()).hexdigest()[:8]
+            original_name_part = original_name_part[:max(10, len(original_name_part) - excess_length)] + f"_{name_hash}"
+    
+        # Regenerate filename with shortened name
+        safe_filename = f"ringtone_{timestamp}_{original_name_part}_{start_time}s_to_{end_time}s{file_ext}"
+        safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
+    
+        # Verify the new command length
+        new_command = f'"{python_exe_path}" "{script_path}" "{os.path.join(target_folder, safe_filename)}"'
+        logger.info(f"✅ Shortened filename: {len(new_command)} chars (was {len(test_command)} chars)")
+    
+        if len(new_command) > max_command_length:
+            # If still too long, use a very short name with hash
+            name_hash = hashlib.md5(clean_original_name.encode()).hexdigest()[:12]
+            safe_filename = f"rt_{timestamp}_{name_hash}_{start_time}s_to_{end_time}s{file_ext}"
+            safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
+            logger.info(f"🔄 Using minimal filename: {safe_filename}")
+    
+    # Set the target filename
+    target_filename = safe_filename
+    
+    return clean_original_name, target_folder, target_filename
+
+def _parse_profiles(data):
+    """
+    Resolve the encoder profiles picked by a request ('profiles' as a list or a
+    comma-separated string), falling back to the deployment defaults.
+    
+    Raises:
+        ValueError: For unknown profiles or profiles writing to the same folder
+    """
+    names = data.get('profiles') if hasattr(data, 'get') else None
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    elif names is not None and not isinstance(names, list):
+        raise ValueError('profiles must be a list of encoder profile names')
+    return encoder_profile_service.resolve(names)
+
+def _parse_trim_options(data):
+    """
+    Read the auto-trim options of a cut request ('trim_silence' plus optional
+    'silence_threshold_db', 'silence_mode' and 'trim_padding').
+    
+    Returns:
+        dict: threshold_db, mode and padding, or None when trimming is off
+    
+    Raises:
+        ValueError: For malformed options
+    """
+    trim = data.get('trim_silence')
+    if isinstance(trim, str):
+        trim = trim.lower() in ('true', '1')
+    if not trim:
+        return None
+    try:
+        threshold_db = float(data.get('silence_threshold_db', DEFAULT_THRESHOLD_DB))
+        padding = float(data.get('trim_padding', DEFAULT_PADDING))
+    except (TypeError, ValueError):
+        raise ValueError('silence_threshold_db and trim_padding must be numbers')
+    if not 0 <= padding <= MAX_TRIM_PADDING:
+        raise ValueError(f'trim_padding must be between 0 and {MAX_TRIM_PADDING:g} seconds')
+    mode = data.get('silence_mode', 'rms')
+    SilenceDetectionService.validate(threshold_db, mode)
+    return {'threshold_db': threshold_db, 'mode': mode, 'padding': padding}
+
+def _store_ringtone(file_path, target_folder, target_filename, clean_original_name,
+                    start_time, end_time, duration, extra_metadata=None, mp3_ready=False, profiles=None):
+    """
+    Register a ringtone file that has just been written: assign its content ID,
+    write its sidecar, index it and queue its renditions.
+    
+    Args:
+        mp3_ready: The file is an MP3 produced by our own encoder, so it already is
+            the MP3 rendition and is not re-encoded
+        profiles: Encoder profiles of the renditions to create (deployment defaults when None)
+    
+    Returns:
+        The Flask response (202 while renditions are pending)
+    """
+    file_ext = os.path.splitext(target_filename)[1].lower()
+    source_folder = os.path.basename(target_folder)
+    if profiles is None:
+        profiles = encoder_profile_service.resolve()
+    profiles_by_name = {profile['name']: profile for profile in profiles}
+    
+    # Stable ID derived from the saved content, shared by all renditions; an identical
+    # ringtone that is already stored makes this file a link of its blob instead of a copy
+    blob = blob_store_service.ingest(file_path, source_folder, target_filename, content_hash_service.hash_file(file_path))
+    ringtone_id = content_hash_service.file_content_id(file_path)
+    
+    # Generate base filename without extension for the renditions
+    base_filename = target_filename.rsplit('.', 1)[0]
+    
+    # Save metadata to a JSON file for original format; the rendition fields are
+    # filled in once the background encodes have finished
+    metadata = {
+        'id': ringtone_id,
+        'filename': target_filename,
+        'original_name': clean_original_name,
+        'start_time': float(start_time),
+        'end_time': float(end_time),
+        'duration': float(duration),
+        'created': datetime.now().isoformat(),
+        'file_path': file_path,
+        'format': file_ext.lower().replace('.', ''),
+        'folder': source_folder,
+        'mp3_available': False,
+        'mp3_filename': None,
+        'mp3_path': None,
+        'renditions': {}
+    }
+    metadata.update(extra_metadata or {})
+    mp3_ready = mp3_ready and file_ext == '.mp3'
+    if mp3_ready:
+        metadata.update(mp3_available=True, mp3_filename=target_filename, mp3_path=file_path)
+    
+    metadata_filename = target_filename.rsplit('.', 1)[0] + '.json'
+    metadata_path = os.path.join(target_folder, metadata_filename)
+    
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    catalog_service.index_file(source_folder, target_filename)
+    
+    # Get file info
+    file_stat = os.stat(file_path)
+    
+    # Each rendition is the saved file itself, a cached copy of identical content, or an encode
+    source_sha256 = content_hash_service.hash_file(file_path)
+    ready = {}
+    targets = []
+    cache_keys = {}
+    for profile in profiles:
+        rendition_path = os.path.join(RINGTONES_FOLDER, profile['folder'], f"{base_filename}.{profile['extension']}")
+        if rendition_path == file_path and (mp3_ready or is_plain_wav(profile)):
+            ready[profile['name']] = {'output_path': file_path, 'size': file_stat.st_size,
+                                      'duration_ms': round(float(duration) * 1000)}
+            continue
+        key = rendition_cache_service.make_key(source_sha256, 0, None, **encoder_profile_service.cache_key_fields(profile))
+        if rendition_cache_service.fetch(key, rendition_path):
+            ready[profile['name']] = {'output_path': rendition_path, 'size': os.path.getsize(rendition_path),
+                                      'duration_ms': round(float(duration) * 1000)}
+        else:
+            targets.append((profile, rendition_path))
+            cache_keys[profile['name']] = key
+    
+    rendition_summary = {'renditions': {}, 'errors': {}}
+    if ready:
+        rendition_summary = _complete_renditions(ready, profiles_by_name, metadata, metadata_path)
+    
+    # Without ffmpeg only the profiles PyAV can encode are queued; the others are reported as skipped
+    skipped = []
+    if targets and not audio_capabilities.ffmpeg_binary():
+        skipped = [profile['name'] for profile, _ in targets if not _av_can_encode(profile)]
+        targets = [(profile, path) for profile, path in targets if _av_can_encode(profile)]
+    
+    # Queue the remaining renditions as one background job; its worker encodes them concurrently
+    job = None
+    if targets:
+        try:
+            job = transcode_job_service.submit(
+                'renditions', export_renditions, file_path, targets, audio_capabilities.ffmpeg_binary(),
+                on_success=lambda results: _complete_renditions(results, profiles_by_name, metadata, metadata_path,
+                                                                cache_keys=cache_keys),
+                context={'ringtone_id': ringtone_id, 'filename': target_filename,
+                         'profiles': [profile['name'] for profile, _ in targets]}
+            )
+        except JobQueueFullError as e:
+            # Nothing is half-created: drop the source so the client can simply retry
+            logger.warning(f"⚠️ {e} - rejecting ringtone {target_filename}")
+            for name, rendition in rendition_summary['renditions'].items():
+                if rendition['file_path'] != file_path and os.path.exists(rendition['file_path']):
+                    os.remove(rendition['file_path'])
+                    catalog_service.remove_file(rendition['folder'], rendition['filename'])
+            for path in (file_path, metadata_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            catalog_service.remove_file(source_folder, target_filename)
+            blob_store_service.release(source_folder, target_filename)
+            response = jsonify({'success': False, 'error': str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+    if skipped:
+        print(f"⚠️ ffmpeg not available - renditions {', '.join(skipped)} skipped")
+        print("💡 To fix this, install ffmpeg")
+        logger.warning(f"ffmpeg not available - renditions {', '.join(skipped)} skipped")
+    pending = [profile['name'] for profile, _ in targets] if job else []
+    
+    # The MP3 fields describe the first selected MP3 profile, for clients that only know MP3
+    mp3_profile = next((profile for profile in profiles if profile['extension'] == 'mp3'), None)
+    mp3_filename = f"{base_filename}.mp3" if mp3_profile else None
+    mp3_path = os.path.join(RINGTONES_FOLDER, mp3_profile['folder'], mp3_filename) if mp3_profile else None
+    mp3_ready = mp3_ready or bool(mp3_profile and mp3_profile['name'] in rendition_summary['renditions'])
+    mp3_pending = bool(mp3_profile and mp3_profile['name'] in pending)
+    
+    # Print success message
+    print("=" * 60)
+    print(f"🎵 SUCCESS: Ringtone created successfully!")
+    print("=" * 60)
+    print(f"📁 {file_ext.upper()} format saved to: {source_folder}")
+    print(f"📁 {file_ext.upper()} filename: {target_filename}")
+    
+    for name, rendition in rendition_summary['renditions'].items():
+        print(f"✅ {name} rendition is ready - no encoding needed: {rendition['folder']}/{rendition['filename']}")
+    if job:
+        print("")
+        print(f"🔄 Renditions {', '.join(pending)} queued as job {job['id']}")
+        print("=" * 60)
+    elif not rendition_summary['renditions']:
+        print("")
+        print("⚠️ Rendition creation skipped")
+        print(f"💡 Only {file_ext.upper()} format was created")
+        print("=" * 60)
+    
+    logger.info(f"✅ {file_ext.upper()} ringtone saved successfully: {target_filename}")
+    logger.info(f"📁 File path: {os.path.abspath(file_path)}")
+    
+    # Create response data
+    response_data = {
+        'success': True,
+        'message': f"{file_ext.upper()} ringtone created successfully! {', '.join(pending)} being created in the background." if job else f'{file_ext.upper()} ringtone created successfully!',
+        'filename': target_filename,
+        'file_path': file_path,
+        'size': file_stat.st_size,
+        'created': datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
+        'metadata': metadata,
+        'format': file_ext.lower().replace('.', ''),
+        'folder': source_folder,
+        'renditions': rendition_summary['renditions'],
+        'renditions_pending': pending,
+        'renditions_skipped': skipped,
+        'mp3_available': mp3_ready,
+        'mp3_pending': mp3_pending,
+        'mp3_filename': mp3_filename if mp3_pending or mp3_ready else None,
+        'mp3_path': mp3_path if mp3_pending or mp3_ready else None,
+        'mp3_created': mp3_ready,
+        'sha256': blob['sha256'],
+        'dedup': blob['dedup']
+    }
+    
+    # Log the response being sent
+    logger.info(f"📤 Sending response: {response_data}")
+    
+    if job:
+        # 202 Accepted: renditions are still being produced; poll the job for the outcome
+        response_data['job_id'] = job['id']
+        response_data['job'] = job
+        response_data['status_url'] = f"/api/jobs/{job['id']}"
+        return jsonify(response_data), 202
+    
+    return jsonify(response_data)
+
 @app.route('/api/ringtones', methods=['POST'])
 def save_ringtone():
     """Save a ringtone file to the mp3_ringtones folder (MP3 only for now)"""
@@ -282,69 +867,15 @@ def save_ringtone():
         end_time = request.form.get('end_time', '0')
         duration = request.form.get('duration', '0')
         
-        # Clean the original name to remove file extensions
-        clean_original_name = original_name
-        for ext in ['.mp3', '.wav', '.m4a', '.ogg']:
-            clean_original_name = clean_original_name.replace(ext, '')
-        
         # Validate file type - Accept MP3 and WAV for now
         file_ext = os.path.splitext(file.filename)[1].lower()
         if file_ext not in ['.mp3', '.wav']:
             return jsonify({'success': False, 'error': 'Only MP3 and WAV files are supported. Please upload an MP3 or WAV file.'}), 400
         
-        # Determine which folder to save to based on file type FIRST
-        if file_ext.lower() == '.wav':
-            target_folder = WAV_RINGTONES_FOLDER
-        else:
-            target_folder = MP3_RINGTONES_FOLDER
-        
-        # Generate unique filename with clean original name info
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"ringtone_{timestamp}_{clean_original_name}_{start_time}s_to_{end_time}s{file_ext}"
-        safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-        
-        # Check if filename would exceed Windows Task Scheduler 261 character limit
-        # We need to account for the full command: python.exe + script_path + ringtone_path
-        python_exe_path = r"C:\Program Files\Python313\pythonw.exe"
-        script_path = os.path.join(os.path.dirname(__file__), "play_ringtone.py")
-        max_command_length = 261
-        
-        # Calculate the command length with current filename
-        test_command = f'"{python_exe_path}" "{script_path}" "{os.path.join(target_folder, safe_filename)}"'
-        
-        if len(test_command) > max_command_length:
-            # Shorten the filename to fit within the limit
-            logger.info(f"⚠️ Filename too long for Windows Task Scheduler ({len(test_command)} chars), shortening...")
-            
-            # Calculate how much we need to shorten
-            excess_length = len(test_command) - max_command_length + 20  # Add some buffer
-            
-            # Shorten the original name part
-            original_name_part = clean_original_name
-            if len(original_name_part) > excess_length:
-                # Truncate the original name and add hash for uniqueness
-                import hashlib
-                name_hash = hashlib.md5(original_name_part.encode()).hexdigest()[:8]
-                original_name_part = original_name_part[:max(10, len(original_name_part) - excess_length)] + f"_{name_hash}"
-            
-            # Regenerate filename with shortened name
-            safe_filename = f"ringtone_{timestamp}_{original_name_part}_{start_time}s_to_{end_time}s{file_ext}"
-            safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-            
-            # Verify the new command length
-            new_command = f'"{python_exe_path}" "{script_path}" "{os.path.join(target_folder, safe_filename)}"'
-            logger.info(f"✅ Shortened filename: {len(new_command)} chars (was {len(test_command)} chars)")
-            
-            if len(new_command) > max_command_length:
-                # If still too long, use a very short name with hash
-                name_hash = hashlib.md5(clean_original_name.encode()).hexdigest()[:12]
-                safe_filename = f"rt_{timestamp}_{name_hash}_{start_time}s_to_{end_time}s{file_ext}"
-                safe_filename = "".join(c for c in safe_filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-                logger.info(f"🔄 Using minimal filename: {safe_filename}")
-        
-        # Set the target filename
-        target_filename = safe_filename
+        # Renditions to create, by encoder profile name (deployment defaults when omitted)
+        profiles = _parse_profiles(request.form)
         
+        clean_original_name, target_folder, target_filename = _ringtone_filename(original_name, start_time, end_time, file_ext)
         file_path = os.path.join(target_folder, target_filename)
         
         # Log the exact file path being used
@@ -354,216 +885,519 @@ def save_ringtone():
         file.save(file_path)
         print(f"💾 {file_ext.upper()} file saved successfully to: {os.path.abspath(file_path)}")
         
-        # Generate base filename without extension for MP3 conversion
-        base_filename = safe_filename.rsplit('.', 1)[0]
+        return _store_ringtone(file_path, target_folder, target_filename, clean_original_name,
+                               start_time, end_time, duration, profiles=profiles)
         
-        # Always create MP3 version regardless of input format
-        mp3_filename = f"{base_filename}.mp3"
-        mp3_path = os.path.join(MP3_RINGTONES_FOLDER, mp3_filename)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error saving ringtone: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/originals/<original_id>/ringtones', methods=['POST'])
+def cut_ringtone(original_id):
+    """Create a ringtone by cutting an uploaded original on the server"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        print(f"✂️ SERVER-SIDE CUT STARTED for original {original_id}: {dict(data)}")
         
-        mp3_created = False
-        mp3_metadata = None
+        original = catalog_service.find_by_id('original_sound', original_id)
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
         
         try:
-            if PYDUB_AVAILABLE and PYDUB_FULLY_WORKING:
-                print("🔄 Starting MP3 conversion...")
-                logger.info("Starting MP3 conversion process")
-                
-                # Convert to MP3
-                if file_ext.lower() == '.wav':
-                    # If input is WAV, convert directly
-                    print("📥 Loading WAV file for conversion...")
-                    audio = AudioSegment.from_wav(file_path)
-                    print(f"✅ WAV file loaded successfully. Duration: {len(audio)}ms")
-                else:
-                    # If input is MP3, load and re-export to ensure consistency
-                    print("📥 Loading MP3 file for re-export...")
-                    audio = AudioSegment.from_mp3(file_path)
-                    print(f"✅ MP3 file loaded successfully. Duration: {len(audio)}ms")
-                
-                # Export as MP3
-                print("🔄 Exporting to MP3 format...")
-                audio.export(mp3_path, format="mp3", bitrate="128k")
-                
-                # Verify the MP3 file was created and has content
-                if os.path.exists(mp3_path):
-                    mp3_size = os.path.getsize(mp3_path)
-                    if mp3_size > 0:
-                        mp3_created = True
-                        print(f"✅ MP3 file created successfully! Size: {mp3_size} bytes")
-                        
-                        # Create MP3 metadata
-                        mp3_metadata = {
-                            'id': str(uuid.uuid4()),
-                            'filename': mp3_filename,
-                            'original_name': clean_original_name,
-                            'start_time': float(start_time),
-                            'end_time': float(end_time),
-                            'duration': float(duration),
-                            'created': datetime.now().isoformat(),
-                            'file_path': mp3_path,
-                            'format': 'mp3',
-                            'folder': 'mp3_ringtones',
-                            'file_size': mp3_size
-                        }
-                        
-                        # Save MP3 metadata
-                        mp3_metadata_filename = mp3_filename.rsplit('.', 1)[0] + '.json'
-                        mp3_metadata_path = os.path.join(MP3_RINGTONES_FOLDER, mp3_metadata_filename)
-                        with open(mp3_metadata_path, 'w') as f:
-                            json.dump(mp3_metadata, f, indent=2)
-                        
-                        print(f"🎵 MP3 version created successfully: {os.path.abspath(mp3_path)}")
-                        print(f"🎯 DUAL FORMAT SUCCESS: Both WAV and MP3 ringtones are now available!")
-                        logger.info(f"✅ MP3 version created: {mp3_filename} (Size: {mp3_size} bytes)")
-                    else:
-                        print(f"❌ MP3 file created but is empty (0 bytes)")
-                        logger.error(f"MP3 file created but is empty: {mp3_filename}")
-                        # Clean up empty file
-                        os.remove(mp3_path)
-                        if os.path.exists(mp3_metadata_path):
-                            os.remove(mp3_metadata_path)
-                else:
-                    print(f"❌ MP3 file was not created")
-                    logger.error(f"MP3 file was not created: {mp3_filename}")
-                    
-            elif PYDUB_AVAILABLE and not PYDUB_FULLY_WORKING:
-                print("⚠️ pydub available but audio conversion not working - missing audio codecs")
-                print("💡 To fix this, install ffmpeg or similar audio codecs")
-                logger.warning("pydub available but audio conversion not working - missing audio codecs")
-            else:
-                print("⚠️ pydub not available - MP3 conversion skipped")
-                logger.warning("pydub not available - MP3 conversion skipped")
-        except Exception as e:
-            print(f"❌ Error creating MP3 version: {e}")
-            logger.error(f"Error creating MP3 version: {e}")
-            
-            # Clean up any partial files
-            if os.path.exists(mp3_path):
-                os.remove(mp3_path)
-                print(f"🧹 Cleaned up partial MP3 file: {mp3_filename}")
-            if 'mp3_metadata_path' in locals() and os.path.exists(mp3_metadata_path):
-                os.remove(mp3_metadata_path)
-                print(f"🧹 Cleaned up partial MP3 metadata")
-        
-        # Save metadata to a JSON file for original format
-        metadata = {
-            'id': str(uuid.uuid4()),
-            'filename': target_filename,
-            'original_name': clean_original_name,
-            'start_time': float(start_time),
-            'end_time': float(end_time),
-            'duration': float(duration),
-            'created': datetime.now().isoformat(),
-            'file_path': file_path,
-            'format': file_ext.lower().replace('.', ''),
-            'folder': os.path.basename(target_folder),
-            'mp3_available': mp3_created,
-            'mp3_filename': mp3_filename if mp3_created else None,
-            'mp3_path': mp3_path if mp3_created else None
-        }
-        
-        metadata_filename = target_filename.rsplit('.', 1)[0] + '.json'
-        metadata_path = os.path.join(target_folder, metadata_filename)
-        
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        # Get file info
-        file_stat = os.stat(file_path)
+            start_time = float(data.get('start_time', 0))
+            end_time = float(data['end_time'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'start_time and end_time must be numbers'}), 400
+        if not (math.isfinite(start_time) and math.isfinite(end_time)) or start_time < 0 or end_time <= start_time:
+            return jsonify({'success': False, 'error': 'The cut must have 0 <= start_time < end_time'}), 400
+        
+        source_ext = os.path.splitext(original['name'])[1].lower()
+        output_format = (data.get('format') or source_ext.lstrip('.')).lower()
+        if output_format not in ('mp3', 'wav'):
+            return jsonify({'success': False, 'error': 'Only MP3 and WAV ringtones are supported'}), 400
+        
+        profiles = _parse_profiles(data)
+        trim = _parse_trim_options(data)
+        source_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        source_sha256 = content_hash_service.hash_file(source_path)
+        extra_metadata = {'source_id': original_id}
+        start_label, end_label = data.get('start_time', '0'), data['end_time']
+        
+        # The range must start inside the source; an end past it is clamped (the peak file
+        # built at upload knows the exact length, and is built now if it is missing)
+        waveform_peak_service.ensure(source_path, source_sha256, audio_capabilities.ffmpeg_binary())
+        source_duration = waveform_peak_service.duration(source_sha256)
+        if start_time >= source_duration:
+            return jsonify({'success': False,
+                            'error': f'start_time is past the end of the source ({source_duration:.3f}s)'}), 400
+        if end_time > source_duration:
+            end_time = source_duration
+            end_label = f"{end_time:g}"
+        
+        # Shrink the chosen range to its sound, leaving a little padding
+        if trim:
+            analysis = silence_detection_service.analyze(source_path, source_sha256, trim['threshold_db'],
+                                                         trim['mode'], audio_capabilities.ffmpeg_binary())
+            trimmed_start, trimmed_end = analysis.trim(start_time, end_time, trim['padding'])
+            extra_metadata['trimmed_from'] = [start_time, end_time]
+            print(f"🔇 Trimmed silence: {start_time}s-{end_time}s -> {trimmed_start}s-{trimmed_end}s")
+            start_time, end_time = trimmed_start, trimmed_end
+            start_label, end_label = f"{start_time:g}", f"{end_time:g}"
+        
+        original_name = data.get('original_name') or os.path.splitext(original['name'])[0]
+        clean_original_name, target_folder, target_filename = _ringtone_filename(
+            original_name, start_label, end_label, f".{output_format}")
+        file_path = os.path.join(target_folder, target_filename)
         
-        # Print success message
-        print("=" * 60)
-        print(f"🎵 SUCCESS: Ringtone created successfully!")
-        print("=" * 60)
-        print(f"📁 {file_ext.upper()} format saved to: {os.path.basename(target_folder)}")
-        print(f"📁 {file_ext.upper()} filename: {target_filename}")
-        
-        if mp3_created:
-            print("")
-            print(f"🎵 MP3 format also created successfully!")
-            print(f"📁 MP3 saved to: mp3_ringtones")
-            print(f"📁 MP3 filename: {mp3_filename}")
-            print("")
-            print(f"✅ Both WAV and MP3 formats are now available!")
-            print("")
-            print("📋 SUMMARY:")
-            print(f"   • WAV: {os.path.basename(target_folder)}/{target_filename}")
-            print(f"   • MP3: mp3_ringtones/{mp3_filename}")
-            print("=" * 60)
+        # Link an identical earlier cut from the rendition cache, or stream copy when the
+        # cut allows it and re-encode otherwise
+        bitrate = "128k" if output_format == 'mp3' else None
+        # cut_audio may stream copy MP3 or frame copy WAV, so its output is keyed apart from the
+        # encoder profile renditions of the same range (e.g. mp3_128 from a batch cut)
+        cut_key = rendition_cache_service.make_key(source_sha256, start_time, end_time, f"{output_format}-cut", bitrate)
+        if rendition_cache_service.fetch(cut_key, file_path):
+            cut_method = 'cache'
+            duration = end_time - start_time
+            print(f"♻️ Reused cached cut: {target_filename}")
         else:
-            print("")
-            print("⚠️ MP3 version creation failed or skipped")
-            print("💡 Only WAV format was created")
-            print("=" * 60)
-        
-        logger.info(f"✅ {file_ext.upper()} ringtone saved successfully: {target_filename}")
-        logger.info(f"📁 File path: {os.path.abspath(file_path)}")
-        if mp3_created:
-            logger.info(f"✅ MP3 version created successfully: {mp3_filename}")
-            logger.info(f"📁 MP3 file path: {os.path.abspath(mp3_path)}")
+            result = cut_audio(source_path, file_path, start_time, end_time, output_format, bitrate=bitrate,
+                               ffmpeg_binary=audio_capabilities.ffmpeg_binary())
+            cut_method = result['method']
+            duration = result['duration_ms'] / 1000
+            rendition_cache_service.store(cut_key, file_path)
+            print(f"✂️ Cut {result['duration_ms']} ms by {result['method']} in {result['encode_ms']} ms: {target_filename}")
+        
+        return _store_ringtone(file_path, target_folder, target_filename, clean_original_name,
+                               start_time, end_time, duration,
+                               extra_metadata=dict(extra_metadata, cut_method=cut_method),
+                               mp3_ready=True, profiles=profiles)
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error cutting ringtone from original {original_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/originals/<original_id>/peaks', methods=['GET'])
+def get_original_peaks(original_id):
+    """Get the min/max waveform peaks of an original for a time window at a zoom level"""
+    try:
+        original = catalog_service.find_by_id('original_sound', original_id)
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
+        
+        zoom = _parse_number_arg('zoom', int)
+        start = _parse_number_arg('start')
+        end = _parse_number_arg('end')
+        
+        source_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        source_sha256 = content_hash_service.hash_file(source_path)
+        
+        # Peaks depend only on the content, so a window never changes
+        etag = f"peaks-{source_sha256[:32]}-{zoom}-{start}-{end}-{request.args.get('format', 'json')}"
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        waveform_peak_service.ensure(source_path, source_sha256, audio_capabilities.ffmpeg_binary())
+        window = waveform_peak_service.window(source_sha256, zoom, start, end)
+        peaks = window.pop('peaks')
+        if len(peaks) > MAX_PEAKS_PER_REQUEST:
+            return jsonify({'success': False, 'error': f'Window has {len(peaks)} peaks (max {MAX_PEAKS_PER_REQUEST}); '
+                                                       f'use a lower zoom or a shorter window'}), 400
+        
+        if request.args.get('format') == 'binary':
+            # Little-endian int16 [min, max] pairs; the window is described in the headers
+            response = make_response(peaks.tobytes())
+            response.mimetype = 'application/octet-stream'
+            response.headers['X-Peaks-Zoom'] = str(window['zoom'])
+            response.headers['X-Peaks-Zoom-Levels'] = str(window['zoom_levels'])
+            response.headers['X-Peaks-Samples-Per-Peak'] = str(window['samples_per_peak'])
+            response.headers['X-Peaks-Sample-Rate'] = str(window['sample_rate'])
+            response.headers['X-Peaks-Start-Index'] = str(window['start_index'])
         else:
-            logger.warning("MP3 version creation failed or skipped")
-        
-        # Create response data
-        response_data = {
-            'success': True,
-            'message': f'Ringtone created successfully in both WAV and MP3 formats!' if mp3_created else f'{file_ext.upper()} ringtone created successfully!',
-            'filename': target_filename,
-            'file_path': file_path,
-            'size': file_stat.st_size,
-            'created': datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
-            'metadata': metadata,
-            'format': file_ext.lower().replace('.', ''),
-            'folder': os.path.basename(target_folder),
-            'mp3_available': mp3_created,
-            'mp3_filename': mp3_filename if mp3_created else None,
-            'mp3_path': mp3_path if mp3_created else None,
-            'mp3_created': mp3_created,
-            'mp3_metadata': mp3_metadata
-        }
+            response = jsonify(dict(window, success=True, id=original['id'], scale=32768,
+                                    min=peaks[:, 0].tolist(), max=peaks[:, 1].tolist()))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting peaks of original {original_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/originals/<original_id>/silence', methods=['GET'])
+def get_original_silence(original_id):
+    """Find leading/trailing silence and quiet gaps of an original and suggest start/end times"""
+    try:
+        original = catalog_service.find_by_id('original_sound', original_id)
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
+        
+        threshold_db = _parse_number_arg('threshold_db')
+        min_silence = _parse_number_arg('min_silence')
+        padding = _parse_number_arg('padding')
+        threshold_db = DEFAULT_THRESHOLD_DB if threshold_db is None else threshold_db
+        min_silence = DEFAULT_MIN_SILENCE if min_silence is None else min_silence
+        padding = DEFAULT_PADDING if padding is None else padding
+        mode = request.args.get('mode', 'rms')
+        SilenceDetectionService.validate(threshold_db, mode, min_silence)
+        if not 0 <= padding <= MAX_TRIM_PADDING:
+            raise ValueError(f'padding must be between 0 and {MAX_TRIM_PADDING:g} seconds')
+        
+        source_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        analysis = silence_detection_service.analyze(source_path, content_hash_service.hash_file(source_path),
+                                                     threshold_db, mode, audio_capabilities.ffmpeg_binary())
+        report = analysis.report(_parse_number_arg('start'), _parse_number_arg('end'), min_silence, padding)
+        return jsonify(dict(report, success=True, id=original['id']))
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error detecting silence of original {original_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/originals/<original_id>/hooks', methods=['GET'])
+def get_original_hooks(original_id):
+    """Suggest ringtone windows of an original: its loudest, most repeated sections, best first"""
+    try:
+        original = catalog_service.find_by_id('original_sound', original_id)
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
+        
+        length = _parse_number_arg('length')
+        count = _parse_number_arg('count', int)
+        source_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        result = chorus_locator_service.locate(source_path, content_hash_service.hash_file(source_path),
+                                               30.0 if length is None else length, 5 if count is None else count,
+                                               audio_capabilities.ffmpeg_binary())
+        return jsonify(dict(result, success=True, id=original['id']))
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error locating hooks of original {original_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/ringtones/batch', methods=['POST'])
+def batch_cut_ringtones():
+    """Cut several ringtones out of one uploaded original with a single decode"""
+    try:
+        started = time.perf_counter()
+        data = request.get_json(silent=True) or {}
+        original_id = data.get('original_id')
+        cuts = data.get('cuts')
+        print(f"✂️ BATCH CUT STARTED for original {original_id}: {len(cuts) if isinstance(cuts, list) else 0} cuts")
+        
+        original = catalog_service.find_by_id('original_sound', str(original_id)) if original_id else None
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
+        if not isinstance(cuts, list) or not cuts:
+            return jsonify({'success': False, 'error': 'cuts must be a non-empty list'}), 400
+        if len(cuts) > MAX_BATCH_CUTS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_CUTS} cuts per batch'}), 400
+        
+        # Every cut gets a WAV plus the renditions of the selected encoder profiles
+        rendition_profiles = [profile for profile in _parse_profiles(data) if profile['folder'] != 'wav_ringtones']
+        profiles_by_name = {profile['name']: profile for profile in rendition_profiles}
+        trim = _parse_trim_options(data)
+        
+        source_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        source_sha256 = content_hash_service.hash_file(source_path)
+        default_name = os.path.splitext(original['name'])[0]
+        
+        # One silence analysis of the whole source trims every cut
+        analysis = None
+        if trim:
+            analysis = silence_detection_service.analyze(source_path, source_sha256, trim['threshold_db'],
+                                                         trim['mode'], audio_capabilities.ffmpeg_binary())
+        
+        # Validate and plan every cut; a bad cut is reported in its result instead of failing the batch
+        plans = []
+        segments = []
+        seen_filenames = set()
+        for index, cut in enumerate(cuts):
+            plan = {'index': index, 'error': None, 'files': {}, 'keys': {}}
+            plans.append(plan)
+            try:
+                start_time = float(cut.get('start_time', 0))
+                end_time = float(cut['end_time'])
+            except (AttributeError, KeyError, TypeError, ValueError):
+                plan['error'] = 'start_time and end_time must be numbers'
+                continue
+            if start_time < 0 or end_time <= start_time:
+                plan['error'] = 'end_time must be greater than start_time'
+                continue
+            start_label, end_label = cut.get('start_time', '0'), cut['end_time']
+            if analysis is not None:
+                try:
+                    trimmed_start, trimmed_end = analysis.trim(start_time, end_time, trim['padding'])
+                except ValueError as e:
+                    plan['error'] = str(e)
+                    continue
+                plan['trimmed_from'] = [start_time, end_time]
+                start_time, end_time = trimmed_start, trimmed_end
+                start_label, end_label = f"{start_time:g}", f"{end_time:g}"
+            
+            clean_original_name, _, wav_filename = _ringtone_filename(
+                str(cut.get('name') or default_name), start_label, end_label, '.wav')
+            base_filename = wav_filename.rsplit('.', 1)[0]
+            if base_filename in seen_filenames:
+                plan['error'] = 'Duplicate cut'
+                continue
+            seen_filenames.add(base_filename)
+            plan.update(name=clean_original_name, base_filename=base_filename, start_time=start_time, end_time=end_time)
+            
+            # Link renditions already in the cache; only the rest is encoded
+            outputs = []
+            for profile in [SOURCE_WAV_PROFILE] + rendition_profiles:
+                file_path = os.path.join(RINGTONES_FOLDER, profile['folder'], f"{base_filename}.{profile['extension']}")
+                key = rendition_cache_service.make_key(source_sha256, start_time, end_time,
+                                                       **encoder_profile_service.cache_key_fields(profile))
+                if rendition_cache_service.fetch(key, file_path):
+                    plan['files'][profile['name']] = {'output_path': file_path, 'size': os.path.getsize(file_path),
+                                                      'method': 'cache'}
+                else:
+                    plan['keys'][profile['name']] = key
+                    outputs.append((profile['name'], file_path, profile))
+            if outputs:
+                plan['segment'] = len(segments)
+                segments.append({'start': start_time, 'end': end_time, 'outputs': outputs})
+        
+        batch = {'segments': [], 'decode_ms': 0}
+        if segments:
+            batch = batch_cut_service.cut_many(source_path, segments, ffmpeg_binary=audio_capabilities.ffmpeg_binary())
+        
+        # Collect the encodes, then write every sidecar and index all files in one catalog transaction
+        indexed_files = []
+        for plan in plans:
+            if 'segment' in plan:
+                segment_result = batch['segments'][plan['segment']]
+                if segment_result.get('error'):
+                    plan['error'] = segment_result['error']
+                for name, result in segment_result['outputs'].items():
+                    plan['files'][name] = dict(result, method='encode')
+            wav_file = plan['files'].pop('wav', {})
+            if plan['error'] or 'error' in wav_file or not wav_file:
+                plan['error'] = plan['error'] or wav_file.get('error') or 'WAV rendition failed'
+                for result in list(plan['files'].values()) + [wav_file]:
+                    if result.get('output_path') and os.path.exists(result['output_path']):
+                        os.remove(result['output_path'])
+                plan['files'] = {}
+                continue
+            
+            wav_path = wav_file['output_path']
+            if wav_file['method'] == 'encode':
+                rendition_cache_service.store(plan['keys']['wav'], wav_path)
+            blob = blob_store_service.ingest(wav_path, 'wav_ringtones', os.path.basename(wav_path),
+                                             content_hash_service.hash_file(wav_path))
+            duration = plan['end_time'] - plan['start_time']
+            if wav_file.get('duration_ms') is not None:
+                duration = wav_file['duration_ms'] / 1000
+            metadata = {
+                'id': content_hash_service.file_content_id(wav_path),
+                'filename': os.path.basename(wav_path),
+                'original_name': plan['name'],
+                'start_time': plan['start_time'],
+                'end_time': plan['end_time'],
+                'duration': duration,
+                'created': datetime.now().isoformat(),
+                'file_path': wav_path,
+                'format': 'wav',
+                'folder': 'wav_ringtones',
+                'mp3_available': False,
+                'mp3_filename': None,
+                'mp3_path': None,
+                'renditions': {},
+                'source_id': original['id'],
+                'cut_method': 'batch'
+            }
+            if 'trimmed_from' in plan:
+                metadata['trimmed_from'] = plan['trimmed_from']
+            cache_keys = {name: plan['keys'][name] for name, result in plan['files'].items()
+                          if result['method'] == 'encode'}
+            summary, files = _record_renditions(plan['files'], profiles_by_name, metadata,
+                                                os.path.join(WAV_RINGTONES_FOLDER, f"{plan['base_filename']}.json"),
+                                                cache_keys=cache_keys)
+            indexed_files += files
+            plan['files']['wav'] = wav_file
+            plan.update(metadata=metadata, errors=summary['errors'], dedup=blob['dedup'])
+        if indexed_files:
+            catalog_service.index_files(indexed_files)
+        
+        results = []
+        for plan in plans:
+            result = {'index': plan['index'], 'success': plan['error'] is None}
+            if plan['error']:
+                result['error'] = plan['error']
+            else:
+                result.update(id=plan['metadata']['id'], metadata=plan['metadata'], dedup=plan['dedup'], files={
+                    name: {
+                        'filename': os.path.basename(file['output_path']),
+                        'size': file['size'],
+                        'method': file['method'],
+                        'encode_ms': file.get('encode_ms'),
+                        'realtime_factor': file.get('realtime_factor')
+                    } for name, file in plan['files'].items() if 'error' not in file
+                })
+                if plan['errors']:
+                    result['errors'] = plan['errors']
+            results.append(result)
+        
+        wall_ms = round((time.perf_counter() - started) * 1000, 1)
+        created = sum(1 for result in results if result['success'])
+        print(f"✂️ Batch cut created {created}/{len(results)} ringtones in {wall_ms} ms (decode {batch['decode_ms']} ms)")
         
-        # Log the response being sent
-        logger.info(f"📤 Sending response: {response_data}")
+        return jsonify({
+            'success': created > 0,
+            'source_id': original['id'],
+            'created': created,
+            'failed': len(results) - created,
+            'cuts': results,
+            'decode_ms': batch['decode_ms'],
+            'wall_ms': wall_ms
+        })
         
-        return jsonify(response_data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error batch cutting ringtones: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/rendition-cache', methods=['GET'])
+def rendition_cache_stats():
+    """Get rendition cache hit/miss counters and size"""
+    try:
+        return jsonify({'success': True, 'stats': rendition_cache_service.stats()})
+    except Exception as e:
+        logger.error(f"Error getting rendition cache stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/encoder-pool', methods=['GET'])
+def encoder_pool_stats():
+    """Get per-worker metrics of the encoder worker pool"""
+    try:
+        return jsonify({'success': True, 'stats': encoder_pool_service.stats()})
+    except Exception as e:
+        logger.error(f"Error getting encoder pool stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/encoder-profiles', methods=['GET'])
+def list_encoder_profiles():
+    """Get the encoder profiles a ringtone can be rendered with and the deployment defaults"""
+    try:
+        return jsonify(dict(encoder_profile_service.list_profiles(), success=True))
+    except Exception as e:
+        logger.error(f"Error listing encoder profiles: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, result and timing of a background job"""
+    try:
+        job = transcode_job_service.get_job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
         
     except Exception as e:
-        logger.error(f"Error saving ringtone: {e}")
+        logger.error(f"Error getting job {job_id}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _send_audio(file_path, sha256, download_name, as_attachment=False, immutable=False):
+    """
+    Stream an audio file with Range (206) and conditional (304) support.
+    
+    The ETag is the content's SHA-256. Files are sent with the WSGI server's file
+    wrapper, which servers like waitress and gunicorn turn into zero-copy sendfile;
+    only partial (Range) responses are read through Python.
+    
+    Args:
+        download_name: File name given in Content-Disposition (and the source of the MIME type)
+        as_attachment: Offer the file as a download instead of playing it inline
+        immutable: The URL names the content, so clients may cache it forever
+    """
+    extension = os.path.splitext(download_name)[1].lower()
+    response = send_file(file_path, mimetype=AUDIO_MIMETYPES.get(extension), as_attachment=as_attachment,
+                         download_name=download_name, conditional=True, etag=sha256)
+    # Advertise seeking on full responses too (Werkzeug only sets it when answering a Range)
+    response.headers.setdefault('Accept-Ranges', 'bytes')
+    if immutable:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        # The name may be reused for other content: revalidate (a cheap 304) before every use
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/api/ringtones/<folder>/<filename>', methods=['GET'])
 def download_ringtone(folder, filename):
-    """Download a ringtone file from the specified folder"""
+    """Download a ringtone file from the specified folder (``?inline=true`` plays it instead)"""
     try:
         # Validate folder name for security
-        if folder not in ['wav_ringtones', 'mp3_ringtones']:
+        if folder not in RINGTONE_FOLDERS:
             return jsonify({'success': False, 'error': 'Invalid folder'}), 400
         
         file_path = os.path.join(RINGTONES_FOLDER, folder, filename)
-        if not os.path.exists(file_path):
+        if not os.path.isfile(file_path):
             return jsonify({'success': False, 'error': 'File not found'}), 404
         
-        return send_file(file_path, as_attachment=True)
+        # Downloads stay attachments unless the client asks to play the file
+        inline = request.args.get('inline', '').lower() in ('true', '1')
+        return _send_audio(file_path, content_hash_service.hash_file(file_path), filename, as_attachment=not inline)
         
+    except HTTPException:
+        # 416 for a range outside the file
+        raise
     except Exception as e:
         logger.error(f"Error downloading ringtone: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/blobs/<sha256>', methods=['GET'])
+def stream_blob(sha256):
+    """Stream stored content by its SHA-256 (``?download=true`` for an attachment); cached immutably"""
+    try:
+        reference = blob_store_service.reference(sha256)
+        if reference is None:
+            return jsonify({'success': False, 'error': 'Content not found'}), 404
+        
+        # Clients revalidating a content address always hold the current version
+        if sha256 in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(sha256)
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
+        
+        folder, name = reference
+        return _send_audio(blob_store_service.blob_path(sha256), sha256, name,
+                           as_attachment=request.args.get('download', '').lower() in ('true', '1'), immutable=True)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming blob {sha256}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/ringtones/<folder>/<filename>', methods=['DELETE'])
 def delete_ringtone(folder, filename):
     """Delete a ringtone file from the specified folder"""
     try:
         # Validate folder name for security
-        if folder not in ['wav_ringtones', 'mp3_ringtones']:
+        if folder not in RINGTONE_FOLDERS:
             return jsonify({'success': False, 'error': 'Invalid folder'}), 400
         
         file_path = os.path.join(RINGTONES_FOLDER, folder, filename)
         if not os.path.exists(file_path):
             return jsonify({'success': False, 'error': 'File not found'}), 404
         
-        # Delete the main file
+        # Delete the main file; its blob goes with its last reference
         os.remove(file_path)
+        catalog_service.remove_file(folder, filename)
+        blob_store_service.release(folder, filename)
         
         # Try to delete metadata file
         metadata_filename = filename.rsplit('.', 1)[0] + '.json'
@@ -572,35 +1406,24 @@ def delete_ringtone(folder, filename):
             os.remove(metadata_path)
             logger.info(f"Metadata deleted: {metadata_filename}")
         
-        # If deleting from WAV folder, also try to delete corresponding MP3
-        if folder == 'wav_ringtones':
-            mp3_filename = filename.rsplit('.', 1)[0] + '.mp3'
-            mp3_path = os.path.join(MP3_RINGTONES_FOLDER, mp3_filename)
-            if os.path.exists(mp3_path):
-                os.remove(mp3_path)
-                logger.info(f"Corresponding MP3 deleted: {mp3_filename}")
-                
-                # Also delete MP3 metadata
-                mp3_metadata_filename = mp3_filename.rsplit('.', 1)[0] + '.json'
-                mp3_metadata_path = os.path.join(MP3_RINGTONES_FOLDER, mp3_metadata_filename)
-                if os.path.exists(mp3_metadata_path):
-                    os.remove(mp3_metadata_path)
-                    logger.info(f"MP3 metadata deleted: {mp3_metadata_filename}")
-        
-        # If deleting from MP3 folder, also try to delete corresponding WAV
-        elif folder == 'mp3_ringtones':
-            wav_filename = filename.rsplit('.', 1)[0] + '.wav'
-            wav_path = os.path.join(WAV_RINGTONES_FOLDER, wav_filename)
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
-                logger.info(f"Corresponding WAV deleted: {wav_filename}")
-                
-                # Also delete WAV metadata
-                wav_metadata_filename = wav_filename.rsplit('.', 1)[0] + '.json'
-                wav_metadata_path = os.path.join(WAV_RINGTONES_FOLDER, wav_metadata_filename)
-                if os.path.exists(wav_metadata_path):
-                    os.remove(wav_metadata_path)
-                    logger.info(f"WAV metadata deleted: {wav_metadata_filename}")
+        # Also delete the other renditions of the ringtone and their metadata
+        base_filename = filename.rsplit('.', 1)[0]
+        for rendition_folder in RINGTONE_FOLDERS:
+            for extension in catalog_service.folders[rendition_folder][1]:
+                rendition_filename = base_filename + extension
+                if (rendition_folder, rendition_filename) == (folder, filename):
+                    continue
+                rendition_path = os.path.join(RINGTONES_FOLDER, rendition_folder, rendition_filename)
+                if os.path.exists(rendition_path):
+                    os.remove(rendition_path)
+                    catalog_service.remove_file(rendition_folder, rendition_filename)
+                    blob_store_service.release(rendition_folder, rendition_filename)
+                    logger.info(f"Corresponding rendition deleted: {rendition_folder}/{rendition_filename}")
+            
+            rendition_metadata_path = os.path.join(RINGTONES_FOLDER, rendition_folder, base_filename + '.json')
+            if rendition_folder != folder and os.path.exists(rendition_metadata_path):
+                os.remove(rendition_metadata_path)
+                logger.info(f"Rendition metadata deleted: {rendition_folder}/{base_filename}.json")
         
         logger.info(f"Ringtone deleted successfully: {filename} from {folder}")
         
@@ -615,42 +1438,405 @@ def delete_ringtone(folder, filename):
         logger.error(f"Error deleting ringtone: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _validate_upload_filename(filename):
+    """Return an upload's file name if it is a plain MP3 or WAV name; raises ValueError otherwise"""
+    if not isinstance(filename, str) or not filename.strip():
+        raise ValueError('No file selected')
+    if (os.path.basename(filename) != filename or '\\' in filename or '\0' in filename
+            or filename.startswith('.') or len(filename) > 255):
+        raise ValueError('Invalid file name')
+    if os.path.splitext(filename)[1].lower() not in ['.mp3', '.wav']:
+        raise ValueError('Only MP3 and WAV files are supported. Please upload an MP3 or WAV file.')
+    return filename
+
+def _original_name_conflict(filename, sha256=None, replace=False):
+    """Return an error message if an original of that name exists with other content, else None"""
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    if replace or not os.path.exists(file_path):
+        return None
+    if sha256 and content_hash_service.hash_file(file_path) == str(sha256).lower():
+        return None
+    return f'An original named {filename} already exists; send "replace": true to overwrite it'
+
+def _register_upload(filename, file_path, sha256=None, blob=None):
+    """
+    Store a new original by content, index it, queue its waveform peaks and build
+    the upload response.
+    
+    Args:
+        sha256: Digest computed while the file was received, if any
+        blob: Result of the blob store if the file was created from a stored blob
+    """
+    file_ext = os.path.splitext(filename)[1].lower()
+    if sha256:
+        # Hashed while the chunks arrived, so neither the catalog nor the peaks read the file again for it
+        content_hash_service.remember(file_path, sha256)
+    else:
+        sha256 = content_hash_service.hash_file(file_path)
+    if blob is None:
+        # Identical content that is already stored turns the file into a link of that blob
+        blob = blob_store_service.ingest(file_path, 'original_sound', filename, sha256)
+    file_stat = os.stat(file_path)
+    entry = catalog_service.index_file('original_sound', filename)
+    
+    # Compute the waveform peaks in the background; a peaks request builds them if this job has not run yet
+    peaks_job = None
+    peaks_path = waveform_peak_service.peaks_path(sha256)
+    if not os.path.exists(peaks_path):
+        try:
+            peaks_job = transcode_job_service.submit('peaks', build_peak_file, file_path, peaks_path,
+                                                     audio_capabilities.ffmpeg_binary())
+        except JobQueueFullError:
+            logger.warning(f"⚠️ Job queue full, peaks of {filename} will be computed on first request")
+    
+    logger.info(f"{file_ext.upper()} audio file uploaded successfully: {filename}" + (" (duplicate content)" if blob['dedup'] else ""))
+    
+    return {
+        'success': True,
+        'message': f'{file_ext.upper()} audio file uploaded successfully',
+        'id': entry['id'] if entry else None,
+        'peaks_job_id': peaks_job['id'] if peaks_job else None,
+        'filename': filename,
+        'file_path': file_path,
+        'size': file_stat.st_size,
+        'uploaded': datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
+        'sha256': sha256,
+        'dedup': blob['dedup']
+    }
+
 @app.route('/api/upload', methods=['POST'])
 def upload_audio():
-    """Upload an original MP3 or WAV audio file"""
+    """Upload an original MP3 or WAV audio file in one request (see /api/uploads for large files)"""
+    staged_path = None
     try:
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
         
         file = request.files['file']
-        if file.filename == '':
-            return jsonify({'success': False, 'error': 'No file selected'}), 400
-        
-        # Validate file type - Accept MP3 and WAV for now
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        if file_ext not in ['.mp3', '.wav']:
-            return jsonify({'success': False, 'error': 'Only MP3 and WAV files are supported. Please upload an MP3 or WAV file.'}), 400
+        try:
+            filename = _validate_upload_filename(file.filename)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Save to the staging folder first, so an existing original is only replaced on request
+        fd, staged_path = tempfile.mkstemp(prefix='upload-', dir=UPLOAD_STAGING_FOLDER)
+        os.close(fd)
+        file.save(staged_path)
+        sha256 = content_hash_service.hash_file(staged_path)
+        conflict = _original_name_conflict(filename, sha256, request.form.get('replace', '').lower() in ('true', '1'))
+        if conflict:
+            return jsonify({'success': False, 'error': conflict}), 409
+        
+        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        os.replace(staged_path, file_path)
+        staged_path = None
+        return jsonify(_register_upload(filename, file_path, sha256))
         
-        # Save file
-        file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(file_path)
+    except Exception as e:
+        logger.error(f"Error uploading audio file: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        if staged_path and os.path.exists(staged_path):
+            os.remove(staged_path)
+
+@app.route('/api/originals/<original_id>', methods=['DELETE'])
+def delete_original(original_id):
+    """Delete an uploaded original; its blob goes with its last reference"""
+    try:
+        original = catalog_service.find_by_id('original_sound', original_id)
+        if original is None:
+            return jsonify({'success': False, 'error': 'Original not found'}), 404
         
-        # Get file info
-        file_stat = os.stat(file_path)
+        file_path = os.path.join(UPLOAD_FOLDER, original['name'])
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        catalog_service.remove_file('original_sound', original['name'])
+        blob_store_service.release('original_sound', original['name'])
+        logger.info(f"Original deleted successfully: {original['name']}")
         
-        logger.info(f"{file_ext.upper()} audio file uploaded successfully: {file.filename}")
-        
-        return jsonify({
-            'success': True,
-            'message': f'{file_ext.upper()} audio file uploaded successfully',
-            'filename': file.filename,
-            'file_path': file_path,
-            'size': file_stat.st_size,
-            'uploaded': datetime.fromtimestamp(file_stat.st_ctime).isoformat()
-        })
+        return jsonify({'success': True, 'message': 'Original deleted successfully', 'filename': original['name']})
         
     except Exception as e:
-        logger.error(f"Error uploading audio file: {e}")
+        logger.error(f"Error deleting original: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/blob-store', methods=['GET'])
+def blob_store_stats():
+    """Blob and reference counts, stored vs referenced bytes and dedup hits"""
+    try:
+        return jsonify({'success': True, 'blob_store': blob_store_service.stats()})
+    except Exception as e:
+        logger.error(f"Error reading blob store stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _upload_session_response(session, status=200):
+    """Return an upload session as JSON with its committed offset in the Upload-Offset header"""
+    response = jsonify({'success': True, 'upload': session})
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(session['offset'])
+    return response
+
+def _upload_not_found():
+    return jsonify({'success': False, 'error': 'Upload not found or expired'}), 404
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Open a resumable upload: JSON {filename, size, sha256?, replace?}; stored content is linked at once"""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = _validate_upload_filename(data.get('filename'))
+        sha256 = data.get('sha256')
+        conflict = _original_name_conflict(filename, sha256, data.get('replace') is True)
+        if conflict:
+            return jsonify({'success': False, 'error': conflict}), 409
+        
+        # Content the server already has is linked under the new name: no transfer needed
+        if sha256 and blob_store_service.has(str(sha256).lower()):
+            sha256 = str(sha256).lower()
+            blob = blob_store_service.materialize(sha256, 'original_sound', filename)
+            if blob is not None:
+                return jsonify(dict(_register_upload(filename, os.path.join(UPLOAD_FOLDER, filename), sha256, blob),
+                                    upload=None))
+        
+        session = upload_session_service.create(filename, data.get('size'), sha256)
+        return _upload_session_response(session, 201)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except UploadLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except Exception as e:
+        logger.error(f"Error creating upload: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Return an upload's committed offset, where an interrupted client resumes"""
+    session = upload_session_service.get(upload_id)
+    if session is None:
+        return _upload_not_found()
+    return _upload_session_response(session)
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """Append the raw request body at the offset given as Upload-Offset header or ?offset="""
+    try:
+        offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+        if offset is None or not offset.isdigit():
+            return jsonify({'success': False, 'error': 'Upload-Offset must be a non-negative integer'}), 400
+        if request.content_length is None:
+            return jsonify({'success': False, 'error': 'Content-Length is required'}), 411
+        
+        session = upload_session_service.write_chunk(upload_id, int(offset), request.stream, request.content_length)
+        if session is None:
+            return _upload_not_found()
+        return _upload_session_response(session)
+    except UploadConflictError as e:
+        response = jsonify({'success': False, 'error': str(e), 'offset': e.committed})
+        response.status_code = 409
+        response.headers['Upload-Offset'] = str(e.committed)
+        return response
+    except UploadLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except Exception as e:
+        logger.error(f"Error writing upload chunk: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Verify a complete upload and add it to the originals"""
+    try:
+        data = request.get_json(silent=True) or {}
+        session = upload_session_service.get(upload_id)
+        sha256 = upload_session_service.digest(upload_id)
+        if session is None or sha256 is None:
+            return _upload_not_found()
+        conflict = _original_name_conflict(session['filename'], sha256, data.get('replace') is True)
+        if conflict:
+            # The session is kept: finalize again with "replace": true, or cancel it
+            return jsonify({'success': False, 'error': conflict}), 409
+        
+        file_path = os.path.join(UPLOAD_FOLDER, session['filename'])
+        result = upload_session_service.finalize(upload_id, file_path)
+        if result is None:
+            return _upload_not_found()
+        return jsonify(_register_upload(session['filename'], file_path, result['sha256']))
+    except UploadConflictError as e:
+        return jsonify({'success': False, 'error': str(e), 'offset': e.committed}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error finalizing upload: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Cancel an upload and delete its staged bytes"""
+    if not upload_session_service.abort(upload_id):
+        return _upload_not_found()
+    return jsonify({'success': True, 'message': 'Upload cancelled'})
+
+def _resolve_alarm_ringtone(folder, filename):
+    """Return the path of the backend ringtone a server alarm plays"""
+    if folder not in RINGTONE_FOLDERS:
+        raise ValueError('Invalid folder')
+    if not isinstance(filename, str) or not filename or os.path.basename(filename) != filename:
+        raise ValueError('Invalid filename')
+    file_path = os.path.abspath(os.path.join(RINGTONES_FOLDER, folder, filename))
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f'Ringtone not found: {folder}/{filename}')
+    return file_path
+
+def _schedule_fields(data, current=None):
+    """Client fields of a schedule; server alarms get the path of their ringtone resolved here"""
+    fields = {key: value for key, value in data.items()
+              if key not in ('id', 'ringtone_path', 'last_fired_at', 'next_fire_at', 'updated')}
+    merged = {**(current or {}), **fields}
+    relocated = current is None or {'source', 'ringtone_folder', 'ringtone_filename', 'ringtone_path'} & set(data)
+    if merged.get('source') == 'server':
+        # Never a client-supplied path: the daemon only plays files from the ringtone folders
+        if relocated:
+            fields['ringtone_path'] = _resolve_alarm_ringtone(merged.get('ringtone_folder'),
+                                                              merged.get('ringtone_filename'))
+    elif 'ringtone_path' in data:
+        fields['ringtone_path'] = data['ringtone_path']
+    return fields
+
+def _schedule_changed():
+    """Wake the alarm daemon so changes to server alarms apply at once"""
+    alarm_scheduler_service.notify()
+
+@app.route('/api/schedules', methods=['GET'])
+def list_schedules():
+    """
+    List schedules.
+    
+    ``within_hours=N`` returns the active schedules firing in the next N hours, soonest first;
+    ``ringtone_id`` (or ``folder`` and ``filename``) the schedules playing a ringtone; otherwise
+    all schedules in pages of ``limit`` with ``cursor``. ``source`` filters by scheduling method.
+    """
+    try:
+        source = request.args.get('source')
+        limit = _parse_number_arg('limit', int)
+        if limit is None:
+            limit = MAX_SCHEDULE_PAGE_SIZE
+        elif limit < 1:
+            return jsonify({'success': False, 'error': 'limit must be at least 1'}), 400
+        within_hours = _parse_number_arg('within_hours')
+        if within_hours is not None:
+            if not 0 < within_hours <= 24 * 7:
+                return jsonify({'success': False, 'error': 'within_hours must be between 0 and 168'}), 400
+            schedules, next_cursor = schedule_store_service.due_within(within_hours * 3600, limit, source), None
+        elif 'ringtone_id' in request.args or 'filename' in request.args:
+            schedules = schedule_store_service.by_ringtone(request.args.get('ringtone_id'), request.args.get('folder'),
+                                                           request.args.get('filename'))
+            next_cursor = None
+        else:
+            schedules, next_cursor = schedule_store_service.list(limit, _parse_number_arg('cursor', int), source)
+        return jsonify({'success': True, 'schedules': schedules, 'count': len(schedules), 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error listing schedules: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/schedules', methods=['POST'])
+def create_schedule():
+    """Create a schedule (JSON fields as returned by GET; ``id`` is generated when omitted)"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'No data provided'}), 400
+        fields = _schedule_fields(data)
+        if data.get('id') is not None:
+            fields['id'] = data['id']
+        schedule = schedule_store_service.create(fields)
+        _schedule_changed()
+        logger.info(f"📅 Created schedule {schedule['id']} ({schedule['source']}, {schedule['time']})")
+        return jsonify({'success': True, 'schedule': schedule}), 201
+    except ScheduleExistsError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating schedule: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/schedules/import', methods=['POST'])
+def import_schedules():
+    """Import schedules kept in a browser until now (JSON ``schedules`` list); existing ids are skipped"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('schedules'), list):
+            return jsonify({'success': False, 'error': 'A schedules list is required'}), 400
+        if len(data['schedules']) > 1000:
+            return jsonify({'success': False, 'error': 'At most 1000 schedules per import'}), 400
+        schedules, errors = [], {}
+        for schedule in data['schedules']:
+            try:
+                if not isinstance(schedule, dict):
+                    raise ValueError('Each schedule must be an object')
+                fields = _schedule_fields(schedule)
+                fields['id'] = schedule.get('id')
+                schedules.append(fields)
+            except (ValueError, FileNotFoundError) as e:
+                errors[str(schedule.get('id') if isinstance(schedule, dict) else None)] = str(e)
+        result = schedule_store_service.import_many(schedules)
+        result['errors'].update(errors)
+        _schedule_changed()
+        logger.info(f"📅 Imported {result['imported']} schedules ({result['skipped']} already stored)")
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        logger.error(f"Error importing schedules: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/schedules/<schedule_id>', methods=['GET'])
+def get_schedule(schedule_id):
+    """Get one schedule"""
+    schedule = schedule_store_service.get(schedule_id)
+    if schedule is None:
+        return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+    return jsonify({'success': True, 'schedule': schedule})
+
+@app.route('/api/schedules/<schedule_id>', methods=['PATCH'])
+def update_schedule(schedule_id):
+    """Change some fields of a schedule (e.g. ``active``, ``time``, ``days``, ``last_played``)"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'No data provided'}), 400
+        current = schedule_store_service.get(schedule_id)
+        if current is None:
+            return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+        schedule = schedule_store_service.update(schedule_id, _schedule_fields(data, current))
+        if schedule is None:
+            return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+        _schedule_changed()
+        return jsonify({'success': True, 'schedule': schedule})
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error updating schedule: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/schedules/<schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    """Delete a schedule"""
+    if not schedule_store_service.delete(schedule_id):
+        return jsonify({'success': False, 'error': 'Schedule not found'}), 404
+    _schedule_changed()
+    return jsonify({'success': True, 'message': 'Schedule deleted'})
+
+@app.route('/api/alarm-scheduler', methods=['GET'])
+def alarm_scheduler_stats():
+    """Alarm daemon status: alarm counts, whether this process fires them, fired/missed counts and lateness"""
+    try:
+        return jsonify({'success': True, **alarm_scheduler_service.stats()})
+    except Exception as e:
+        logger.error(f"Error getting alarm scheduler stats: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Windows Task Scheduler endpoints
@@ -851,6 +2037,68 @@ def test_ringtone_playback():
         logger.error(f"Error testing ringtone playback: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/task-scheduler/task-status', methods=['GET'])
+def scheduled_task_statuses():
+    """State of every ringtone task (or the tasks in names=) from one schtasks query"""
+    try:
+        if not TASK_SCHEDULER_AVAILABLE:
+            return jsonify({'success': False, 'error': 'Windows Task Scheduler service is not available'}), 503
+        
+        names = _parse_csv_arg('names')
+        if names is not None and len(names) > 1000:
+            return jsonify({'success': False, 'error': 'At most 1000 task names per request'}), 400
+        statuses = task_scheduler_service.get_task_statuses(
+            names, refresh=request.args.get('refresh', '').lower() in ('true', '1'))
+        
+        return jsonify({
+            'success': True,
+            'tasks': statuses,
+            'count': sum(1 for status in statuses.values() if status is not None),
+            'scheduler': task_scheduler_service.stats()
+        })
+            
+    except Exception as e:
+        logger.error(f"Error getting scheduled task statuses: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/task-scheduler/sync', methods=['POST'])
+def sync_scheduled_tasks():
+    """Make the Windows ringtone tasks (one per ringtone) match the full set of device schedules, changing only what differs"""
+    try:
+        if not TASK_SCHEDULER_AVAILABLE:
+            return jsonify({'success': False, 'error': 'Windows Task Scheduler service is not available'}), 503
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('schedules'), list):
+            return jsonify({'success': False, 'error': 'A schedules list is required'}), 400
+        dry_run = data.get('dry_run', False)
+        if not isinstance(dry_run, bool):
+            return jsonify({'success': False, 'error': 'dry_run must be true or false'}), 400
+        
+        # Schedules whose ringtone file is gone keep their ringtone's task as it is instead of blocking the sync
+        schedules, missing = [], {}
+        for schedule in data['schedules']:
+            ringtone_path = schedule.get('ringtone_path') if isinstance(schedule, dict) else None
+            if isinstance(ringtone_path, str) and ringtone_path and '"' not in ringtone_path:
+                ringtone_path = os.path.abspath(ringtone_path)
+                if not os.path.isfile(ringtone_path):
+                    missing[str(schedule.get('id'))] = ringtone_path
+                    continue
+                schedule = {**schedule, 'ringtone_path': ringtone_path}
+            schedules.append(schedule)
+        
+        report = task_scheduler_service.sync_tasks(
+            schedules, dry_run=dry_run, keep=[ringtone_task_name(path) for path in missing.values()])
+        if missing:
+            logger.warning(f"⚠️ Task sync skipped {len(missing)} schedules with missing ringtone files")
+        return jsonify({'success': not report['failed'], **report, 'missing': missing})
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error syncing scheduled tasks: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/task-scheduler/list', methods=['GET'])
 def list_scheduled_tasks():
     """List all ringtone scheduler tasks"""
@@ -858,8 +2106,8 @@ def list_scheduled_tasks():
         if not TASK_SCHEDULER_AVAILABLE:
             return jsonify({'success': False, 'error': 'Windows Task Scheduler service is not available'}), 503
         
-        # List all tasks
-        tasks = task_scheduler_service.list_all_tasks()
+        # List all tasks (from the cached inventory unless refresh=true)
+        tasks = task_scheduler_service.list_all_tasks(refresh=request.args.get('refresh', '').lower() in ('true', '1'))
         
         logger.info(f"✅ Listed {len(tasks)} scheduled tasks")
         return jsonify({
@@ -873,26 +2121,11 @@ def list_scheduled_tasks():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
-    try:
-        logger.info(f"Starting Ringtone Creator Backend Server")
-        logger.info(f"RINGTONES_FOLDER: {RINGTONES_FOLDER}")
-        logger.info(f"WAV_RINGTONES_FOLDER: {WAV_RINGTONES_FOLDER}")
-        logger.info(f"MP3_RINGTONES_FOLDER: {MP3_RINGTONES_FOLDER}")
-        logger.info(f"UPLOAD_FOLDER: {UPLOAD_FOLDER}")
-        logger.info("Server will be available at http://localhost:5000")
-        logger.info(f"PYDUB_AVAILABLE: {PYDUB_AVAILABLE}")
-        logger.info(f"PYDUB_FULLY_WORKING: {PYDUB_FULLY_WORKING}")
-        
-        if not PYDUB_AVAILABLE:
-            logger.warning("⚠️ MP3 conversion will be disabled - pydub not available")
-            logger.warning("💡 To enable MP3 conversion, ensure pydub is installed in the Python environment")
-        elif not PYDUB_FULLY_WORKING:
-            logger.warning("⚠️ MP3 conversion will be disabled - pydub available but audio conversion not working")
-            logger.warning("💡 To fix this, install ffmpeg or similar audio codecs")
-        else:
-            logger.info("✅ MP3 conversion enabled - pydub is available and working")
-        
-        app.run(host='0.0.0.0', port=5000, debug=True)
-    except Exception as e:
-        logger.error(f"Failed to start server: {e}")
-        exit(1)
+    # Serve with the production server (see wsgiServer.py for engines and settings); it imports
+    # this file as ``server``, which must be this module rather than a second copy
+    import sys
+    sys.modules.setdefault('server', sys.modules[__name__])
+    from wsgiServer import main
+    logger.info("Starting Ringtone Creator Backend Server")
+    logger.info("Audio capabilities are probed in the background - see /health")
+    exit(main())
@@ -0,0 +1,228 @@
+# Rules applied
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from batchCutService import decoded_pcm
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Length of one envelope window in seconds
+WINDOW_SECONDS = 0.01
+# Windows analyzed per step, so memory stays bounded on hour-long sources (60 s per chunk)
+CHUNK_WINDOWS = 6000
+DEFAULT_THRESHOLD_DB = -50.0
+DEFAULT_MIN_SILENCE = 0.5
+# Silence left in front of and after the sound when trimming, so attacks are not clipped
+DEFAULT_PADDING = 0.05
+SILENCE_MODES = ('rms', 'peak')
+# Analyses kept in memory (one per source, threshold and mode)
+CACHED_ANALYSES = 64
+
+
+def compute_envelope(samples: np.ndarray, window_frames: int, mode: str = 'rms') -> np.ndarray:
+    """
+    Compute the level of every window of interleaved 16-bit samples in dBFS.
+
+    Args:
+        samples: int16 array of shape (frames, channels)
+        window_frames: Frames per window; a partial last window is included
+        mode: 'rms' (loudness) or 'peak' (largest sample)
+
+    Returns:
+        np.ndarray: float32 levels, one per window (-inf for digital silence)
+    """
+    frames = len(samples)
+    windows = -(-frames // window_frames)
+    padded = samples
+    if frames % window_frames:
+        # Pad with silence; RMS of the last window is averaged over its real frames only
+        padded = np.zeros((windows * window_frames, samples.shape[1]), dtype=samples.dtype)
+        padded[:frames] = samples
+    blocks = padded.reshape(windows, -1).astype(np.float32)
+
+    if mode == 'peak':
+        levels = np.abs(blocks).max(axis=1)
+    else:
+        counts = np.full(windows, blocks.shape[1], dtype=np.float32)
+        if frames % window_frames:
+            counts[-1] = (frames % window_frames) * samples.shape[1]
+        levels = np.sqrt(np.square(blocks).sum(axis=1) / counts)
+    with np.errstate(divide='ignore'):
+        return (20 * np.log10(levels / 32768.0)).astype(np.float32)
+
+
+def _silent_runs(silent: np.ndarray) -> List[Tuple[int, int]]:
+    """Return the [first, last) window indexes of every run of silent windows."""
+    edges = np.diff(np.concatenate(([False], silent, [False])).astype(np.int8))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+class SilenceAnalysis:
+    """Windowed loud/silent mask of a whole source at one threshold."""
+
+    def __init__(self, loud: np.ndarray, window_seconds: float, duration: float, threshold_db: float, mode: str,
+                 analysis_ms: float):
+        self.loud = loud
+        self.window_seconds = window_seconds
+        self.duration = duration
+        self.threshold_db = threshold_db
+        self.mode = mode
+        self.analysis_ms = analysis_ms
+
+    def _window_range(self, start: Optional[float], end: Optional[float]) -> Tuple[float, float, int, int]:
+        start = 0.0 if start is None else start
+        end = self.duration if end is None else min(end, self.duration)
+        if start < 0 or end <= start:
+            raise ValueError("end must be greater than start, and start at least 0")
+        first = int(start / self.window_seconds)
+        last = min(math.ceil(end / self.window_seconds - 1e-9), len(self.loud))
+        return start, end, first, last
+
+    def _seconds(self, window: int) -> float:
+        return round(min(window * self.window_seconds, self.duration), 3)
+
+    def report(self, start: Optional[float] = None, end: Optional[float] = None,
+               min_silence: float = DEFAULT_MIN_SILENCE, padding: float = DEFAULT_PADDING) -> Dict:
+        """
+        Describe the silence of [start, end) seconds.
+
+        Returns:
+            dict: 'leading_silence' and 'trailing_silence' (seconds), 'gaps' (quiet
+                stretches of at least min_silence inside the sound), 'suggested_start'
+                and 'suggested_end' (the sound with padding), and 'silent' (no sound at all)
+        """
+        start, end, first, last = self._window_range(start, end)
+        loud_windows = np.flatnonzero(self.loud[first:last]) + first
+        result = {
+            'start': round(start, 3),
+            'end': round(end, 3),
+            'duration': round(self.duration, 3),
+            'threshold_db': self.threshold_db,
+            'mode': self.mode,
+            'window_ms': round(self.window_seconds * 1000, 3),
+            'analysis_ms': self.analysis_ms
+        }
+        if not len(loud_windows):
+            return dict(result, silent=True, leading_silence=round(end - start, 3), trailing_silence=0.0,
+                        suggested_start=None, suggested_end=None, gaps=[])
+
+        first_loud, last_loud = int(loud_windows[0]), int(loud_windows[-1])
+        sound_start = max(self._seconds(first_loud), start)
+        sound_end = min(self._seconds(last_loud + 1), end)
+
+        # Quiet gaps between the first and the last sound
+        min_windows = max(1, round(min_silence / self.window_seconds))
+        gaps = []
+        for run_start, run_end in _silent_runs(~self.loud[first_loud:last_loud + 1]):
+            if run_end - run_start >= min_windows:
+                gaps.append({'start': self._seconds(first_loud + run_start), 'end': self._seconds(first_loud + run_end),
+                             'duration': round((run_end - run_start) * self.window_seconds, 3)})
+        return dict(result, silent=False,
+                    leading_silence=round(sound_start - start, 3),
+                    trailing_silence=round(end - sound_end, 3),
+                    suggested_start=round(max(sound_start - padding, start), 3),
+                    suggested_end=round(min(sound_end + padding, end), 3),
+                    gaps=gaps)
+
+    def trim(self, start: float, end: float, padding: float = DEFAULT_PADDING) -> Tuple[float, float]:
+        """
+        Shrink [start, end) to its sound plus padding.
+
+        Raises:
+            ValueError: If the range holds no sound above the threshold
+        """
+        report = self.report(start, end, padding=padding)
+        if report['silent']:
+            raise ValueError(f"The selected range is silent (below {self.threshold_db:g} dBFS)")
+        return report['suggested_start'], report['suggested_end']
+
+
+class SilenceDetectionService:
+    """
+    Vectorized silence detection over the PCM of uploaded originals.
+
+    The source is decoded once (a 16-bit PCM WAV is mapped as is) and its RMS or
+    peak envelope is computed with NumPy in fixed-size chunks, so an hour-long
+    original is analyzed in one pass without holding it in memory as floats. The
+    resulting loud/silent mask is cached per source content, threshold and mode, and
+    answers both suggestion requests and auto-trims of any range.
+    """
+
+    def __init__(self, max_cached: int = CACHED_ANALYSES):
+        """
+        Args:
+            max_cached: Number of analyses kept in memory
+        """
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[Tuple, SilenceAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate(threshold_db: float, mode: str, min_silence: float = DEFAULT_MIN_SILENCE) -> None:
+        """
+        Raises:
+            ValueError: For parameters outside the supported ranges
+        """
+        if not -96 <= threshold_db <= 0:
+            raise ValueError("threshold_db must be between -96 and 0")
+        if mode not in SILENCE_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(SILENCE_MODES)}")
+        if not 0 < min_silence <= 60:
+            raise ValueError("min_silence must be between 0 and 60 seconds")
+
+    def analyze(self, source_path: str, source_sha256: str, threshold_db: float = DEFAULT_THRESHOLD_DB,
+                mode: str = 'rms', ffmpeg_binary: Optional[str] = None) -> SilenceAnalysis:
+        """
+        Return the silence analysis of a source, computing it on first use.
+
+        Args:
+            source_path: Path of the source audio file
+            source_sha256: Content hash of the source (the cache key)
+            threshold_db: Windows below this level in dBFS are silent
+            mode: 'rms' or 'peak' envelope
+            ffmpeg_binary: Path of ffmpeg for sources that are not 16-bit PCM WAV
+
+        Returns:
+            SilenceAnalysis: The loud/silent mask of the whole source
+        """
+        self.validate(threshold_db, mode)
+        key = (source_sha256, float(threshold_db), mode)
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is not None:
+                self._cache.move_to_end(key)
+                return analysis
+
+        started = time.perf_counter()
+        with decoded_pcm(source_path, ffmpeg_binary) as pcm:
+            window_frames = max(1, round(pcm.sample_rate * WINDOW_SECONDS))
+            chunk_frames = window_frames * CHUNK_WINDOWS
+            loud = np.empty(-(-pcm.frames // window_frames), dtype=bool)
+            for chunk_start in range(0, pcm.frames, chunk_frames):
+                chunk_end = min(chunk_start + chunk_frames, pcm.frames)
+                view = pcm.slice(chunk_start / pcm.sample_rate, chunk_end / pcm.sample_rate)
+                samples = np.frombuffer(view, dtype='<i2').reshape(-1, pcm.channels)
+                first_window = chunk_start // window_frames
+                levels = compute_envelope(samples, window_frames, mode)
+                loud[first_window:first_window + len(levels)] = levels >= threshold_db
+                del samples
+            window_seconds = window_frames / pcm.sample_rate
+            duration = pcm.duration
+
+        analysis_ms = round((time.perf_counter() - started) * 1000, 1)
+        analysis = SilenceAnalysis(loud, window_seconds, duration, float(threshold_db), mode, analysis_ms)
+        logger.info(f"🔇 Silence analysis of {duration:.1f}s ({len(loud)} windows, {mode} at {threshold_db:g} dBFS) "
+                    f"in {analysis_ms} ms")
+        with self._lock:
+            self._cache[key] = analysis
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return analysis
@@ -0,0 +1,344 @@
+# Rules applied
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Size of the chunks moved through the ffmpeg pipes; memory use is bounded by a few of these
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Encoder arguments per output format. These match what pydub's export produced
+# (libmp3lame at the requested bitrate, 16-bit PCM WAV) so renditions are unchanged.
+OUTPUT_FORMATS = {
+    'mp3': ['-codec:a', 'libmp3lame', '-f', 'mp3'],
+    'wav': ['-codec:a', 'pcm_s16le', '-f', 'wav']
+}
+
+# Number of ffmpeg log lines kept for error messages
+STDERR_TAIL_LINES = 20
+
+PROGRESS_TIME_PATTERN = re.compile(r'^out_time_(?:us|ms)=(\d+)$')
+
+# MPEG audio header tables, indexed by the header's version bits
+MPEG_SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),  # MPEG-1
+    0b10: (22050, 24000, 16000),  # MPEG-2
+    0b00: (11025, 12000, 8000)    # MPEG-2.5
+}
+# Bytes of an MP3 searched for the first frame header (after any ID3v2 tag)
+MP3_HEADER_SEARCH_BYTES = 64 * 1024
+
+
+class TranscodeError(Exception):
+    """Raised when ffmpeg is missing or fails to transcode."""
+
+
+def find_ffmpeg() -> Optional[str]:
+    """Return the path of the ffmpeg executable, or None if it is not installed."""
+    return shutil.which('ffmpeg')
+
+
+def _pump(source: BinaryIO, sink: BinaryIO, chunk_size: int) -> None:
+    """Copy a stream to another in fixed-size chunks, closing the sink at the end."""
+    try:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            sink.write(chunk)
+    except BrokenPipeError:
+        # ffmpeg stopped reading (it failed, or needed no more input); its exit status tells why
+        pass
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+
+
+def transcode(source: Union[str, BinaryIO], output: Union[str, BinaryIO], output_format: str = 'mp3',
+              bitrate: Optional[str] = '128k', ffmpeg_binary: Optional[str] = None,
+              extra_args: Optional[List[str]] = None, copy: bool = False,
+              input_args: Optional[List[str]] = None, output_args: Optional[List[str]] = None,
+              chunk_size: int = STREAM_CHUNK_SIZE) -> Dict:
+    """
+    Transcode audio with ffmpeg, streaming it through pipes in fixed-size chunks.
+
+    Nothing is decoded into Python memory: a path is opened by ffmpeg itself, a file
+    object is fed to its stdin chunk by chunk, and encoded output is either written
+    by ffmpeg to a temporary file that is renamed into place, or read from its stdout
+    chunk by chunk into the given file object. Memory use is constant regardless of
+    the length of the input. Output streamed to a file object cannot be seeked, so
+    its headers (the MP3 Xing frame, WAV chunk sizes) are left unfinalized; prefer an
+    output path when the result is stored.
+
+    Args:
+        source: Input file path, or a readable binary file object
+        output: Output file path, or a writable binary file object
+        output_format: Key of OUTPUT_FORMATS ('mp3' or 'wav'), or just a label when
+            output_args is given
+        bitrate: Audio bitrate for lossy formats (ignored for WAV)
+        ffmpeg_binary: Path of ffmpeg (looked up on PATH when omitted)
+        extra_args: Additional output options (e.g. ['-ss', '1.5', '-t', '10'])
+        copy: Copy the compressed frames instead of re-encoding (the source must
+            already be in output_format)
+        input_args: Input options (e.g. ['-f', 's16le', '-ar', '44100', '-ac', '2'] for raw PCM)
+        output_args: Encoder and muxer options replacing OUTPUT_FORMATS[output_format]
+            and bitrate (see encoderProfileService.encoder_args)
+        chunk_size: Size of the chunks moved through the pipes
+
+    Returns:
+        dict: output path (if any), output size, audio duration_ms, encode_ms and
+            realtime_factor (encode time divided by audio duration)
+
+    Raises:
+        TranscodeError: If ffmpeg is missing or exits with an error
+    """
+    if output_format not in OUTPUT_FORMATS and output_args is None:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    ffmpeg_binary = ffmpeg_binary or find_ffmpeg()
+    if not ffmpeg_binary:
+        raise TranscodeError("ffmpeg not found - install ffmpeg to enable audio conversion")
+
+    source_is_path = isinstance(source, str)
+    output_is_path = isinstance(output, str)
+    # Written next to the target and renamed, so readers never see a partial file and a
+    # source can be transcoded onto itself
+    partial_path = output + '.part' if output_is_path else None
+
+    command = [ffmpeg_binary, '-hide_banner', '-nostats', '-loglevel', 'error', '-progress', 'pipe:2', '-y']
+    command += input_args or []
+    command += ['-i', source if source_is_path else 'pipe:0', '-vn']
+    command += extra_args or []
+    if copy:
+        command += ['-codec:a', 'copy', '-f', output_format]
+    elif output_args is not None:
+        command += output_args
+    else:
+        command += OUTPUT_FORMATS[output_format]
+    if bitrate and output_format != 'wav' and not copy and output_args is None:
+        command += ['-b:a', bitrate]
+    command.append(partial_path if output_is_path else 'pipe:1')
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL if source_is_path else subprocess.PIPE,
+        stdout=subprocess.DEVNULL if output_is_path else subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0
+    )
+
+    # ffmpeg writes progress (and errors) to stderr; it must be drained concurrently or
+    # the pipe fills up and ffmpeg blocks
+    progress = {'out_time_us': 0}
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    def read_stderr():
+        for raw_line in process.stderr:
+            line = raw_line.decode('utf-8', 'replace').strip()
+            match = PROGRESS_TIME_PATTERN.match(line)
+            if match:
+                progress['out_time_us'] = int(match.group(1))
+            elif line and '=' not in line:
+                stderr_tail.append(line)
+
+    threads = [threading.Thread(target=read_stderr, daemon=True)]
+    if not source_is_path:
+        threads.append(threading.Thread(target=_pump, args=(source, process.stdin, chunk_size), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    try:
+        output_size = 0
+        if not output_is_path:
+            for chunk in iter(lambda: process.stdout.read(chunk_size), b''):
+                output.write(chunk)
+                output_size += len(chunk)
+        return_code = process.wait()
+        for thread in threads:
+            thread.join()
+    except BaseException:
+        process.kill()
+        process.wait()
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    encode_seconds = time.perf_counter() - started
+
+    if return_code != 0 or (output_is_path and not os.path.getsize(partial_path)):
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+        details = '; '.join(stderr_tail) or f"exit status {return_code}"
+        raise TranscodeError(f"ffmpeg failed to encode {output_format.upper()}: {details}")
+
+    if output_is_path:
+        os.replace(partial_path, output)
+        output_size = os.path.getsize(output)
+
+    duration_seconds = progress['out_time_us'] / 1_000_000
+    result = {
+        'output_path': output if output_is_path else None,
+        'format': output_format,
+        'size': output_size,
+        'duration_ms': round(duration_seconds * 1000),
+        'encode_ms': round(encode_seconds * 1000, 1),
+        'realtime_factor': round(encode_seconds / duration_seconds, 4) if duration_seconds else None
+    }
+    logger.info(f"🎛️ Encoded {output_format.upper()} ({result['duration_ms']} ms of audio) in "
+                f"{result['encode_ms']} ms, RTF {result['realtime_factor']}")
+    return result
+
+
+def read_mp3_frame_info(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Read the first MPEG audio frame header of an MP3 file.
+
+    Returns:
+        tuple: (sample_rate, samples_per_frame), or None if no valid header is found
+    """
+    with open(path, 'rb') as f:
+        data = f.read(10)
+        offset = 0
+        if len(data) == 10 and data[:3] == b'ID3':
+            # ID3v2 tag: 10-byte header, syncsafe size, optional 10-byte footer
+            offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+            if data[5] & 0x10:
+                offset += 10
+        f.seek(offset)
+        data = f.read(MP3_HEADER_SEARCH_BYTES)
+
+    for index in range(len(data) - 3):
+        if data[index] != 0xFF or (data[index + 1] & 0xE0) != 0xE0:
+            continue
+        version = (data[index + 1] >> 3) & 0b11
+        layer = (data[index + 1] >> 1) & 0b11
+        bitrate_index = data[index + 2] >> 4
+        rate_index = (data[index + 2] >> 2) & 0b11
+        if version == 0b01 or layer == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+        if layer == 0b11:
+            samples_per_frame = 384       # Layer I
+        elif layer == 0b10 or version == 0b11:
+            samples_per_frame = 1152      # Layer II, or Layer III in MPEG-1
+        else:
+            samples_per_frame = 576       # Layer III in MPEG-2/2.5
+        return sample_rate, samples_per_frame
+    return None
+
+
+def _on_frame_boundary(seconds: float, sample_rate: int, samples_per_frame: int) -> bool:
+    """Whether a time falls on a frame boundary, to within half a sample."""
+    sample = seconds * sample_rate
+    return abs(sample - round(sample / samples_per_frame) * samples_per_frame) < 0.5
+
+
+def _copy_wav_range(source_path: str, output_path: str, start: float, end: float, chunk_size: int) -> Dict:
+    """Copy the PCM frames of [start, end) to a new WAV with the source's format, chunk by chunk."""
+    started = time.perf_counter()
+    partial_path = output_path + '.part'
+    try:
+        with wave.open(source_path, 'rb') as source:
+            rate = source.getframerate()
+            frame_size = source.getsampwidth() * source.getnchannels()
+            first_frame = min(round(start * rate), source.getnframes())
+            last_frame = min(round(end * rate), source.getnframes())
+            source.setpos(first_frame)
+
+            with wave.open(partial_path, 'wb') as output:
+                output.setnchannels(source.getnchannels())
+                output.setsampwidth(source.getsampwidth())
+                output.setframerate(rate)
+                remaining = last_frame - first_frame
+                frames_per_chunk = max(1, chunk_size // frame_size)
+                while remaining > 0:
+                    frames = source.readframes(min(frames_per_chunk, remaining))
+                    if not frames:
+                        break
+                    output.writeframesraw(frames)
+                    remaining -= len(frames) // frame_size
+        os.replace(partial_path, output_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    encode_seconds = time.perf_counter() - started
+    duration_seconds = (last_frame - first_frame) / rate
+    return {
+        'output_path': output_path,
+        'format': 'wav',
+        'size': os.path.getsize(output_path),
+        'duration_ms': round(duration_seconds * 1000),
+        'encode_ms': round(encode_seconds * 1000, 1),
+        'realtime_factor': round(encode_seconds / duration_seconds, 4) if duration_seconds else None
+    }
+
+
+def cut_audio(source_path: str, output_path: str, start: float, end: float, output_format: Optional[str] = None,
+              bitrate: Optional[str] = '128k', ffmpeg_binary: Optional[str] = None,
+              chunk_size: int = STREAM_CHUNK_SIZE) -> Dict:
+    """
+    Cut the [start, end) range of an audio file, copying instead of re-encoding when possible.
+
+    A WAV cut from a PCM WAV is always a copy of whole sample frames. An MP3 cut from an
+    MP3 is a stream copy when both ends land on MPEG frame boundaries. Everything else
+    is decoded and re-encoded by ffmpeg.
+
+    Args:
+        source_path: Path of the source audio file
+        output_path: Path of the cut file
+        start: Start of the cut in seconds
+        end: End of the cut in seconds
+        output_format: 'mp3' or 'wav' (defaults to the source's format)
+        bitrate: Bitrate used when re-encoding to a lossy format
+        ffmpeg_binary: Path of ffmpeg (looked up on PATH when omitted)
+
+    Returns:
+        dict: The transcode result plus 'method' ('copy' or 'encode')
+
+    Raises:
+        ValueError: If the range is empty or negative
+        TranscodeError: If ffmpeg fails
+    """
+    if start < 0 or end <= start:
+        raise ValueError("The cut must have 0 <= start_time < end_time")
+
+    source_format = os.path.splitext(source_path)[1].lower().lstrip('.')
+    output_format = output_format or source_format
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    if source_format == output_format == 'wav':
+        try:
+            result = _copy_wav_range(source_path, output_path, start, end, chunk_size)
+            result['method'] = 'copy'
+            return result
+        except (wave.Error, EOFError) as e:
+            # Not plain PCM (e.g. float or compressed WAV): let ffmpeg decode it
+            logger.info(f"🔄 WAV cannot be copied directly ({e}), re-encoding")
+
+    copy = False
+    if source_format == output_format == 'mp3':
+        frame_info = read_mp3_frame_info(source_path)
+        copy = bool(frame_info) and all(_on_frame_boundary(t, *frame_info) for t in (start, end))
+
+    # Output-side seeking decodes (or, when copying, reads) from the beginning and drops
+    # everything before the start, which is exact even for VBR files without a seek table
+    result = transcode(source_path, output_path, output_format, bitrate=bitrate, copy=copy, ffmpeg_binary=ffmpeg_binary,
+                       extra_args=['-ss', f"{start:.6f}", '-t', f"{end - start:.6f}"], chunk_size=chunk_size)
+    if copy:
+        # ffmpeg's progress clock is not reset for copied packets; the copied range is exact
+        result['duration_ms'] = round((end - start) * 1000)
+        result['realtime_factor'] = round(result['encode_ms'] / result['duration_ms'], 4)
+    result['method'] = 'copy' if copy else 'encode'
+    return result
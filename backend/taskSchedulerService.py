@@ -1,33 +1,270 @@
 # Rules applied
+import csv
+import hashlib
+import io
+import re
 import subprocess
 import json
 import os
 import sys
+import threading
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
 import logging
+import tempfile
+
+from scheduleStoreService import parse_days, parse_time_of_day
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Task Scheduler folder holding the ringtone tasks, so queries never walk the machine's other tasks
+TASK_FOLDER = "\\RingtoneScheduler\\"
+TASK_PREFIX = "Ringtone_"
+TASK_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,100}$')
+# Seconds a task inventory is served from memory; every create/change/delete clears it
+INVENTORY_TTL = 5.0
+SCHTASKS_TIMEOUT = 30
+PYTHONW_EXE = r"C:\Program Files\Python313\pythonw.exe"
+# schtasks processes run at once while a sync applies its changes (each task's own steps stay in order)
+SYNC_WORKERS = 4
+MAX_SYNC_SCHEDULES = 1000
+
+# Columns of `schtasks /query /fo csv /v`; their order is the same in every Windows language,
+# only the header text is translated
+COL_TASK_NAME = 1
+COL_NEXT_RUN = 2
+COL_STATUS = 3
+COL_LAST_RUN = 5
+COL_LAST_RESULT = 6
+COL_TASK_TO_RUN = 8
+COL_COMMENT = 10
+COL_TASK_STATE = 11
+COL_SCHEDULE_TYPE = 18
+COL_START_TIME = 19
+COL_DAYS = 22
+VERBOSE_COLUMNS = 23
+
+DAY_NAMES = ('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT')
+XML_DAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+# Fingerprint of the generated definition, kept in the task description so a sync can tell if a task is current
+DEFINITION_TAG = re.compile(r'\[sync:([0-9a-f]{16})\]')
+SCHTASKS_TIME_FORMATS = ('%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S',
+                         '%d.%m.%Y %H:%M:%S')
+
+
+def _parse_schtasks_time(value: str) -> Optional[str]:
+    """ISO form of a schtasks date/time cell; None for N/A, Never and other non-dates."""
+    value = value.strip()
+    for time_format in SCHTASKS_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_clock(value: str) -> Optional[str]:
+    """HH:MM of a schtasks start time cell ('7:05:00 AM', '07:05:00')."""
+    for time_format in ('%I:%M:%S %p', '%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.strptime(value.strip(), time_format).strftime('%H:%M')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_task_inventory(output: str) -> Dict[str, Dict]:
+    """
+    Parse the verbose CSV listing of schtasks into one record per ringtone task.
+
+    schtasks quotes every cell (the Days cell holds commas), repeats the header before
+    each folder and writes one row per trigger of a task; the rows of a task are
+    merged and its triggers collected.
+
+    Args:
+        output: stdout of `schtasks /query /fo csv /v`
+
+    Returns:
+        Dict: Task records keyed by task name (without folder and Ringtone_ prefix)
+    """
+    tasks: Dict[str, Dict] = {}
+    header = None
+    for row in csv.reader(io.StringIO(output)):
+        if len(row) < VERBOSE_COLUMNS:
+            continue
+        if header is None or row == header:
+            header = row
+            continue
+        path = row[COL_TASK_NAME]
+        leaf = path.rsplit('\\', 1)[-1]
+        if not leaf.startswith(TASK_PREFIX):
+            continue
+        name = leaf[len(TASK_PREFIX):]
+        task = tasks.get(name)
+        if task is None:
+            status = row[COL_STATUS].strip()
+            try:
+                last_result = int(row[COL_LAST_RESULT].strip())
+            except ValueError:
+                last_result = None
+            task = tasks[name] = {
+                'name': name,
+                'full_name': path,
+                'status': status or 'Unknown',
+                'enabled': status != 'Disabled' and row[COL_TASK_STATE].strip() != 'Disabled',
+                'next_run': _parse_schtasks_time(row[COL_NEXT_RUN]),
+                'last_run': _parse_schtasks_time(row[COL_LAST_RUN]),
+                'last_result': last_result,
+                'command': row[COL_TASK_TO_RUN].strip(),
+                'description': row[COL_COMMENT].strip(),
+                'triggers': []
+            }
+        days = [DAY_NAMES.index(day) for day in re.findall(r'[A-Z]{3}', row[COL_DAYS].upper()) if day in DAY_NAMES]
+        task['triggers'].append({
+            'schedule_type': row[COL_SCHEDULE_TYPE].strip(),
+            'time': _parse_clock(row[COL_START_TIME]),
+            'days': sorted(set(days))
+        })
+    return tasks
+
+
+def ringtone_task_name(ringtone_path: str) -> str:
+    """
+    Task name of the task playing a ringtone: readable file name plus a hash of the full path.
+
+    Windows paths are case-insensitive, so paths differing only in case get the same name.
+
+    Args:
+        ringtone_path: Absolute path of the ringtone file
+
+    Returns:
+        str: Name matching TASK_NAME_PATTERN, the same for the same file on every call
+    """
+    stem = os.path.splitext(re.split(r'[\\/]', ringtone_path)[-1])[0]
+    slug = re.sub(r'[^a-z0-9]+', '_', stem.lower()).strip('_')[:40] or 'ringtone'
+    return f"{slug}_{hashlib.sha256(ringtone_path.casefold().encode('utf-8')).hexdigest()[:10]}"
+
+
+def build_task_xml(ringtone_path: str, triggers: List[Tuple[str, List[int]]], python_exe: str,
+                   player_script: str) -> Tuple[str, str]:
+    """
+    Task Scheduler XML for one ringtone with all of its times.
+
+    The output depends only on the arguments (fixed element order, sorted triggers, no
+    registration date), so the same schedules always give the same text and fingerprint.
+    A trigger firing every day uses ScheduleByDay, other day patterns ScheduleByWeek.
+
+    Args:
+        ringtone_path: Ringtone file the task plays
+        triggers: (HH:MM:SS, days 0 = Sunday ... 6 = Saturday) pairs
+        python_exe: Interpreter running the player
+        player_script: play_ringtone.py
+
+    Returns:
+        Tuple: The XML and its 16-hex-digit fingerprint (also written into the description)
+    """
+    trigger_xml = []
+    for time_of_day, days in sorted((time_of_day, sorted(set(days))) for time_of_day, days in triggers):
+        if len(days) == 7:
+            schedule = ('      <ScheduleByDay>\n'
+                        '        <DaysInterval>1</DaysInterval>\n'
+                        '      </ScheduleByDay>\n')
+        else:
+            schedule = ('      <ScheduleByWeek>\n'
+                        '        <DaysOfWeek>\n' +
+                        ''.join(f'          <{XML_DAY_NAMES[day]} />\n' for day in days) +
+                        '        </DaysOfWeek>\n'
+                        '        <WeeksInterval>1</WeeksInterval>\n'
+                        '      </ScheduleByWeek>\n')
+        trigger_xml.append('    <CalendarTrigger>\n'
+                           f'      <StartBoundary>2000-01-01T{time_of_day}</StartBoundary>\n'
+                           '      <Enabled>true</Enabled>\n' +
+                           schedule +
+                           '    </CalendarTrigger>\n')
+    arguments = f'"{player_script}" "{ringtone_path}"'
+    body = ('  <Triggers>\n' + ''.join(trigger_xml) + '  </Triggers>\n'
+            '  <Principals>\n'
+            '    <Principal id="Author">\n'
+            '      <LogonType>InteractiveToken</LogonType>\n'
+            '      <RunLevel>LeastPrivilege</RunLevel>\n'
+            '    </Principal>\n'
+            '  </Principals>\n'
+            '  <Settings>\n'
+            '    <MultipleInstancesPolicy>IgnoreNew</MultipleInstancesPolicy>\n'
+            '    <DisallowStartIfOnBatteries>false</DisallowStartIfOnBatteries>\n'
+            '    <StopIfGoingOnBatteries>false</StopIfGoingOnBatteries>\n'
+            '    <StartWhenAvailable>false</StartWhenAvailable>\n'
+            '    <Enabled>true</Enabled>\n'
+            '    <ExecutionTimeLimit>PT10M</ExecutionTimeLimit>\n'
+            '  </Settings>\n'
+            '  <Actions Context="Author">\n'
+            '    <Exec>\n'
+            f'      <Command>{escape(python_exe)}</Command>\n'
+            f'      <Arguments>{escape(arguments)}</Arguments>\n'
+            '    </Exec>\n'
+            '  </Actions>\n')
+    digest = hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]
+    name = re.split(r'[\\/]', ringtone_path)[-1]
+    xml = ('<?xml version="1.0" encoding="UTF-16"?>\n'
+           '<Task version="1.2" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">\n'
+           '  <RegistrationInfo>\n'
+           f'    <Description>{escape(f"Plays {name} [sync:{digest}]")}</Description>\n'
+           '  </RegistrationInfo>\n' +
+           body +
+           '</Task>\n')
+    return xml, digest
+
+
+def _run_subprocess(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=SCHTASKS_TIMEOUT)
+
+
 class WindowsTaskSchedulerService:
     """
     Service to manage Windows Task Scheduler tasks for ringtone scheduling.
     This service creates, updates, deletes, and manages Windows scheduled tasks.
+
+    The ringtone tasks live in their own Task Scheduler folder (TASK_FOLDER). Status
+    and listing calls share one verbose query of that folder, kept for INVENTORY_TTL
+    seconds and cleared by every write, so a page showing many schedules costs one
+    schtasks process instead of one per task.
     """
     
-    def __init__(self):
-        self.task_folder = ""  # Use root folder instead of custom folder
+    def __init__(self, runner: Optional[Callable[[List[str]], subprocess.CompletedProcess]] = None,
+                 inventory_ttl: float = INVENTORY_TTL):
+        """
+        Args:
+            runner: Runs a command and returns its CompletedProcess (default: subprocess.run)
+            inventory_ttl: Seconds a task inventory is reused
+        """
+        self.task_folder = TASK_FOLDER
         self.ringtone_player_script = self._get_ringtone_player_script_path()
-        # No need to ensure task folder exists for root folder
+        self.runner = runner or _run_subprocess
+        self.inventory_ttl = inventory_ttl
+        self._inventory: Optional[Dict[str, Dict]] = None
+        self._inventory_at = 0.0
+        # Held while querying, so concurrent callers wait for one query instead of starting their own
+        self._inventory_lock = threading.Lock()
+        self._counters = {'spawns': 0, 'queries': 0, 'cache_hits': 0}
+        self._counter_lock = threading.Lock()
+        # One sync at a time, so two syncs never diff against each other's half-applied changes
+        self._sync_lock = threading.Lock()
     
     def _get_ringtone_player_script_path(self) -> str:
         """Get the path to the ringtone player Python script."""
         script_dir = os.path.dirname(os.path.abspath(__file__))
         return os.path.join(script_dir, "play_ringtone.py")
     
-    
+    def _task_path(self, task_name: str) -> str:
+        """Full Task Scheduler path of a ringtone task; rejects names that could escape the folder."""
+        if not isinstance(task_name, str) or not TASK_NAME_PATTERN.match(task_name):
+            raise ValueError(f"Invalid task name: {task_name!r}")
+        return f"{self.task_folder}{TASK_PREFIX}{task_name}"
     
     def _run_schtasks_command(self, args: List[str]) -> Tuple[bool, str, str]:
         """Run a schtasks command and return success status, stdout, and stderr."""
@@ -35,23 +272,22 @@ class WindowsTaskSchedulerService:
             cmd = ["schtasks"] + args
             logger.info(f"🔧 Running command: {' '.join(cmd)}")
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                check=False,
-                timeout=30
-            )
+            started = clock.perf_counter()
+            with self._counter_lock:
+                self._counters['spawns'] += 1
+            result = self.runner(cmd)
             
             success = result.returncode == 0
-            logger.info(f"📋 Command result - Success: {success}, Return code: {result.returncode}")
+            logger.info(f"📋 Command result - Success: {success}, Return code: {result.returncode} "
+                        f"({(clock.perf_counter() - started) * 1000:.0f} ms, {len(result.stdout or '')} bytes)")
             
+            # The verbose listings run to many kilobytes; only keep them at DEBUG
             if result.stdout:
-                logger.info(f"📤 stdout: {result.stdout}")
+                logger.debug(f"📤 stdout: {result.stdout}")
             if result.stderr:
-                logger.info(f"📤 stderr: {result.stderr}")
+                logger.log(logging.DEBUG if success else logging.WARNING, f"📤 stderr: {result.stderr.strip()}")
             
-            return success, result.stdout, result.stderr
+            return success, result.stdout or "", result.stderr or ""
             
         except subprocess.TimeoutExpired:
             logger.error("❌ Command timed out")
@@ -60,6 +296,41 @@ class WindowsTaskSchedulerService:
             logger.error(f"❌ Error running command: {e}")
             return False, "", str(e)
     
+    def invalidate_inventory(self) -> None:
+        """Forget the cached task inventory (after any change to the tasks)."""
+        self._inventory = None
+    
+    def query_tasks(self, refresh: bool = False) -> Dict[str, Dict]:
+        """
+        All ringtone tasks with their state, from one schtasks query of the task folder.
+        
+        Args:
+            refresh: Query again even if the cached inventory is still fresh
+        
+        Returns:
+            Dict: Task records (see parse_task_inventory) keyed by task name
+        """
+        with self._inventory_lock:
+            if not refresh and self._inventory is not None and \
+                    clock.monotonic() - self._inventory_at < self.inventory_ttl:
+                self._counters['cache_hits'] += 1
+                return self._inventory
+            
+            self._counters['queries'] += 1
+            success, stdout, stderr = self._run_schtasks_command(["/query", "/tn", self.task_folder, "/fo", "csv", "/v"])
+            # A failed query also means the folder does not exist yet (no task created so far)
+            inventory = parse_task_inventory(stdout) if success else {}
+            self._inventory, self._inventory_at = inventory, clock.monotonic()
+            logger.info(f"📋 Task inventory: {len(inventory)} ringtone tasks")
+            return inventory
+    
+    def stats(self) -> Dict:
+        """schtasks processes started, inventory queries made and inventory reads served from the cache."""
+        return dict(self._counters)
+    
+    def _player_command(self, ringtone_path: str) -> str:
+        """Command line of a task that plays a ringtone with play_ringtone.py."""
+        return f'"{PYTHONW_EXE}" "{self.ringtone_player_script}" "{ringtone_path}"'
     
     def create_scheduled_task(self, task_name: str, ringtone_path: str, time: str, days: List[int]) -> bool:
         """
@@ -75,6 +346,8 @@ class WindowsTaskSchedulerService:
             bool: True if successful, False otherwise
         """
         try:
+            task_path = self._task_path(task_name)
+            
             # Ensure the ringtone player script exists
             if not os.path.exists(self.ringtone_player_script):
                 logger.error(f"❌ Ringtone player script not found: {self.ringtone_player_script}")
@@ -94,8 +367,8 @@ class WindowsTaskSchedulerService:
             day_list = ",".join([day_mapping[day] for day in days])
             
             # Check if the command would exceed 261 character limit
-            python_exe = r"C:\Program Files\Python313\pythonw.exe"
-            test_command = f'"{python_exe}" "{self.ringtone_player_script}" "{ringtone_path}"'
+            python_exe = PYTHONW_EXE
+            test_command = self._player_command(ringtone_path)
             
             if len(test_command) > 261:
                 # For existing long filenames, create a Python wrapper script
@@ -129,7 +402,7 @@ main()
                 
                 args = [
                     "/create",
-                    "/tn", f"Ringtone_{task_name}",
+                    "/tn", task_path,
                     "/tr", f"\"{python_exe}\" \"{wrapper_script}\"",
                     "/sc", "weekly",
                     "/d", day_list,
@@ -141,8 +414,8 @@ main()
                 logger.info(f"✅ Command length OK ({len(test_command)} chars), using pythonw.exe directly")
                 args = [
                     "/create",
-                    "/tn", f"Ringtone_{task_name}",
-                    "/tr", f"\"{python_exe}\" \"{self.ringtone_player_script}\" \"{ringtone_path}\"",
+                    "/tn", task_path,
+                    "/tr", test_command,
                     "/sc", "weekly",
                     "/d", day_list,
                     "/st", time,
@@ -150,6 +423,7 @@ main()
                 ]
             
             success, stdout, stderr = self._run_schtasks_command(args)
+            self.invalidate_inventory()
             
             if success:
                 logger.info(f"✅ Created scheduled task: {task_name}")
@@ -163,6 +437,16 @@ main()
             logger.error(f"❌ Error creating scheduled task: {e}")
             return False
     
+    def _run_task_change(self, task_name: str, args: List[str]) -> Tuple[bool, str, str]:
+        """Run /change or /delete on a ringtone task, falling back to its old location in the root folder."""
+        task_path = self._task_path(task_name)
+        success, stdout, stderr = self._run_schtasks_command([args[0], "/tn", task_path] + args[1:])
+        if not success:
+            # Tasks created before TASK_FOLDER was introduced sit in the root folder
+            success, stdout, stderr = self._run_schtasks_command([args[0], "/tn", f"{TASK_PREFIX}{task_name}"] + args[1:])
+        self.invalidate_inventory()
+        return success, stdout, stderr
+    
     def delete_scheduled_task(self, task_name: str) -> bool:
         """
         Delete a Windows scheduled task.
@@ -174,13 +458,7 @@ main()
             bool: True if successful, False otherwise
         """
         try:
-            args = [
-                "/delete",
-                "/tn", f"Ringtone_{task_name}",
-                "/f"  # Force deletion
-            ]
-            
-            success, stdout, stderr = self._run_schtasks_command(args)
+            success, stdout, stderr = self._run_task_change(task_name, ["/delete", "/f"])
             
             if success:
                 logger.info(f"✅ Deleted scheduled task: {task_name}")
@@ -205,13 +483,7 @@ main()
             bool: True if successful, False otherwise
         """
         try:
-            args = [
-                "/change",
-                "/tn", f"Ringtone_{task_name}",
-                "/enable"
-            ]
-            
-            success, stdout, stderr = self._run_schtasks_command(args)
+            success, stdout, stderr = self._run_task_change(task_name, ["/change", "/enable"])
             
             if success:
                 logger.info(f"✅ Enabled scheduled task: {task_name}")
@@ -236,13 +508,7 @@ main()
             bool: True if successful, False otherwise
         """
         try:
-            args = [
-                "/change",
-                "/tn", f"Ringtone_{task_name}",
-                "/disable"
-            ]
-            
-            success, stdout, stderr = self._run_schtasks_command(args)
+            success, stdout, stderr = self._run_task_change(task_name, ["/change", "/disable"])
             
             if success:
                 logger.info(f"✅ Disabled scheduled task: {task_name}")
@@ -267,78 +533,216 @@ main()
             str: Task status or None if not found
         """
         try:
-            args = [
-                "/query",
-                "/tn", f"Ringtone_{task_name}",
-                "/fo", "csv",
-                "/v"
-            ]
-            
-            success, stdout, stderr = self._run_schtasks_command(args)
-            
-            if success and stdout:
-                # Parse the CSV output to find the status
-                lines = stdout.strip().split('\n')
-                if len(lines) > 1:
-                    # Skip header line and get the first data line
-                    data_line = lines[1]
-                    # The status is typically in one of the columns
-                    # This is a simplified parsing - you might need to adjust based on actual output
-                    if "Ready" in data_line:
-                        return "Ready"
-                    elif "Disabled" in data_line:
-                        return "Disabled"
-                    elif "Running" in data_line:
-                        return "Running"
-                
-            return None
+            task = self.query_tasks().get(task_name)
+            return task['status'] if task else None
             
         except Exception as e:
             logger.error(f"❌ Error getting task status: {e}")
             return None
     
-    def list_all_tasks(self) -> List[Dict]:
+    def get_task_statuses(self, task_names: Optional[List[str]] = None, refresh: bool = False) -> Dict[str, Optional[Dict]]:
+        """
+        State of many ringtone tasks from a single (possibly cached) query.
+        
+        Args:
+            task_names: Tasks to report (None for every ringtone task)
+            refresh: Bypass the cached inventory
+        
+        Returns:
+            Dict: Task name to its status, enabled flag, next/last run and last result (None if the task does not exist)
+        """
+        inventory = self.query_tasks(refresh=refresh)
+        names = list(inventory) if task_names is None else task_names
+        return {
+            name: {key: inventory[name][key] for key in ('status', 'enabled', 'next_run', 'last_run', 'last_result')}
+            if name in inventory else None
+            for name in names
+        }
+    
+    def list_all_tasks(self, refresh: bool = False) -> List[Dict]:
         """
         List all ringtone scheduler tasks.
         
+        Args:
+            refresh: Bypass the cached inventory
+        
         Returns:
             List of task information dictionaries
         """
         try:
-            args = [
-                "/query",
-                "/fo", "csv",
-                "/v"
-            ]
-            
-            success, stdout, stderr = self._run_schtasks_command(args)
-            
-            tasks = []
-            if success and stdout:
-                lines = stdout.strip().split('\n')
-                if len(lines) > 1:
-                    # Parse CSV output
-                    for line in lines[1:]:  # Skip header
-                        if "Ringtone_" in line:
-                            # This is one of our tasks
-                            parts = line.split(',')
-                            if len(parts) > 0:
-                                task_name = parts[0].strip('"')
-                                # Extract just the task name without the Ringtone_ prefix
-                                if "Ringtone_" in task_name:
-                                    clean_name = task_name.replace("Ringtone_", "")
-                                    tasks.append({
-                                        "name": clean_name,
-                                        "full_name": task_name,
-                                        "status": "Unknown"  # Would need more parsing to get actual status
-                                    })
-            
-            return tasks
+            return list(self.query_tasks(refresh=refresh).values())
             
         except Exception as e:
             logger.error(f"❌ Error listing tasks: {e}")
             return []
     
+    def create_task_from_xml(self, task_name: str, xml: str) -> bool:
+        """
+        Create or replace a ringtone task from a Task Scheduler XML definition in one schtasks call.
+        
+        Args:
+            task_name: Name of the task (without folder and prefix)
+            xml: Task definition (see build_task_xml)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            task_path = self._task_path(task_name)
+            # schtasks reads the definition from a file, in the UTF-16 the declaration names
+            fd, xml_path = tempfile.mkstemp(prefix='ringtone_task_', suffix='.xml')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-16') as f:
+                    f.write(xml)
+                success, stdout, stderr = self._run_schtasks_command(["/create", "/tn", task_path, "/xml", xml_path, "/f"])
+            finally:
+                os.remove(xml_path)
+            self.invalidate_inventory()
+            
+            if success:
+                logger.info(f"✅ Created scheduled task from XML: {task_name}")
+                return True
+            else:
+                logger.error(f"❌ Failed to create scheduled task from XML: {task_name}")
+                logger.error(f"Error: {stderr}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Error creating scheduled task from XML: {e}")
+            return False
+    
+    def _desired_tasks(self, schedules: List[Dict]) -> Dict[str, Dict]:
+        """
+        Validate a desired schedule set and group it into one task per ringtone.
+        
+        Active schedules of the same ringtone become triggers of one task; schedules at
+        the same time of day share one trigger with the union of their days. Ringtones
+        without an active schedule get no task.
+        """
+        seen, by_ringtone = set(), {}
+        for schedule in schedules:
+            if not isinstance(schedule, dict):
+                raise ValueError("Each schedule must be an object")
+            schedule_id = schedule.get('id')
+            if not isinstance(schedule_id, str) or not TASK_NAME_PATTERN.match(schedule_id):
+                raise ValueError(f"Invalid schedule id: {schedule_id!r}")
+            if schedule_id in seen:
+                raise ValueError(f"Duplicate schedule id: {schedule_id}")
+            seen.add(schedule_id)
+            ringtone_path = schedule.get('ringtone_path')
+            if not isinstance(ringtone_path, str) or not ringtone_path or '"' in ringtone_path:
+                raise ValueError(f"Invalid ringtone_path for {schedule_id}")
+            active = schedule.get('active', True)
+            if not isinstance(active, bool):
+                raise ValueError(f"active must be true or false for {schedule_id}")
+            time_of_day = parse_time_of_day(schedule.get('time')).strftime('%H:%M:%S')
+            days = parse_days(schedule.get('days'))
+            if active:
+                # The first spelling of a path names the file in the task
+                path, times = by_ringtone.setdefault(ringtone_task_name(ringtone_path), (ringtone_path, {}))
+                times.setdefault(time_of_day, set()).update(days)
+        
+        tasks = {}
+        for task_name, (ringtone_path, times) in by_ringtone.items():
+            triggers = [(time_of_day, sorted(days)) for time_of_day, days in times.items()]
+            xml, digest = build_task_xml(ringtone_path, triggers, PYTHONW_EXE, self.ringtone_player_script)
+            tasks[task_name] = {'xml': xml, 'digest': digest, 'triggers': len(triggers)}
+        return tasks
+    
+    def _plan_task(self, desired: Optional[Dict], existing: Optional[Dict]) -> List[str]:
+        """Smallest list of steps that turns an existing task (or none) into the desired one (or none)."""
+        if desired is None:
+            return ['delete']
+        if existing is None:
+            return ['create']
+        tag = DEFINITION_TAG.search(existing['description'])
+        if not tag or tag.group(1) != desired['digest']:
+            # /create /xml /f replaces the task in place, enabled as the definition says
+            return ['update']
+        if not existing['enabled']:
+            return ['enable']
+        return []
+    
+    def _apply_steps(self, desired: Optional[Dict], task_name: str, steps: List[str]) -> Optional[str]:
+        """Run one task's steps in order; returns the step that failed, if any."""
+        for step in steps:
+            if step in ('create', 'update'):
+                success = self.create_task_from_xml(task_name, desired['xml'])
+            elif step == 'enable':
+                success = self.enable_scheduled_task(task_name)
+            else:
+                success = self.delete_scheduled_task(task_name)
+            if not success:
+                return step
+        return None
+    
+    def sync_tasks(self, schedules: List[Dict], dry_run: bool = False, keep: Optional[List[str]] = None,
+                   max_workers: int = SYNC_WORKERS) -> Dict:
+        """
+        Make the ringtone tasks match a full desired schedule set.
+        
+        Each ringtone gets one task holding the times of all its active schedules as
+        triggers, defined in XML and imported with a single schtasks call. The set is
+        diffed against the task inventory (one cached query) by the fingerprint of each
+        definition, and only the differences are applied: missing tasks are created,
+        tasks whose definition differs are replaced, tasks disabled by hand are enabled,
+        and tasks of the folder that are not in the set are deleted (this also removes
+        the one-task-per-schedule tasks of earlier versions). Tasks are worked on in
+        parallel. A failed step leaves that task for the next sync, which diffs against
+        the real state again.
+        
+        Args:
+            schedules: Every device schedule (id, ringtone_path, time, days, active)
+            dry_run: Only report the steps that would run
+            keep: Tasks to leave as they are although they are not in the set
+            max_workers: schtasks processes run at once
+        
+        Returns:
+            Dict: Task names per step, unchanged count, failures, task/trigger/schedule counts and
+            the schtasks processes used
+        
+        Raises:
+            ValueError: For an invalid schedule, a duplicate id or too many schedules
+        """
+        if not isinstance(schedules, list) or len(schedules) > MAX_SYNC_SCHEDULES:
+            raise ValueError(f"schedules must be a list of at most {MAX_SYNC_SCHEDULES} schedules")
+        desired = self._desired_tasks(schedules)
+        
+        with self._sync_lock:
+            started = clock.perf_counter()
+            spawns = self.stats()['spawns']
+            inventory = self.query_tasks()
+            plan = {name: self._plan_task(task, inventory.get(name)) for name, task in desired.items()}
+            plan.update({name: ['delete'] for name in inventory if name not in desired and name not in (keep or [])})
+            changes = {name: steps for name, steps in plan.items() if steps}
+            
+            failed = {}
+            if not dry_run and changes:
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(changes))),
+                                        thread_name_prefix='task-sync') as pool:
+                    futures = {name: pool.submit(self._apply_steps, desired.get(name), name, steps)
+                               for name, steps in changes.items()}
+                failed = {name: f"{future.result()} failed" for name, future in futures.items() if future.result()}
+                self.invalidate_inventory()
+            
+            report = {step: sorted(name for name, steps in changes.items() if step in steps and name not in failed)
+                      for step in ('create', 'update', 'enable', 'delete')}
+            report.update({
+                'unchanged': sum(1 for steps in plan.values() if not steps),
+                'failed': failed,
+                'dry_run': dry_run,
+                'schedules': len(schedules),
+                'tasks': len(desired),
+                'triggers': sum(task['triggers'] for task in desired.values()),
+                'spawns': self.stats()['spawns'] - spawns,
+                'duration_ms': round((clock.perf_counter() - started) * 1000, 1)
+            })
+            logger.info(f"🔄 Task sync: {report['schedules']} schedules in {report['tasks']} tasks, "
+                        f"{len(report['create'])} created, {len(report['update'])} updated, "
+                        f"{len(report['delete'])} deleted, {report['unchanged']} unchanged, {len(failed)} failed, "
+                        f"{report['spawns']} schtasks processes")
+            return report
+    
     def test_ringtone_playback(self, ringtone_path: str) -> bool:
         """
         Test playing a ringtone immediately.
@@ -351,8 +755,8 @@ main()
         """
         try:
             # Check if the command would exceed 261 character limit
-            python_exe = r"C:\Program Files\Python313\pythonw.exe"
-            test_command = f'"{python_exe}" "{self.ringtone_player_script}" "{ringtone_path}"'
+            python_exe = PYTHONW_EXE
+            test_command = self._player_command(ringtone_path)
             
             if len(test_command) > 261:
                 # Use batch file wrapper for existing ringtones with long filenames
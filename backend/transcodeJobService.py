@@ -0,0 +1,296 @@
+# Rules applied
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import logging
+
+from encoderPoolService import EncoderPoolService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status queries before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcode_jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    context TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT,
+    pid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcode_jobs_finished ON transcode_jobs (finished);
+"""
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _process_alive(pid: int) -> bool:
+    """Return False if no process with this id exists (always True on Windows, where os.kill terminates)."""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run_timed(fn: Callable, args: tuple, kwargs: dict) -> Dict:
+    """Run a job function in the worker and record when it actually ran."""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return {'result': result, 'started': started, 'finished': time.time()}
+
+
+class TranscodeJobService:
+    """
+    Bounded background job queue for transcoding work.
+
+    Jobs run on the encoder worker pool so encodes neither block the request thread
+    nor serialize on the GIL. The queue is bounded: once ``max_pending`` jobs are
+    queued or running, new submissions are rejected instead of piling up.
+
+    With a database, job records are also written to SQLite, so a status poll
+    answered by another server process (e.g. another gunicorn worker) still finds
+    the job. Each process runs, and bounds, only the jobs it accepted.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64,
+                 pool: Optional[EncoderPoolService] = None, db_path: Optional[str] = None):
+        """
+        Args:
+            max_workers: Pool size when no pool is given (defaults to the CPU count)
+            max_pending: Maximum number of queued plus running jobs
+            pool: Encoder worker pool to run the jobs on (shared with other callers)
+            db_path: SQLite database shared by the server processes (jobs stay in memory when omitted)
+        """
+        self._pool = pool or EncoderPoolService(max_workers)
+        self.max_workers = self._pool.size
+        self.max_pending = max_pending
+        self.db_path = db_path
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        if db_path:
+            with self._connect() as conn:
+                conn.executescript(JOB_SCHEMA)
+                self._fail_orphaned_jobs(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _fail_orphaned_jobs(conn: sqlite3.Connection) -> None:
+        """Mark unfinished jobs of server processes that no longer exist as failed."""
+        rows = conn.execute("SELECT DISTINCT pid FROM transcode_jobs WHERE finished IS NULL").fetchall()
+        for row in rows:
+            if row['pid'] != os.getpid() and not _process_alive(row['pid']):
+                conn.execute("UPDATE transcode_jobs SET status = 'failed', error = 'Server process exited', "
+                             "finished = ? WHERE pid = ? AND finished IS NULL", (time.time(), row['pid']))
+
+    def _save(self, job: Dict) -> None:
+        """Write a job record to the database; a failed write only costs cross-process visibility."""
+        if not self.db_path:
+            return
+        try:
+            with self._write_lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcode_jobs (id, type, status, context, created, started, finished, "
+                    "result, error, pid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job['id'], job['type'], job['status'], json.dumps(job['context'], default=str), job['created'],
+                     job['started'], job['finished'],
+                     json.dumps(job['result'], default=str) if job['result'] is not None else None,
+                     job['error'], os.getpid()))
+                if job['finished'] is not None:
+                    conn.execute("DELETE FROM transcode_jobs WHERE finished IS NOT NULL AND id NOT IN "
+                                 "(SELECT id FROM transcode_jobs WHERE finished IS NOT NULL "
+                                 "ORDER BY finished DESC LIMIT ?)", (MAX_FINISHED_JOBS,))
+        except sqlite3.Error as e:
+            logger.error(f"❌ Could not store {job['type']} job {job['id']}: {e}")
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        """Read a job record written by any server process."""
+        if not self.db_path:
+            return None
+        row = self._connect().execute("SELECT * FROM transcode_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'status': row['status'],
+            'context': json.loads(row['context']),
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'future': None
+        }
+
+    def submit(self, job_type: str, fn: Callable, *args, on_success: Optional[Callable[[Dict], Dict]] = None,
+               context: Optional[Dict] = None, **kwargs) -> Dict:
+        """
+        Queue a job.
+
+        Args:
+            job_type: Short label for the kind of job (e.g. 'mp3_rendition')
+            fn: Picklable top-level function run in a worker process
+            on_success: Called in the server process with the worker's result; its
+                return value becomes the job's result (e.g. after writing sidecars)
+            context: Extra information stored on the job record
+
+        Returns:
+            dict: The new job record
+
+        Raises:
+            JobQueueFullError: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(f"Job queue is full ({self.max_pending} jobs pending)")
+            self._pending += 1
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'type': job_type,
+                'status': 'queued',
+                'context': context or {},
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+                'future': None
+            }
+            self._jobs[job['id']] = job
+        self._save(job)
+
+        try:
+            future = self._pool.submit(_run_timed, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                del self._jobs[job['id']]
+            if self.db_path:
+                with self._write_lock, self._connect() as conn:
+                    conn.execute("DELETE FROM transcode_jobs WHERE id = ?", (job['id'],))
+            raise
+
+        job['future'] = future
+        future.add_done_callback(lambda done: self._complete(job, done, on_success))
+        logger.info(f"📥 Queued {job_type} job {job['id']}")
+        return self._public(job)
+
+    def _complete(self, job: Dict, future, on_success: Optional[Callable[[Dict], Dict]]) -> None:
+        """Record the outcome of a finished job (runs in the server process)."""
+        finished = None
+        try:
+            outcome = future.result()
+            job['started'] = outcome['started']
+            # The worker's clock, so run_ms leaves out the on_success work done here
+            finished = outcome['finished']
+            job['result'] = outcome['result']
+            if on_success:
+                job['result'] = on_success(outcome['result'])
+            job['status'] = 'succeeded'
+            logger.info(f"✅ {job['type']} job {job['id']} succeeded")
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            logger.error(f"❌ {job['type']} job {job['id']} failed: {e}")
+        finally:
+            job['finished'] = finished or time.time()
+            self._save(job)
+            with self._lock:
+                self._pending -= 1
+                self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job['finished'] is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _public(job: Dict) -> Dict:
+        """Return the JSON view of a job record, including per-job timing."""
+        def iso(timestamp):
+            return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+        status = job['status']
+        if status == 'queued' and job['future'] is not None and job['future'].running():
+            status = 'running'
+
+        timing = {'queue_ms': None, 'run_ms': None, 'total_ms': None}
+        if job['started']:
+            timing['queue_ms'] = round((job['started'] - job['created']) * 1000, 1)
+        if job['finished']:
+            timing['total_ms'] = round((job['finished'] - job['created']) * 1000, 1)
+            if job['started']:
+                timing['run_ms'] = round((job['finished'] - job['started']) * 1000, 1)
+
+        return {
+            'id': job['id'],
+            'type': job['type'],
+            'status': status,
+            'context': job['context'],
+            'created': iso(job['created']),
+            'started': iso(job['started']),
+            'finished': iso(job['finished']),
+            'timing': timing,
+            'result': job['result'],
+            'error': job['error']
+        }
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Return the JSON view of a job, or None if it is unknown or was forgotten."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return self._public(job)
+        # Accepted by another server process
+        job = self._load(job_id)
+        return self._public(job) if job else None
+
+    def stats(self) -> Dict:
+        """Return queue statistics."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'tracked_jobs': len(self._jobs)
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool."""
+        self._pool.shutdown(wait=wait)
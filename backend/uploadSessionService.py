@@ -0,0 +1,351 @@
+# Rules applied
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPLOAD_SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    committed INTEGER NOT NULL DEFAULT 0,
+    expected_sha256 TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_updated ON upload_sessions (updated);
+"""
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+# Size of the reads from the request body (and of the re-hash after a restart)
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadLimitError(Exception):
+    """Raised when an upload exceeds a size limit or no more sessions can be opened."""
+
+
+class UploadConflictError(Exception):
+    """Raised for a chunk that does not start at the session's committed offset."""
+
+    def __init__(self, message: str, committed: int):
+        super().__init__(message)
+        self.committed = committed
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """Return 'wav' or 'mp3' if the first bytes of a file look like that format."""
+    if len(header) >= 12 and header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:3] == b'ID3' or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+
+class UploadSessionService:
+    """
+    Resumable chunked uploads.
+
+    A client opens a session with the file's name and size, then PUTs chunks at
+    increasing offsets. Each chunk is streamed from the request body straight into
+    the session's staging file and hashed on the way; once it is on disk (fsync) the
+    new offset is committed to SQLite. After a dropped connection, or a server
+    restart, the client asks for the committed offset and continues from there;
+    bytes past it are discarded. Finalizing checks the size, hash and audio type and
+    renames the staging file into place, so the upload is never copied.
+
+    Limits: a file may not exceed max_file_size, a chunk max_chunk_size, and a
+    session never accepts bytes past its declared size. Open sessions are capped
+    in number and in the bytes they reserve, and idle sessions expire.
+    """
+
+    def __init__(self, staging_dir: str, db_path: str, max_file_size: int, max_chunk_size: int,
+                 max_sessions: int = 20, max_reserved_bytes: Optional[int] = None,
+                 session_ttl: float = 24 * 3600):
+        """
+        Args:
+            staging_dir: Folder of the partial files; must be on the same file system
+                as the upload folder so finalizing is a rename
+            db_path: Path of the SQLite database holding the sessions
+            max_file_size: Largest file a session may declare
+            max_chunk_size: Largest body of one PUT
+            max_sessions: Maximum number of open sessions
+            max_reserved_bytes: Maximum total declared size of the open sessions
+            session_ttl: Seconds after the last chunk before a session expires
+        """
+        self.staging_dir = staging_dir
+        self.db_path = db_path
+        self.max_file_size = max_file_size
+        self.max_chunk_size = max_chunk_size
+        self.max_sessions = max_sessions
+        self.max_reserved_bytes = max_reserved_bytes or max_file_size * 4
+        self.session_ttl = session_ttl
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        # upload id -> (hasher, offset it has consumed); rebuilt from the staging file after a restart
+        self._hashers: Dict[str, Tuple["hashlib._Hash", int]] = {}
+
+        os.makedirs(staging_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(UPLOAD_SESSION_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.part")
+
+    def _session_lock(self, upload_id: str) -> threading.Lock:
+        with self._write_lock:
+            return self._session_locks.setdefault(upload_id, threading.Lock())
+
+    def _describe(self, row: sqlite3.Row) -> Dict:
+        return {
+            'upload_id': row['id'],
+            'filename': row['filename'],
+            'size': row['size'],
+            'offset': row['committed'],
+            'complete': row['committed'] == row['size'],
+            'expires': row['updated'] + self.session_ttl
+        }
+
+    def _forget(self, upload_id: str) -> None:
+        part_path = self._part_path(upload_id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        self._hashers.pop(upload_id, None)
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM upload_sessions WHERE id = ?", (upload_id,))
+            self._session_locks.pop(upload_id, None)
+
+    def purge_expired(self) -> int:
+        """Delete sessions idle for longer than the TTL; returns how many were removed."""
+        conn = self._connect()
+        expired = [row['id'] for row in conn.execute(
+            "SELECT id FROM upload_sessions WHERE updated < ?", (time.time() - self.session_ttl,))]
+        for upload_id in expired:
+            self._forget(upload_id)
+        if expired:
+            logger.info(f"🧹 Removed {len(expired)} expired upload sessions")
+        return len(expired)
+
+    def create(self, filename: str, size: int, expected_sha256: Optional[str] = None) -> Dict:
+        """
+        Open an upload session.
+
+        Args:
+            filename: Final file name (validated by the caller)
+            size: Exact size of the file in bytes
+            expected_sha256: Optional SHA-256 the finished upload must match
+
+        Returns:
+            dict: The session ('upload_id', 'offset', 'size', ...)
+
+        Raises:
+            ValueError: For a malformed size or hash
+            UploadLimitError: If the file is too large or too many bytes are reserved
+        """
+        if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+            raise ValueError('size must be a positive integer')
+        if size > self.max_file_size:
+            raise UploadLimitError(f'File is too large ({size} bytes, max {self.max_file_size})')
+        if expected_sha256 is not None:
+            expected_sha256 = str(expected_sha256).lower()
+            if not SHA256_PATTERN.match(expected_sha256):
+                raise ValueError('sha256 must be a hex SHA-256 digest')
+
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        with self._write_lock, conn:
+            open_sessions, reserved = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size - committed), 0) FROM upload_sessions").fetchone()
+            if open_sessions >= self.max_sessions:
+                raise UploadLimitError(f'Too many open uploads (max {self.max_sessions})')
+            if reserved + size > self.max_reserved_bytes:
+                raise UploadLimitError('Too many bytes reserved by open uploads; finish or cancel some first')
+            conn.execute("INSERT INTO upload_sessions (id, filename, size, committed, expected_sha256, created, updated) "
+                         "VALUES (?, ?, ?, 0, ?, ?, ?)", (upload_id, filename, size, expected_sha256, now, now))
+        open(self._part_path(upload_id), 'wb').close()
+        self._hashers[upload_id] = (hashlib.sha256(), 0)
+        logger.info(f"📤 Upload session {upload_id} opened for {filename} ({size} bytes)")
+        return self.get(upload_id)
+
+    def _row(self, upload_id: str) -> Optional[sqlite3.Row]:
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            return None
+        row = self._connect().execute("SELECT * FROM upload_sessions WHERE id = ?", (upload_id,)).fetchone()
+        if row is not None and row['updated'] < time.time() - self.session_ttl:
+            self._forget(upload_id)
+            return None
+        return row
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        """Return a session (its committed 'offset' is where to resume), or None."""
+        row = self._row(upload_id)
+        return self._describe(row) if row is not None else None
+
+    def _hasher(self, upload_id: str, committed: int):
+        """Return the session's hasher positioned at the committed offset."""
+        hasher, consumed = self._hashers.get(upload_id, (None, -1))
+        if consumed != committed:
+            # After a restart (or a failed chunk), hash the committed bytes again
+            hasher = hashlib.sha256()
+            remaining = committed
+            with open(self._part_path(upload_id), 'rb') as f:
+                while remaining:
+                    buffer = f.read(min(COPY_BUFFER_SIZE, remaining))
+                    if not buffer:
+                        raise UploadConflictError('Staged upload is shorter than its committed offset', 0)
+                    hasher.update(buffer)
+                    remaining -= len(buffer)
+        return hasher
+
+    def write_chunk(self, upload_id: str, offset: int, stream: BinaryIO, length: int) -> Optional[Dict]:
+        """
+        Append a chunk read from a stream at the committed offset.
+
+        Bytes that arrive before the stream fails are still committed, so the client
+        can resume from the returned (or queried) offset.
+
+        Returns:
+            dict: The updated session, or None if it does not exist
+
+        Raises:
+            UploadConflictError: If offset is not the committed offset
+            UploadLimitError: If the chunk is too large or runs past the declared size
+        """
+        with self._session_lock(upload_id):
+            row = self._row(upload_id)
+            if row is None:
+                return None
+            committed = row['committed']
+            if offset != committed:
+                raise UploadConflictError(f'Chunk starts at {offset}, expected {committed}', committed)
+            if length > self.max_chunk_size:
+                raise UploadLimitError(f'Chunk is too large ({length} bytes, max {self.max_chunk_size})')
+            if committed + length > row['size']:
+                raise UploadLimitError(f"Chunk runs past the declared size of {row['size']} bytes")
+
+            hasher = self._hasher(upload_id, committed)
+            received = 0
+            try:
+                with open(self._part_path(upload_id), 'r+b') as f:
+                    # Drop anything written after the last commit (e.g. by a chunk that failed midway)
+                    f.truncate(committed)
+                    f.seek(committed)
+                    try:
+                        while received < length:
+                            buffer = stream.read(min(COPY_BUFFER_SIZE, length - received))
+                            if not buffer:
+                                break
+                            f.write(buffer)
+                            hasher.update(buffer)
+                            received += len(buffer)
+                    finally:
+                        f.flush()
+                        os.fsync(f.fileno())
+            finally:
+                committed += received
+                self._hashers[upload_id] = (hasher, committed)
+                conn = self._connect()
+                with self._write_lock, conn:
+                    conn.execute("UPDATE upload_sessions SET committed = ?, updated = ? WHERE id = ?",
+                                 (committed, time.time(), upload_id))
+            return self.get(upload_id)
+
+    def digest(self, upload_id: str) -> Optional[str]:
+        """
+        Return the SHA-256 of a complete upload without finalizing it, or None if the
+        session does not exist.
+
+        Raises:
+            UploadConflictError: If bytes are still missing
+        """
+        with self._session_lock(upload_id):
+            row = self._row(upload_id)
+            if row is None:
+                return None
+            if row['committed'] != row['size']:
+                raise UploadConflictError(f"Upload is incomplete ({row['committed']} of {row['size']} bytes)",
+                                          row['committed'])
+            hasher = self._hasher(upload_id, row['committed'])
+            self._hashers[upload_id] = (hasher, row['committed'])
+            return hasher.hexdigest()
+
+    def finalize(self, upload_id: str, target_path: str) -> Optional[Dict]:
+        """
+        Check a complete upload and move it to target_path.
+
+        Returns:
+            dict: 'path', 'size', 'sha256' and 'format' of the file, or None if the
+                session does not exist
+
+        Raises:
+            UploadConflictError: If bytes are still missing
+            ValueError: If the hash does not match or the file is not the audio
+                format its name says
+        """
+        with self._session_lock(upload_id):
+            row = self._row(upload_id)
+            if row is None:
+                return None
+            if row['committed'] != row['size']:
+                raise UploadConflictError(f"Upload is incomplete ({row['committed']} of {row['size']} bytes)",
+                                          row['committed'])
+
+            part_path = self._part_path(upload_id)
+            sha256 = self._hasher(upload_id, row['committed']).hexdigest()
+            if row['expected_sha256'] and sha256 != row['expected_sha256']:
+                self._forget(upload_id)
+                raise ValueError('Uploaded content does not match the declared sha256; start a new upload')
+
+            with open(part_path, 'rb') as f:
+                audio_format = sniff_audio_format(f.read(16))
+            extension = os.path.splitext(row['filename'])[1].lower().lstrip('.')
+            if audio_format != extension:
+                self._forget(upload_id)
+                raise ValueError(f"Uploaded content is not a valid {extension.upper()} file")
+
+            os.replace(part_path, target_path)
+            self._forget(upload_id)
+            logger.info(f"✅ Upload {upload_id} finalized: {os.path.basename(target_path)} ({row['size']} bytes)")
+            return {'path': target_path, 'size': row['size'], 'sha256': sha256, 'format': audio_format}
+
+    def abort(self, upload_id: str) -> bool:
+        """Cancel a session and delete its staged bytes; returns False if it does not exist."""
+        with self._session_lock(upload_id):
+            if self._row(upload_id) is None:
+                return False
+            self._forget(upload_id)
+            return True
+
+    def stats(self) -> Dict:
+        """Return the number of open sessions and the bytes they have staged and reserved."""
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS sessions, COALESCE(SUM(committed), 0) AS staged, "
+            "COALESCE(SUM(size - committed), 0) AS reserved FROM upload_sessions").fetchone()
+        return {'open_sessions': row['sessions'], 'staged_bytes': row['staged'], 'reserved_bytes': row['reserved'],
+                'max_file_size': self.max_file_size, 'max_chunk_size': self.max_chunk_size}
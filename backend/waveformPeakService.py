@@ -0,0 +1,261 @@
+# Rules applied
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from batchCutService import decoded_pcm
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Peak file layout (little-endian): header, one (offset, count) entry per level, then per level
+# `count` int16 [min, max] pairs. Level 0 is the finest; every level halves the one before it.
+PEAK_FILE_MAGIC = b'RTPK'
+PEAK_FILE_VERSION = 1
+PEAK_HEADER = struct.Struct('<4sHHIQII')
+PEAK_LEVEL_ENTRY = struct.Struct('<QQ')
+
+# Frames per peak at the finest level (about 5.8 ms at 44.1 kHz)
+BASE_SAMPLES_PER_PEAK = 256
+# Levels are added until the coarsest one has no more peaks than this
+OVERVIEW_PEAKS = 1024
+# Peak files kept mapped between requests
+OPEN_PEAK_FILES = 32
+
+
+def _reduce_level(mins: np.ndarray, maxs: np.ndarray):
+    """Merge neighbouring pairs of peaks into the next coarser level."""
+    count = len(mins)
+    pairs = count // 2
+    coarse_mins = mins[:pairs * 2].reshape(pairs, 2).min(axis=1)
+    coarse_maxs = maxs[:pairs * 2].reshape(pairs, 2).max(axis=1)
+    if count % 2:
+        coarse_mins = np.append(coarse_mins, mins[-1])
+        coarse_maxs = np.append(coarse_maxs, maxs[-1])
+    return coarse_mins, coarse_maxs
+
+
+def compute_peaks(samples: np.ndarray, base_samples_per_peak: int = BASE_SAMPLES_PER_PEAK,
+                  overview_peaks: int = OVERVIEW_PEAKS) -> List[np.ndarray]:
+    """
+    Compute the min/max pyramid of interleaved 16-bit samples.
+
+    Args:
+        samples: int16 array of shape (frames, channels); channels are merged
+        base_samples_per_peak: Frames per peak at the finest level
+        overview_peaks: Stop adding levels once a level has at most this many peaks
+
+    Returns:
+        list: One int16 array of shape (peaks, 2) per level, finest first
+    """
+    frames = len(samples)
+    blocks = frames // base_samples_per_peak
+    full = samples[:blocks * base_samples_per_peak].reshape(blocks, -1)
+    mins = full.min(axis=1) if blocks else np.empty(0, dtype=np.int16)
+    maxs = full.max(axis=1) if blocks else np.empty(0, dtype=np.int16)
+    if frames % base_samples_per_peak:
+        tail = samples[blocks * base_samples_per_peak:]
+        mins = np.append(mins, tail.min())
+        maxs = np.append(maxs, tail.max())
+
+    levels = [np.stack([mins, maxs], axis=1).astype('<i2')]
+    while len(mins) > overview_peaks:
+        mins, maxs = _reduce_level(mins, maxs)
+        levels.append(np.stack([mins, maxs], axis=1).astype('<i2'))
+    return levels
+
+
+def build_peak_file(source_path: str, output_path: str, ffmpeg_binary: Optional[str] = None) -> Dict:
+    """
+    Worker: decode a source and write its peak pyramid file.
+
+    A 16-bit PCM WAV is mapped as is; anything else is decoded to a temporary WAV
+    first. The file appears atomically under output_path.
+
+    Returns:
+        dict: 'output_path', 'size', 'levels', 'frames', 'sample_rate' and 'compute_ms'
+    """
+    started = time.perf_counter()
+    partial_path = output_path + '.part'
+    try:
+        with decoded_pcm(source_path, ffmpeg_binary) as pcm:
+            view = pcm.slice(0, pcm.duration)
+            samples = np.frombuffer(view, dtype='<i2').reshape(-1, pcm.channels)
+            levels = compute_peaks(samples)
+            del samples
+            channels, sample_rate, frames = pcm.channels, pcm.sample_rate, pcm.frames
+
+        offset = PEAK_HEADER.size + PEAK_LEVEL_ENTRY.size * len(levels)
+        with open(partial_path, 'wb') as f:
+            f.write(PEAK_HEADER.pack(PEAK_FILE_MAGIC, PEAK_FILE_VERSION, channels, sample_rate,
+                                     frames, BASE_SAMPLES_PER_PEAK, len(levels)))
+            for level in levels:
+                f.write(PEAK_LEVEL_ENTRY.pack(offset, len(level)))
+                offset += level.nbytes
+            for level in levels:
+                f.write(level.tobytes())
+        os.replace(partial_path, output_path)
+
+        compute_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"📈 Peaks of {os.path.basename(source_path)}: {len(levels)} levels "
+                    f"({len(levels[0])} finest peaks) in {compute_ms} ms")
+        return {
+            'output_path': output_path,
+            'size': os.path.getsize(output_path),
+            'levels': len(levels),
+            'frames': frames,
+            'sample_rate': sample_rate,
+            'compute_ms': compute_ms
+        }
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+class PeakFile:
+    """A memory-mapped peak pyramid file; levels are zero-copy NumPy views of the mapping."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty peak file: {path}")
+        if len(self._map) < PEAK_HEADER.size:
+            self.close()
+            raise ValueError(f"Truncated peak file: {path}")
+        (magic, version, self.channels, self.sample_rate, self.frames,
+         self.base_samples_per_peak, level_count) = PEAK_HEADER.unpack_from(self._map)
+        if magic != PEAK_FILE_MAGIC or version != PEAK_FILE_VERSION:
+            self.close()
+            raise ValueError(f"Not a peak file: {path}")
+
+        self.levels: List[np.ndarray] = []
+        for index in range(level_count):
+            offset, count = PEAK_LEVEL_ENTRY.unpack_from(self._map, PEAK_HEADER.size + index * PEAK_LEVEL_ENTRY.size)
+            self.levels.append(np.frombuffer(self._map, dtype='<i2', count=count * 2, offset=offset).reshape(-1, 2))
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def samples_per_peak(self, level: int) -> int:
+        return self.base_samples_per_peak << level
+
+    def close(self) -> None:
+        self.levels = []
+        self._map.close()
+        self._file.close()
+
+
+class WaveformPeakService:
+    """
+    Multi-resolution min/max waveform peaks of uploaded originals.
+
+    Peaks are computed once per source content (files are named by SHA-256), stored
+    in a compact binary pyramid and memory-mapped to answer window requests, so a
+    client draws the visible part of a waveform at its zoom without downloading and
+    decoding the audio.
+
+    Zoom 0 is the overview (the coarsest level); each zoom step doubles the detail
+    up to the finest level of BASE_SAMPLES_PER_PEAK frames per peak.
+    """
+
+    def __init__(self, peaks_folder: str):
+        """
+        Args:
+            peaks_folder: Directory of the peak files
+        """
+        self.peaks_folder = peaks_folder
+        os.makedirs(peaks_folder, exist_ok=True)
+        self._open: "OrderedDict[str, PeakFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def peaks_path(self, source_sha256: str) -> str:
+        return os.path.join(self.peaks_folder, f"{source_sha256}.peaks")
+
+    def ensure(self, source_path: str, source_sha256: str, ffmpeg_binary: Optional[str] = None) -> str:
+        """Build the peak file of a source unless it exists; returns its path."""
+        path = self.peaks_path(source_sha256)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            build_lock = self._build_locks.setdefault(source_sha256, threading.Lock())
+        with build_lock:
+            if not os.path.exists(path):
+                build_peak_file(source_path, path, ffmpeg_binary)
+        with self._lock:
+            self._build_locks.pop(source_sha256, None)
+        return path
+
+    def _peak_file(self, source_sha256: str) -> PeakFile:
+        with self._lock:
+            peak_file = self._open.get(source_sha256)
+            if peak_file is not None:
+                self._open.move_to_end(source_sha256)
+                return peak_file
+            peak_file = PeakFile(self.peaks_path(source_sha256))
+            self._open[source_sha256] = peak_file
+            # Dropped files are unmapped once no response holds a view of them
+            while len(self._open) > OPEN_PEAK_FILES:
+                self._open.popitem(last=False)
+            return peak_file
+
+    def duration(self, source_sha256: str) -> float:
+        """Return the length in seconds of a source whose peak file exists."""
+        return self._peak_file(source_sha256).duration
+
+    def window(self, source_sha256: str, zoom: Optional[int] = None, start: Optional[float] = None,
+               end: Optional[float] = None) -> Dict:
+        """
+        Return the peaks of [start, end) seconds at a zoom level.
+
+        Args:
+            source_sha256: Content hash of the source (its peak file must exist)
+            zoom: 0 for the overview up to 'zoom_levels' - 1 for the finest level
+            start: Window start in seconds (default: beginning)
+            end: Window end in seconds (default: end of the audio)
+
+        Returns:
+            dict: Window description plus 'peaks', an int16 array of [min, max] rows
+
+        Raises:
+            ValueError: For a zoom level or window outside the audio
+        """
+        peak_file = self._peak_file(source_sha256)
+        zoom_levels = len(peak_file.levels)
+        zoom = 0 if zoom is None else zoom
+        if not 0 <= zoom < zoom_levels:
+            raise ValueError(f"zoom must be between 0 and {zoom_levels - 1}")
+        start = 0.0 if start is None else start
+        end = peak_file.duration if end is None else min(end, peak_file.duration)
+        if start < 0 or end <= start:
+            raise ValueError("end must be greater than start, and start at least 0")
+
+        level = zoom_levels - 1 - zoom
+        samples_per_peak = peak_file.samples_per_peak(level)
+        peaks = peak_file.levels[level]
+        first = min(int(start * peak_file.sample_rate) // samples_per_peak, len(peaks))
+        last = min(-(-int(end * peak_file.sample_rate) // samples_per_peak), len(peaks))
+        return {
+            'zoom': zoom,
+            'zoom_levels': zoom_levels,
+            'samples_per_peak': samples_per_peak,
+            'sample_rate': peak_file.sample_rate,
+            'channels': peak_file.channels,
+            'duration': peak_file.duration,
+            'start_index': first,
+            'start': round(first * samples_per_peak / peak_file.sample_rate, 6),
+            'end': round(min(last * samples_per_peak / peak_file.sample_rate, peak_file.duration), 6),
+            'peaks': peaks[first:last]
+        }
@@ -0,0 +1,282 @@
+# Rules applied
+"""
+Production entry point of the backend.
+
+Serves the Flask app with a real WSGI server instead of the Werkzeug development
+server:
+
+- waitress: one process with a thread pool; works on Windows
+- gunicorn: several worker processes (POSIX only), each with a thread pool
+- werkzeug: the development server, threaded, without reloader or debugger
+
+Every worker process builds its own app through server.create_app(), so the
+SQLite connections, the catalog watcher and the encoder pool are created in the
+process that uses them and never shared across a fork. Each gunicorn worker
+therefore runs its own encoder pool and catalog watcher; state that requests
+share across workers (catalog, schedules, background job records) lives in
+SQLite. The CPU cores are divided among the encoder pools of the workers
+unless ENCODER_WORKERS sets the size of each pool.
+
+Settings come from the command line or the environment (command line wins):
+SERVER_ENGINE, BACKEND_HOST, BACKEND_PORT, WEB_PROCESSES, WEB_THREADS,
+ENCODER_WORKERS, KEEPALIVE, REQUEST_TIMEOUT, GRACEFUL_TIMEOUT, MAX_REQUESTS.
+
+Signals: SIGTERM/SIGINT stop gracefully (no new connections, in-flight requests
+finish within GRACEFUL_TIMEOUT); SIGHUP reloads gracefully (gunicorn replaces
+its workers, waitress drains and restarts the process).
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SERVER_ENGINES = ('auto', 'waitress', 'gunicorn', 'werkzeug')
+
+DEFAULT_SETTINGS = {
+    'engine': 'auto',
+    'host': '0.0.0.0',
+    'port': 5000,
+    # gunicorn worker processes; every worker runs its own encoder pool, so keep this small
+    'processes': 2,
+    'threads': 8,
+    # Encoder processes of each worker's pool (0 = the CPU cores divided among the workers)
+    'encoders': 0,
+    # Seconds an idle keep-alive connection stays open
+    'keepalive': 5,
+    # Seconds a request may take (gunicorn kills the worker) / a connection may stay inactive (waitress)
+    'request_timeout': 120,
+    # Seconds in-flight requests get to finish on shutdown or reload
+    'graceful_timeout': 30,
+    # Restart a gunicorn worker after this many requests (0 = never)
+    'max_requests': 0
+}
+
+# Environment variable of every setting
+SETTING_ENVIRONMENT = {
+    'engine': 'SERVER_ENGINE',
+    'host': 'BACKEND_HOST',
+    'port': 'BACKEND_PORT',
+    'processes': 'WEB_PROCESSES',
+    'threads': 'WEB_THREADS',
+    'encoders': 'ENCODER_WORKERS',
+    'keepalive': 'KEEPALIVE',
+    'request_timeout': 'REQUEST_TIMEOUT',
+    'graceful_timeout': 'GRACEFUL_TIMEOUT',
+    'max_requests': 'MAX_REQUESTS'
+}
+
+
+def _module_available(name: str) -> bool:
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def load_settings(argv: Optional[List[str]] = None) -> Dict:
+    """
+    Read the server settings from the command line and the environment.
+
+    Raises:
+        ValueError: For malformed or out-of-range settings
+    """
+    parser = argparse.ArgumentParser(description='Ringtone Creator backend server')
+    parser.add_argument('--engine', choices=SERVER_ENGINES)
+    parser.add_argument('--host')
+    for name in ('port', 'processes', 'threads', 'encoders', 'keepalive', 'request_timeout', 'graceful_timeout', 'max_requests'):
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int)
+    args = vars(parser.parse_args(argv))
+
+    settings = {}
+    for name, default in DEFAULT_SETTINGS.items():
+        value = args.get(name)
+        if value is None:
+            value = os.environ.get(SETTING_ENVIRONMENT[name], default)
+        if isinstance(default, int):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{SETTING_ENVIRONMENT[name]} must be an integer")
+        settings[name] = value
+
+    if settings['engine'] not in SERVER_ENGINES:
+        raise ValueError(f"SERVER_ENGINE must be one of: {', '.join(SERVER_ENGINES)}")
+    if not 0 < settings['port'] < 65536:
+        raise ValueError("BACKEND_PORT must be between 1 and 65535")
+    for name in ('processes', 'threads', 'request_timeout'):
+        if settings[name] < 1:
+            raise ValueError(f"{SETTING_ENVIRONMENT[name]} must be at least 1")
+    for name in ('encoders', 'keepalive', 'graceful_timeout', 'max_requests'):
+        if settings[name] < 0:
+            raise ValueError(f"{SETTING_ENVIRONMENT[name]} must not be negative")
+
+    if settings['engine'] == 'auto':
+        if os.name != 'nt' and _module_available('gunicorn'):
+            settings['engine'] = 'gunicorn'
+        elif _module_available('waitress'):
+            settings['engine'] = 'waitress'
+        else:
+            logger.warning("⚠️ Neither waitress nor gunicorn is installed - using the development server "
+                           "(pip install waitress)")
+            settings['engine'] = 'werkzeug'
+    return settings
+
+
+def encoder_workers(settings: Dict) -> int:
+    """Size of the encoder pool of each server process: ENCODER_WORKERS, or the CPU cores shared by the processes."""
+    if settings['encoders']:
+        return settings['encoders']
+    processes = settings['processes'] if settings['engine'] == 'gunicorn' else 1
+    return max(1, (os.cpu_count() or 1) // processes)
+
+
+def run_waitress(settings: Dict) -> bool:
+    """
+    Serve with waitress until a stop or reload signal.
+
+    Returns:
+        bool: True if the process should be restarted (SIGHUP)
+    """
+    from waitress import create_server
+    from waitress.channel import HTTPChannel
+    import server
+
+    app = server.create_app()
+    wsgi_server = create_server(
+        app, host=settings['host'], port=settings['port'], threads=settings['threads'],
+        channel_timeout=settings['request_timeout'], backlog=1024, ident='ringtone-backend',
+        max_request_body_size=app.config['MAX_CONTENT_LENGTH']
+    )
+    channels = wsgi_server._map
+    stop = {'requested': None}
+
+    def request_stop(signum, frame):
+        if stop['requested'] is not None:
+            return
+        stop['requested'] = signum
+        # Wake the event loop so it notices at once
+        wsgi_server.pull_trigger()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, request_stop)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, request_stop)
+
+    logger.info(f"🚀 waitress serving on http://{settings['host']}:{settings['port']} "
+                f"({settings['threads']} threads)")
+    deadline = None
+    while True:
+        wsgi_server.asyncore.loop(timeout=1.0, map=channels, count=1)
+        if stop['requested'] is None:
+            continue
+        if deadline is None:
+            # Stop accepting, and close keep-alive connections as soon as they are idle
+            deadline = time.monotonic() + settings['graceful_timeout']
+            wsgi_server.accepting = False
+            logger.info(f"🛑 Draining in-flight requests (up to {settings['graceful_timeout']} s)")
+        busy = [channel for channel in list(channels.values()) if isinstance(channel, HTTPChannel)
+                and (channel.requests or channel.total_outbufs_len)]
+        for channel in list(channels.values()):
+            if isinstance(channel, HTTPChannel) and channel not in busy:
+                channel.will_close = True
+        if not busy or time.monotonic() >= deadline:
+            if busy:
+                logger.warning(f"⚠️ {len(busy)} requests still running at the graceful timeout")
+            break
+
+    wsgi_server.task_dispatcher.shutdown(timeout=1)
+    wsgi_server.asyncore.close_all(channels)
+    server.shutdown_app()
+    return stop['requested'] == getattr(signal, 'SIGHUP', None)
+
+
+def run_gunicorn(settings: Dict) -> None:
+    """Serve with a gunicorn master and settings['processes'] workers, each building its own app."""
+    from gunicorn.app.base import BaseApplication
+
+    def worker_exit(arbiter, worker):
+        import server
+        server.shutdown_app()
+
+    class RingtoneApplication(BaseApplication):
+        def load_config(self):
+            config = {
+                'bind': f"{settings['host']}:{settings['port']}",
+                'workers': settings['processes'],
+                'threads': settings['threads'],
+                # gthread keeps connections alive and serves them from a thread pool
+                'worker_class': 'gthread' if settings['threads'] > 1 else 'sync',
+                'keepalive': settings['keepalive'],
+                'timeout': settings['request_timeout'],
+                'graceful_timeout': settings['graceful_timeout'],
+                'max_requests': settings['max_requests'],
+                'max_requests_jitter': settings['max_requests'] // 10,
+                # Never build the app in the master: every worker calls the factory after the fork
+                'preload_app': False,
+                'reload': False,
+                'worker_exit': worker_exit
+            }
+            for key, value in config.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import server
+            return server.create_app()
+
+    logger.info(f"🚀 gunicorn serving on http://{settings['host']}:{settings['port']} "
+                f"({settings['processes']} workers x {settings['threads']} threads, "
+                f"{encoder_workers(settings)} encoders each)")
+    RingtoneApplication().run()
+
+
+def run_werkzeug(settings: Dict) -> None:
+    """Serve with the Werkzeug development server: threaded, no reloader, no debugger."""
+    import server
+
+    app = server.create_app()
+    logger.warning("⚠️ Using the Werkzeug development server - not for production")
+    try:
+        app.run(host=settings['host'], port=settings['port'], debug=False, use_reloader=False, threaded=True)
+    finally:
+        server.shutdown_app()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Start the configured server; returns the process exit code."""
+    try:
+        settings = load_settings(argv)
+    except ValueError as e:
+        logger.error(f"Invalid server settings: {e}")
+        return 2
+
+    logger.info(f"Server settings: {settings}")
+    # Read by every app's encoder pool; gunicorn workers inherit it when they fork
+    os.environ['ENCODER_WORKERS'] = str(encoder_workers(settings))
+    if settings['engine'] == 'gunicorn':
+        if os.name == 'nt':
+            logger.error("gunicorn does not run on Windows - use SERVER_ENGINE=waitress")
+            return 2
+        run_gunicorn(settings)
+    elif settings['engine'] == 'waitress':
+        if run_waitress(settings):
+            logger.info("🔄 Reloading")
+            sys.stdout.flush()
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+    else:
+        run_werkzeug(settings)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# Rules applied
+"""
+Test script for the server-side alarm scheduler
+Checks next fire times, firing precision, changes from another process, leader election and restart catch-up
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from alarmSchedulerService import AlarmSchedulerService
+from scheduleStoreService import ScheduleStoreService, next_fire_time
+
+ALL_DAYS = [0, 1, 2, 3, 4, 5, 6]
+
+
+class FakePlayer:
+    """Records when each ringtone was played instead of playing it"""
+
+    def __init__(self):
+        self.played = []
+        self.event = threading.Event()
+
+    def __call__(self, ringtone_path):
+        self.played.append((ringtone_path, time.time()))
+        self.event.set()
+        return True
+
+
+def set_alarm(store, daemon, alarm_id, ringtone, time_of_day, active=True):
+    """Store a server alarm and wake the daemon, as the API does"""
+    store.create({'id': alarm_id, 'ringtone_id': 'ring', 'ringtone_name': 'ring.wav', 'ringtone_path': ringtone,
+                  'time': time_of_day, 'days': ALL_DAYS, 'source': 'server', 'active': active})
+    daemon.notify()
+    return store.get(alarm_id)
+
+
+def clock_in(seconds):
+    """HH:MM:SS of a moment a few seconds from now"""
+    return (datetime.now() + timedelta(seconds=seconds)).strftime('%H:%M:%S')
+
+
+def test_alarm_scheduler():
+    """Test next_fire_time and the alarm daemon"""
+    print("🧪 Testing Alarm Scheduler Service")
+    print("=" * 50)
+
+    # Test 1: next occurrence on the right weekday (2024-01-01 was a Monday)
+    print("Test 1: Next fire time")
+    monday_noon = datetime(2024, 1, 1, 12, 0).timestamp()
+    assert datetime.fromtimestamp(next_fire_time('07:00', [1], monday_noon)) == datetime(2024, 1, 8, 7, 0)
+    assert datetime.fromtimestamp(next_fire_time('13:30', [1], monday_noon)) == datetime(2024, 1, 1, 13, 30)
+    assert datetime.fromtimestamp(next_fire_time('07:00', [0, 3], monday_noon)) == datetime(2024, 1, 3, 7, 0)
+    assert next_fire_time('12:00', [1], monday_noon) > monday_noon
+    for bad_time, bad_days in (('7:00', [1]), ('24:00', [1]), ('07:00', []), ('07:00', [7])):
+        try:
+            next_fire_time(bad_time, bad_days, monday_noon)
+            assert False, f"{bad_time} {bad_days} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Weekday, same-day and invalid input handling")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'alarms.db')
+        lock_path = os.path.join(temp_dir, 'alarms.lock')
+        ringtone = os.path.join(temp_dir, 'ring.wav')
+        with open(ringtone, 'wb') as f:
+            f.write(b'RIFF')
+
+        # Test 2: an alarm rings on time
+        print("\nTest 2: Firing precision")
+        store = ScheduleStoreService(db_path)
+        player = FakePlayer()
+        daemon = AlarmSchedulerService(store, lock_path, player=player)
+        daemon.start()
+        fire_time = clock_in(2)
+        alarm = set_alarm(store, daemon, 'alarm_1', ringtone, fire_time)
+        assert player.event.wait(5), "the alarm did not ring"
+        lateness_ms = (player.played[0][1] - alarm['next_fire_at']) * 1000
+        assert 0 <= lateness_ms < 100, lateness_ms
+        stats = daemon.stats()
+        assert stats['leader'] and stats['fired'] == 1
+        assert store.get('alarm_1')['last_fired_at'] == alarm['next_fire_at']
+        print(f"✅ Rang {lateness_ms:.1f} ms after {fire_time}")
+
+        # Test 3: a second process stands by and its changes reach the firing process
+        print("\nTest 3: Changes from another process")
+        other_store = ScheduleStoreService(db_path)
+        standby = AlarmSchedulerService(other_store, lock_path, player=FakePlayer())
+        standby.start()
+        time.sleep(0.2)
+        assert not standby.stats()['leader']
+        player.event.clear()
+        set_alarm(other_store, standby, 'alarm_2', ringtone, clock_in(2))
+        assert player.event.wait(5) and player.played[-1][0] == ringtone
+        assert not standby.player.played
+        print("✅ Alarm set through the standby process rang once, in the firing process")
+
+        # Other services share the database; only schedule edits make the firing process reload
+        loads = []
+        load = daemon._load
+        daemon._load = lambda: (loads.append(time.time()), load())
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS other_service (value TEXT)")
+            conn.execute("INSERT INTO other_service VALUES ('x')")
+        conn.close()
+        daemon.notify()
+        time.sleep(0.3)
+        assert not loads, "a write to another table reloaded the alarms"
+        other_store.update('alarm_2', {'time': clock_in(120)})
+        daemon.notify()
+        time.sleep(0.3)
+        assert len(loads) == 1
+        print("✅ Writes to other tables leave the alarms alone, schedule edits reload them")
+
+        # Test 4: removed and inactive alarms do not ring
+        print("\nTest 4: Remove and deactivate")
+        player.event.clear()
+        set_alarm(store, daemon, 'alarm_3', ringtone, clock_in(1))
+        set_alarm(store, daemon, 'alarm_4', ringtone, clock_in(1), active=False)
+        assert store.delete('alarm_3') and not store.delete('alarm_3')
+        daemon.notify()
+        assert not player.event.wait(2.5)
+        assert store.get('alarm_4')['next_fire_at'] is None
+        print("✅ Nothing rang")
+
+        # Test 5: an alarm that came due while the server was down rings after the restart
+        print("\nTest 5: Restart catch-up")
+        daemon.stop()
+        standby.stop()
+        store.create({'id': 'alarm_5', 'ringtone_id': 'ring', 'ringtone_name': 'ring.wav', 'ringtone_path': ringtone,
+                      'time': clock_in(1), 'days': ALL_DAYS, 'source': 'server'})
+        time.sleep(2)
+        player = FakePlayer()
+        daemon = AlarmSchedulerService(ScheduleStoreService(db_path), lock_path, player=player)
+        daemon.start()
+        assert player.event.wait(3), "the missed alarm did not ring after the restart"
+        assert len(player.played) == 1
+        daemon.stop()
+        print("✅ Missed alarm rang once after the restart")
+
+    print("\n🎉 All alarm scheduler tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_alarm_scheduler()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,83 @@
+# Rules applied
+"""
+Test script for batch cuts
+Slices several segments from one shared decode and encodes them concurrently
+"""
+
+import sys
+import os
+import tempfile
+import wave
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from batchCutService import BatchCutService
+from streamingTranscoder import find_ffmpeg
+from encoderProfileService import DEFAULT_ENCODER_PROFILES, validate_profile
+
+WAV_PROFILE = validate_profile('wav', DEFAULT_ENCODER_PROFILES['wav'])
+MP3_PROFILE = validate_profile('mp3_64', dict(DEFAULT_ENCODER_PROFILES['mp3_128'], bitrate='64k'))
+
+
+def write_ramp_wav(path, seconds, rate=8000):
+    """Write a mono 16-bit WAV whose samples count up, so slices can be checked exactly"""
+    frames = b''.join((i % 30000).to_bytes(2, 'little') for i in range(int(seconds * rate)))
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(frames)
+    return frames
+
+
+def test_batch_cut():
+    """Test sample-exact WAV slices, out-of-range cuts and parallel MP3 encodes"""
+    print("🧪 Testing Batch Cut Service")
+    print("=" * 50)
+
+    service = BatchCutService(max_workers=4)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'source.wav')
+        frames = write_ramp_wav(source_path, 3)
+
+        # Test 1: WAV slices of a PCM source are sample exact
+        print("Test 1: WAV slices")
+        segments = [
+            {'start': start, 'end': end, 'outputs': [('wav', os.path.join(temp_dir, f'cut{i}.wav'), WAV_PROFILE)]}
+            for i, (start, end) in enumerate([(0, 1), (0.5, 2.25), (2.5, 10)])
+        ]
+        result = service.cut_many(source_path, segments)
+        for (start, end), segment in zip([(0, 1), (0.5, 2.25), (2.5, 3)], result['segments']):
+            with wave.open(segment['outputs']['wav']['output_path'], 'rb') as wav_file:
+                assert wav_file.readframes(wav_file.getnframes()) == frames[int(start * 8000) * 2:int(end * 8000) * 2]
+        print(f"✅ 3 slices match the source (decode {result['decode_ms']} ms, wall {result['wall_ms']} ms)")
+
+        # Test 2: a cut past the end of the source is reported, not encoded
+        print("\nTest 2: Cut past the end")
+        result = service.cut_many(source_path, [{'start': 5, 'end': 6, 'outputs': [('wav', os.path.join(temp_dir, 'late.wav'), WAV_PROFILE)]}])
+        assert 'error' in result['segments'][0] and not os.path.exists(os.path.join(temp_dir, 'late.wav'))
+        print(f"✅ {result['segments'][0]['error']}")
+
+        # Test 3: MP3 outputs are encoded from the shared PCM through ffmpeg
+        print("\nTest 3: MP3 outputs")
+        if find_ffmpeg():
+            segments = [
+                {'start': i * 0.5, 'end': i * 0.5 + 1, 'outputs': [('mp3', os.path.join(temp_dir, f'cut{i}.mp3'), MP3_PROFILE)]}
+                for i in range(4)
+            ]
+            result = service.cut_many(source_path, segments)
+            for segment in result['segments']:
+                assert segment['outputs']['mp3']['size'] > 0, segment
+            print(f"✅ 4 MP3 cuts in {result['wall_ms']} ms")
+        else:
+            print("⚠️ ffmpeg not found - skipped")
+
+    print("\n🎉 All batch cut tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_batch_cut()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+# Rules applied
+"""
+Test script for the content-addressed blob store
+Checks dedup of identical files, reference counting, collection of the last reference and GC
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+import blobStoreService
+from blobStoreService import BlobStoreService
+
+
+def write_file(folder, name, data):
+    """Write a named file and return its path and SHA-256"""
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def test_blob_store():
+    """Test ingest, materialize, release, adopt and gc"""
+    print("🧪 Testing Blob Store Service")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        originals = os.path.join(temp_dir, 'original_sound')
+        ringtones = os.path.join(temp_dir, 'wav_ringtones')
+        os.makedirs(originals)
+        os.makedirs(ringtones)
+        store = BlobStoreService(os.path.join(temp_dir, 'blobs'), os.path.join(temp_dir, 'blobs.db'),
+                                 {'original_sound': originals, 'wav_ringtones': ringtones})
+        data = os.urandom(50000)
+
+        # Test 1: the second identical file becomes a link of the first one's blob
+        print("Test 1: Dedup")
+        path_a, sha256 = write_file(originals, 'a.wav', data)
+        first = store.ingest(path_a, 'original_sound', 'a.wav', sha256)
+        path_b, _ = write_file(ringtones, 'b.wav', data)
+        second = store.ingest(path_b, 'wav_ringtones', 'b.wav', sha256)
+        assert not first['dedup'] and second['dedup'] and second['refcount'] == 2
+        assert os.path.samefile(path_a, path_b) and os.path.samefile(path_a, store.blob_path(sha256))
+        stats = store.stats()
+        assert stats['blobs'] == 1 and stats['stored_bytes'] == len(data) and stats['referenced_bytes'] == 2 * len(data)
+        print(f"✅ Two names, one blob ({second['method']})")
+
+        # Test 2: a name created from a stored blob needs no transfer
+        print("\nTest 2: Materialize")
+        assert store.has(sha256) and not store.has('0' * 64)
+        third = store.materialize(sha256, 'original_sound', 'c.wav')
+        assert third['dedup'] and third['refcount'] == 3
+        assert store.materialize('0' * 64, 'original_sound', 'd.wav') is None
+        print("✅ c.wav linked from the blob")
+
+        # Test 3: the blob is deleted with its last reference
+        print("\nTest 3: Release")
+        for folder, name in (('original_sound', 'a.wav'), ('wav_ringtones', 'b.wav')):
+            os.remove(os.path.join(store.folders[folder], name))
+            assert store.release(folder, name)
+        assert store.has(sha256)
+        os.remove(os.path.join(originals, 'c.wav'))
+        store.release('original_sound', 'c.wav')
+        assert not store.has(sha256) and not os.path.exists(store.blob_path(sha256))
+        assert not store.release('original_sound', 'c.wav')
+        print("✅ Blob collected after the last release")
+
+        # Test 4: replacing a name moves its reference to the new content
+        print("\nTest 4: Replace")
+        path, old_sha = write_file(originals, 'e.wav', b'old content')
+        store.ingest(path, 'original_sound', 'e.wav', old_sha)
+        os.remove(path)
+        path, new_sha = write_file(originals, 'e.wav', b'new content')
+        store.ingest(path, 'original_sound', 'e.wav', new_sha)
+        assert not store.has(old_sha) and store.has(new_sha) and store.lookup('original_sound', 'e.wav') == new_sha
+        print("✅ Old content collected, name points at the new content")
+
+        # Test 5: adopt unmanaged files, then gc drops references of files deleted behind the store's back
+        print("\nTest 5: Adopt and GC")
+        write_file(originals, 'f.wav', data)
+        write_file(originals, 'notes.txt', b'not audio')
+        assert store.adopt('original_sound', lambda path: hashlib.sha256(open(path, 'rb').read()).hexdigest()) == 1
+        os.remove(os.path.join(originals, 'f.wav'))
+        os.makedirs(os.path.join(store.blob_dir, 'ff'), exist_ok=True)
+        orphan_path, _ = write_file(os.path.join(store.blob_dir, 'ff'), 'f' * 64, b'orphan')
+        result = store.gc()
+        assert result == {'dropped_refs': 1, 'collected_blobs': 1, 'orphan_files': 0}, result
+        assert store.stats()['blobs'] == 1
+        assert os.path.exists(orphan_path), "a fresh unknown blob may be another worker's ingest"
+        print(f"✅ GC: {result} (fresh orphan kept)")
+        blobStoreService.ORPHAN_GRACE_SECONDS = -60
+        result = store.gc()
+        assert result == {'dropped_refs': 0, 'collected_blobs': 0, 'orphan_files': 1}, result
+        assert not os.path.exists(orphan_path)
+        print(f"✅ GC after the grace period: {result}")
+
+    print("\n🎉 All blob store tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_blob_store()
+    sys.exit(0 if success else 1)
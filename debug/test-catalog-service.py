@@ -0,0 +1,153 @@
+# Rules applied
+"""
+Test script for the SQLite ringtone catalog
+Indexes a temporary folder layout, then checks incremental updates, reconcile, cursor pages,
+generations, the changes feed and the listing ETag
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from catalogService import RingtoneCatalogService
+from contentHashService import ContentHashService
+
+
+def write_file(path, content=b'RIFF0000WAVE'):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def test_catalog_service():
+    """Test indexing, listing and reconciling the catalog"""
+    print("🧪 Testing Ringtone Catalog Service")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wav_folder = os.path.join(temp_dir, 'wav_ringtones')
+        mp3_folder = os.path.join(temp_dir, 'mp3_ringtones')
+        os.makedirs(wav_folder)
+        os.makedirs(mp3_folder)
+
+        db_path = os.path.join(temp_dir, 'catalog.db')
+        catalog = RingtoneCatalogService(db_path, {
+            'wav_ringtones': (wav_folder, ('.wav',)),
+            'mp3_ringtones': (mp3_folder, ('.mp3',))
+        }, ContentHashService(db_path), rendition_folders=['wav_ringtones', 'mp3_ringtones'])
+
+        # Test 1: index a file with a sidecar
+        print("Test 1: Index a file with metadata")
+        write_file(os.path.join(wav_folder, 'a.wav'))
+        with open(os.path.join(wav_folder, 'a.json'), 'w') as f:
+            json.dump({'id': 'abc', 'original_name': 'Song', 'start_time': 1.0, 'end_time': 5.0, 'duration': 4.0}, f)
+        entry = catalog.index_file('wav_ringtones', 'a.wav')
+        assert entry['id'] == 'abc' and entry['has_metadata'], entry
+        print("✅ Indexed with metadata")
+
+        # Test 2: files dropped in behind the catalog's back are picked up by reconcile
+        print("\nTest 2: Reconcile picks up external changes")
+        write_file(os.path.join(mp3_folder, 'b.mp3'))
+        os.remove(os.path.join(wav_folder, 'a.wav'))
+        stats = catalog.reconcile()
+        assert stats['added'] == 1 and stats['removed'] == 1, stats
+        names = [entry['name'] for entry in catalog.list_entries(['wav_ringtones', 'mp3_ringtones'])]
+        assert names == ['b.mp3'], names
+        print(f"✅ Reconcile stats: {stats}")
+
+        # Test 3: a second reconcile is a no-op
+        print("\nTest 3: Unchanged files are skipped")
+        stats = catalog.reconcile()
+        assert stats['unchanged'] == 1 and stats['added'] == 0, stats
+        print(f"✅ Reconcile stats: {stats}")
+
+        # Test 4: IDs without a sidecar are derived from content and shared by renditions
+        print("\nTest 4: Stable content-derived IDs")
+        mp3_id = catalog.get_entry('mp3_ringtones', 'b.mp3')['id']
+        assert mp3_id == catalog.index_file('mp3_ringtones', 'b.mp3')['id'], "ID changed between requests"
+        write_file(os.path.join(wav_folder, 'b.wav'), b'RIFF1111WAVE')
+        wav_id = catalog.index_file('wav_ringtones', 'b.wav')['id']
+        assert catalog.get_entry('mp3_ringtones', 'b.mp3')['id'] == wav_id != mp3_id
+        print(f"✅ WAV and MP3 renditions share ID {wav_id}")
+
+        # Test 5: cursor pages cover every entry once, also when many entries tie on the sort key
+        print("\nTest 5: Cursor pagination, sorting and filters")
+        for i in range(25):
+            write_file(os.path.join(wav_folder, f"tie_{i:02d}.wav"), f"RIFF{i:04d}WAVE".encode())
+            with open(os.path.join(wav_folder, f"tie_{i:02d}.json"), 'w') as f:
+                json.dump({'id': f"tie{i}", 'original_name': f"Tie {i:02d}", 'duration': 10.0 if i % 5 else 30.0}, f)
+        catalog.reconcile()
+        folders = ['wav_ringtones', 'mp3_ringtones']
+        for sort, order in (('duration', 'asc'), ('duration', 'desc'), ('original_name', 'asc'), ('created', 'desc')):
+            seen, cursor = [], None
+            while True:
+                page, cursor = catalog.query_entries(folders, sort=sort, order=order, limit=4, cursor=cursor)
+                seen.extend(page)
+                if cursor is None:
+                    break
+            assert len(seen) == len({(e['folder'], e['name']) for e in seen}) == 27, (sort, order, len(seen))
+            assert seen == catalog.query_entries(folders, sort=sort, order=order)[0], (sort, order)
+        durations = [e.get('duration', -1) for e in catalog.query_entries(folders, sort='duration', order='asc')[0]]
+        assert durations == sorted(durations) and durations.count(10.0) == 20
+        only_long, _ = catalog.query_entries(folders, min_duration=20, formats=['wav'], has_metadata=True)
+        assert sorted(e['name'] for e in only_long) == [f"tie_{i:02d}.wav" for i in range(0, 25, 5)]
+        assert [e['name'] for e in catalog.query_entries(folders, name_prefix='tie 1')[0]] != []
+        try:
+            catalog.query_entries(folders, cursor='not-a-cursor')
+            assert False, "an invalid cursor should be rejected"
+        except ValueError:
+            pass
+        print("✅ 27 entries in pages of 4 for 4 sort orders, with 20 tied durations; filters applied")
+
+        # Test 6: every change bumps the generation and the changes feed carries removals as tombstones
+        print("\nTest 6: Generations and the changes feed")
+        start = catalog.generation()
+        write_file(os.path.join(mp3_folder, 'c.mp3'), b'ID3c')
+        catalog.index_file('mp3_ringtones', 'c.mp3')
+        after_add = catalog.generation()
+        assert after_add > start
+        assert catalog.index_file('mp3_ringtones', 'c.mp3') and catalog.generation() == after_add, "no-op bumped"
+        os.remove(os.path.join(mp3_folder, 'c.mp3'))
+        assert catalog.remove_file('mp3_ringtones', 'c.mp3')
+        after_delete = catalog.generation()
+        assert after_delete > after_add
+        changes = catalog.changes_since(folders, start)
+        assert changes['generation'] == after_delete and not changes['reset']
+        assert 'c.mp3' not in [e['name'] for e in changes['added']]
+        assert [r['name'] for r in changes['removed']] == ['c.mp3']
+        assert [e['name'] for e in catalog.changes_since(folders, start)['added']] == []
+        changes = catalog.changes_since(folders, after_delete)
+        assert changes['added'] == [] and changes['removed'] == []
+        print(f"✅ Generation {start} → {after_add} (upsert) → {after_delete} (delete), tombstone for c.mp3")
+
+        # Test 7: listings answer a matching If-None-Match with 304 until the catalog changes
+        print("\nTest 7: ETag and 304")
+        import server
+        server.create_app()
+        server.catalog_service = catalog
+        client = server.app.test_client()
+        response = client.get('/api/ringtones?limit=5')
+        etag = response.headers['ETag']
+        assert response.status_code == 200 and response.get_json()['generation'] == after_delete
+        assert client.get('/api/ringtones?limit=5', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get('/api/ringtones?limit=6', headers={'If-None-Match': etag}).status_code == 200
+        write_file(os.path.join(mp3_folder, 'd.mp3'), b'ID3d')
+        catalog.index_file('mp3_ringtones', 'd.mp3')
+        response = client.get('/api/ringtones?limit=5', headers={'If-None-Match': etag})
+        assert response.status_code == 200 and response.headers['ETag'] != etag
+        feed = client.get(f'/api/ringtones/changes?since={after_add}').get_json()
+        assert [e['name'] for e in feed['added']] == ['d.mp3'] and [r['name'] for r in feed['removed']] == ['c.mp3']
+        server.shutdown_app()
+        print("✅ 304 for the same query and generation, 200 with a new ETag after a change")
+
+    print("\n🎉 All catalog tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_catalog_service()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,140 @@
+# Rules applied
+"""
+Test script for the catalog watcher
+Creates and deletes files in watched folders, then checks queue overflow, a failing
+reconcile and a folder that is deleted and recreated while the watcher runs
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+import catalogWatcher
+from catalogService import RingtoneCatalogService
+from catalogWatcher import CatalogWatcher
+from contentHashService import ContentHashService
+
+
+def write_file(path, content=b'RIFF0000WAVE'):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll condition() until it is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_catalog_watcher():
+    """Test that the watcher follows folder changes and survives errors"""
+    print("🧪 Testing Catalog Watcher")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wav_folder = os.path.join(temp_dir, 'wav_ringtones')
+        mp3_folder = os.path.join(temp_dir, 'mp3_ringtones')
+        os.makedirs(wav_folder)
+        os.makedirs(mp3_folder)
+
+        db_path = os.path.join(temp_dir, 'catalog.db')
+        catalog = RingtoneCatalogService(db_path, {
+            'wav_ringtones': (wav_folder, ('.wav',)),
+            'mp3_ringtones': (mp3_folder, ('.mp3',))
+        }, ContentHashService(db_path), rendition_folders=['wav_ringtones', 'mp3_ringtones'])
+        catalog.reconcile()
+
+        # Count reconciles and fail the first one on demand
+        reconcile_calls = []
+        fail_next = []
+        original_reconcile = catalog.reconcile
+
+        def reconcile():
+            reconcile_calls.append(time.monotonic())
+            if fail_next:
+                fail_next.pop()
+                raise RuntimeError('database is locked')
+            return original_reconcile()
+
+        catalog.reconcile = reconcile
+
+        watcher = CatalogWatcher(catalog)
+        watcher.start()
+        try:
+            print(f"Backend: {watcher.backend}")
+
+            # Test 1: a new file shows up
+            print("\nTest 1: Created file is indexed")
+            write_file(os.path.join(wav_folder, 'a.wav'))
+            assert wait_for(lambda: catalog.get_entry('wav_ringtones', 'a.wav')), "a.wav not indexed"
+            print("✅ a.wav indexed")
+
+            # Test 2: a deleted file disappears
+            print("\nTest 2: Deleted file is removed")
+            os.remove(os.path.join(wav_folder, 'a.wav'))
+            assert wait_for(lambda: catalog.get_entry('wav_ringtones', 'a.wav') is None), "a.wav still indexed"
+            print("✅ a.wav removed")
+
+            if watcher.backend != 'inotify':
+                print("\n⚠️ inotify not available, skipping overflow and re-watch tests")
+                return
+
+            # Test 3: a queue overflow schedules a full reconcile
+            print("\nTest 3: Queue overflow triggers a reconcile")
+            original_read = watcher._inotify.read_events
+            overflow = [(-1, catalogWatcher.IN_Q_OVERFLOW, '')]
+
+            def read_events():
+                while overflow:
+                    yield overflow.pop()
+                yield from original_read()
+
+            watcher._inotify.read_events = read_events
+            calls_before = len(reconcile_calls)
+            write_file(os.path.join(mp3_folder, 'b.mp3'))
+            assert wait_for(lambda: len(reconcile_calls) > calls_before), "no reconcile after overflow"
+            assert wait_for(lambda: catalog.get_entry('mp3_ringtones', 'b.mp3')), "b.mp3 not indexed"
+            print("✅ Overflow reconciled the catalog")
+
+            # Test 4: a failing reconcile is retried and the watcher keeps running
+            print("\nTest 4: Failing reconcile does not stop the watcher")
+            fail_next.append(True)
+            overflow.append((-1, catalogWatcher.IN_Q_OVERFLOW, ''))
+            calls_before = len(reconcile_calls)
+            write_file(os.path.join(mp3_folder, 'c.mp3'))
+            assert wait_for(lambda: len(reconcile_calls) >= calls_before + 2), "reconcile not retried"
+            assert watcher._thread.is_alive(), "watcher thread died"
+            assert wait_for(lambda: catalog.get_entry('mp3_ringtones', 'c.mp3')), "c.mp3 not indexed"
+            write_file(os.path.join(mp3_folder, 'd.mp3'))
+            assert wait_for(lambda: catalog.get_entry('mp3_ringtones', 'd.mp3')), "d.mp3 not indexed"
+            print("✅ Watcher retried and kept indexing")
+
+            # Test 5: a deleted and recreated folder is watched again
+            print("\nTest 5: Recreated folder is watched again")
+            shutil.rmtree(mp3_folder)
+            assert wait_for(lambda: catalog.get_entry('mp3_ringtones', 'b.mp3') is None), "deleted folder still listed"
+            os.makedirs(mp3_folder)
+            assert wait_for(lambda: 'mp3_ringtones' in watcher._watches.values()), "folder not watched again"
+            write_file(os.path.join(mp3_folder, 'e.mp3'))
+            assert wait_for(lambda: catalog.get_entry('mp3_ringtones', 'e.mp3')), "e.mp3 not indexed"
+            print("✅ Recreated folder re-watched")
+
+            assert watcher._thread.is_alive(), "watcher thread died"
+        finally:
+            watcher.stop()
+
+    print("\n🎉 Catalog watcher tests completed!")
+
+
+if __name__ == "__main__":
+    test_catalog_watcher()
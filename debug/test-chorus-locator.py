@@ -0,0 +1,101 @@
+# Rules applied
+"""
+Test script for the chorus/hook locator
+Builds a song with a repeated loud chorus and checks that it is ranked first
+"""
+
+import sys
+import os
+import time
+import wave
+import tempfile
+
+import numpy as np
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from chorusLocatorService import ChorusLocatorService
+
+SAMPLE_RATE = 22050
+
+
+def melody(frequencies, amplitude, note_seconds=0.5):
+    """Render a sequence of decaying harmonic notes"""
+    t = np.arange(int(SAMPLE_RATE * note_seconds)) / SAMPLE_RATE
+    notes = [amplitude * np.exp(-2 * t) * sum(np.sin(2 * np.pi * f * h * t) / h for h in (1, 2, 3))
+             for f in frequencies]
+    return np.concatenate(notes)
+
+
+def create_song(path):
+    """Write verse/chorus/verse/chorus/bridge/chorus; returns the chorus start times"""
+    verse = melody([220, 247, 262, 294, 330, 294, 262, 247] * 5, 0.2)      # 20 s
+    chorus = melody([392, 440, 494, 523, 587, 523, 494, 440] * 3, 0.6)    # 12 s
+    bridge = melody([175, 196, 208, 233] * 5, 0.25)                        # 10 s
+    sections = [verse, chorus, verse, chorus, bridge, chorus]
+    starts = np.cumsum([0] + [len(section) / SAMPLE_RATE for section in sections])
+    song = np.concatenate(sections)
+    samples = (song / np.abs(song).max() * 20000).astype('<i2')
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+    return [starts[1], starts[3], starts[5]]
+
+
+def test_chorus_locator():
+    """Test candidate ranking, caching and validation"""
+    print("🧪 Testing Chorus Locator Service")
+    print("=" * 50)
+
+    service = ChorusLocatorService()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'song.wav')
+        chorus_starts = create_song(source_path)
+
+        # Test 1: the best candidates are the choruses
+        print("Test 1: Ranking")
+        started = time.perf_counter()
+        result = service.locate(source_path, 'a' * 64, length=12, count=3)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for candidate in result['candidates']:
+            print(f"   {candidate['start']}s-{candidate['end']}s score {candidate['score']} "
+                  f"(repeats at {candidate['repeats_at']}s)")
+        for candidate in result['candidates']:
+            assert min(abs(candidate['start'] - start) for start in chorus_starts) < 1.0, candidate
+            assert abs(candidate['end'] - candidate['start'] - 12) < 0.01
+        print(f"✅ All {len(result['candidates'])} candidates are choruses ({elapsed_ms:.0f} ms)")
+
+        # Test 2: results are cached per source content and length
+        print("\nTest 2: Cache")
+        assert not result['cached']
+        assert service.locate(source_path, 'a' * 64, length=12, count=3)['cached']
+        other = service.locate(source_path, 'a' * 64, length=8, count=2)
+        assert not other['cached'] and len(other['candidates']) == 2
+        print("✅ Repeat request served from the cache")
+
+        # Test 3: a ringtone longer than the song is the whole song
+        print("\nTest 3: Long ringtone")
+        whole = service.locate(source_path, 'a' * 64, length=500, count=3)['candidates']
+        assert len(whole) == 1 and whole[0]['start'] == 0
+        print(f"✅ {whole[0]['start']}s-{whole[0]['end']}s")
+
+        # Test 4: validation
+        print("\nTest 4: Validation")
+        for kwargs in ({'length': 0}, {'count': 0}, {'count': 11}):
+            try:
+                service.locate(source_path, 'a' * 64, **kwargs)
+                assert False, f"{kwargs} should be rejected"
+            except ValueError as e:
+                print(f"✅ Rejected {kwargs}: {e}")
+
+    print("\n🎉 All chorus locator tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_chorus_locator()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,140 @@
+# Rules applied
+"""
+Test script for the encoder worker pool
+Encodes through long-lived workers, restarts a crashed worker, reads the metrics
+and checks that spawn failures are retried and then fail the queued tasks
+"""
+
+import sys
+import os
+import time
+import wave
+import struct
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+import encoderPoolService
+from encoderPoolService import EncoderPoolService, WorkerCrashedError, encode_file, export_renditions
+from encoderProfileService import EncoderProfileService
+from audioCapabilityService import AudioCapabilityService
+
+
+def create_test_wav(path, seconds=3, sample_rate=44100):
+    """Write a short stereo sine-ish WAV file"""
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        frames = bytearray()
+        for i in range(seconds * sample_rate):
+            sample = int(8000 * ((i // 50) % 2 * 2 - 1))
+            frames += struct.pack('<hh', sample, sample)
+        wav_file.writeframes(bytes(frames))
+
+
+def test_encoder_pool():
+    """Test pooled encodes, crash recovery, health checks and metrics"""
+    print("🧪 Testing Encoder Pool Service")
+    print("=" * 50)
+
+    profiles = EncoderProfileService().profiles
+    pool = EncoderPoolService(size=2, health_check_interval=1)
+    pool.start()
+    print(f"Engine: {pool.engine}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ffmpeg = AudioCapabilityService(os.path.join(temp_dir, 'capabilities.json')).ffmpeg_binary()
+        source_path = os.path.join(temp_dir, 'source.wav')
+        create_test_wav(source_path)
+
+        # Test 1: a single encode through a worker
+        print("Test 1: Encode through the pool")
+        output_path = os.path.join(temp_dir, 'out.mp3')
+        result = pool.submit(encode_file, source_path, output_path, profiles['mp3_128']).result()
+        assert os.path.getsize(output_path) == result['size'] > 0
+        print(f"✅ mp3_128 encoded with {result['engine']} in {result['encode_ms']} ms")
+
+        # Test 2: several renditions in one task
+        print("\nTest 2: Renditions")
+        # VBR MP3 needs ffmpeg; PyAV only encodes constant bitrates
+        names = ('wav', 'opus_96', 'mp3_vbr') if ffmpeg else ('wav', 'opus_96')
+        if not ffmpeg:
+            print("⚠️ ffmpeg not available - mp3_vbr skipped")
+        targets = [(profiles[name], os.path.join(temp_dir, f"out_{name}.{profiles[name]['extension']}"))
+                   for name in names]
+        results = pool.submit(export_renditions, source_path, targets).result()
+        for name, result in results.items():
+            assert 'error' not in result, result
+            print(f"✅ {name}: {result['size']} bytes ({result['engine']})")
+
+        # Test 3: a crashing task fails alone and its worker is replaced
+        print("\nTest 3: Crash recovery")
+        try:
+            pool.submit(os._exit, 3).result()
+            assert False, "the crash should fail the task"
+        except WorkerCrashedError as e:
+            print(f"✅ Crash reported: {e}")
+        result = pool.submit(encode_file, source_path, output_path, profiles['mp3_128']).result()
+        assert result['size'] > 0
+        print("✅ Pool still encodes after the crash")
+
+        # Test 4: health checks and per-worker metrics
+        print("\nTest 4: Metrics")
+        time.sleep(1.5)
+        stats = pool.stats()
+        assert stats['size'] == 2 and all(worker['alive'] for worker in stats['workers'])
+        assert sum(worker['restarts'] for worker in stats['workers']) == 1
+        assert sum(worker['tasks_completed'] for worker in stats['workers']) == 3
+        assert all(worker['last_health_check'] for worker in stats['workers'])
+        for worker in stats['workers']:
+            print(f"✅ Worker {worker['id']} (pid {worker['pid']}): {worker['tasks_completed']} done, "
+                  f"{worker['tasks_failed']} failed, {worker['restarts']} restarts, busy {worker['busy_ms']} ms")
+
+    pool.shutdown()
+
+    # Test 5: a worker that fails to start is retried, and queued tasks fail once none can start
+    print("\nTest 5: Spawn failures")
+    encoderPoolService.SPAWN_BACKOFF_SECONDS = 0.05
+    flaky_pool = EncoderPoolService(size=1, health_check_interval=1)
+    spawn = flaky_pool._spawn
+    failures = [OSError('fork failed')]
+
+    def flaky_spawn(worker):
+        if failures:
+            raise failures.pop()
+        spawn(worker)
+
+    flaky_pool._spawn = flaky_spawn
+    assert flaky_pool.submit(pow, 2, 10).result(timeout=30) == 1024
+    print("✅ Worker started on the second attempt")
+    flaky_pool.shutdown()
+
+    broken_pool = EncoderPoolService(size=2, health_check_interval=1)
+
+    def broken_spawn(worker):
+        raise OSError('fork failed')
+
+    broken_pool._spawn = broken_spawn
+    futures = [broken_pool.submit(pow, 2, 10) for _ in range(3)]
+    errors = [future.exception(timeout=10) for future in futures]
+    assert all(isinstance(error, WorkerCrashedError) for error in errors), errors
+    print(f"✅ Queued tasks failed: {errors[0]}")
+    try:
+        broken_pool.submit(pow, 2, 10).result(timeout=1)
+        assert False, "the task should fail"
+    except WorkerCrashedError as e:
+        print(f"✅ New task failed at once: {e}")
+    assert all(worker['state'] == 'failed' for worker in broken_pool.stats()['workers'])
+    broken_pool.shutdown()
+
+    print("\n🎉 All encoder pool tests passed!")
+    return True
+
+
+# Workers are spawned, so the test must only run when executed as a script
+if __name__ == "__main__":
+    success = test_encoder_pool()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,77 @@
+# Rules applied
+"""
+Test script for encoder profiles
+Validates profiles, resolves per-request selections and builds ffmpeg options
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from encoderProfileService import EncoderProfileService, encoder_args, validate_profile
+
+
+def test_encoder_profiles():
+    """Test built-in profiles, deployment overrides and validation"""
+    print("🧪 Testing Encoder Profile Service")
+    print("=" * 50)
+
+    # Test 1: built-in profiles and their ffmpeg options
+    print("Test 1: Built-in profiles")
+    service = EncoderProfileService()
+    assert service.resolve() == [service.profiles['mp3_128']]
+    assert encoder_args(service.profiles['mp3_128']) == ['-codec:a', 'libmp3lame', '-b:a', '128k', '-f', 'mp3']
+    assert encoder_args(service.profiles['ogg_q4']) == ['-codec:a', 'libvorbis', '-q:a', '4', '-f', 'ogg']
+    assert '-ar' in encoder_args(service.profiles['opus_96'])
+    assert service.folders()['opus_ringtones'] == ('.opus',)
+    print(f"✅ {len(service.profiles)} profiles in {len(service.folders())} folders")
+
+    # Test 2: per-request selection
+    print("\nTest 2: Per-request selection")
+    names = [profile['name'] for profile in service.resolve(['opus_96', 'm4r_128', 'opus_96'])]
+    assert names == ['opus_96', 'm4r_128'], names
+    for bad in (['nope'], ['mp3_128', 'mp3_vbr']):
+        try:
+            service.resolve(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError as e:
+            print(f"✅ Rejected {bad}: {e}")
+
+    # Test 3: deployment config adds profiles and changes the defaults
+    print("\nTest 3: Deployment config")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = os.path.join(temp_dir, 'encoder_profiles.json')
+        with open(config_path, 'w') as f:
+            json.dump({'profiles': {'opus_32_mono': {'codec': 'libopus', 'container': 'ogg', 'extension': 'opus',
+                                                     'bitrate': '32k', 'sample_rate': 48000, 'channels': 1,
+                                                     'folder': 'opusmono_ringtones'}},
+                       'default_profiles': ['mp3_128', 'opus_32_mono']}, f)
+        service = EncoderProfileService(config_path)
+        assert [profile['name'] for profile in service.resolve()] == ['mp3_128', 'opus_32_mono']
+        assert 'opusmono_ringtones' in service.folders()
+    print("✅ Deployment profile and defaults loaded")
+
+    # Test 4: values that would reach the ffmpeg command line are validated
+    print("\nTest 4: Validation")
+    for profile in ({'codec': 'aac; rm -rf /', 'container': 'ipod', 'extension': 'm4a'},
+                    {'codec': 'aac', 'container': 'ipod', 'extension': 'm4a', 'bitrate': '64000'},
+                    {'codec': 'aac', 'container': 'ipod', 'extension': 'm4a', 'folder': '../etc'},
+                    {'codec': 'aac', 'container': 'ipod', 'extension': 'm4a', 'bitrate': '64k', 'quality': 2}):
+        try:
+            validate_profile('bad', profile)
+            assert False, f"{profile} should be rejected"
+        except ValueError as e:
+            print(f"✅ Rejected: {e}")
+
+    print("\n🎉 All encoder profile tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_encoder_profiles()
+    sys.exit(0 if success else 1)
@@ -41,8 +41,11 @@ def test_backend_imports():
     
     try:
         # Test server imports
-        from server import app, RINGTONES_FOLDER, WAV_RINGTONES_FOLDER, MP3_RINGTONES_FOLDER
+        from server import create_app, RINGTONES_FOLDER, WAV_RINGTONES_FOLDER, MP3_RINGTONES_FOLDER
         print("✅ Server imports successful")
+        
+        # Folders are created at startup, not at import time
+        create_app()
         print(f"   RINGTONES_FOLDER: {RINGTONES_FOLDER}")
         print(f"   WAV_RINGTONES_FOLDER: {WAV_RINGTONES_FOLDER}")
         print(f"   MP3_RINGTONES_FOLDER: {MP3_RINGTONES_FOLDER}")
@@ -0,0 +1,74 @@
+# Rules applied
+"""
+Test script for the rendition cache
+Stores renditions, serves hits by linking and evicts least recently used entries
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from renditionCacheService import RenditionCacheService
+
+
+def write_file(path, size):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+
+
+def test_rendition_cache():
+    """Test hits, misses, linking and LRU eviction"""
+    print("🧪 Testing Rendition Cache Service")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = RenditionCacheService(os.path.join(temp_dir, 'cache'), os.path.join(temp_dir, 'cache.db'), max_bytes=2500)
+
+        # Test 1: a miss, then a hit served without re-encoding
+        print("Test 1: Miss then hit")
+        key = cache.make_key('a' * 64, 1.5, 4.0, 'mp3', '128k')
+        assert cache.fetch(key, os.path.join(temp_dir, 'out1.mp3')) is None
+        write_file(os.path.join(temp_dir, 'encoded.mp3'), 1000)
+        cache.store(key, os.path.join(temp_dir, 'encoded.mp3'))
+        method = cache.fetch(key, os.path.join(temp_dir, 'out2.mp3'))
+        assert method in ('reflink', 'hardlink', 'copy'), method
+        with open(os.path.join(temp_dir, 'encoded.mp3'), 'rb') as a, open(os.path.join(temp_dir, 'out2.mp3'), 'rb') as b:
+            assert a.read() == b.read()
+        print(f"✅ Hit served by {method}")
+
+        # Test 2: any difference in the key is a different rendition
+        print("\nTest 2: Key covers range and encoder settings")
+        assert cache.make_key('a' * 64, 1.5, 4.0, 'mp3', '192k')['key'] != key['key']
+        assert cache.make_key('a' * 64, 1.5, 4.001, 'mp3', '128k')['key'] != key['key']
+        assert cache.make_key('a' * 64, 1.5, 4.0, 'mp3', '128k')['key'] == key['key']
+        print("✅ Keys are distinct per setting and stable")
+
+        # Test 3: the least recently used entry is evicted past the byte budget
+        print("\nTest 3: LRU eviction")
+        time.sleep(0.01)
+        other_key = cache.make_key('b' * 64, 0, None, 'mp3', '128k')
+        write_file(os.path.join(temp_dir, 'other.mp3'), 1000)
+        cache.store(other_key, os.path.join(temp_dir, 'other.mp3'))
+        time.sleep(0.01)
+        cache.fetch(key, os.path.join(temp_dir, 'out3.mp3'))  # key is now more recent than other_key
+        third_key = cache.make_key('c' * 64, 0, None, 'mp3', '128k')
+        write_file(os.path.join(temp_dir, 'third.mp3'), 1000)
+        cache.store(third_key, os.path.join(temp_dir, 'third.mp3'))
+        assert cache.fetch(other_key, os.path.join(temp_dir, 'out4.mp3')) is None
+        assert cache.fetch(key, os.path.join(temp_dir, 'out5.mp3')) is not None
+        stats = cache.stats()
+        assert stats['evictions'] == 1 and stats['bytes'] <= 2500, stats
+        print(f"✅ Stats: {stats}")
+
+    print("\n🎉 All rendition cache tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_rendition_cache()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+# Rules applied
+"""
+Test script for the server-side schedule store
+Checks CRUD, the precomputed next fire time, window and ringtone queries on 20000 schedules, the import
+and that the API never stores a client-supplied ringtone path for server alarms or accepts a bad page limit
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from scheduleStoreService import ScheduleStoreService, ScheduleExistsError, next_fire_time
+
+
+def schedule(schedule_id, ringtone_id='ring_1', time_of_day='07:00', days=None, source='web'):
+    """A schedule as the frontend sends it"""
+    return {'id': schedule_id, 'ringtone_id': ringtone_id, 'ringtone_name': f"{ringtone_id}.wav",
+            'ringtone_url': f"http://localhost:5000/api/ringtones/wav_ringtones/{ringtone_id}.wav",
+            'ringtone_folder': 'wav_ringtones', 'ringtone_filename': f"{ringtone_id}.wav",
+            'time': time_of_day, 'days': days if days is not None else [1, 2, 3, 4, 5], 'source': source}
+
+
+def test_schedule_store():
+    """Test CRUD, queries and import"""
+    print("🧪 Testing Schedule Store Service")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ScheduleStoreService(os.path.join(temp_dir, 'schedules.db'))
+
+        # Test 1: CRUD keeps next_fire_at in step with time, days and active
+        print("Test 1: CRUD")
+        created = store.create(schedule('s1'))
+        assert created['next_fire_at'] == next_fire_time('07:00', [1, 2, 3, 4, 5], created['updated'])
+        try:
+            store.create(schedule('s1'))
+            assert False, "a duplicate id should be rejected"
+        except ScheduleExistsError:
+            pass
+        assert store.update('s1', {'active': False})['next_fire_at'] is None
+        updated = store.update('s1', {'active': True, 'time': '08:15'})
+        assert updated['time'] == '08:15' and updated['next_fire_at'] is not None
+        assert store.update('missing', {'active': False}) is None
+        for bad in ({'time': '8:15'}, {'days': [9]}, {'source': 'cron'}, {'owner': 'x'}, {'active': 'yes'}):
+            try:
+                store.update('s1', bad)
+                assert False, f"{bad} should be rejected"
+            except ValueError:
+                pass
+        generated = store.create({k: v for k, v in schedule('ignored').items() if k != 'id'})
+        assert generated['id'].startswith('schedule_')
+        assert store.delete(generated['id']) and not store.delete(generated['id'])
+        print("✅ Create, update, validation and delete")
+
+        # Test 2: 20000 schedules; window and ringtone queries use the indexes
+        print("\nTest 2: Queries at scale")
+        started = time.perf_counter()
+        result = store.import_many([schedule(f"bulk_{i}", f"ring_{i % 500}", f"{i % 24:02d}:{i % 60:02d}",
+                                             [i % 7]) for i in range(20000)] + [schedule('s1')])
+        assert result['imported'] == 20000 and result['skipped'] == 1, result
+        print(f"   imported 20000 in {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        soon = store.due_within(6 * 3600, limit=1000)
+        window_ms = (time.perf_counter() - started) * 1000
+        now = time.time()
+        assert soon and all(now < item['next_fire_at'] <= now + 6 * 3600 for item in soon)
+        assert [item['next_fire_at'] for item in soon] == sorted(item['next_fire_at'] for item in soon)
+
+        started = time.perf_counter()
+        using = store.by_ringtone('ring_7')
+        ringtone_ms = (time.perf_counter() - started) * 1000
+        assert len(using) == 40 and store.by_ringtone(folder='wav_ringtones', filename='ring_7.wav') == using
+
+        conn = sqlite3.connect(store.db_path)
+        plans = [' '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)) for sql, params in (
+            ("SELECT * FROM schedules WHERE active = 1 AND next_fire_at > ? AND next_fire_at <= ? "
+             "ORDER BY next_fire_at", (0, 1)),
+            ("SELECT * FROM schedules WHERE ringtone_id = ?", ('ring_7',)))]
+        assert 'idx_schedules_next_fire' in plans[0] and 'idx_schedules_ringtone_id' in plans[1], plans
+        print(f"✅ {len(soon)} firing in 6 h ({window_ms:.1f} ms), {len(using)} using ring_7 ({ringtone_ms:.1f} ms)")
+
+        # Test 3: fire times that passed are rolled forward by the next window query
+        print("\nTest 3: Advance due")
+        conn.execute("UPDATE schedules SET next_fire_at = 1 WHERE id = 's1'")
+        conn.commit()
+        assert store.advance_due() == 1
+        assert store.get('s1')['next_fire_at'] > time.time()
+        print("✅ Stale next fire time advanced")
+
+        # Test 4: pages cover every schedule once
+        print("\nTest 4: Pagination")
+        seen, cursor = set(), None
+        while True:
+            page, cursor = store.list(limit=1000, cursor=cursor)
+            seen.update(item['id'] for item in page)
+            if cursor is None:
+                break
+        assert len(seen) == 20001
+        stats = store.stats()
+        assert stats['schedules'] == 20001 and stats['by_source']['web']['active'] == 20001
+        print(f"✅ {len(seen)} schedules in pages")
+
+        # Test 5: alarms of the former alarm_schedules table are moved into the store
+        print("\nTest 5: Alarm migration")
+        legacy = os.path.join(temp_dir, 'legacy.db')
+        conn = sqlite3.connect(legacy)
+        conn.execute("CREATE TABLE alarm_schedules (id TEXT PRIMARY KEY, ringtone_path TEXT NOT NULL, "
+                     "time_of_day TEXT NOT NULL, days TEXT NOT NULL, active INTEGER NOT NULL DEFAULT 1, "
+                     "last_fired_at REAL, created REAL NOT NULL, updated REAL NOT NULL)")
+        conn.execute("INSERT INTO alarm_schedules VALUES ('a1', '/r/wav_ringtones/x.wav', '06:30', '[1]', 1, NULL, ?, ?)",
+                     (time.time(), time.time()))
+        conn.commit()
+        conn.close()
+        migrated = ScheduleStoreService(legacy).get('a1')
+        assert migrated['source'] == 'server' and migrated['ringtone_folder'] == 'wav_ringtones'
+        assert migrated['ringtone_filename'] == 'x.wav' and migrated['next_fire_at'] is not None
+        print("✅ Alarm a1 moved into the schedule store")
+
+        # Test 6: server alarms only ever play a path the server resolved itself
+        print("\nTest 6: Server alarm ringtone paths")
+        import server
+        server.create_app()
+        server.schedule_store_service = store
+        server.RINGTONES_FOLDER = temp_dir
+        os.makedirs(os.path.join(temp_dir, 'wav_ringtones'))
+        ringtone_path = os.path.join(temp_dir, 'wav_ringtones', 'ring_1.wav')
+        with open(ringtone_path, 'wb') as f:
+            f.write(b'RIFF0000WAVE')
+        client = server.app.test_client()
+        alarm = dict(schedule('alarm_1', source='server'), ringtone_path='/etc/passwd')
+        created = client.post('/api/schedules', json=alarm).get_json()['schedule']
+        assert created['ringtone_path'] == os.path.abspath(ringtone_path), created
+        for patch in ({'ringtone_path': '/etc/passwd'}, {'ringtone_path': '/etc/passwd', 'active': False}):
+            response = client.patch('/api/schedules/alarm_1', json=patch)
+            assert response.status_code == 200, response.get_json()
+            assert response.get_json()['schedule']['ringtone_path'] == os.path.abspath(ringtone_path)
+        response = client.patch('/api/schedules/alarm_1', json={'ringtone_filename': '../../etc/passwd'})
+        assert response.status_code == 400 and store.get('alarm_1')['ringtone_path'] == os.path.abspath(ringtone_path)
+        print("✅ Client-supplied paths ignored for server alarms")
+
+        # Test 7: the listing limit is validated like the other paginated endpoints
+        print("\nTest 7: Listing limit")
+        for limit in ('0', '-5', 'ten'):
+            response = client.get(f'/api/schedules?limit={limit}')
+            assert response.status_code == 400, (limit, response.get_json())
+        page = client.get('/api/schedules?limit=3').get_json()
+        assert page['count'] == 3 and page['next_cursor'] is not None, page
+        assert client.get('/api/schedules').get_json()['count'] == 1000
+        server.shutdown_app()
+        print("✅ limit=0, negative and non-numeric limits rejected; default page of 1000")
+
+    print("\n🎉 All schedule store tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_schedule_store()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+# Rules applied
+"""
+Test script for server-side cuts of uploaded originals
+Runs the Flask app on temporary folders, uploads a 10 s WAV and checks that cut ranges
+are validated against the length of the source and that renditions nothing here can encode are skipped
+"""
+
+import sys
+import os
+import io
+import math
+import wave
+import struct
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+import server
+
+
+def tone_wav(seconds=10, sample_rate=8000):
+    """A mono 16-bit sine tone as WAV bytes"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b''.join(struct.pack('<h', int(8000 * math.sin(i / 8)))
+                                      for i in range(seconds * sample_rate)))
+    return buffer.getvalue()
+
+
+def relocate_server(temp_dir):
+    """Point every folder and file of the server module into temp_dir"""
+    ringtones, originals = server.RINGTONES_FOLDER, server.UPLOAD_FOLDER
+    for name in dir(server):
+        value = getattr(server, name)
+        if (name.endswith('_FOLDER') or name.endswith('_PATH')) and isinstance(value, str):
+            for prefix, target in ((ringtones, 'ringtones'), (originals, 'original_sound')):
+                if value.startswith(prefix):
+                    setattr(server, name, os.path.join(temp_dir, target) + value[len(prefix):])
+                    break
+
+
+def test_server_cut():
+    """Test cut range validation against the source duration"""
+    print("🧪 Testing Server-Side Cuts")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        relocate_server(temp_dir)
+        server.create_app()
+        client = server.app.test_client()
+        try:
+            upload = client.post('/api/upload', data={'file': (io.BytesIO(tone_wav()), 'tone.wav')},
+                                 content_type='multipart/form-data').get_json()
+            assert upload['success'] and upload['id'], upload
+            cut_url = f"/api/originals/{upload['id']}/ringtones"
+
+            # Test 1: ranges that are empty, inverted or outside the source are rejected
+            print("Test 1: Invalid ranges")
+            for body in ({'start_time': 20, 'end_time': 30}, {'start_time': 10, 'end_time': 12},
+                         {'start_time': 5, 'end_time': 5}, {'start_time': 6, 'end_time': 4},
+                         {'start_time': -1, 'end_time': 2}, {'start_time': 1, 'end_time': 'nan'}):
+                response = client.post(cut_url, json=body)
+                assert response.status_code == 400, (body, response.get_json())
+                print(f"✅ Rejected {body}: {response.get_json()['error']}")
+
+            # Test 2: an end past the source is clamped to its length
+            print("\nTest 2: End clamped to the source")
+            response = client.post(cut_url, json={'start_time': 8, 'end_time': 30})
+            result = response.get_json()
+            assert response.status_code in (200, 202) and result['success'], result
+            assert result['metadata']['end_time'] == 10.0 and abs(result['metadata']['duration'] - 2.0) < 0.01, result
+            with wave.open(result['file_path'], 'rb') as wav_file:
+                assert wav_file.getnframes() == 2 * 8000, wav_file.getnframes()
+            print(f"✅ Cut 8-30 s stored as {result['filename']} (2 s)")
+
+            # Test 3: without ffmpeg, profiles PyAV cannot encode are reported instead of queued
+            print("\nTest 3: Renditions without ffmpeg")
+            response = client.post(cut_url, json={'start_time': 1, 'end_time': 3, 'profiles': ['opus_96', 'mp3_vbr']})
+            result = response.get_json()
+            assert result['success'], result
+            if server.audio_capabilities.ffmpeg_binary():
+                assert result['renditions_skipped'] == [], result
+                print("⚠️ ffmpeg available - nothing to skip")
+            else:
+                assert result['renditions_skipped'] == ['mp3_vbr'], result
+                assert 'mp3_vbr' not in result['renditions_pending'], result
+                print(f"✅ Skipped {result['renditions_skipped']}, queued {result['renditions_pending']}")
+        finally:
+            server.shutdown_app()
+
+    print("\n🎉 All server cut tests passed!")
+    return True
+
+
+# The encoder pool spawns workers, so the test must only run when executed as a script
+if __name__ == "__main__":
+    success = test_server_cut()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,94 @@
+# Rules applied
+"""
+Test script for silence detection
+Finds leading/trailing silence and gaps, suggests cut times and trims ranges
+"""
+
+import sys
+import os
+import math
+import wave
+import struct
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from silenceDetectionService import SilenceDetectionService
+
+
+def create_test_wav(path, sample_rate=8000):
+    """Write 1 s silence, 2 s tone, 1 s silence, 1 s tone, 2 s near-silent noise (mono)"""
+    parts = [(1.0, 0), (2.0, 12000), (1.0, 0), (1.0, 12000), (2.0, 20)]
+    frames = bytearray()
+    for seconds, amplitude in parts:
+        for i in range(int(seconds * sample_rate)):
+            frames += struct.pack('<h', int(amplitude * math.sin(2 * math.pi * 440 * i / sample_rate)))
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(bytes(frames))
+
+
+def test_silence_detection():
+    """Test the silence report, auto-trim and parameter validation"""
+    print("🧪 Testing Silence Detection Service")
+    print("=" * 50)
+
+    service = SilenceDetectionService()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'source.wav')
+        create_test_wav(source_path)
+
+        # Test 1: whole-source report
+        print("Test 1: Report")
+        report = service.analyze(source_path, 'a' * 64).report(padding=0)
+        assert not report['silent']
+        assert report['leading_silence'] == 1.0 and report['trailing_silence'] == 2.0, report
+        assert (report['suggested_start'], report['suggested_end']) == (1.0, 5.0), report
+        assert [(gap['start'], gap['end']) for gap in report['gaps']] == [(3.0, 4.0)], report['gaps']
+        print(f"✅ Sound from {report['suggested_start']}s to {report['suggested_end']}s, "
+              f"gap {report['gaps'][0]['start']}s-{report['gaps'][0]['end']}s, {report['analysis_ms']} ms")
+
+        # Test 2: the threshold decides whether the quiet noise counts as sound
+        print("\nTest 2: Threshold")
+        loose = service.analyze(source_path, 'a' * 64, threshold_db=-70).report(padding=0)
+        assert loose['trailing_silence'] == 0.0, loose
+        print(f"✅ At -70 dBFS the noise is sound (trailing silence {loose['trailing_silence']}s)")
+
+        # Test 3: trimming a range keeps padding and stays inside the range
+        print("\nTest 3: Trim")
+        analysis = service.analyze(source_path, 'a' * 64)
+        assert analysis.trim(0, 7) == (0.95, 5.05)
+        assert analysis.trim(2, 6, padding=0) == (2, 5.0)
+        try:
+            analysis.trim(5.5, 7)
+            assert False, "a silent range should be rejected"
+        except ValueError as e:
+            print(f"✅ Rejected silent range: {e}")
+        print("✅ Ranges trimmed to their sound")
+
+        # Test 4: the peak envelope finds the same sound
+        print("\nTest 4: Peak mode")
+        peak = service.analyze(source_path, 'a' * 64, mode='peak').report(padding=0)
+        assert (peak['suggested_start'], peak['suggested_end']) == (1.0, 5.0), peak
+        print("✅ Peak envelope agrees")
+
+        # Test 5: validation
+        print("\nTest 5: Validation")
+        for args in ((5, 'rms'), (-50, 'loud'), (-50, 'rms', 0)):
+            try:
+                SilenceDetectionService.validate(*args)
+                assert False, f"{args} should be rejected"
+            except ValueError as e:
+                print(f"✅ Rejected {args}: {e}")
+
+    print("\n🎉 All silence detection tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_silence_detection()
+    sys.exit(0 if success else 1)
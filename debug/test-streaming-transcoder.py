@@ -0,0 +1,109 @@
+# Rules applied
+"""
+Test script for the streaming ffmpeg transcoder
+Encodes a generated WAV to MP3 and back, from paths and from pipes, and cuts ranges
+"""
+
+import sys
+import os
+import io
+import wave
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from streamingTranscoder import transcode, cut_audio, find_ffmpeg, TranscodeError
+
+
+def write_tone(path, seconds=5, rate=44100):
+    """Write a stereo 16-bit WAV of the given length"""
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(os.urandom(rate * 4 * seconds))
+
+
+def test_streaming_transcoder():
+    """Test path and pipe transcoding, timing and error reporting"""
+    print("🧪 Testing Streaming Transcoder")
+    print("=" * 50)
+
+    if not find_ffmpeg():
+        print("❌ ffmpeg not found on PATH - cannot run transcoder tests")
+        return False
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wav_path = os.path.join(temp_dir, 'tone.wav')
+        mp3_path = os.path.join(temp_dir, 'tone.mp3')
+        write_tone(wav_path)
+
+        # Test 1: WAV file to MP3 file
+        print("Test 1: WAV to MP3")
+        result = transcode(wav_path, mp3_path, 'mp3', bitrate='128k')
+        assert os.path.getsize(mp3_path) == result['size'] > 0, result
+        assert abs(result['duration_ms'] - 5000) < 100, result
+        assert result['realtime_factor'] is not None, result
+        assert not os.path.exists(mp3_path + '.part')
+        print(f"✅ {result['size']} bytes in {result['encode_ms']} ms (RTF {result['realtime_factor']})")
+
+        # Test 2: stream in and out through pipes
+        print("\nTest 2: Piped input and output")
+        output = io.BytesIO()
+        with open(wav_path, 'rb') as source:
+            result = transcode(source, output, 'mp3')
+        assert len(output.getvalue()) == result['size'] > 0, result
+        print(f"✅ Streamed {result['size']} bytes")
+
+        # Test 3: MP3 back to WAV, and an MP3 re-encoded onto itself
+        print("\nTest 3: MP3 to WAV and in-place re-encode")
+        result = transcode(mp3_path, os.path.join(temp_dir, 'back.wav'), 'wav')
+        with wave.open(os.path.join(temp_dir, 'back.wav'), 'rb') as wav_file:
+            assert wav_file.getsampwidth() == 2 and wav_file.getnchannels() == 2
+        transcode(mp3_path, mp3_path, 'mp3')
+        assert os.path.getsize(mp3_path) > 0
+        print("✅ WAV decoded and MP3 replaced in place")
+
+        # Test 4: bad input raises TranscodeError and leaves nothing behind
+        print("\nTest 4: Invalid input")
+        bad_output = os.path.join(temp_dir, 'bad.mp3')
+        try:
+            transcode(io.BytesIO(b'not audio' * 1000), bad_output, 'mp3')
+            assert False, "Expected TranscodeError"
+        except TranscodeError as e:
+            print(f"✅ Raised TranscodeError: {str(e)[:60]}...")
+        assert not os.path.exists(bad_output) and not os.path.exists(bad_output + '.part')
+
+        # Test 5: cuts are copied when possible and re-encoded otherwise
+        print("\nTest 5: Cutting ranges")
+        result = cut_audio(wav_path, os.path.join(temp_dir, 'cut.wav'), 1.25, 3.5)
+        with wave.open(os.path.join(temp_dir, 'cut.wav'), 'rb') as wav_file:
+            assert wav_file.getnframes() == round(2.25 * 44100), wav_file.getnframes()
+        assert result['method'] == 'copy', result
+        frame_seconds = 1152 / 44100
+        result = cut_audio(mp3_path, os.path.join(temp_dir, 'cut.mp3'), 10 * frame_seconds, 60 * frame_seconds)
+        assert result['method'] == 'copy', result
+        result = cut_audio(mp3_path, os.path.join(temp_dir, 'cut.mp3'), 1.0, 3.0)
+        assert result['method'] == 'encode' and abs(result['duration_ms'] - 2000) < 50, result
+        print("✅ WAV and frame-aligned MP3 cuts copied, unaligned MP3 cut re-encoded")
+
+        # Test 6: unsupported formats and empty ranges are rejected before ffmpeg runs
+        print("\nTest 6: Invalid cut requests")
+        for args in [(os.path.join(temp_dir, 'song.m4a'), os.path.join(temp_dir, 'cut.ogg'), 0, 1, 'ogg'),
+                     (os.path.join(temp_dir, 'song.m4a'), os.path.join(temp_dir, 'cut.m4a'), 0, 1),
+                     (wav_path, os.path.join(temp_dir, 'cut.wav'), 2.0, 2.0)]:
+            try:
+                cut_audio(*args)
+                assert False, f"Expected ValueError for {args}"
+            except ValueError as e:
+                print(f"✅ Raised ValueError: {e}")
+
+    print("\n🎉 All streaming transcoder tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_streaming_transcoder()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,120 @@
+# Rules applied
+"""
+Test script for the cached Windows Task Scheduler inventory
+Runs on any OS: schtasks is replaced by a fake runner that returns a recorded verbose CSV listing
+"""
+
+import sys
+import os
+import subprocess
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from taskSchedulerService import WindowsTaskSchedulerService, parse_task_inventory
+
+HEADER = ('"HostName","TaskName","Next Run Time","Status","Logon Mode","Last Run Time","Last Result","Author",'
+          '"Task To Run","Start In","Comment","Scheduled Task State","Idle Time","Power Management","Run As User",'
+          '"Delete Task If Not Rescheduled","Stop Task If Runs X Hours and X Mins","Schedule","Schedule Type",'
+          '"Start Time","Start Date","End Date","Days","Months","Repeat: Every","Repeat: Until: Time",'
+          '"Repeat: Until: Duration","Repeat: Stop If Still Running"')
+
+
+def row(task, next_run, status, last_run, result, command, state, start, days):
+    cells = ['PC', task, next_run, status, 'Interactive only', last_run, result, 'me', command, 'N/A', 'N/A',
+             state, 'Disabled', 'Stop On Battery Mode', 'me', 'Disabled', '72:00:00', 'Scheduling data',
+             'Weekly', start, '1/1/2026', 'N/A', days, 'Every 1 week(s)', 'Disabled', 'Disabled', 'Disabled',
+             'Disabled']
+    return ','.join('"' + cell.replace('"', '""') + '"' for cell in cells)
+
+
+# Commas inside the quoted Days and Task To Run cells broke the former line.split(',') parser
+LISTING = '\n'.join([
+    '', 'Folder: \\RingtoneScheduler', HEADER,
+    row('\\RingtoneScheduler\\Ringtone_schedule_1', '10/19/2026 7:00:00 AM', 'Ready', '10/16/2026 7:00:01 AM', '0',
+        '"C:\\Py\\pythonw.exe" "C:\\app\\play_ringtone.py" "C:\\r\\Wake up, now.wav"', 'Enabled', '7:00:00 AM',
+        'MON, TUE, WED, THU, FRI'),
+    row('\\RingtoneScheduler\\Ringtone_schedule_1', '10/19/2026 7:00:00 AM', 'Ready', '10/16/2026 7:00:01 AM', '0',
+        '"C:\\Py\\pythonw.exe" "C:\\app\\play_ringtone.py" "C:\\r\\Wake up, now.wav"', 'Enabled', '9:30:00 AM',
+        'SAT, SUN'),
+    HEADER,
+    row('\\RingtoneScheduler\\Ringtone_schedule_2', 'N/A', 'Disabled', 'N/A', '267011', 'x', 'Disabled',
+        '18:45:00', 'FRI'),
+    row('\\RingtoneScheduler\\Backup', 'N/A', 'Ready', 'N/A', '0', 'x', 'Enabled', '1:00:00 AM', 'SUN'),
+])
+
+
+class FakeRunner:
+    """Records schtasks command lines and answers like schtasks would"""
+
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, cmd):
+        self.commands.append(cmd)
+        stdout = LISTING if cmd[1] == '/query' else 'SUCCESS: done.'
+        return subprocess.CompletedProcess(cmd, 0, stdout, '')
+
+
+def test_task_inventory():
+    """Test CSV parsing, the single bulk query and cache invalidation"""
+    print("🧪 Testing Task Scheduler Inventory")
+    print("=" * 50)
+
+    # Test 1: quoted cells, repeated headers and one row per trigger
+    print("Test 1: Parsing the verbose CSV listing")
+    tasks = parse_task_inventory(LISTING)
+    assert sorted(tasks) == ['schedule_1', 'schedule_2'], sorted(tasks)
+    first, second = tasks['schedule_1'], tasks['schedule_2']
+    assert first['status'] == 'Ready' and first['enabled'] and first['last_result'] == 0
+    assert first['next_run'] == '2026-10-19T07:00:00' and first['last_run'] == '2026-10-16T07:00:01'
+    assert first['command'].endswith('"C:\\r\\Wake up, now.wav"')
+    assert first['triggers'] == [{'schedule_type': 'Weekly', 'time': '07:00', 'days': [1, 2, 3, 4, 5]},
+                                 {'schedule_type': 'Weekly', 'time': '09:30', 'days': [0, 6]}]
+    assert second['status'] == 'Disabled' and not second['enabled'] and second['next_run'] is None
+    assert second['triggers'][0]['time'] == '18:45'
+    print("✅ 2 ringtone tasks, 3 triggers, statuses and times parsed")
+
+    # Test 2: status of every task from one schtasks process, then from the cache
+    print("\nTest 2: One bulk query, cached")
+    runner = FakeRunner()
+    service = WindowsTaskSchedulerService(runner=runner)
+    statuses = service.get_task_statuses()
+    assert statuses['schedule_1']['status'] == 'Ready' and statuses['schedule_2']['enabled'] is False
+    assert service.get_task_status('schedule_2') == 'Disabled' and service.get_task_status('missing') is None
+    assert service.get_task_statuses(['schedule_1', 'missing'])['missing'] is None
+    assert len(service.list_all_tasks()) == 2
+    assert runner.commands == [['schtasks', '/query', '/tn', '\\RingtoneScheduler\\', '/fo', 'csv', '/v']]
+    assert service.stats() == {'spawns': 1, 'queries': 1, 'cache_hits': 4}
+    print(f"✅ 5 lookups, {service.stats()['spawns']} schtasks process")
+
+    # Test 3: writes clear the cache and target the task folder
+    print("\nTest 3: Writes invalidate the inventory")
+    assert service.disable_scheduled_task('schedule_1')
+    assert runner.commands[-1] == ['schtasks', '/change', '/tn', '\\RingtoneScheduler\\Ringtone_schedule_1', '/disable']
+    service.get_task_status('schedule_1')
+    assert service.stats()['queries'] == 2
+    assert service.create_scheduled_task('schedule_3', 'C:\\r\\ring.wav', '07:00', [1])
+    assert runner.commands[-1][runner.commands[-1].index('/tn') + 1] == '\\RingtoneScheduler\\Ringtone_schedule_3'
+    service.list_all_tasks()
+    assert service.stats()['queries'] == 3
+    spawns = service.stats()['spawns']
+    assert not service.delete_scheduled_task('..\\Other') and service.stats()['spawns'] == spawns
+    print("✅ Change and create re-query; unsafe task names are rejected without running schtasks")
+
+    # Test 4: the cache expires
+    print("\nTest 4: TTL")
+    service = WindowsTaskSchedulerService(runner=FakeRunner(), inventory_ttl=0)
+    service.list_all_tasks()
+    service.list_all_tasks()
+    assert service.stats()['queries'] == 2
+    print("✅ Expired inventory is queried again")
+
+    print("\n🎉 All task inventory tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_task_inventory()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,215 @@
+# Rules applied
+"""
+Test script for the declarative Windows task sync with one XML-defined task per ringtone
+Runs on any OS: schtasks is replaced by a fake that keeps a task table and answers queries from it
+"""
+
+import sys
+import os
+import time
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from taskSchedulerService import (WindowsTaskSchedulerService, build_task_xml, ringtone_task_name, PYTHONW_EXE,
+                                  XML_DAY_NAMES)
+
+NS = {'t': 'http://schemas.microsoft.com/windows/2004/02/mit/task'}
+
+
+class FakeSchtasks:
+    """Keeps tasks in memory like Task Scheduler would and records every command"""
+
+    def __init__(self, delay=0.0):
+        self.tasks = {}
+        self.commands = []
+        self.delay = delay
+        self.fail_names = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, cmd):
+        time.sleep(self.delay)
+        args = {flag: value for flag, value in zip(cmd[1:], cmd[2:]) if flag in ('/tn', '/tr', '/xml', '/d', '/st')}
+        path = args['/tn']
+        with self.lock:
+            self.commands.append(cmd)
+            if any(path.endswith(name) for name in self.fail_names):
+                return subprocess.CompletedProcess(cmd, 1, '', 'ERROR: Access is denied.')
+            if cmd[1] == '/query':
+                return subprocess.CompletedProcess(cmd, 0, self.listing(), '')
+            if cmd[1] == '/create' and '/xml' in args:
+                self.tasks[path] = self.from_xml(args['/xml'])
+            elif cmd[1] == '/create':
+                self.tasks[path] = {'description': 'N/A', 'command': args['/tr'], 'enabled': True,
+                                    'triggers': [(args['/st'] + ':00', args['/d'].replace(',', ', '))]}
+            elif path not in self.tasks:
+                return subprocess.CompletedProcess(cmd, 1, '', 'ERROR: The system cannot find the file specified.')
+            elif cmd[1] == '/delete':
+                del self.tasks[path]
+            else:
+                self.tasks[path]['enabled'] = '/enable' in cmd
+            return subprocess.CompletedProcess(cmd, 0, 'SUCCESS', '')
+
+    @staticmethod
+    def from_xml(xml_path):
+        with open(xml_path, encoding='utf-16') as f:
+            root = ET.fromstring(f.read().replace('encoding="UTF-16"', ''))
+        triggers = []
+        for trigger in root.iterfind('t:Triggers/t:CalendarTrigger', NS):
+            days = [day[:3].upper() for day in XML_DAY_NAMES if trigger.find(f't:ScheduleByWeek/t:DaysOfWeek/t:{day}', NS) is not None]
+            triggers.append((trigger.find('t:StartBoundary', NS).text[11:], ', '.join(days) or 'Every day'))
+        exec_node = root.find('t:Actions/t:Exec', NS)
+        return {'description': root.find('t:RegistrationInfo/t:Description', NS).text,
+                'command': f"{exec_node.find('t:Command', NS).text} {exec_node.find('t:Arguments', NS).text}",
+                'enabled': root.find('t:Settings/t:Enabled', NS).text == 'true', 'triggers': triggers}
+
+    def listing(self):
+        lines = ['"HostName","TaskName"' + ',"x"' * 26]
+        for path, task in sorted(self.tasks.items()):
+            status = 'Ready' if task['enabled'] else 'Disabled'
+            for start, days in task['triggers']:
+                cells = ['PC', path, 'N/A', status, 'Interactive only', 'N/A', '0', 'me', task['command'], 'N/A',
+                         task['description'], 'Enabled' if task['enabled'] else 'Disabled', '', '', '', '', '', '',
+                         'Weekly', start, '', '', days, '', '', '', '', '']
+                lines.append(','.join('"' + cell.replace('"', '""') + '"' for cell in cells))
+        return '\n'.join(lines)
+
+
+def desired(count, ringtones=10):
+    """count schedules spread over a number of ringtones, two of every five at the same time"""
+    return [{'id': f"schedule_{i}", 'ringtone_path': f"C:\\r\\ring_{i % ringtones}.wav",
+             'time': f"{6 + (i // ringtones) % 3:02d}:30", 'days': [1, 2, 3, 4, 5] if i % 2 else [0, 6],
+             'active': True} for i in range(count)]
+
+
+def task_path(ringtone_path):
+    return f"\\RingtoneScheduler\\Ringtone_{ringtone_task_name(ringtone_path)}"
+
+
+def test_task_sync():
+    """Test the XML generator and that a sync applies only the differences"""
+    print("🧪 Testing Windows Task Sync")
+    print("=" * 50)
+
+    # Test 1: the XML depends only on the schedules, not on their order
+    print("Test 1: Deterministic XML")
+    triggers = [('07:00:00', [5, 1, 3]), ('06:30:00', list(range(7)))]
+    xml, digest = build_task_xml('C:\\r\\Wake & up.wav', triggers, PYTHONW_EXE, 'C:\\app\\play_ringtone.py')
+    assert (xml, digest) == build_task_xml('C:\\r\\Wake & up.wav', triggers[::-1], PYTHONW_EXE,
+                                           'C:\\app\\play_ringtone.py')
+    assert digest != build_task_xml('C:\\r\\Wake & up.wav', [('07:01:00', [1])], PYTHONW_EXE,
+                                    'C:\\app\\play_ringtone.py')[1]
+    root = ET.fromstring(xml.replace('encoding="UTF-16"', ''))
+    calendar = root.findall('t:Triggers/t:CalendarTrigger', NS)
+    assert len(calendar) == 2 and calendar[0].find('t:ScheduleByDay', NS) is not None
+    assert [day.tag.split('}')[1] for day in calendar[1].find('t:ScheduleByWeek/t:DaysOfWeek', NS)] == \
+        ['Monday', 'Wednesday', 'Friday']
+    assert f"[sync:{digest}]" in root.find('t:RegistrationInfo/t:Description', NS).text
+    assert ringtone_task_name('C:\\r\\Wake & up.wav') == ringtone_task_name('c:\\R\\WAKE & UP.wav')
+    print(f"✅ Same XML for reordered triggers, fingerprint {digest}")
+
+    fake = FakeSchtasks()
+    service = WindowsTaskSchedulerService(runner=fake)
+    schedules = desired(50)
+
+    # Test 2: 50 schedules of 10 ringtones become 10 tasks
+    print("\nTest 2: Initial sync")
+    report = service.sync_tasks(schedules)
+    assert report['tasks'] == 10 and len(report['create']) == 10 and not report['failed'], report
+    assert report['triggers'] == 30 and report['spawns'] == 11 and len(fake.tasks) == 10
+    assert sum(1 for cmd in fake.commands if '/xml' in cmd) == 10
+    print(f"✅ {report['schedules']} schedules → {report['tasks']} tasks, {report['triggers']} triggers, "
+          f"{report['spawns']} schtasks processes (one task per schedule took 51)")
+
+    # Test 3: the same set again changes nothing and needs one query
+    print("\nTest 3: No-op sync")
+    report = service.sync_tasks(schedules)
+    assert report['unchanged'] == 10 and report['spawns'] == 1, report
+    print("✅ 10 unchanged, 1 schtasks process")
+
+    # Test 4: an edit rewrites only its ringtone's task; no active schedule left removes the task
+    print("\nTest 4: Minimal changes")
+    schedules[0]['time'] = '05:45'
+    # schedule_31 has the same ringtone, time and days, so turning schedule_1 off changes no trigger
+    schedules[1]['active'] = False
+    for schedule in schedules:
+        if schedule['ringtone_path'].endswith('ring_2.wav'):
+            schedule['active'] = False
+    report = service.sync_tasks(schedules)
+    assert report['update'] == [ringtone_task_name('C:\\r\\ring_0.wav')], report
+    assert report['delete'] == [ringtone_task_name('C:\\r\\ring_2.wav')] and report['unchanged'] == 8
+    # The inventory of the no-op sync is still fresh, so only the two changes run schtasks
+    assert report['spawns'] == 2 and report['tasks'] == 9, report
+    assert ('05:45:00', 'SUN, SAT') in fake.tasks[task_path('C:\\r\\ring_0.wav')]['triggers']
+    print(f"✅ 1 updated, 1 deleted, 1 unchanged by a shared trigger, {report['spawns']} schtasks processes")
+
+    # Test 5: a task disabled by hand is enabled again; old one-task-per-schedule tasks are removed
+    print("\nTest 5: Drift and old tasks")
+    fake.tasks[task_path('C:\\r\\ring_3.wav')]['enabled'] = False
+    service.create_scheduled_task('schedule_3', 'C:\\r\\ring_3.wav', '07:00', [1])
+    report = service.sync_tasks(schedules)
+    assert report['enable'] == [ringtone_task_name('C:\\r\\ring_3.wav')] and report['delete'] == ['schedule_3']
+    assert len(fake.tasks) == 9 and all(task['enabled'] for task in fake.tasks.values())
+    print("✅ Re-enabled 1 task, deleted 1 old per-schedule task")
+
+    # Test 6: dry run only reports
+    print("\nTest 6: Dry run")
+    spawned = len(fake.commands)
+    report = service.sync_tasks([], dry_run=True)
+    assert len(report['delete']) == 9 and len(fake.tasks) == 9 and len(fake.commands) - spawned <= 1
+    print("✅ Would delete 9, deleted none")
+
+    # Test 7: a failing task is reported and repaired by the next sync; kept tasks are left alone
+    print("\nTest 7: Failure, repair and keep")
+    for schedule in schedules:
+        if schedule['ringtone_path'].endswith('ring_2.wav'):
+            schedule['active'] = True
+    fake.fail_names.add(ringtone_task_name('C:\\r\\ring_2.wav'))
+    report = service.sync_tasks(schedules)
+    assert report['failed'] == {ringtone_task_name('C:\\r\\ring_2.wav'): 'create failed'}, report
+    fake.fail_names.clear()
+    report = service.sync_tasks(schedules)
+    assert report['create'] == [ringtone_task_name('C:\\r\\ring_2.wav')] and len(fake.tasks) == 10
+    kept = ringtone_task_name('C:\\r\\ring_4.wav')
+    report = service.sync_tasks([s for s in schedules if not s['ringtone_path'].endswith('ring_4.wav')], keep=[kept])
+    assert report['delete'] == [] and report['unchanged'] == 9 and task_path('C:\\r\\ring_4.wav') in fake.tasks
+    print("✅ Failed create retried on the next sync, kept task untouched")
+
+    # Test 8: bad input is rejected before anything runs
+    print("\nTest 8: Validation")
+    for bad in ([{'id': '..\\x', 'ringtone_path': 'C:\\r.wav', 'time': '07:00', 'days': [1]}],
+                [{'id': 'a', 'ringtone_path': 'C:\\r.wav', 'time': '7', 'days': [1]}],
+                [{'id': 'a', 'ringtone_path': 'C:\\r".wav', 'time': '07:00', 'days': [1]}],
+                [{'id': 'a', 'ringtone_path': 'C:\\r.wav', 'time': '07:00', 'days': [1], 'active': 'no'}],
+                desired(1) + desired(1)):
+        try:
+            service.sync_tasks(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Bad schedules rejected")
+
+    # Test 9: tasks are changed in parallel
+    print("\nTest 9: Parallel apply")
+    timings = {}
+    for workers in (1, 4):
+        fake = FakeSchtasks(delay=0.01)
+        service = WindowsTaskSchedulerService(runner=fake)
+        started = time.perf_counter()
+        report = service.sync_tasks(desired(200, ringtones=40), max_workers=workers)
+        timings[workers] = time.perf_counter() - started
+    assert report['tasks'] == 40 and report['spawns'] == 41
+    assert timings[4] < timings[1] / 2, timings
+    print(f"✅ 200 schedules, 40 tasks: {timings[1] * 1000:.0f} ms with 1 worker, {timings[4] * 1000:.0f} ms with 4")
+
+    print("\n🎉 All task sync tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_task_sync()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,100 @@
+# Rules applied
+"""
+Test script for the background transcode job queue
+Runs jobs on the encoder pool and reads them back from a second service on the same
+database, the way another gunicorn worker would
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import subprocess
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from encoderPoolService import EncoderPoolService
+from transcodeJobService import TranscodeJobService, JobQueueFullError
+
+
+def wait_for_job(service, job_id, timeout=30.0):
+    """Poll a job until it has finished"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.get_job(job_id)
+        if job and job['finished']:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_transcode_jobs():
+    """Test job results, cross-process visibility and orphaned jobs"""
+    print("🧪 Testing Transcode Job Service")
+    print("=" * 50)
+
+    pool = EncoderPoolService(size=1)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'catalog.db')
+        jobs = TranscodeJobService(pool=pool, db_path=db_path, max_pending=2)
+        other_worker = TranscodeJobService(pool=pool, db_path=db_path)
+
+        # Test 1: a job succeeds and on_success shapes its result
+        print("Test 1: Job result")
+        job = jobs.submit('power', pow, 2, 10, on_success=lambda result: {'value': result}, context={'n': 10})
+        assert job['status'] in ('queued', 'running'), job
+        done = wait_for_job(jobs, job['id'])
+        assert done['status'] == 'succeeded' and done['result'] == {'value': 1024}, done
+        print(f"✅ Succeeded in {done['timing']['total_ms']} ms")
+        # run_ms is the worker's time; slow on_success work in the server does not count
+        slow = wait_for_job(jobs, jobs.submit('power', pow, 2, 3,
+                                              on_success=lambda result: time.sleep(0.5) or result)['id'])
+        assert slow['status'] == 'succeeded' and slow['timing']['run_ms'] < 500, slow['timing']
+        print(f"✅ run_ms {slow['timing']['run_ms']} ms with a 500 ms on_success")
+
+        # Test 2: another process on the same database sees the job
+        print("\nTest 2: Status from another worker")
+        seen = other_worker.get_job(job['id'])
+        assert seen['status'] == 'succeeded' and seen['result'] == {'value': 1024}, seen
+        assert seen['context'] == {'n': 10} and seen['timing']['run_ms'] is not None, seen
+        failed = wait_for_job(other_worker, jobs.submit('power', pow, 'a', 2)['id'])
+        assert failed['status'] == 'failed' and failed['error'], failed
+        assert other_worker.get_job('missing') is None
+        print(f"✅ Other worker sees results and errors ({failed['error'][:40]}...)")
+
+        # Test 3: the queue is bounded per process
+        print("\nTest 3: Bounded queue")
+        queued = [jobs.submit('sleep', time.sleep, 0.5) for _ in range(2)]
+        try:
+            jobs.submit('sleep', time.sleep, 0.5)
+            assert False, "the queue should be full"
+        except JobQueueFullError as e:
+            print(f"✅ Rejected: {e}")
+        for job in queued:
+            wait_for_job(other_worker, job['id'])
+
+        # Test 4: unfinished jobs of a server process that died are failed at start-up
+        print("\nTest 4: Orphaned jobs")
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO transcode_jobs (id, type, status, context, created, pid) "
+                     "VALUES ('orphan', 'mp3_rendition', 'queued', '{}', ?, ?)", (time.time(), child.pid))
+        conn.commit()
+        conn.close()
+        orphan = TranscodeJobService(pool=pool, db_path=db_path).get_job('orphan')
+        assert orphan['status'] == 'failed' and orphan['error'] == 'Server process exited', orphan
+        print("✅ Orphaned job reported as failed")
+
+    pool.shutdown()
+    print("\n🎉 All transcode job tests passed!")
+    return True
+
+
+# Workers are spawned, so the test must only run when executed as a script
+if __name__ == "__main__":
+    success = test_transcode_jobs()
+    sys.exit(0 if success else 1)
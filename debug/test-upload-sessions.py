@@ -0,0 +1,121 @@
+# Rules applied
+"""
+Test script for resumable chunked uploads
+Uploads in chunks, resumes after a dropped chunk and a restart, and checks limits and validation
+"""
+
+import sys
+import os
+import io
+import hashlib
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from uploadSessionService import UploadSessionService, UploadLimitError, UploadConflictError
+
+
+class DroppedStream(io.BytesIO):
+    """A request body whose connection drops after a number of bytes"""
+
+    def __init__(self, data, drop_after):
+        super().__init__(data)
+        self.drop_after = drop_after
+
+    def read(self, size=-1):
+        if self.tell() >= self.drop_after:
+            raise ConnectionResetError('client disconnected')
+        return super().read(min(size, self.drop_after - self.tell()))
+
+
+def test_upload_sessions():
+    """Test chunked upload, resume, hashing, limits and validation"""
+    print("🧪 Testing Upload Session Service")
+    print("=" * 50)
+
+    data = b'ID3' + os.urandom(300000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'uploads.db')
+        staging = os.path.join(temp_dir, '.uploads')
+        service = UploadSessionService(staging, db_path, max_file_size=1000000, max_chunk_size=100000,
+                                       max_sessions=3)
+
+        # Test 1: a chunk that drops midway commits what arrived
+        print("Test 1: Dropped chunk")
+        session = service.create('song.mp3', len(data), sha256)
+        upload_id = session['upload_id']
+        try:
+            service.write_chunk(upload_id, 0, DroppedStream(data[:100000], 60000), 100000)
+            assert False, "the dropped stream should raise"
+        except ConnectionResetError:
+            pass
+        assert service.get(upload_id)['offset'] == 60000
+        print("✅ Resumes from 60000 after the connection dropped")
+
+        # Test 2: a chunk at the wrong offset is a conflict that reports the committed offset
+        print("\nTest 2: Offset conflict")
+        try:
+            service.write_chunk(upload_id, 0, io.BytesIO(data[:1000]), 1000)
+            assert False, "a stale offset should be rejected"
+        except UploadConflictError as e:
+            assert e.committed == 60000
+            print(f"✅ Rejected: {e}")
+
+        # Test 3: a restart keeps the offset and re-hashes the committed bytes
+        print("\nTest 3: Restart and finish")
+        service = UploadSessionService(staging, db_path, max_file_size=1000000, max_chunk_size=100000,
+                                       max_sessions=3)
+        offset = service.get(upload_id)['offset']
+        while offset < len(data):
+            chunk = data[offset:offset + 100000]
+            offset = service.write_chunk(upload_id, offset, io.BytesIO(chunk), len(chunk))['offset']
+        target = os.path.join(temp_dir, 'song.mp3')
+        result = service.finalize(upload_id, target)
+        assert result['sha256'] == sha256 and result['format'] == 'mp3'
+        with open(target, 'rb') as f:
+            assert f.read() == data
+        assert service.get(upload_id) is None and not os.listdir(staging)
+        print(f"✅ Finalized {result['size']} bytes, sha256 {result['sha256'][:12]}")
+
+        # Test 4: limits
+        print("\nTest 4: Limits")
+        for attempt in (lambda: service.create('big.mp3', 2000000),
+                        lambda: service.write_chunk(service.create('a.mp3', 200000)['upload_id'], 0,
+                                                    io.BytesIO(b'x' * 150000), 150000)):
+            try:
+                attempt()
+                assert False, "the limit should be enforced"
+            except UploadLimitError as e:
+                print(f"✅ Rejected: {e}")
+        service.create('b.mp3', 10)
+        service.create('c.mp3', 10)
+        try:
+            service.create('d.mp3', 10)
+            assert False, "the session limit should be enforced"
+        except UploadLimitError as e:
+            print(f"✅ Rejected: {e}")
+
+        # Test 5: hash and content checks on finalize
+        print("\nTest 5: Content checks")
+        service = UploadSessionService(staging, os.path.join(temp_dir, 'checks.db'), max_file_size=1000000,
+                                       max_chunk_size=100000)
+        for filename, body, expected in (('e.wav', b'ID3' + b'\0' * 13, None),
+                                         ('f.mp3', b'ID3' + b'\0' * 13, '0' * 64)):
+            upload_id = service.create(filename, len(body), expected)['upload_id']
+            service.write_chunk(upload_id, 0, io.BytesIO(body), len(body))
+            try:
+                service.finalize(upload_id, os.path.join(temp_dir, filename))
+                assert False, f"{filename} should be rejected"
+            except ValueError as e:
+                print(f"✅ Rejected {filename}: {e}")
+
+    print("\n🎉 All upload session tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_upload_sessions()
+    sys.exit(0 if success else 1)
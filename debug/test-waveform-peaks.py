@@ -0,0 +1,98 @@
+# Rules applied
+"""
+Test script for waveform peak pyramids
+Builds a peak file, checks the levels against a plain Python min/max and reads windows
+"""
+
+import sys
+import os
+import wave
+import struct
+import tempfile
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from waveformPeakService import WaveformPeakService, build_peak_file, BASE_SAMPLES_PER_PEAK
+
+
+def create_test_wav(path, seconds=70, sample_rate=8000):
+    """Write a stereo sawtooth WAV with a drifting offset; returns the samples"""
+    samples = []
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        frames = bytearray()
+        for i in range(seconds * sample_rate + 100):
+            left = (i * 7) % 2000 - 1000 + (i // 400) % 1000
+            right = -left // 2
+            samples.append((left, right))
+            frames += struct.pack('<hh', left, right)
+        wav_file.writeframes(bytes(frames))
+    return samples
+
+
+def test_waveform_peaks():
+    """Test the peak pyramid file and window lookups"""
+    print("🧪 Testing Waveform Peak Service")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'source.wav')
+        samples = create_test_wav(source_path)
+        service = WaveformPeakService(os.path.join(temp_dir, 'peaks'))
+
+        # Test 1: build the pyramid
+        print("Test 1: Build peak file")
+        path = service.ensure(source_path, 'a' * 64)
+        result_size = os.path.getsize(path)
+        overview = service.window('a' * 64)
+        levels = overview['zoom_levels']
+        assert levels > 1 and len(overview['peaks']) <= 1024
+        print(f"✅ {levels} levels, {result_size} bytes, overview of {len(overview['peaks'])} peaks")
+
+        # Test 2: the finest level matches a plain min/max of every block
+        print("\nTest 2: Finest level")
+        finest = service.window('a' * 64, zoom=levels - 1)
+        assert finest['samples_per_peak'] == BASE_SAMPLES_PER_PEAK
+        for index in (0, 5, len(finest['peaks']) - 1):
+            block = samples[index * BASE_SAMPLES_PER_PEAK:(index + 1) * BASE_SAMPLES_PER_PEAK]
+            values = [value for frame in block for value in frame]
+            assert list(finest['peaks'][index]) == [min(values), max(values)], index
+        print(f"✅ {len(finest['peaks'])} peaks match, including the partial last block")
+
+        # Test 3: a window covers the requested seconds
+        print("\nTest 3: Window")
+        window = service.window('a' * 64, zoom=levels - 1, start=2.0, end=3.0)
+        assert window['start'] <= 2.0 and window['end'] >= 3.0
+        assert window['start_index'] == 2 * 8000 // BASE_SAMPLES_PER_PEAK
+        coarse = service.window('a' * 64, zoom=levels - 2, start=2.0, end=3.0)
+        assert coarse['samples_per_peak'] == 2 * window['samples_per_peak']
+        print(f"✅ {window['start']}s-{window['end']}s: {len(window['peaks'])} peaks, "
+              f"{len(coarse['peaks'])} one zoom level out")
+
+        # Test 4: invalid requests
+        print("\nTest 4: Validation")
+        for kwargs in ({'zoom': levels}, {'zoom': -1}, {'start': 5, 'end': 2}):
+            try:
+                service.window('a' * 64, **kwargs)
+                assert False, f"{kwargs} should be rejected"
+            except ValueError as e:
+                print(f"✅ Rejected {kwargs}: {e}")
+
+        # Test 5: building again replaces the file atomically
+        print("\nTest 5: Rebuild")
+        result = build_peak_file(source_path, path)
+        assert result['levels'] == levels and not os.path.exists(path + '.part')
+        print(f"✅ Rebuilt in {result['compute_ms']} ms")
+        service._open.clear()
+
+    print("\n🎉 All waveform peak tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_waveform_peaks()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,77 @@
+# Rules applied
+"""
+Test script for the production server settings
+Checks command-line and environment precedence, validation, the engine choice and the encoder pool size
+"""
+
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, backend_dir)
+
+from wsgiServer import load_settings, encoder_workers, DEFAULT_SETTINGS, SETTING_ENVIRONMENT
+
+
+def test_wsgi_settings():
+    """Test load_settings"""
+    print("🧪 Testing WSGI Server Settings")
+    print("=" * 50)
+
+    for variable in SETTING_ENVIRONMENT.values():
+        os.environ.pop(variable, None)
+
+    # Test 1: defaults
+    print("Test 1: Defaults")
+    settings = load_settings(['--engine', 'werkzeug'])
+    for name, default in DEFAULT_SETTINGS.items():
+        if name != 'engine':
+            assert settings[name] == default, name
+    print(f"✅ {settings}")
+
+    # Test 2: the command line wins over the environment
+    print("\nTest 2: Precedence")
+    os.environ['WEB_THREADS'] = '4'
+    os.environ['BACKEND_PORT'] = '5001'
+    settings = load_settings(['--engine', 'werkzeug', '--threads', '16'])
+    assert settings['threads'] == 16 and settings['port'] == 5001
+    print("✅ --threads 16 over WEB_THREADS=4, BACKEND_PORT=5001 from the environment")
+
+    # Test 3: invalid values are rejected
+    print("\nTest 3: Validation")
+    for variable, value in (('BACKEND_PORT', '70000'), ('WEB_PROCESSES', '0'), ('KEEPALIVE', '-1'),
+                            ('ENCODER_WORKERS', '-1'), ('REQUEST_TIMEOUT', 'soon'), ('SERVER_ENGINE', 'uwsgi')):
+        os.environ[variable] = value
+        try:
+            load_settings([])
+            assert False, f"{variable}={value} should be rejected"
+        except ValueError as e:
+            print(f"✅ Rejected {variable}={value}: {e}")
+        os.environ.pop(variable)
+
+    # Test 4: auto picks an installed production server
+    print("\nTest 4: Auto engine")
+    os.environ.pop('WEB_THREADS')
+    engine = load_settings([])['engine']
+    assert engine in ('waitress', 'gunicorn', 'werkzeug')
+    if os.name == 'nt':
+        assert engine != 'gunicorn'
+    print(f"✅ auto -> {engine}")
+
+    # Test 5: gunicorn workers share the CPU cores between their encoder pools
+    print("\nTest 5: Encoder pool size")
+    cores = os.cpu_count() or 1
+    settings = load_settings(['--engine', 'gunicorn', '--processes', '4'])
+    assert encoder_workers(settings) == max(1, cores // 4)
+    assert encoder_workers(load_settings(['--engine', 'waitress', '--processes', '4'])) == cores
+    assert encoder_workers(load_settings(['--engine', 'gunicorn', '--processes', '4', '--encoders', '3'])) == 3
+    print(f"✅ {cores} cores, 4 gunicorn workers -> {encoder_workers(settings)} encoders each; --encoders 3 -> 3")
+
+    print("\n🎉 All WSGI settings tests passed!")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_wsgi_settings()
+    sys.exit(0 if success else 1)
@@ -6,7 +6,7 @@ import FileUpload from './components/FileUpload';
 import RingtoneList from './components/RingtoneList';
 import ScheduleRingtone from './components/ScheduleRingtone';
 import { AudioFile } from './types/audio';
-import ringtoneService, { API_BASE_URL } from './services/ringtoneService';
+import ringtoneService, { getRenditionKey, getRingtoneStreamUrl } from './services/ringtoneService';
 
 type MainTabType = 'creator' | 'ringtones' | 'schedule';
 
@@ -34,11 +34,10 @@ function App() {
         // Convert backend ringtones to AudioFile format
         const existingRingtones: AudioFile[] = result.ringtones
           .map(ringtone => ({
-            id: ringtone.id,
+            id: getRenditionKey(ringtone),
             name: ringtone.original_name || ringtone.name,
-            url: `${API_BASE_URL}/ringtones/${ringtone.folder}/${ringtone.name}`,
+            url: getRingtoneStreamUrl(ringtone.folder || 'wav_ringtones', ringtone.name),
             duration: ringtone.duration || 0,
-            file: null as any, // We don't have the actual file object
             type: 'ringtone' as const,
             startTime: ringtone.start_time,
             endTime: ringtone.end_time
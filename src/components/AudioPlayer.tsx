@@ -1,7 +1,7 @@
 // Rules applied
 import React, { useState, useRef, useEffect, useCallback } from 'react';
 import { AudioFile } from '../types/audio';
-import ringtoneService from '../services/ringtoneService';
+import ringtoneService, { getRingtoneStreamUrl } from '../services/ringtoneService';
 
 interface AudioPlayerProps {
   audioFile: AudioFile;
@@ -21,7 +21,8 @@ const AudioPlayer: React.FC<AudioPlayerProps> = ({ audioFile, onRingtoneCreated
   
   const audioRef = useRef<HTMLAudioElement>(null);
   const progressRef = useRef<HTMLDivElement>(null);
-  const audioContextRef = useRef<AudioContext | null>(null);
+  // Backend id of the uploaded original, so further cuts of the same file skip the upload
+  const originalRef = useRef<{ fileId: string; originalId: string } | null>(null);
 
   useEffect(() => {
     if (audioRef.current) {
@@ -140,123 +141,98 @@ const AudioPlayer: React.FC<AudioPlayerProps> = ({ audioFile, onRingtoneCreated
       setIsCreatingRingtone(true);
       setError(null);
 
-      // Create AudioContext if not exists
-      if (!audioContextRef.current) {
-        audioContextRef.current = new (window.AudioContext || (window as any).webkitAudioContext)();
+      // Upload the original once per file (resumable, and skipped when the server already has
+      // its content); every cut after that only sends the range
+      let originalId = originalRef.current?.fileId === audioFile.id ? originalRef.current.originalId : null;
+      if (!originalId) {
+        console.log('🔄 Uploading original to backend...');
+        let sourceFile: File;
+        if (audioFile.file instanceof File) {
+          sourceFile = audioFile.file;
+        } else {
+          // Ringtones opened from the list only have a URL
+          const response = await fetch(audioFile.url);
+          const blob = await response.blob();
+          sourceFile = new File([blob], audioFile.name, { type: blob.type });
+        }
+        let upload = await ringtoneService.uploadAudioFile(sourceFile);
+        if (upload.conflict) {
+          // Another original already has this name; keep both by uploading under a unique name
+          const dot = sourceFile.name.lastIndexOf('.');
+          const [base, ext] = dot > 0 ? [sourceFile.name.slice(0, dot), sourceFile.name.slice(dot)] : [sourceFile.name, ''];
+          console.log('⚠️ Name taken on the backend, uploading under a unique name');
+          upload = await ringtoneService.uploadAudioFile(sourceFile, undefined, `${base}_${Date.now()}${ext}`);
+        }
+        if (!upload.success || !upload.id) {
+          throw new Error(upload.error || 'Upload of the original failed');
+        }
+        originalId = upload.id;
+        originalRef.current = { fileId: audioFile.id, originalId };
       }
 
-      const audioContext = audioContextRef.current;
-      
-      // Fetch the audio file
-      const response = await fetch(audioFile.url);
-      const arrayBuffer = await response.arrayBuffer();
-      
-      // Decode the audio data
-      const audioBuffer = await audioContext.decodeAudioData(arrayBuffer);
-      
-      // Calculate the sample positions
-      const sampleRate = audioBuffer.sampleRate;
-      const startSample = Math.floor(startTime * sampleRate);
-      const endSample = Math.floor(endTime * sampleRate);
-      const segmentLength = endSample - startSample;
-      
-      // Create a new audio buffer for the segment
-      const segmentBuffer = audioContext.createBuffer(
-        audioBuffer.numberOfChannels,
-        segmentLength,
-        sampleRate
-      );
-      
-      // Copy the audio data for each channel
-      for (let channel = 0; channel < audioBuffer.numberOfChannels; channel++) {
-        const channelData = audioBuffer.getChannelData(channel);
-        const segmentData = segmentBuffer.getChannelData(channel);
-        
-        for (let i = 0; i < segmentLength; i++) {
-          segmentData[i] = channelData[startSample + i];
+      // The backend cuts the original and keeps its format; a WAV source is copied frame for frame
+      console.log('✂️ Cutting ringtone on the backend...');
+      const saveResult = await ringtoneService.cutRingtone(originalId, startTime, endTime, {
+        originalName: audioFile.name,
+      });
+      console.log('📥 Received response from backend:', saveResult);
+
+      if (saveResult.success) {
+        console.log('🎵 SUCCESS: Ringtone created and saved to backend successfully!');
+        console.log('📁 Filename:', saveResult.filename);
+        console.log('📁 File path:', saveResult.file_path);
+        console.log('📁 Format:', saveResult.format);
+        console.log('📁 Folder:', saveResult.folder);
+
+        if (saveResult.mp3_available) {
+          console.log('🎵 MP3 version also available!');
+          console.log('📁 MP3 filename:', saveResult.mp3_filename);
+          console.log('📁 MP3 path:', saveResult.mp3_path);
         }
-      }
-      
-      // Convert the audio buffer to a blob
-      const offlineContext = new OfflineAudioContext(
-        segmentBuffer.numberOfChannels,
-        segmentBuffer.length,
-        segmentBuffer.sampleRate
-      );
-      
-      const source = offlineContext.createBufferSource();
-      source.buffer = segmentBuffer;
-      source.connect(offlineContext.destination);
-      source.start();
-      
-      const renderedBuffer = await offlineContext.startRendering();
-      
-      // Convert to WAV format (MP3 encoding is not supported in browsers)
-      const wavBlob = audioBufferToWav(renderedBuffer);
-      const ringtoneFile = new File([wavBlob], `ringtone_${Date.now()}.wav`, { type: 'audio/wav' });
-      const ringtoneUrl = URL.createObjectURL(wavBlob);
-
-      const ringtone: AudioFile = {
-        id: Date.now().toString(),
-        name: `Ringtone_${audioFile.name}`,
-        url: ringtoneUrl,
-        duration: endTime - startTime,
-        file: ringtoneFile,
-        type: 'ringtone',
-        startTime,
-        endTime
-      };
-
-      onRingtoneCreated(ringtone);
-      
-             // Save ringtone to backend
-       try {
-         console.log('🔄 Sending ringtone to backend...');
-         const saveResult = await ringtoneService.saveRingtone(ringtone);
-         console.log('📥 Received response from backend:', saveResult);
-         console.log('📥 Response type:', typeof saveResult);
-         console.log('📥 Response keys:', Object.keys(saveResult));
-         
-         if (saveResult.success) {
-           console.log('🎵 SUCCESS: Ringtone created and saved to backend successfully!');
-           console.log('📁 Filename:', saveResult.filename);
-           console.log('📁 File path:', saveResult.file_path);
-           console.log('📁 Format:', saveResult.format);
-           console.log('📁 Folder:', saveResult.folder);
-           
-           if (saveResult.mp3_available) {
-             console.log('🎵 MP3 version also available!');
-             console.log('📁 MP3 filename:', saveResult.mp3_filename);
-             console.log('📁 MP3 path:', saveResult.mp3_path);
-           }
-           
-           // Show success message to user
-           setError(null);
-           
-           let successMessage = `🎵 SUCCESS: Ringtone created successfully!\n\n📁 ${saveResult.format?.toUpperCase()} format saved to: ${saveResult.folder}\n📁 ${saveResult.format?.toUpperCase()} filename: ${saveResult.filename}`;
-           
-           if (saveResult.mp3_available) {
-             successMessage += `\n\n🎵 MP3 format also created successfully!\n📁 MP3 saved to: mp3_ringtones\n📁 MP3 filename: ${saveResult.mp3_filename}\n\n✅ Both WAV and MP3 formats are now available!`;
-           } else {
-             successMessage += `\n\n⚠️ MP3 version creation failed or skipped\n💡 Only ${saveResult.format?.toUpperCase()} format was created`;
-           }
-           
-           setSuccessMessage(successMessage);
-          
-          // Auto-hide success message after 10 seconds
-          setTimeout(() => {
-            setSuccessMessage(null);
-          }, 10000);
+
+        const ringtone: AudioFile = {
+          id: `${saveResult.metadata?.id || Date.now()}:${saveResult.format}`,
+          name: `Ringtone_${audioFile.name}`,
+          url: getRingtoneStreamUrl(saveResult.folder, saveResult.filename),
+          duration: saveResult.metadata?.duration ?? endTime - startTime,
+          type: 'ringtone',
+          startTime: saveResult.metadata?.start_time ?? startTime,
+          endTime: saveResult.metadata?.end_time ?? endTime
+        };
+
+        onRingtoneCreated(ringtone);
+
+        // Show success message to user
+        setError(null);
+
+        let successMessage = `🎵 SUCCESS: Ringtone created successfully!\n\n📁 ${saveResult.format?.toUpperCase()} format saved to: ${saveResult.folder}\n📁 ${saveResult.format?.toUpperCase()} filename: ${saveResult.filename}`;
+
+        if (saveResult.mp3_available) {
+          successMessage += `\n\n🎵 MP3 format also created successfully!\n📁 MP3 saved to: mp3_ringtones\n📁 MP3 filename: ${saveResult.mp3_filename}\n\n✅ Both WAV and MP3 formats are now available!`;
+        } else if (saveResult.mp3_pending && saveResult.job_id) {
+          successMessage += `\n\n🔄 MP3 version is being created in the background\n📁 MP3 filename: ${saveResult.mp3_filename}`;
+          const baseMessage = successMessage;
+          ringtoneService.waitForJob(saveResult.job_id).then(job => {
+            if (job?.status === 'succeeded') {
+              setSuccessMessage(`${baseMessage}\n\n✅ MP3 format created in ${job.timing.run_ms} ms`);
+            } else if (job?.status === 'failed') {
+              setSuccessMessage(`${baseMessage}\n\n⚠️ MP3 version creation failed: ${job.error}`);
+            }
+          });
         } else {
-          console.error('Failed to save ringtone to backend:', saveResult.error);
-          setError(`Ringtone created but failed to save to backend: ${saveResult.error}`);
+          successMessage += `\n\n⚠️ MP3 version creation failed or skipped\n💡 Only ${saveResult.format?.toUpperCase()} format was created`;
         }
-      } catch (saveError) {
-        console.error('Error saving ringtone to backend:', saveError);
-        setError(`Ringtone created but failed to save to backend: ${saveError}`);
+
+        setSuccessMessage(successMessage);
+
+        // Auto-hide success message after 10 seconds
+        setTimeout(() => {
+          setSuccessMessage(null);
+        }, 10000);
+      } else {
+        console.error('Failed to cut ringtone on backend:', saveResult.error);
+        setError(`Error creating ringtone: ${saveResult.error}`);
       }
-      
-      setError(null);
     } catch (error) {
       console.error('Error creating ringtone:', error);
       setError(`Error creating ringtone: ${error}`);
@@ -265,54 +241,6 @@ const AudioPlayer: React.FC<AudioPlayerProps> = ({ audioFile, onRingtoneCreated
     }
   }, [startTime, endTime, audioFile, onRingtoneCreated]);
 
-  // Helper function to convert AudioBuffer to WAV format
-  const audioBufferToWav = (buffer: AudioBuffer): Blob => {
-    const numChannels = buffer.numberOfChannels;
-    const sampleRate = buffer.sampleRate;
-    const length = buffer.length;
-    
-    // WAV file header
-    const arrayBuffer = new ArrayBuffer(44 + length * numChannels * 2);
-    const view = new DataView(arrayBuffer);
-    
-    // RIFF chunk descriptor
-    const writeString = (offset: number, string: string) => {
-      for (let i = 0; i < string.length; i++) {
-        view.setUint8(offset + i, string.charCodeAt(i));
-      }
-    };
-    
-    writeString(0, 'RIFF');
-    view.setUint32(4, 36 + length * numChannels * 2, true);
-    writeString(8, 'WAVE');
-    
-    // fmt sub-chunk
-    writeString(12, 'fmt ');
-    view.setUint32(16, 16, true);
-    view.setUint16(20, 1, true);
-    view.setUint16(22, numChannels, true);
-    view.setUint32(24, sampleRate, true);
-    view.setUint32(28, sampleRate * numChannels * 2, true);
-    view.setUint16(32, numChannels * 2, true);
-    view.setUint16(34, 16, true);
-    
-    // data sub-chunk
-    writeString(36, 'data');
-    view.setUint32(40, length * numChannels * 2, true);
-    
-    // Write audio data
-    let offset = 44;
-    for (let i = 0; i < length; i++) {
-      for (let channel = 0; channel < numChannels; channel++) {
-        const sample = Math.max(-1, Math.min(1, buffer.getChannelData(channel)[i]));
-        view.setInt16(offset, sample < 0 ? sample * 0x8000 : sample * 0x7FFF, true);
-        offset += 2;
-      }
-    }
-    
-    return new Blob([arrayBuffer], { type: 'audio/wav' });
-  };
-
   return (
     <div className="audio-player">
       <div className="audio-info">
@@ -1,7 +1,15 @@
 // Rules applied
 import React, { useState, useRef, useEffect } from 'react';
 import { AudioFile } from '../types/audio';
-import ringtoneService, { RingtoneInfo, API_BASE_URL } from '../services/ringtoneService';
+import ringtoneService, { RingtoneInfo, ListRingtonesParams, getRenditionKey, getRingtoneStreamUrl } from '../services/ringtoneService';
+
+// Page size and fields requested from the backend listing (file_path is not needed by the list)
+const RINGTONE_PAGE_PARAMS: ListRingtonesParams = {
+  limit: 100,
+  sort: 'created',
+  order: 'desc',
+  fields: ['id', 'name', 'size', 'created', 'modified', 'format', 'folder', 'original_name', 'start_time', 'end_time', 'duration', 'has_metadata']
+};
 
 interface RingtoneListProps {
   ringtones: AudioFile[];
@@ -15,6 +23,7 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
   const [error, setError] = useState<string | null>(null);
   const [backendRingtones, setBackendRingtones] = useState<RingtoneInfo[]>([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState<string>('');
   const audioRefs = useRef<{ [key: string]: HTMLAudioElement }>({});
 
@@ -30,16 +39,18 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
       setIsLoading(true);
       setError(null);
       
-      const result = await ringtoneService.listRingtones();
+      const result = await ringtoneService.listRingtonesPage(RINGTONE_PAGE_PARAMS);
       console.log('🔄 RingtoneList: Backend response:', result);
       
       if (result.success && result.ringtones) {
         setBackendRingtones(result.ringtones);
+        setNextCursor(result.next_cursor || null);
         console.log('✅ RingtoneList: Successfully loaded backend ringtones:', result.ringtones);
         console.log('✅ RingtoneList: Count:', result.ringtones.length);
       } else {
         console.warn('⚠️ RingtoneList: Backend response indicates failure:', result);
         setBackendRingtones([]);
+        setNextCursor(null);
         if (result.error) {
           setError(`Failed to load ringtones: ${result.error}`);
         }
@@ -53,6 +64,32 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
     }
   };
 
+  // Load the next page of ringtones and append it to the list
+  const loadMoreBackendRingtones = async () => {
+    if (!nextCursor) {
+      return;
+    }
+    try {
+      setIsLoading(true);
+      setError(null);
+      
+      const result = await ringtoneService.listRingtonesPage({ ...RINGTONE_PAGE_PARAMS, cursor: nextCursor });
+      if (result.success && result.ringtones) {
+        const page = result.ringtones;
+        setBackendRingtones(prev => [...prev, ...page]);
+        setNextCursor(result.next_cursor || null);
+        console.log('✅ RingtoneList: Loaded next page:', page.length);
+      } else if (result.error) {
+        setError(`Failed to load more ringtones: ${result.error}`);
+      }
+    } catch (error) {
+      console.error('❌ RingtoneList: Error loading more ringtones:', error);
+      setError(`Error loading more ringtones: ${error}`);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   // Helper function to sort ringtones by creation time (newest first)
   const sortRingtonesByTime = (ringtones: RingtoneInfo[]) => {
     return ringtones.sort((a, b) => {
@@ -87,11 +124,10 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
   // Helper function to convert RingtoneInfo to AudioFile format
   const convertToAudioFile = (ringtone: RingtoneInfo): AudioFile => {
     return {
-      id: ringtone.id,
+      id: getRenditionKey(ringtone),
       name: ringtone.original_name || ringtone.name,
-      url: `${API_BASE_URL}/ringtones/${ringtone.folder || 'wav_ringtones'}/${ringtone.name}`,
+      url: getRingtoneStreamUrl(ringtone.folder || 'wav_ringtones', ringtone.name),
       duration: ringtone.duration || 0,
-      file: null as any, // We don't have the actual file object
       type: 'ringtone' as const,
       startTime: ringtone.start_time,
       endTime: ringtone.end_time
@@ -124,7 +160,7 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
     });
   };
 
-  const handlePlay = (ringtone: AudioFile) => {
+  const handlePlay = (itemKey: string) => {
     try {
       // Stop any currently playing audio
       if (playingId && audioRefs.current[playingId]) {
@@ -133,10 +169,10 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
       }
 
       // Play the selected ringtone
-      const audio = audioRefs.current[ringtone.id];
+      const audio = audioRefs.current[itemKey];
       if (audio) {
         audio.play();
-        setPlayingId(ringtone.id);
+        setPlayingId(itemKey);
         
         // Reset when audio ends
         audio.onended = () => {
@@ -149,9 +185,9 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
     }
   };
 
-  const handleStop = (ringtone: AudioFile) => {
+  const handleStop = (itemKey: string) => {
     try {
-      const audio = audioRefs.current[ringtone.id];
+      const audio = audioRefs.current[itemKey];
       if (audio) {
         audio.pause();
         audio.currentTime = 0;
@@ -231,9 +267,10 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
   const renderRingtoneItem = (ringtone: RingtoneInfo | AudioFile, isLocal: boolean = false) => {
     const isLocalRingtone = isLocal;
     const ringtoneData = isLocalRingtone ? ringtone as AudioFile : ringtone as RingtoneInfo;
+    const itemKey = isLocalRingtone ? ringtoneData.id : getRenditionKey(ringtoneData as RingtoneInfo);
     
     return (
-      <div key={ringtoneData.id} className={`ringtone-item ${isLocalRingtone ? 'local' : 'saved'}`}>
+      <div key={itemKey} className={`ringtone-item ${isLocalRingtone ? 'local' : 'saved'}`}>
         <div className="ringtone-info">
           <h4>{ringtoneData.name}</h4>
           <p>Duration: {Math.floor(ringtoneData.duration || 0)}s</p>
@@ -249,17 +286,17 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
         </div>
         
         <div className="ringtone-controls">
-          {playingId === ringtoneData.id ? (
+          {playingId === itemKey ? (
             <button 
               className="stop-button"
-              onClick={() => handleStop(ringtoneData as AudioFile)}
+              onClick={() => handleStop(itemKey)}
             >
               ⏹️ Stop
             </button>
           ) : (
             <button 
               className="play-button"
-              onClick={() => handlePlay(ringtoneData as AudioFile)}
+              onClick={() => handlePlay(itemKey)}
             >
               ▶️ Play
             </button>
@@ -301,9 +338,9 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
         
         <audio
           ref={(el) => {
-            if (el) audioRefs.current[ringtoneData.id] = el;
+            if (el) audioRefs.current[itemKey] = el;
           }}
-          src={isLocalRingtone ? (ringtoneData as AudioFile).url : `${API_BASE_URL}/ringtones/${(ringtoneData as RingtoneInfo).folder || 'wav_ringtones'}/${(ringtoneData as RingtoneInfo).name}`}
+          src={isLocalRingtone ? (ringtoneData as AudioFile).url : getRingtoneStreamUrl((ringtoneData as RingtoneInfo).folder || 'wav_ringtones', (ringtoneData as RingtoneInfo).name)}
           preload="metadata"
         />
       </div>
@@ -447,6 +484,15 @@ const RingtoneList: React.FC<RingtoneListProps> = ({ ringtones, onRingtonesUpdat
       )}
 
       <div className="refresh-section">
+        {nextCursor && (
+          <button 
+            className="refresh-button"
+            onClick={loadMoreBackendRingtones}
+            disabled={isLoading}
+          >
+            ⬇️ Load More Ringtones
+          </button>
+        )}
         <button 
           className="refresh-button"
           onClick={loadBackendRingtones}
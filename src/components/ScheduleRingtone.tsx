@@ -1,7 +1,7 @@
 // Rules applied
 import React, { useState, useEffect } from 'react';
 import { AudioFile } from '../types/audio';
-import { ScheduledRingtone, ScheduleFormData, DAYS_OF_WEEK } from '../types/schedule';
+import { ScheduledRingtone, ScheduleFormData, ScheduleSource, DAYS_OF_WEEK } from '../types/schedule';
 import { scheduleService } from '../services/scheduleService';
 
 interface ScheduleRingtoneProps {
@@ -27,9 +27,9 @@ const ScheduleRingtone: React.FC<ScheduleRingtoneProps> = ({ ringtones }) => {
     loadSchedules();
   }, []);
 
-  const loadSchedules = () => {
+  const loadSchedules = async () => {
     try {
-      const allSchedules = scheduleService.getAllSchedules();
+      const allSchedules = await scheduleService.refreshSchedules();
       setSchedules(allSchedules);
       console.log('📅 Loaded schedules:', allSchedules.length);
     } catch (error) {
@@ -330,7 +330,7 @@ const ScheduleRingtone: React.FC<ScheduleRingtoneProps> = ({ ringtones }) => {
                     name="scheduleSource"
                     value="web"
                     checked={formData.scheduleSource === 'web'}
-                    onChange={(e) => setFormData(prev => ({ ...prev, scheduleSource: e.target.value as 'web' | 'device' }))}
+                    onChange={(e) => setFormData(prev => ({ ...prev, scheduleSource: e.target.value as ScheduleSource }))}
                   />
                   <span>🌐 Web-based (Browser only)</span>
                   <small>Ringtones play only when browser is open</small>
@@ -341,11 +341,22 @@ const ScheduleRingtone: React.FC<ScheduleRingtoneProps> = ({ ringtones }) => {
                     name="scheduleSource"
                     value="device"
                     checked={formData.scheduleSource === 'device'}
-                    onChange={(e) => setFormData(prev => ({ ...prev, scheduleSource: e.target.value as 'web' | 'device' }))}
+                    onChange={(e) => setFormData(prev => ({ ...prev, scheduleSource: e.target.value as ScheduleSource }))}
                   />
                   <span>💻 Device-based (Windows Task Scheduler)</span>
                   <small>Ringtones play even when browser is closed</small>
                 </label>
+                <label className="source-radio">
+                  <input
+                    type="radio"
+                    name="scheduleSource"
+                    value="server"
+                    checked={formData.scheduleSource === 'server'}
+                    onChange={(e) => setFormData(prev => ({ ...prev, scheduleSource: e.target.value as ScheduleSource }))}
+                  />
+                  <span>🖥️ Server alarm (backend, any OS)</span>
+                  <small>The backend plays the ringtone on time while it is running</small>
+                </label>
               </div>
             </div>
 
@@ -379,7 +390,7 @@ const ScheduleRingtone: React.FC<ScheduleRingtoneProps> = ({ ringtones }) => {
                   <h4>{schedule.ringtoneName}</h4>
                   <p><strong>Time:</strong> {schedule.time}</p>
                   <p><strong>Days:</strong> {formatDays(schedule.days)}</p>
-                  <p><strong>Method:</strong> {schedule.scheduleSource === 'web' ? '🌐 Web-based' : '💻 Device-based'}</p>
+                  <p><strong>Method:</strong> {schedule.scheduleSource === 'web' ? '🌐 Web-based' : schedule.scheduleSource === 'server' ? '🖥️ Server alarm' : '💻 Device-based'}</p>
                   <p><strong>Status:</strong> {getScheduleStatus(schedule)}</p>
                   {schedule.lastPlayed && (
                     <p><strong>Last played:</strong> {new Date(schedule.lastPlayed).toLocaleString()}</p>
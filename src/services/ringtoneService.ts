@@ -3,13 +3,21 @@ import { AudioFile } from '../types/audio';
 
 export const API_BASE_URL = 'http://localhost:5000/api';
 
+// Resumable uploads: chunk size (the server accepts up to 8 MB), retries per chunk, and the
+// localStorage prefix remembering unfinished uploads so the same file resumes after a reload
+const UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024;
+const MAX_CHUNK_RETRIES = 5;
+const UPLOAD_RESUME_PREFIX = 'ringtone-upload:';
+// Files up to this size are hashed before upload (the browser digest reads the whole file into memory)
+const DEDUP_HASH_MAX_SIZE = 64 * 1024 * 1024;
+
 export interface RingtoneInfo {
   id: string;
   name: string;
   size: number;
   created: string;
   modified: string;
-  file_path: string;
+  file_path?: string;
   original_name?: string;
   start_time?: number;
   end_time?: number;
@@ -21,6 +29,114 @@ export interface RingtoneInfo {
   folder?: string;
 }
 
+// WAV and MP3 renditions of a ringtone share its id, so UI keys need the format as well
+export const getRenditionKey = (ringtone: RingtoneInfo): string => `${ringtone.id}:${ringtone.format || ringtone.folder}`;
+
+// URL that plays a ringtone inline with seeking (Range) and revalidation (304) instead of downloading it
+export const getRingtoneStreamUrl = (folder: string, name: string): string =>
+  `${API_BASE_URL}/ringtones/${encodeURIComponent(folder)}/${encodeURIComponent(name)}?inline=true`;
+
+// Content-addressed URL of stored audio (the sha256 of an upload or ringtone); cached by the browser for good
+export const getContentUrl = (sha256: string): string => `${API_BASE_URL}/blobs/${sha256}`;
+
+export interface ListRingtonesParams {
+  limit?: number;
+  cursor?: string;
+  sort?: 'created' | 'size' | 'duration' | 'original_name';
+  order?: 'asc' | 'desc';
+  format?: string;
+  folder?: string;
+  min_duration?: number;
+  max_duration?: number;
+  has_metadata?: boolean;
+  name_prefix?: string;
+  fields?: (keyof RingtoneInfo)[];
+}
+
+export interface RingtoneChanges {
+  success: boolean;
+  since: number;
+  generation: number;
+  reset: boolean;  // true when the backend no longer has changes that old; reload the full list
+  added: RingtoneInfo[];
+  removed: { folder: string; name: string; id: string }[];
+  error?: string;
+}
+
+export interface BackgroundJob {
+  id: string;
+  type: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  context: Record<string, any>;
+  created: string;
+  started: string | null;
+  finished: string | null;
+  timing: { queue_ms: number | null; run_ms: number | null; total_ms: number | null };
+  result: any;
+  error: string | null;
+}
+
+export interface WaveformPeaks {
+  zoom: number;
+  zoomLevels: number;  // zoom 0 is the overview, zoomLevels - 1 the finest level
+  samplesPerPeak: number;
+  sampleRate: number;
+  startIndex: number;  // index of the first peak; it starts at startIndex * samplesPerPeak / sampleRate seconds
+  peaks: Int16Array;  // [min, max] pairs; divide by 32768 for -1..1
+}
+
+export interface SilenceReport {
+  success: boolean;
+  id?: string;
+  start?: number;
+  end?: number;
+  duration?: number;
+  silent?: boolean;  // no sound above the threshold in the range
+  leading_silence?: number;
+  trailing_silence?: number;
+  suggested_start?: number | null;
+  suggested_end?: number | null;
+  gaps?: { start: number; end: number; duration: number }[];
+  threshold_db?: number;
+  mode?: 'rms' | 'peak';
+  analysis_ms?: number;
+  error?: string;
+}
+
+export interface HookCandidate {
+  start: number;
+  end: number;
+  score: number;  // 0-1, repetition and loudness combined
+  repetition: number;  // similarity to the best repeat of the window
+  energy: number;
+  repeats_at: number | null;  // start of that repeat in seconds
+}
+
+export interface HookSuggestions {
+  success: boolean;
+  id?: string;
+  length?: number;
+  duration?: number;
+  candidates?: HookCandidate[];
+  cached?: boolean;
+  analysis_ms?: number;
+  error?: string;
+}
+
+// Auto-trim of a cut: true for the defaults (-50 dBFS RMS, 50 ms padding), or custom settings
+export type TrimSilence = boolean | { thresholdDb?: number; mode?: 'rms' | 'peak'; padding?: number };
+
+const trimSilenceFields = (trim?: TrimSilence) => {
+  if (!trim) return {};
+  const settings = trim === true ? {} : trim;
+  return {
+    trim_silence: true,
+    silence_threshold_db: settings.thresholdDb,
+    silence_mode: settings.mode,
+    trim_padding: settings.padding,
+  };
+};
+
 export interface ApiResponse<T> {
   success: boolean;
   message?: string;
@@ -28,6 +144,15 @@ export interface ApiResponse<T> {
   data?: T;
   ringtones?: T;  // For listRingtones endpoint
   count?: number;  // For listRingtones endpoint
+  next_cursor?: string | null;  // For paginated listRingtones requests
+  generation?: number;  // Catalog generation the listing was built from
+}
+
+// Failed resumable upload request, with the HTTP status (409: an original of that name has other content)
+class UploadError extends Error {
+  constructor(message: string, readonly status: number) {
+    super(message);
+  }
 }
 
 class RingtoneService {
@@ -60,7 +185,7 @@ class RingtoneService {
     }
   }
 
-  async saveRingtone(audioFile: AudioFile): Promise<{ 
+  async saveRingtone(audioFile: AudioFile, profiles?: string[]): Promise<{ 
     success: boolean;
     message: string;
     filename: string; 
@@ -73,6 +198,12 @@ class RingtoneService {
     folder: string;
     mp3_filename?: string;
     mp3_path?: string;
+    mp3_pending?: boolean;  // MP3 rendition queued as a background job
+    renditions?: Record<string, { profile: string; filename: string; folder: string; format: string; size: number }>;
+    renditions_pending?: string[];  // Encoder profiles still being encoded by the job
+    renditions_skipped?: string[];  // Encoder profiles skipped because nothing here can encode them
+    job_id?: string;
+    status_url?: string;
     error?: string;
   }> {
     try {
@@ -96,6 +227,9 @@ class RingtoneService {
       formData.append('start_time', (audioFile.startTime || 0).toString());
       formData.append('end_time', (audioFile.endTime || 0).toString());
       formData.append('duration', audioFile.duration.toString());
+      if (profiles && profiles.length > 0) {
+        formData.append('profiles', profiles.join(','));
+      }
 
       const response = await fetch(`${API_BASE_URL}/ringtones`, {
         method: 'POST',
@@ -127,10 +261,279 @@ class RingtoneService {
     }
   }
 
+  // Get the status of a background job (e.g. the MP3 rendition of a new ringtone)
+  async getJob(jobId: string): Promise<{ success: boolean; job?: BackgroundJob; error?: string }> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/jobs/${encodeURIComponent(jobId)}`);
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching job status:', error);
+      return {
+        success: false,
+        error: error instanceof Error ? error.message : 'Unknown error occurred',
+      };
+    }
+  }
+
+  // Poll a background job until it has finished or the timeout expires
+  async waitForJob(jobId: string, intervalMs: number = 500, timeoutMs: number = 60000): Promise<BackgroundJob | null> {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const result = await this.getJob(jobId);
+      if (!result.success || !result.job) {
+        return null;
+      }
+      if (result.job.status === 'succeeded' || result.job.status === 'failed') {
+        return result.job;
+      }
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+    return null;
+  }
+
+  // Cut a ringtone on the server from an original uploaded with uploadAudioFile; only the
+  // range is sent, the backend stream-copies or re-encodes the original itself
+  async cutRingtone(
+    originalId: string,
+    startTime: number,
+    endTime: number,
+    options: { format?: 'mp3' | 'wav'; originalName?: string; profiles?: string[]; trimSilence?: TrimSilence } = {}
+  ): Promise<Awaited<ReturnType<RingtoneService['saveRingtone']>>> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/originals/${encodeURIComponent(originalId)}/ringtones`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          start_time: startTime,
+          end_time: endTime,
+          format: options.format,
+          original_name: options.originalName,
+          profiles: options.profiles,
+          ...trimSilenceFields(options.trimSilence),
+        }),
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error cutting ringtone:', error);
+      return {
+        success: false,
+        message: 'Failed to cut ringtone',
+        filename: '',
+        file_path: '',
+        size: 0,
+        created: '',
+        metadata: {},
+        mp3_available: false,
+        format: '',
+        folder: '',
+        error: error instanceof Error ? error.message : 'Unknown error occurred',
+      };
+    }
+  }
+
+  // Cut several ringtones from one uploaded original; the server decodes it once and encodes the cuts in parallel
+  async batchCutRingtones(
+    originalId: string,
+    cuts: Array<{ startTime: number; endTime: number; name?: string }>,
+    profiles?: string[],
+    trimSilence?: TrimSilence
+  ): Promise<{
+    success: boolean;
+    source_id?: string;
+    created?: number;
+    failed?: number;
+    cuts?: Array<{
+      index: number;
+      success: boolean;
+      id?: string;
+      metadata?: any;
+      files?: Record<string, { filename: string; size: number; method: string; encode_ms?: number | null }>;
+      error?: string;
+    }>;
+    decode_ms?: number;
+    wall_ms?: number;
+    error?: string;
+  }> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/ringtones/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          original_id: originalId,
+          profiles,
+          ...trimSilenceFields(trimSilence),
+          cuts: cuts.map(cut => ({ start_time: cut.startTime, end_time: cut.endTime, name: cut.name })),
+        }),
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error batch cutting ringtones:', error);
+      return {
+        success: false,
+        error: error instanceof Error ? error.message : 'Unknown error occurred',
+      };
+    }
+  }
+
+  // Encoder profiles (codec, bitrate or VBR quality, sample rate, channels) that renditions can be created with
+  async getEncoderProfiles(): Promise<{
+    success: boolean;
+    profiles?: Record<string, {
+      name: string;
+      codec: string;
+      container: string;
+      extension: string;
+      bitrate: string | null;
+      quality: number | null;
+      sample_rate: number | null;
+      channels: number | null;
+      folder: string;
+    }>;
+    default_profiles?: string[];
+    error?: string;
+  }> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/encoder-profiles`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error getting encoder profiles:', error);
+      return { success: false, error: error instanceof Error ? error.message : 'Unknown error occurred' };
+    }
+  }
+
+  // Leading/trailing silence and quiet gaps of an uploaded original, with suggested start/end times
+  async getSilence(
+    originalId: string,
+    options: { start?: number; end?: number; thresholdDb?: number; minSilence?: number; mode?: 'rms' | 'peak'; padding?: number } = {}
+  ): Promise<SilenceReport> {
+    try {
+      const query = new URLSearchParams();
+      const params: Record<string, number | string | undefined> = {
+        start: options.start,
+        end: options.end,
+        threshold_db: options.thresholdDb,
+        min_silence: options.minSilence,
+        mode: options.mode,
+        padding: options.padding,
+      };
+      Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined) query.set(key, String(value));
+      });
+      const response = await fetch(`${API_BASE_URL}/originals/${encodeURIComponent(originalId)}/silence?${query}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error detecting silence:', error);
+      return { success: false, error: error instanceof Error ? error.message : 'Unknown error occurred' };
+    }
+  }
+
+  // Candidate ringtone windows of an uploaded original (its catchiest, most repeated sections), best first
+  async getHookSuggestions(originalId: string, length: number = 30, count: number = 5): Promise<HookSuggestions> {
+    try {
+      const query = new URLSearchParams({ length: String(length), count: String(count) });
+      const response = await fetch(`${API_BASE_URL}/originals/${encodeURIComponent(originalId)}/hooks?${query}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Error locating hooks:', error);
+      return { success: false, error: error instanceof Error ? error.message : 'Unknown error occurred' };
+    }
+  }
+
+  // Waveform peaks of an uploaded original for the visible window, in the compact binary format
+  async getOriginalPeaks(
+    originalId: string,
+    window: { zoom?: number; start?: number; end?: number } = {}
+  ): Promise<WaveformPeaks> {
+    const query = new URLSearchParams({ format: 'binary' });
+    if (window.zoom !== undefined) query.set('zoom', String(window.zoom));
+    if (window.start !== undefined) query.set('start', String(window.start));
+    if (window.end !== undefined) query.set('end', String(window.end));
+
+    const response = await fetch(`${API_BASE_URL}/originals/${encodeURIComponent(originalId)}/peaks?${query}`);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const header = (name: string) => Number(response.headers.get(`X-Peaks-${name}`));
+    const buffer = await response.arrayBuffer();
+    const view = new DataView(buffer);
+    const peaks = new Int16Array(buffer.byteLength / 2);
+    for (let i = 0; i < peaks.length; i++) {
+      peaks[i] = view.getInt16(i * 2, true);
+    }
+    return {
+      zoom: header('Zoom'),
+      zoomLevels: header('Zoom-Levels'),
+      samplesPerPeak: header('Samples-Per-Peak'),
+      sampleRate: header('Sample-Rate'),
+      startIndex: header('Start-Index'),
+      peaks,
+    };
+  }
+
   async listRingtones(): Promise<ApiResponse<RingtoneInfo[]>> {
     return this.makeRequest<RingtoneInfo[]>('/ringtones');
   }
 
+  // Fetch one page of ringtones; pass the returned next_cursor to get the following page
+  async listRingtonesPage(params: ListRingtonesParams = {}): Promise<ApiResponse<RingtoneInfo[]>> {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value === undefined || value === null || value === '') {
+        return;
+      }
+      query.append(key, Array.isArray(value) ? value.join(',') : String(value));
+    });
+    return this.makeRequest<RingtoneInfo[]>(`/ringtones?${query.toString()}`);
+  }
+
+  // Fetch only the ringtones added or removed since a catalog generation
+  async getRingtoneChanges(since: number, fields?: (keyof RingtoneInfo)[]): Promise<RingtoneChanges> {
+    try {
+      const query = new URLSearchParams({ since: since.toString() });
+      if (fields && fields.length > 0) {
+        query.append('fields', fields.join(','));
+      }
+
+      const response = await fetch(`${API_BASE_URL}/ringtones/changes?${query.toString()}`);
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching ringtone changes:', error);
+      return {
+        success: false,
+        since,
+        generation: since,
+        reset: false,
+        added: [],
+        removed: [],
+        error: error instanceof Error ? error.message : 'Unknown error occurred',
+      };
+    }
+  }
+
   async downloadRingtone(filename: string, folder?: string): Promise<void> {
     try {
       let endpoint = `/ringtones/${filename}`;
@@ -174,32 +577,106 @@ class RingtoneService {
     });
   }
 
-  async uploadAudioFile(file: File): Promise<ApiResponse<{ filename: string; file_path: string; size: number; uploaded: string }>> {
+  // Upload an original with the resumable protocol: the file is sent in chunks, and a dropped
+  // chunk (or a retry of the same file after a reload) continues from the server's committed offset
+  async uploadAudioFile(
+    file: File,
+    onProgress?: (uploaded: number, total: number) => void,
+    filename: string = file.name
+  ): Promise<ApiResponse<{ filename: string; file_path: string; size: number; uploaded: string }> & { id?: string; peaks_job_id?: string | null; sha256?: string; dedup?: boolean; conflict?: boolean }> {
+    const resumeKey = `${UPLOAD_RESUME_PREFIX}${filename}:${file.size}:${file.lastModified}`;
+    let uploadId: string | null = null;
     try {
-      const formData = new FormData();
-      formData.append('file', file);
-
-      const response = await fetch(`${API_BASE_URL}/upload`, {
-        method: 'POST',
-        body: formData,
-      });
+      uploadId = localStorage.getItem(resumeKey);
+      let offset = uploadId ? await this.getUploadOffset(uploadId) : null;
+      if (uploadId === null || offset === null) {
+        const sha256 = await this.hashFile(file);
+        const created = await this.uploadRequest('', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ filename, size: file.size, sha256 }),
+        });
+        if (created.dedup) {
+          // The server already stores this content and linked it under the new name
+          onProgress?.(file.size, file.size);
+          return created;
+        }
+        uploadId = created.upload.upload_id as string;
+        offset = 0;
+        localStorage.setItem(resumeKey, uploadId);
+      }
 
-      if (!response.ok) {
-        const errorData = await response.json().catch(() => ({}));
-        throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+      let failures = 0;
+      while (offset < file.size) {
+        onProgress?.(offset, file.size);
+        try {
+          const result = await this.uploadRequest(`/${uploadId}`, {
+            method: 'PUT',
+            headers: { 'Upload-Offset': String(offset) },
+            body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+          });
+          offset = result.upload.offset as number;
+          failures = 0;
+        } catch (error) {
+          // Ask the server how much it kept, then continue from there
+          failures += 1;
+          const committed = await this.getUploadOffset(uploadId);
+          if (committed === null || failures > MAX_CHUNK_RETRIES) {
+            throw error;
+          }
+          offset = committed;
+        }
       }
+      onProgress?.(file.size, file.size);
 
-      const data = await response.json();
+      const data = await this.uploadRequest(`/${uploadId}/finalize`, { method: 'POST' });
+      localStorage.removeItem(resumeKey);
       return data;
     } catch (error) {
       console.error('Error uploading audio file:', error);
+      // An original of that name exists with other content: drop the session so the caller
+      // can upload again under another name
+      const conflict = error instanceof UploadError && error.status === 409;
+      if (conflict && uploadId) {
+        localStorage.removeItem(resumeKey);
+        await fetch(`${API_BASE_URL}/uploads/${uploadId}`, { method: 'DELETE' }).catch(() => undefined);
+      }
       return {
         success: false,
+        conflict,
         error: error instanceof Error ? error.message : 'Unknown error occurred',
       };
     }
   }
 
+  // SHA-256 of a file, sent with a new upload so content the server already has is not transferred
+  private async hashFile(file: File): Promise<string | undefined> {
+    if (file.size > DEDUP_HASH_MAX_SIZE || !window.crypto?.subtle) {
+      return undefined;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+  }
+
+  // Committed offset of a resumable upload, or null if it does not exist (anymore)
+  private async getUploadOffset(uploadId: string): Promise<number | null> {
+    try {
+      const data = await this.uploadRequest(`/${uploadId}`, {});
+      return data.upload.offset as number;
+    } catch (error) {
+      return null;
+    }
+  }
+
+  private async uploadRequest(path: string, init: RequestInit): Promise<any> {
+    const response = await fetch(`${API_BASE_URL}/uploads${path}`, init);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new UploadError(errorData.error || `HTTP ${response.status}: ${response.statusText}`, response.status);
+    }
+    return response.json();
+  }
+
   async checkServerHealth(): Promise<boolean> {
     try {
       const response = await fetch(`${API_BASE_URL.replace('/api', '')}/health`);
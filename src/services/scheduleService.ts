@@ -1,20 +1,40 @@
 // Rules applied
-import { ScheduledRingtone, ScheduleFormData } from '../types/schedule';
+import { ScheduledRingtone, ScheduleFormData, ScheduleSource } from '../types/schedule';
 import { AudioFile } from '../types/audio';
 import { ringtoneService } from './ringtoneService';
 
 const API_BASE_URL = 'http://localhost:5000';
 
+// Where schedules were kept before the server-side store; imported once, then removed
 const STORAGE_KEY = 'scheduledRingtones';
 
+// A schedule as the backend store returns it
+interface ScheduleRecord {
+  id: string;
+  ringtone_id: string;
+  ringtone_name: string;
+  ringtone_url: string | null;
+  ringtone_path: string | null;
+  ringtone_folder: string | null;
+  ringtone_filename: string | null;
+  time: string;
+  days: number[];
+  active: boolean;
+  source: ScheduleSource;
+  created_at: string;
+  last_played: string | null;
+  next_fire_at: number | null;
+}
+
 export class ScheduleService {
   private static instance: ScheduleService;
   private scheduledRingtones: ScheduledRingtone[] = [];
   private checkInterval: NodeJS.Timeout | null = null;
   private audioElement: HTMLAudioElement | null = null;
+  private loaded: Promise<void>;
 
   private constructor() {
-    this.loadFromStorage();
+    this.loaded = this.loadFromServer();
     this.startScheduleChecker();
   }
 
@@ -25,28 +45,113 @@ export class ScheduleService {
     return ScheduleService.instance;
   }
 
-  // Load scheduled ringtones from localStorage
-  private loadFromStorage(): void {
+  private static toRecord(schedule: ScheduledRingtone): Partial<ScheduleRecord> {
+    return {
+      id: schedule.id,
+      ringtone_id: schedule.ringtoneId,
+      ringtone_name: schedule.ringtoneName,
+      ringtone_url: schedule.ringtoneUrl,
+      ringtone_path: schedule.ringtoneFilePath,
+      ringtone_folder: schedule.ringtoneFolder,
+      ringtone_filename: schedule.ringtoneFilename,
+      time: schedule.time,
+      days: schedule.days,
+      active: schedule.isActive,
+      source: schedule.scheduleSource,
+      created_at: schedule.createdAt,
+      last_played: schedule.lastPlayed
+    };
+  }
+
+  private static fromRecord(record: ScheduleRecord): ScheduledRingtone {
+    return {
+      id: record.id,
+      ringtoneId: record.ringtone_id,
+      ringtoneName: record.ringtone_name,
+      ringtoneUrl: record.ringtone_url || '',
+      ringtoneFilePath: record.ringtone_path || undefined,
+      ringtoneFolder: record.ringtone_folder || undefined,
+      ringtoneFilename: record.ringtone_filename || undefined,
+      time: record.time,
+      days: record.days,
+      isActive: record.active,
+      scheduleSource: record.source,
+      createdAt: record.created_at,
+      lastPlayed: record.last_played || undefined,
+      nextFireAt: record.next_fire_at ?? undefined
+    };
+  }
+
+  // Send a request to the schedule store and return its JSON result
+  private async scheduleRequest(path: string, method: string, body?: unknown): Promise<any> {
+    const response = await fetch(`${API_BASE_URL}/api/schedules${path}`, {
+      method,
+      headers: body === undefined ? undefined : { 'Content-Type': 'application/json' },
+      body: body === undefined ? undefined : JSON.stringify(body)
+    });
+    const result = await response.json();
+    if (!response.ok || !result.success) {
+      throw new Error(result.error || `HTTP ${response.status}: ${response.statusText}`);
+    }
+    return result;
+  }
+
+  // Load the schedules from the backend store, importing this browser's old localStorage copy first
+  private async loadFromServer(): Promise<void> {
     try {
       const stored = localStorage.getItem(STORAGE_KEY);
       if (stored) {
-        this.scheduledRingtones = JSON.parse(stored);
-        console.log('📅 Loaded scheduled ringtones from storage:', this.scheduledRingtones.length);
+        const legacySchedules: ScheduledRingtone[] = JSON.parse(stored);
+        const result = await this.scheduleRequest('/import', 'POST', {
+          schedules: legacySchedules.map(schedule => ScheduleService.toRecord(schedule))
+        });
+        localStorage.removeItem(STORAGE_KEY);
+        console.log('📦 Imported schedules from localStorage:', result.imported, 'skipped:', result.skipped);
       }
+
+      const schedules: ScheduledRingtone[] = [];
+      let cursor: number | null = null;
+      do {
+        const result: { schedules: ScheduleRecord[]; next_cursor: number | null } =
+          await this.scheduleRequest(cursor === null ? '' : `?cursor=${cursor}`, 'GET');
+        schedules.push(...result.schedules.map(record => ScheduleService.fromRecord(record)));
+        cursor = result.next_cursor;
+      } while (cursor !== null);
+
+      this.scheduledRingtones = schedules;
+      console.log('📅 Loaded scheduled ringtones from the server:', schedules.length);
     } catch (error) {
-      console.error('❌ Error loading scheduled ringtones from storage:', error);
-      this.scheduledRingtones = [];
+      console.error('❌ Error loading scheduled ringtones from the server:', error);
     }
   }
 
-  // Save scheduled ringtones to localStorage
-  private saveToStorage(): void {
-    try {
-      localStorage.setItem(STORAGE_KEY, JSON.stringify(this.scheduledRingtones));
-      console.log('💾 Saved scheduled ringtones to storage');
-    } catch (error) {
-      console.error('❌ Error saving scheduled ringtones to storage:', error);
+  // Reload the schedules from the backend store (changes made on other devices included)
+  public async refreshSchedules(): Promise<ScheduledRingtone[]> {
+    await this.loaded;
+    this.loaded = this.loadFromServer();
+    await this.loaded;
+    return this.getAllSchedules();
+  }
+
+  // Folder and file name of a backend ringtone from its download or stream URL
+  private parseBackendRingtoneUrl(url: string): { folder: string; filename: string } {
+    const urlParts = new URL(url).pathname.split('/');
+    return {
+      folder: decodeURIComponent(urlParts[urlParts.length - 2]), // e.g., 'wav_ringtones' or 'mp3_ringtones'
+      filename: decodeURIComponent(urlParts[urlParts.length - 1]) // e.g., 'ringtone_20231201_120000_song.wav'
+    };
+  }
+
+  // Backend location of the ringtone a server alarm plays; local ringtones are saved first
+  private async getServerRingtoneLocation(ringtone: AudioFile): Promise<{ folder: string; filename: string }> {
+    if (ringtone.url.startsWith(`${API_BASE_URL}/api/ringtones/`)) {
+      return this.parseBackendRingtoneUrl(ringtone.url);
     }
+    const saveResult = await ringtoneService.saveRingtone(ringtone);
+    if (!saveResult.success) {
+      throw new Error(`Failed to save ringtone: ${saveResult.error || 'Unknown error'}`);
+    }
+    return { folder: saveResult.folder, filename: saveResult.filename };
   }
 
   // Create a new scheduled ringtone
@@ -56,14 +161,17 @@ export class ScheduleService {
       console.log('📋 Schedule data:', { ringtone: ringtone.name, time: formData.time, days: formData.days });
       
       let ringtoneFilePath: string;
+      let serverRingtone: { folder: string; filename: string } | undefined;
       
-      // Check if this is a backend ringtone (already has a file path)
-      if (ringtone.url.startsWith('http://localhost:5000/api/ringtones/')) {
+      if (formData.scheduleSource === 'server') {
+        // The backend alarm daemon plays the ringtone from its own folders
+        serverRingtone = await this.getServerRingtoneLocation(ringtone);
+        ringtoneFilePath = `${serverRingtone.folder}/${serverRingtone.filename}`;
+      } else if (ringtone.url.startsWith('http://localhost:5000/api/ringtones/')) {
+        // Check if this is a backend ringtone (already has a file path)
         console.log('📁 This is a backend ringtone, extracting file path from URL...');
         // Extract the file path from the URL
-        const urlParts = ringtone.url.split('/');
-        const folder = urlParts[urlParts.length - 2]; // e.g., 'wav_ringtones' or 'mp3_ringtones'
-        const filename = urlParts[urlParts.length - 1]; // e.g., 'ringtone_20231201_120000_song.wav'
+        const { folder, filename } = this.parseBackendRingtoneUrl(ringtone.url);
         
         // Prefer WAV format for scheduling (more reliable for Windows Task Scheduler)
         let preferredFolder = folder;
@@ -99,6 +207,8 @@ export class ScheduleService {
         ringtoneName: ringtone.name,
         ringtoneUrl: ringtone.url,
         ringtoneFilePath: ringtoneFilePath, // Store the actual file path
+        ringtoneFolder: serverRingtone?.folder,
+        ringtoneFilename: serverRingtone?.filename,
         time: formData.time,
         days: formData.days,
         isActive: true,
@@ -108,30 +218,24 @@ export class ScheduleService {
 
       console.log('📝 Created schedule object:', newSchedule);
 
-      // Create Windows Task Scheduler task only if schedule source is 'device'
       if (formData.scheduleSource === 'device') {
-        console.log('🔄 Schedule source is device, checking Windows Task Scheduler availability...');
-        const taskSchedulerAvailable = await this.isTaskSchedulerAvailable();
-        if (taskSchedulerAvailable) {
-          console.log('✅ Windows Task Scheduler is available, creating task...');
-          try {
-            await this.createWindowsTask(newSchedule);
-            console.log('✅ Windows Task Scheduler task created successfully');
-          } catch (taskError) {
-            console.warn('⚠️ Failed to create Windows Task Scheduler task, but continuing with local schedule:', taskError);
-          }
-        } else {
-          console.log('ℹ️ Windows Task Scheduler not available, creating local schedule only');
-        }
+        console.log('ℹ️ Schedule source is device, its Windows task is created by the task sync');
+      } else if (formData.scheduleSource === 'server') {
+        console.log('ℹ️ Schedule source is server, the backend alarm daemon will play it');
       } else {
         console.log('ℹ️ Schedule source is web, creating browser-based schedule only');
       }
 
-      this.scheduledRingtones.push(newSchedule);
-      this.saveToStorage();
+      const result = await this.scheduleRequest('', 'POST', ScheduleService.toRecord(newSchedule));
+      const savedSchedule = ScheduleService.fromRecord(result.schedule);
+      this.scheduledRingtones.push(savedSchedule);
       
-      console.log('✅ Created new schedule with Windows Task:', newSchedule);
-      return newSchedule;
+      if (savedSchedule.scheduleSource === 'device') {
+        await this.syncWindowsTasks();
+      }
+      
+      console.log('✅ Created new schedule with Windows Task:', savedSchedule);
+      return savedSchedule;
     } catch (error) {
       console.error('❌ Error creating schedule:', error);
       throw error;
@@ -158,7 +262,10 @@ export class ScheduleService {
       }
 
       this.scheduledRingtones[index] = { ...this.scheduledRingtones[index], ...updates };
-      this.saveToStorage();
+      const changes = ScheduleService.toRecord(this.scheduledRingtones[index]);
+      delete changes.id;
+      this.scheduleRequest(`/${encodeURIComponent(id)}`, 'PATCH', changes)
+        .catch(error => console.error('❌ Error saving schedule update:', error));
       
       console.log('✅ Updated schedule:', id);
       return true;
@@ -179,18 +286,17 @@ export class ScheduleService {
 
       const oldSchedule = this.scheduledRingtones[index];
       
-      // Delete old Windows task
-      await this.deleteWindowsTask(oldSchedule.id);
-      
       let ringtoneFilePath: string;
+      let serverRingtone: { folder: string; filename: string } | undefined;
       
-      // Check if this is a backend ringtone (already has a file path)
-      if (ringtone.url.startsWith('http://localhost:5000/api/ringtones/')) {
+      if (formData.scheduleSource === 'server') {
+        serverRingtone = await this.getServerRingtoneLocation(ringtone);
+        ringtoneFilePath = `${serverRingtone.folder}/${serverRingtone.filename}`;
+      } else if (ringtone.url.startsWith('http://localhost:5000/api/ringtones/')) {
+        // Check if this is a backend ringtone (already has a file path)
         console.log('📁 This is a backend ringtone, extracting file path from URL...');
         // Extract the file path from the URL
-        const urlParts = ringtone.url.split('/');
-        const folder = urlParts[urlParts.length - 2]; // e.g., 'wav_ringtones' or 'mp3_ringtones'
-        const filename = urlParts[urlParts.length - 1]; // e.g., 'ringtone_20231201_120000_song.wav'
+        const { folder, filename } = this.parseBackendRingtoneUrl(ringtone.url);
         
         // Prefer WAV format for scheduling (more reliable for Windows Task Scheduler)
         let preferredFolder = folder;
@@ -225,6 +331,8 @@ export class ScheduleService {
         ringtoneName: ringtone.name,
         ringtoneUrl: ringtone.url,
         ringtoneFilePath: ringtoneFilePath, // Store the actual file path
+        ringtoneFolder: serverRingtone?.folder,
+        ringtoneFilename: serverRingtone?.filename,
         time: formData.time,
         days: formData.days,
         scheduleSource: formData.scheduleSource // Update the scheduling method
@@ -232,13 +340,15 @@ export class ScheduleService {
 
       const updatedSchedule = { ...this.scheduledRingtones[index], ...updates };
       
-      // Create new Windows task only if schedule source is 'device'
-      if (formData.scheduleSource === 'device') {
-        await this.createWindowsTask(updatedSchedule);
+      const changes = ScheduleService.toRecord(updatedSchedule);
+      delete changes.id;
+      const result = await this.scheduleRequest(`/${encodeURIComponent(id)}`, 'PATCH', changes);
+      this.scheduledRingtones[index] = ScheduleService.fromRecord(result.schedule);
+      
+      // The sync replaces, creates or removes the Windows task as the schedule now requires
+      if (oldSchedule.scheduleSource === 'device' || formData.scheduleSource === 'device') {
+        await this.syncWindowsTasks();
       }
-
-      this.scheduledRingtones[index] = updatedSchedule;
-      this.saveToStorage();
       
       console.log('✅ Updated schedule with form data and Windows Task:', id);
       return true;
@@ -259,22 +369,18 @@ export class ScheduleService {
 
       const scheduleToDelete = this.scheduledRingtones[index];
 
-      // Try to delete Windows Task Scheduler task only for device-based schedules
-      if (scheduleToDelete.scheduleSource === 'device') {
-        try {
-          await this.deleteWindowsTask(id);
-          console.log('✅ Deleted Windows Task Scheduler task:', id);
-        } catch (taskError) {
-          console.warn('⚠️ Failed to delete Windows Task Scheduler task, but continuing with local deletion:', taskError);
-          // Continue with local deletion even if Windows task deletion fails
-        }
-      } else {
-        console.log('ℹ️ Web-based schedule, no Windows Task Scheduler task to delete');
+      // Already gone on the server (deleted from another device) is fine
+      try {
+        await this.scheduleRequest(`/${encodeURIComponent(id)}`, 'DELETE');
+      } catch (deleteError) {
+        console.warn('⚠️ Schedule was not deleted on the server:', deleteError);
       }
-
-      // Always delete from local storage
       this.scheduledRingtones.splice(index, 1);
-      this.saveToStorage();
+      
+      // Tasks of schedules no longer in the list are deleted by the sync
+      if (scheduleToDelete.scheduleSource === 'device') {
+        await this.syncWindowsTasks();
+      }
       
       console.log('✅ Deleted schedule:', id);
       return true;
@@ -295,27 +401,17 @@ export class ScheduleService {
 
       schedule.isActive = !schedule.isActive;
       
-      // Update Windows Task Scheduler task status only for device-based schedules
-      if (schedule.scheduleSource === 'device') {
-        const taskSchedulerAvailable = await this.isTaskSchedulerAvailable();
-        if (taskSchedulerAvailable) {
-          try {
-            if (schedule.isActive) {
-              await this.enableWindowsTask(id);
-            } else {
-              await this.disableWindowsTask(id);
-            }
-          } catch (taskError) {
-            console.warn('⚠️ Failed to update Windows Task Scheduler task, but continuing with local update:', taskError);
-          }
-        } else {
-          console.log('ℹ️ Windows Task Scheduler not available, updating local schedule only');
-        }
-      } else {
-        console.log('ℹ️ Web-based schedule, no Windows Task Scheduler interaction needed');
+      try {
+        const result = await this.scheduleRequest(`/${encodeURIComponent(id)}`, 'PATCH', { active: schedule.isActive });
+        Object.assign(schedule, ScheduleService.fromRecord(result.schedule));
+      } catch (saveError) {
+        schedule.isActive = !schedule.isActive;
+        throw saveError;
       }
       
-      this.saveToStorage();
+      if (schedule.scheduleSource === 'device') {
+        await this.syncWindowsTasks();
+      }
       
       console.log('✅ Toggled schedule and Windows Task:', id, 'Active:', schedule.isActive);
       return true;
@@ -351,7 +447,8 @@ export class ScheduleService {
       const currentTime = now.toTimeString().slice(0, 5); // "HH:MM" format
       const currentDay = now.getDay(); // 0 = Sunday, 1 = Monday, etc.
 
-      const activeSchedules = this.getActiveSchedules();
+      // Server alarms ring on the backend, browser open or not
+      const activeSchedules = this.getActiveSchedules().filter(schedule => schedule.scheduleSource !== 'server');
       
       for (const schedule of activeSchedules) {
         // Check if it's the right time and day
@@ -440,120 +537,60 @@ export class ScheduleService {
     }
   }
 
-  // Windows Task Scheduler integration methods
-  private async createWindowsTask(schedule: ScheduledRingtone): Promise<void> {
+  // Windows Task Scheduler integration: send every device schedule and let the backend apply the difference
+  // (one task per ringtone, with a trigger per time)
+  private async syncWindowsTasks(): Promise<void> {
     try {
-      // Use the file path if available, otherwise fall back to URL
-      const ringtonePath = schedule.ringtoneFilePath || schedule.ringtoneUrl;
-      
-      if (!schedule.ringtoneFilePath) {
-        console.warn('⚠️ No file path available for ringtone, using URL (may not work with Windows Task Scheduler)');
-      }
-      
-      console.log('🔧 Creating Windows Task with ringtone path:', ringtonePath);
-      console.log('🔧 Schedule object:', schedule);
-      
-      const response = await fetch(`${API_BASE_URL}/api/task-scheduler/create`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          task_name: schedule.id,
-          ringtone_path: ringtonePath,
-          time: schedule.time,
-          days: schedule.days
-        })
-      });
-
-      const result = await response.json();
-      if (!result.success) {
-        console.error('❌ Windows Task Scheduler API error:', result);
-        throw new Error(result.error || 'Failed to create Windows task');
+      const taskSchedulerAvailable = await this.isTaskSchedulerAvailable();
+      if (!taskSchedulerAvailable) {
+        console.log('ℹ️ Windows Task Scheduler not available, keeping schedules only');
+        return;
       }
 
-      console.log('✅ Created Windows Task Scheduler task:', schedule.id);
-    } catch (error) {
-      console.error('❌ Error creating Windows task:', error);
-      throw error;
-    }
-  }
-
-  private async deleteWindowsTask(taskId: string): Promise<void> {
-    try {
-      console.log('🔄 Attempting to delete Windows Task Scheduler task:', taskId);
-      
-      const response = await fetch(`${API_BASE_URL}/api/task-scheduler/delete`, {
+      const schedules = this.scheduledRingtones
+        .filter(schedule => schedule.scheduleSource === 'device')
+        .map(schedule => {
+          if (!schedule.ringtoneFilePath) {
+            console.warn('⚠️ No file path available for ringtone, using URL (may not work with Windows Task Scheduler)');
+          }
+          return {
+            id: schedule.id,
+            ringtone_path: schedule.ringtoneFilePath || schedule.ringtoneUrl,
+            time: schedule.time,
+            days: schedule.days,
+            active: schedule.isActive
+          };
+        });
+
+      const response = await fetch(`${API_BASE_URL}/api/task-scheduler/sync`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          task_name: taskId
-        })
+        body: JSON.stringify({ schedules })
       });
 
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-
       const result = await response.json();
-      if (!result.success) {
-        throw new Error(result.error || 'Failed to delete Windows task');
+      if (!response.ok) {
+        throw new Error(result.error || `HTTP ${response.status}: ${response.statusText}`);
       }
-
-      console.log('✅ Deleted Windows Task Scheduler task:', taskId);
-    } catch (error) {
-      console.error('❌ Error deleting Windows task:', error);
-      throw error;
-    }
-  }
-
-  private async enableWindowsTask(taskId: string): Promise<void> {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/task-scheduler/enable`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          task_name: taskId
-        })
-      });
-
-      const result = await response.json();
       if (!result.success) {
-        throw new Error(result.error || 'Failed to enable Windows task');
+        // Failed tasks are retried by the next sync, which diffs against the real tasks again
+        console.warn('⚠️ Some Windows tasks could not be changed:', result.failed, result.missing);
       }
 
-      console.log('✅ Enabled Windows Task Scheduler task:', taskId);
-    } catch (error) {
-      console.error('❌ Error enabling Windows task:', error);
-      throw error;
-    }
-  }
-
-  private async disableWindowsTask(taskId: string): Promise<void> {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/task-scheduler/disable`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          task_name: taskId
-        })
+      console.log('✅ Synced Windows Task Scheduler tasks:', {
+        schedules: result.schedules,
+        tasks: result.tasks,
+        created: result.create.length,
+        updated: result.update.length,
+        enabled: result.enable.length,
+        deleted: result.delete.length,
+        unchanged: result.unchanged,
+        processes: result.spawns
       });
-
-      const result = await response.json();
-      if (!result.success) {
-        throw new Error(result.error || 'Failed to disable Windows task');
-      }
-
-      console.log('✅ Disabled Windows Task Scheduler task:', taskId);
     } catch (error) {
-      console.error('❌ Error disabling Windows task:', error);
-      throw error;
+      console.warn('⚠️ Failed to sync Windows Task Scheduler tasks, keeping schedules only:', error);
     }
   }
 
@@ -570,9 +607,7 @@ export class ScheduleService {
           if (ringtone.url.startsWith('http://localhost:5000/api/ringtones/')) {
             console.log('📁 This is a backend ringtone, extracting file path from URL...');
             // Extract the file path from the URL
-            const urlParts = ringtone.url.split('/');
-            const folder = urlParts[urlParts.length - 2]; // e.g., 'wav_ringtones' or 'mp3_ringtones'
-            const filename = urlParts[urlParts.length - 1]; // e.g., 'ringtone_20231201_120000_song.wav'
+            const { folder, filename } = this.parseBackendRingtoneUrl(ringtone.url);
             
             // Construct the file path
             ringtoneFilePath = `C:\\devops\\schedule_ringtone\\ringtones\\${folder}\\${filename}`;
@@ -4,7 +4,7 @@ export interface AudioFile {
   name: string;
   url: string;
   duration: number;
-  file: File;
+  file?: File; // Only set for files picked in the browser; ringtones live on the backend
   type: 'original' | 'ringtone';
   startTime?: number;
   endTime?: number;
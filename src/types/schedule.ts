@@ -1,23 +1,29 @@
 // Rules applied
+// 'web' for browser-based, 'device' for Windows Task Scheduler, 'server' for the backend alarm daemon
+export type ScheduleSource = 'web' | 'device' | 'server';
+
 export interface ScheduledRingtone {
   id: string;
   ringtoneId: string;
   ringtoneName: string;
   ringtoneUrl: string;
   ringtoneFilePath?: string; // Actual file path on the filesystem for Windows Task Scheduler
+  ringtoneFolder?: string; // Backend folder and file name of the ringtone a server alarm plays
+  ringtoneFilename?: string;
   time: string; // Format: "HH:MM" (24-hour format)
   days: number[]; // Array of day numbers (0 = Sunday, 1 = Monday, ..., 6 = Saturday)
   isActive: boolean;
-  scheduleSource: 'web' | 'device'; // How the schedule is managed
+  scheduleSource: ScheduleSource; // How the schedule is managed
   createdAt: string;
   lastPlayed?: string;
+  nextFireAt?: number; // Epoch seconds of the next occurrence, computed by the server
 }
 
 export interface ScheduleFormData {
   ringtoneId: string;
   time: string;
   days: number[];
-  scheduleSource: 'web' | 'device'; // 'web' for browser-based, 'device' for Windows Task Scheduler
+  scheduleSource: ScheduleSource;
 }
 
 export const DAYS_OF_WEEK = [